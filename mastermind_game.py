@@ -6,9 +6,12 @@
     Create the Game Driver of the Mastermind game.
 """
 
-from mastermind_game_model import GameModel
+from mastermind_game_model import GameModel, score_guess
 from mastermind_game_view import Board
 from mastermind_game_controller import Controller
+from mastermind_game_leaderboard import PersistenceWorker
+from mastermind_game_recorder import open_recorder
+from mastermind_game_snapshot import SNAPSHOT_FILENAME
 
 
 def count_bulls_and_cows(secret_code, guess):
@@ -24,32 +27,8 @@ def count_bulls_and_cows(secret_code, guess):
         A 2-tuple containing the number of bulls and cows
     """
 
-    if not (isinstance(secret_code, list) and isinstance(guess, list)):
-        raise TypeError("Color code and color guess must be lists!")
-
-    elif len(secret_code) != len(guess):
-        raise ValueError("The length of color code and color guess must be equal!")
-
-    else:
-        bull_num, cow_num = 0, 0
-        code_copy, guess_copy = secret_code[:], guess[:]
-
-        # count the correct guess in correct position
-        for i in range(len(guess)):
-            if guess[i] == secret_code[i]:
-                bull_num += 1
-                # remove the bulls already counted
-                guess_copy.remove(guess[i])
-                code_copy.remove(secret_code[i])
-
-        # count the correct guess in incorrect position
-        for each in guess_copy:
-            if each in code_copy:
-                cow_num += 1
-                # remove the cows already counted
-                code_copy.remove(each)
-
-    return bull_num, cow_num
+    # the model scores through the shared score table when it can
+    return score_guess(secret_code, guess)
 
 
 def start_game():
@@ -61,18 +40,33 @@ def start_game():
     Return: nothing
     """
 
-    # initialize the GameModel        
-    model = GameModel()
-    model.create_code()
-
     # create a Board
     board = Board()
 
-    # initialize the Controller
-    controller = Controller(model, board.ask_player())
-    controller.reset_guess()
-
-    # initialize the Board
+    # resume the game in progress when the game last stopped,
+    # or initialize the GameModel and the Controller of a new game
+    controller = Controller()
+    try:
+        resumed = controller.load_snapshot()
+    # a damaged snapshot starts a new game
+    except ValueError:
+        resumed = False
+    if not resumed:
+        model = GameModel()
+        model.create_code()
+        controller = Controller(model, board.ask_player())
+        controller.reset_guess()
+    # load and save the leaderboard off the window's event thread
+    controller.add_worker(PersistenceWorker())
+    # count every finished game's score for the median and percentile
+    controller.set_score_tracking(True)
+    # record every game event of the session in a log of this game's own,
+    # written when each game ends and when the game quits
+    controller.add_recorder(open_recorder())
+    # save the game in progress when the game quits or the window closes
+    controller.set_snapshot_file(SNAPSHOT_FILENAME)
+
+    # initialize the Board, with the rounds of a resumed game
     board.add_controller(controller)
     board.initialize_board()
     board.operate_board_objects()
@@ -91,6 +85,8 @@ def main():
     4. Allows player to play multiple rounds of the game without quitting.
     5. Player can either click the Marble to make a guess, or drag the Marble to
     the guessing position.   
+    6. The game in progress is saved when the player quits or closes the
+    window, and resumed when the game starts again.
     """
 
     start_game()
@@ -0,0 +1,377 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Game Analytics
+    Aggregate the recorded Mastermind game sessions in one streaming pass:
+    player averages, score distributions and first-guess effectiveness.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from mastermind_game_sessions import SessionLog
+from mastermind_game_database import format_game_config
+from mastermind_game_sketch import ScoreSketch
+
+
+class GameStats:
+    """
+    A class that aggregates finished games, one at a time: the games,
+    wins and guesses of each player, the ScoreSketch of each game
+    configuration, and the games, wins, guesses and first feedback of
+    each first guess of a configuration. Its size depends on the players,
+    configurations and guesses, not on the games, and two GameStats
+    merge by adding their counts.
+    Attributes: name(str), players(dict), sketches(dict), first_guesses(dict)
+    Methods: __init__, add, add_games, merge, game_num, player_average,
+             top_players, get_sketch, first_guess_table, format_report,
+             __str__, __eq__
+    """
+
+    def __init__(self):
+        """
+        Method: __init__
+            Create an instance of GameStats, without games.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.name = "Game Stats"
+        # dictionary: key = player, value = [games, wins, guesses of the wins]
+        self.players = {}
+        # dictionary: key = configuration, value = ScoreSketch
+        self.sketches = {}
+        # dictionary: key = (configuration, first guess joined by ","),
+        # value = [games, wins, guesses of the wins, first bulls and cows]
+        self.first_guesses = {}
+
+    def add(self, game):
+        """
+        Method: add
+            Count a finished game.
+        Parameter:
+            game (dict) -- the game, as from iter_games
+        Return: nothing
+        """
+
+        won = game["status"] == "win"
+        counts = self.players.setdefault(game["player"], [0, 0, 0])
+        counts[0] += 1
+        if won:
+            counts[1] += 1
+            counts[2] += game["score"]
+
+        self.sketches.setdefault(game["config"], ScoreSketch()).add(
+            game["score"], game["status"])
+
+        counts = self.first_guesses.setdefault(
+            (game["config"], ",".join(game["first_guess"])), [0, 0, 0, 0])
+        counts[0] += 1
+        if won:
+            counts[1] += 1
+            counts[2] += game["score"]
+        counts[3] += game["first_bull_num"] + game["first_cow_num"]
+
+    def add_games(self, games):
+        """
+        Method: add_games
+            Count the games of an iterable, one at a time, so a generator
+            of games is never held in memory.
+        Parameter:
+            games (iterable of dict) -- the games, as from iter_games
+        Return:
+            The GameStats itself
+        """
+
+        for game in games:
+            self.add(game)
+        return self
+
+    def merge(self, other):
+        """
+        Method: merge
+            Add the counts of another GameStats, e.g. of another shard.
+        Parameter:
+            other (GameStats) -- the GameStats to merge
+        Return:
+            The GameStats itself
+        """
+
+        if not isinstance(other, GameStats):
+            raise TypeError("Argument must be of GameStats class!")
+
+        for table, other_table in [(self.players, other.players),
+                                   (self.first_guesses, other.first_guesses)]:
+            for key, other_counts in other_table.items():
+                counts = table.setdefault(key, [0] * len(other_counts))
+                for i in range(len(counts)):
+                    counts[i] += other_counts[i]
+        for config, sketch in other.sketches.items():
+            self.sketches.setdefault(config, ScoreSketch()).merge(sketch)
+        return self
+
+    def game_num(self):
+        """
+        Method: game_num
+            Get the number of finished games counted.
+        Parameter: nothing
+        Return:
+            An integer representing the number of games
+        """
+
+        return sum(counts[0] for counts in self.players.values())
+
+    def player_average(self, player):
+        """
+        Method: player_average
+            Get the average guesses of a player's won games.
+        Parameter:
+            player (str) -- the player's name
+        Return:
+            A float representing the average, or None if the player never won
+        """
+
+        game_num, win_num, score_sum = self.players.get(player, [0, 0, 0])
+        return score_sum / win_num if win_num > 0 else None
+
+    def top_players(self, limit, min_games = 1):
+        """
+        Method: top_players
+            Get the players with the fewest average guesses, for a
+            leaderboard of every recorded game.
+        Parameters:
+            limit (int) -- the number of players
+            min_games (int) -- the fewest won games of a player listed
+        Return:
+            A list of [player, average] records, best first; on a tie,
+            the player with more wins goes first
+        """
+
+        if not (isinstance(limit, int) and isinstance(min_games, int)):
+            raise TypeError("Limit and min games must be integers!")
+
+        records = [[player, score_sum / win_num, win_num]
+                   for player, (game_num, win_num, score_sum)
+                   in self.players.items()
+                   if win_num >= max(min_games, 1)]
+        records.sort(key=lambda record: (record[1], -record[2], record[0]))
+        return [record[:2] for record in records[:limit]]
+
+    def get_sketch(self, config):
+        """
+        Method: get_sketch
+            Get the score distribution of a configuration.
+        Parameter:
+            config (str) -- the game configuration, as from get_game_config
+        Return:
+            A ScoreSketch, without games if the configuration has none
+        """
+
+        return self.sketches.get(config, ScoreSketch())
+
+    def first_guess_table(self, config):
+        """
+        Method: first_guess_table
+            Get how well each first guess of a configuration did.
+        Parameter:
+            config (str) -- the game configuration, as from get_game_config
+        Return:
+            A list of [first guess (list of str), games, win rate, average
+            guesses of the wins or None, average first bulls and cows],
+            the highest win rate first, then the fewest guesses
+        """
+
+        table = []
+        for (guess_config, guess), (game_num, win_num, score_sum, feedback_sum) \
+                in self.first_guesses.items():
+            if guess_config == config:
+                table.append([guess.split(","), game_num, win_num / game_num,
+                              score_sum / win_num if win_num > 0 else None,
+                              feedback_sum / game_num])
+        table.sort(key=lambda row: (-row[2], float("inf") if row[3] is None
+                                    else row[3], row[0]))
+        return table
+
+    def format_report(self, limit = 5):
+        """
+        Method: format_report
+            Format the games, the top players, and for each configuration
+            the score distribution and the best first guesses.
+        Parameter:
+            limit (int) -- the players and first guesses listed
+        Return:
+            A string of report lines
+        """
+
+        lines = ["Games: {}\tPlayers: {}".format(self.game_num(),
+                                                 len(self.players))]
+        for player, average in self.top_players(limit):
+            lines.append("{}: {:.2f} guesses".format(player, average))
+        for config in sorted(self.sketches):
+            sketch = self.sketches[config]
+            lines.append("{}\tGames: {}\tWon: {}\tMedian: {}".format(
+                config, sketch.game_num(), sketch.win_num(), sketch.median()))
+            for guess, game_num, win_rate, average, feedback in \
+                    self.first_guess_table(config)[:limit]:
+                lines.append("{}\tGames: {}\tWon: {:.2%}\tGuesses: {}\t"
+                             "First feedback: {:.2f}".format(
+                                 ",".join(guess), game_num, win_rate,
+                                 "-" if average is None else
+                                 "{:.2f}".format(average), feedback))
+
+        return "\n".join(lines) + "\n"
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of GameStats instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tGames: {}\tPlayers: {}".format(self.name, self.game_num(),
+                                                   len(self.players))
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current GameStats instance to another one.
+            Two instances are equal if they counted the same games.
+        Parameter:
+            other (GameStats) -- another instance of GameStats
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, GameStats) and \
+               self.players == other.players and \
+               self.sketches == other.sketches and \
+               self.first_guesses == other.first_guesses
+
+
+def iter_games(records):
+    """
+    Function: iter_games
+        Assemble the finished games from the records of a session log,
+        as they are decoded. Only the sessions of the recorder that wrote
+        the last open record are kept, so memory does not grow with the log.
+    Parameter:
+        records (iterable) -- the records, as from decode_records
+    Return:
+        A generator of game dicts: player, config (as from get_game_config),
+        score, status, first_guess (list of str), first_bull_num and
+        first_cow_num
+    """
+
+    palette = []
+    # dictionary: key = session, value = [player, config, score,
+    # first guess, first bulls, first cows] of the session's current game
+    sessions = {}
+    for offset, kind, record_time, session, values in records:
+        if kind == "open":
+            sessions = {}
+        elif kind == "palette":
+            palette = values[0]
+        elif kind == "create":
+            player, max_guess, code = values
+            sessions[session] = [player, format_game_config(
+                palette, len(code), max_guess), 0, None, 0, 0]
+        elif kind == "restart" and session in sessions:
+            sessions[session][2:] = [0, None, 0, 0]
+        elif kind == "round" and session in sessions:
+            guess, bull_num, cow_num, status = values
+            game = sessions[session]
+            game[2] += 1
+            if game[3] is None:
+                game[3:] = [guess, bull_num, cow_num]
+            if status != "running":
+                yield {"player": game[0], "config": game[1], "score": game[2],
+                       "status": status, "first_guess": game[3],
+                       "first_bull_num": game[4], "first_cow_num": game[5]}
+
+
+def analyze_log(filename):
+    """
+    Function: analyze_log
+        Aggregate the finished games of a session log in one pass,
+        reading the log through mmap.
+    Parameter:
+        filename (str) -- the session log filename
+    Return:
+        A GameStats
+    """
+
+    log = SessionLog(filename)
+    try:
+        return GameStats().add_games(iter_games(log.records()))
+    finally:
+        log.close()
+
+
+def analyze_logs(filenames, worker_num = 1):
+    """
+    Function: analyze_logs
+        Aggregate the finished games of many session logs, e.g. one log per
+        game process, each log a shard analyzed by a worker process, then
+        merge the shards' GameStats.
+    Parameters:
+        filenames (list of str) -- the session log filenames
+        worker_num (int) -- the number of worker processes,
+                            1 to analyze the logs here
+    Return:
+        A GameStats
+    """
+
+    if not (isinstance(filenames, list) and isinstance(worker_num, int)):
+        raise TypeError("Filenames and worker number must be list and int!")
+    elif worker_num < 1:
+        raise ValueError("Worker number must be positive!")
+
+    stats = GameStats()
+    if worker_num == 1 or len(filenames) < 2:
+        for filename in filenames:
+            stats.merge(analyze_log(filename))
+    else:
+        with ProcessPoolExecutor(min(worker_num, len(filenames))) as executor:
+            for shard_stats in executor.map(analyze_log, filenames):
+                stats.merge(shard_stats)
+    return stats
+
+
+def parse_arguments(args = None):
+    """
+    Function: parse_arguments
+        Parse the command-line arguments of the analytics report.
+    Parameter:
+        args (list of str) -- the arguments, sys.argv if not given
+    Return:
+        An argparse.Namespace
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Report on recorded Mastermind game sessions.")
+    parser.add_argument("logs", nargs="+", help="session log files")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of worker processes")
+    parser.add_argument("-n", "--limit", type=int, default=5,
+                        help="players and first guesses listed")
+    return parser.parse_args(args)
+
+
+def main(args = None):
+    """
+    Function: main
+        Print the report of session logs from the command line.
+    Parameter:
+        args (list of str) -- the arguments, sys.argv if not given
+    Return: nothing
+    """
+
+    arguments = parse_arguments(args)
+    stats = analyze_logs(arguments.logs, arguments.workers)
+    print(stats.format_report(arguments.limit), end="")
+
+
+if __name__ == "__main__":
+    main()
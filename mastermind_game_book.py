@@ -0,0 +1,240 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Opening Book
+    Precompute and store the first guesses of the Mastermind game solvers.
+"""
+
+import mmap
+import struct
+from mastermind_game_solver import Solver
+from mastermind_game_leaderboard import write_atomic
+
+BOOK_FILENAME = "opening_book.bin"
+BOOK_MAGIC = b"MMBK"
+BOOK_VERSION = 1
+BOOK_DEPTH_LIMIT = 3  # the most guesses stored for one path
+
+# header: magic, version, code length, depth, number of entries, config digest
+BOOK_HEADER = struct.Struct("<4sHHHI20s")
+# entry: feedback path key, encoded guess
+BOOK_ENTRY = struct.Struct("<II")
+
+
+class OpeningBook:
+    """
+    A class that stores the best guesses of a Solver for the first feedback
+    branches of a game configuration, in a compact binary file that is read
+    through mmap: the entries are sorted by feedback path and looked up by
+    binary search, so nothing is decoded before it is needed.
+    Attributes: name(str), filename(str), length(int), depth(int),
+                digest(bytes), entry_num(int), data(mmap)
+    Methods: __init__, path_key, find, close, __len__, __str__, __eq__
+    """
+
+    def __init__(self, filename = BOOK_FILENAME):
+        """
+        Method: __init__
+            Open an OpeningBook file.
+        Parameter:
+            filename (str) -- the opening book filename
+        Return: nothing
+        """
+
+        if not isinstance(filename, str):
+            raise TypeError("Filename must be a string!")
+
+        self.name = "Opening Book"
+        self.filename = filename
+
+        with open(filename, "rb") as infile:
+            self.data = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.data) < BOOK_HEADER.size:
+            self.close()
+            raise ValueError("The opening book file is truncated!")
+
+        magic, version, self.length, self.depth, self.entry_num, self.digest = \
+            BOOK_HEADER.unpack_from(self.data, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION or \
+                len(self.data) != BOOK_HEADER.size + \
+                self.entry_num * BOOK_ENTRY.size:
+            self.close()
+            raise ValueError("The file is not a valid opening book!")
+
+    def path_key(self, feedback):
+        """
+        Method: path_key
+            Get the key of a feedback path: the packed scores + 1 read as
+            digits of one number, so paths of every depth have distinct keys.
+        Parameter:
+            feedback (list of tuple) -- the (bull_num, cow_num) of each guess
+        Return:
+            An integer representing the path
+        """
+
+        base = (self.length + 1) ** 2 + 1
+        key = 0
+        for bull_num, cow_num in feedback:
+            key = key * base + bull_num * (self.length + 1) + cow_num + 1
+        return key
+
+    def find(self, feedback):
+        """
+        Method: find
+            Look up the guess of the book after a feedback path.
+        Parameter:
+            feedback (list of tuple) -- the (bull_num, cow_num) of each guess
+                                        played from the book so far
+        Return:
+            An integer representing the encoded guess,
+            or None if the path is not in the book
+        """
+
+        if len(feedback) >= self.depth:
+            return None
+
+        key = self.path_key(feedback)
+        low, high = 0, self.entry_num
+        while low < high:
+            middle = (low + high) // 2
+            middle_key, guess_index = BOOK_ENTRY.unpack_from(
+                self.data, BOOK_HEADER.size + middle * BOOK_ENTRY.size)
+            if middle_key == key:
+                return guess_index
+            elif middle_key < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return None
+
+    def close(self):
+        """
+        Method: close
+            Close the mmap of the book file.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.data.close()
+
+    def __len__(self):
+        """
+        Method: __len__
+            Get the number of guesses in the book.
+        Parameter: nothing
+        Return:
+            An integer representing the number of entries
+        """
+
+        return self.entry_num
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of OpeningBook instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tDepth: {}\tEntries: {}".format(self.name, self.depth,
+                                                   self.entry_num)
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current OpeningBook instance to another one.
+            Two instances are equal if they store the same configuration
+            to the same depth.
+        Parameter:
+            other (OpeningBook) -- another instance of OpeningBook
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, OpeningBook) and self.digest == other.digest \
+               and self.depth == other.depth
+
+
+def build_opening_book(solver, depth = 2, filename = BOOK_FILENAME):
+    """
+    Function: build_opening_book
+        Precompute the guesses of a Solver for every feedback path shorter
+        than depth, and save them to a book file. The file is written to
+        a temporary file first, then renamed over the old book.
+    Parameters:
+        solver (Solver) -- the Solver whose guesses are stored
+        depth (int) -- the number of guesses stored for each path
+        filename (str) -- the opening book filename
+    Return: nothing
+    """
+
+    if not (isinstance(solver, Solver) and isinstance(depth, int) and
+            isinstance(filename, str)):
+        raise TypeError("Book arguments must be Solver, int and str!")
+    elif not 0 < depth <= BOOK_DEPTH_LIMIT:
+        raise ValueError("Book depth must be between 1 and " +
+                         str(BOOK_DEPTH_LIMIT) + "!")
+    elif len(solver.codes) > 2 ** 32:
+        raise ValueError("The code space is too large for an opening book!")
+
+    base = (solver.length + 1) ** 2 + 1
+    entries = []
+    # stack of (feedback path, path key, candidates after the path,
+    # guess history of the path)
+    paths = [([], 0, solver.codes, [])]
+    while paths:
+        feedback, key, candidates, history = paths.pop()
+        solver.candidates, solver.history = candidates, history
+        guess = solver.choose_guess() if len(candidates) > 1 else \
+            solver.codes.decode(candidates.codes[0])
+        entries.append((key, solver.codes.encode(guess)))
+
+        if len(feedback) + 1 < depth and len(candidates) > 1:
+            scores = candidates.score(guess)
+            for value in solver.score_values:
+                # no branch for a win or for a feedback nobody gets
+                bull_num, cow_num = divmod(value, solver.length + 1)
+                if bull_num < solver.length and value in scores:
+                    paths.append((feedback + [(bull_num, cow_num)],
+                                  key * base + value + 1,
+                                  candidates.filter(guess, bull_num, cow_num),
+                                  history + [(guess, bull_num, cow_num)]))
+    solver.reset()
+
+    entries.sort()
+    data = [BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, solver.length, depth,
+                             len(entries), solver.get_digest())]
+    data += [BOOK_ENTRY.pack(*entry) for entry in entries]
+    write_atomic(filename, b"".join(data))
+
+
+def load_opening_book(solver, depth = 2, filename = BOOK_FILENAME):
+    """
+    Function: load_opening_book
+        Open the opening book of a Solver's configuration and strategy.
+        If the file doesn't exist, is damaged, or stores another configuration
+        or a smaller depth, a new book is built first.
+    Parameters:
+        solver (Solver) -- the Solver of the book
+        depth (int) -- the number of guesses stored for each path
+        filename (str) -- the opening book filename
+    Return:
+        An OpeningBook
+    """
+
+    try:
+        book = OpeningBook(filename)
+        if book.digest == solver.get_digest() and book.depth >= depth:
+            return book
+        book.close()
+
+    # no book yet, or a damaged book: build it again
+    except (FileNotFoundError, ValueError):
+        pass
+
+    build_opening_book(solver, depth, filename)
+    return OpeningBook(filename)
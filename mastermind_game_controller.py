@@ -7,6 +7,17 @@
 """
 
 from mastermind_game_model import GameModel
+from mastermind_game_leaderboard import Leaderboard, LeaderboardJournal, \
+    SharedLeaderboard, PersistenceWorker, TOP_LEADERS_NUM, write_records, \
+    LeaderboardShards, write_atomic, save_records, get_file_fingerprint
+from mastermind_game_database import LeaderboardDatabase, get_game_config
+from mastermind_game_persistence import FilePersistence, JournalPersistence, \
+    WorkerPersistence, DatabasePersistence
+from mastermind_game_sketch import ScoreSketch, SKETCH_SUFFIX, read_sketch, \
+    merge_sketch_file
+from mastermind_game_recorder import SessionRecorder
+from mastermind_game_snapshot import SNAPSHOT_FILENAME, encode_snapshot, \
+    write_snapshot, load_snapshot
 
 LEADERBOARD_FILENAME = "leaderboard.txt"
 
@@ -16,21 +27,43 @@ class Controller:
     A class that controls the Mastermind Game process:
     takes user inputs and tells the GameModel what to do;
     tells the Board what to display.
-    Attributes: name(str), player(str), model(GameModel), current_guess(list of str),
-                current_round(int), game_status(str)
-    Methods: __init__, add_model, reset_guess, add_guess, validate_filename,
-            load_leaderboard_file, save_leaderboard_file, create_top_leaders_list,
-            update_round, get_bulls_and_cows, get_current_guess_index, restart, 
-            __str__, __eq__
+    The leaderboard is kept by one persistence object, chosen by the
+    journal, database and worker added.
+    Attributes: name(str), player(str), model(GameModel),
+                current_guess(list of str), current_round(int),
+                game_status(str), leader_num(int), leaderboard(Leaderboard),
+                leaders_filename(str), leaders_config(str),
+                journal(LeaderboardJournal), database(LeaderboardDatabase),
+                worker(PersistenceWorker), persistence(FilePersistence),
+                leaders_requested(str), pending_wins(list),
+                leaders_fingerprint(tuple), check_requested(bool),
+                shards(LeaderboardShards), track_scores(bool),
+                sketch(ScoreSketch), sketch_filename(str),
+                sketch_requests(list of str), recorder(SessionRecorder),
+                session(int), snapshot_filename(str)
+    Methods: __init__, add_model, add_recorder, record_game, add_journal,
+             add_database, add_worker, select_persistence, set_snapshot_file,
+             save_snapshot, load_snapshot, add_shards, get_shard_filename,
+             set_score_tracking, get_sketch_filename, get_sketch,
+             record_score, get_score_summary, uses_worker,
+             request_leaderboard, read_leaderboard, save_in_background,
+             apply_pending_wins, poll_worker, close, get_leaders_fingerprint,
+             check_leaderboard, get_leaders_version, reset_guess, add_guess,
+             validate_filename, load_leaderboard_file, get_leaderboard,
+             get_leaders_config, get_leaders, save_leaderboard_file,
+             create_top_leaders_list, update_game, update_round,
+             get_bulls_and_cows, get_current_guess_index, restart,
+             __str__, __eq__
     """
 
-    def __init__(self, model = None, player = ""):
+    def __init__(self, model = None, player = "", leader_num = TOP_LEADERS_NUM):
         """
         Method: __init__
             Create an instance of Controller.
         Parameters:
             model (GameModel) -- the GameModel of MasterMind game
             player (str) -- the player's name
+            leader_num (int) -- the number of leaders kept on the leaderboard
         Return: nothing
         """
 
@@ -38,6 +71,10 @@ class Controller:
                 (player != "" and not isinstance(player, str)):
             raise TypeError("Model and player arguments must be " +
                             "GameModel class and str type!")
+        elif not isinstance(leader_num, int):
+            raise TypeError("Leader number must be an integer!")
+        elif leader_num <= 0:
+            raise ValueError("Leader number must be positive!")
 
         self.name = "MasterMind Game Controller"
         self.player = player
@@ -45,6 +82,55 @@ class Controller:
         self.current_guess = []
         self.current_round = 1
         self.game_status = "running"
+        self.leader_num = leader_num
+
+        # the in-memory leaderboard, and the file it was loaded from
+        # None until the leaderboard is first needed
+        self.leaderboard = None
+        self.leaders_filename = None
+        # the game configuration of the in-memory leaderboard,
+        # with a database, whose leaderboards are per configuration
+        self.leaders_config = None
+        # the journal the wins are appended to, None to rewrite the file
+        self.journal = None
+        # the database every finished game is recorded in, None to use files
+        self.database = None
+
+        # the background thread of the leaderboard file, None to use it here
+        self.worker = None
+        # the storage of the leaderboard, chosen by select_persistence
+        self.persistence = FilePersistence(self)
+        # the leaderboard file being loaded in the background, or None
+        self.leaders_requested = None
+        # the wins waiting for the leaderboard to be loaded:
+        # list of [player, score, outfile name]
+        self.pending_wins = []
+
+        # the fingerprint of the leaderboard storage when last read or written
+        self.leaders_fingerprint = None
+        # whether the worker is checking the leaderboard file
+        self.check_requested = False
+
+        # the leaderboard files of each game configuration,
+        # None to use the leaderboard filename given
+        self.shards = None
+
+        # whether every finished game's score is counted in a score sketch
+        self.track_scores = False
+        # the in-memory score sketch, and the file it was read from
+        self.sketch = None
+        self.sketch_filename = None
+        # the sketch files of the worker's sketch tasks, oldest first
+        self.sketch_requests = []
+
+        # the log every game event is recorded in, None to record nothing,
+        # and the session number of the current game in it
+        self.recorder = None
+        self.session = None
+
+        # the file the game in progress is saved in when the game stops,
+        # None not to save it
+        self.snapshot_filename = None
 
     def add_model(self, model):
         """
@@ -59,6 +145,541 @@ class Controller:
             raise TypeError("Model must be of GameModel class!")
 
         self.model = model
+        if self.recorder is not None:
+            self.record_game()
+
+    def add_recorder(self, recorder):
+        """
+        Method: add_recorder
+            Let the Controller record every game event in a session log:
+            the game's creation with its secret code, each guess added,
+            each round played and each restart. The current game starts
+            a session at once, a model added later starts a new one.
+        Parameter:
+            recorder (SessionRecorder) -- the recorder, or None to detach it
+        Return: nothing
+        """
+
+        if recorder is not None and not isinstance(recorder, SessionRecorder):
+            raise TypeError("Argument must be of SessionRecorder class!")
+
+        self.recorder = recorder
+        self.session = None
+        if recorder is not None:
+            recorder.add_worker(self.worker)
+            if self.model is not None:
+                self.record_game()
+
+    def record_game(self):
+        """
+        Method: record_game
+            Start a session of the current game in the session log: its
+            creation, and the rounds already played, e.g. of a restored game.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.session = self.recorder.record_create(self.player, self.model)
+        for round_num, (guess, bull_num, cow_num) in \
+                enumerate(self.model.history, 1):
+            status = "running" if round_num < len(self.model.history) \
+                else self.game_status
+            self.recorder.record_round(self.session, guess, bull_num, cow_num,
+                                       status)
+
+    def add_journal(self, journal):
+        """
+        Method: add_journal
+            Let the Controller append the wins to a leaderboard journal,
+            instead of rewriting the leaderboard file.
+        Parameter:
+            journal (LeaderboardJournal) -- the journal of the leaderboard
+                                            file, or None to detach it
+        Return: nothing
+        """
+
+        if journal is not None:
+            if not isinstance(journal, LeaderboardJournal):
+                raise TypeError("Argument must be of LeaderboardJournal class!")
+            elif journal.capacity != self.leader_num:
+                raise ValueError("The journal must keep as many leaders " +
+                                 "as the Controller!")
+
+        self.journal = journal
+        self.leaderboard = None
+        self.leaders_filename = None
+        if journal is not None:
+            journal.add_worker(self.worker)
+        self.select_persistence()
+
+    def add_database(self, database):
+        """
+        Method: add_database
+            Let the Controller record every finished game in a database,
+            and read the leaderboard from it instead of the leaderboard file.
+        Parameter:
+            database (LeaderboardDatabase) -- the database, or None to
+                                              detach it
+        Return: nothing
+        """
+
+        if database is not None and not isinstance(database, LeaderboardDatabase):
+            raise TypeError("Argument must be of LeaderboardDatabase class!")
+
+        self.database = database
+        self.leaderboard = None
+        self.leaders_filename = None
+        self.select_persistence()
+
+    def add_worker(self, worker):
+        """
+        Method: add_worker
+            Let the Controller load and save the leaderboard file in a
+            background thread, so no call waits on the disk. The results
+            are taken by poll_worker. A journal's compactions, a recorder's
+            records and the writes of close are done in the same thread.
+        Parameter:
+            worker (PersistenceWorker) -- the worker, or None to detach it
+        Return: nothing
+        """
+
+        if worker is not None and not isinstance(worker, PersistenceWorker):
+            raise TypeError("Argument must be of PersistenceWorker class!")
+
+        self.worker = worker
+        self.leaders_requested = None
+        if self.journal is not None:
+            self.journal.add_worker(worker)
+        if self.recorder is not None:
+            self.recorder.add_worker(worker)
+        self.select_persistence()
+
+    def select_persistence(self):
+        """
+        Method: select_persistence
+            Choose the storage of the leaderboard: a database records
+            every game, a journal keeps its own files, and the worker
+            loads and saves the leaderboard file, which is used here
+            without any of them.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        if self.database is not None:
+            self.persistence = DatabasePersistence(self, self.database)
+        elif self.journal is not None:
+            self.persistence = JournalPersistence(self, self.journal)
+        elif self.worker is not None:
+            self.persistence = WorkerPersistence(self, self.worker)
+        else:
+            self.persistence = FilePersistence(self)
+
+    def add_shards(self, shards):
+        """
+        Method: add_shards
+            Let the Controller keep a leaderboard file for each game
+            configuration, instead of the leaderboard filename given.
+            Only the file of the current configuration is loaded.
+        Parameter:
+            shards (LeaderboardShards) -- the leaderboard files,
+                                          or None to detach them
+        Return: nothing
+        """
+
+        if shards is not None and not isinstance(shards, LeaderboardShards):
+            raise TypeError("Argument must be of LeaderboardShards class!")
+
+        self.shards = shards
+
+    def get_shard_filename(self, filename = LEADERBOARD_FILENAME):
+        """
+        Method: get_shard_filename
+            Get the leaderboard filename of the current game configuration.
+        Parameter:
+            filename (str) -- the leaderboard filename, used without shards
+        Return:
+            A string representing the leaderboard filename
+        """
+
+        self.validate_filename(filename)
+
+        if self.shards is None or self.model is None:
+            return filename
+        return self.shards.get_filename(get_game_config(self.model))
+
+    def set_snapshot_file(self, filename):
+        """
+        Method: set_snapshot_file
+            Let the Controller save the game in progress in a snapshot
+            file when the game stops, to be resumed by load_snapshot.
+        Parameter:
+            filename (str) -- the snapshot filename, or None not to save it
+        Return: nothing
+        """
+
+        if filename is not None:
+            self.validate_filename(filename)
+
+        self.snapshot_filename = filename
+
+    def save_snapshot(self, filename = SNAPSHOT_FILENAME):
+        """
+        Method: save_snapshot
+            Save the game in a snapshot file. A finished game has nothing
+            to resume, so its snapshot file is removed instead. With a
+            worker, the file is written in the background; if the worker's
+            queue is full, it is written here.
+        Parameter:
+            filename (str) -- the snapshot filename
+        Return: nothing
+        """
+
+        self.validate_filename(filename)
+
+        data = encode_snapshot(self) if self.game_status == "running" else None
+        if self.worker is None or \
+                not self.worker.submit("snapshot", write_snapshot, data, filename):
+            write_snapshot(data, filename)
+
+    def load_snapshot(self, filename = SNAPSHOT_FILENAME):
+        """
+        Method: load_snapshot
+            Resume the game saved in a snapshot file: the player, the
+            GameModel, the current guess, round and game status.
+        Parameter:
+            filename (str) -- the snapshot filename
+        Return:
+            A boolean representing whether a game was resumed,
+            False if there is no snapshot file
+        """
+
+        self.validate_filename(filename)
+
+        snapshot = load_snapshot(filename)
+        if snapshot is None:
+            return False
+
+        self.player = snapshot["player"]
+        self.current_guess = snapshot["current_guess"]
+        self.current_round = snapshot["current_round"]
+        self.game_status = snapshot["game_status"]
+        # the model is added last, so a recorder records the whole game
+        self.add_model(snapshot["model"])
+        return True
+
+    def set_score_tracking(self, track_scores):
+        """
+        Method: set_score_tracking
+            Let the Controller count every finished game's score, won or
+            lost, in the score sketch file next to the leaderboard file,
+            so the median and a player's percentile are known without
+            keeping every game.
+        Parameter:
+            track_scores (bool) -- whether the scores are counted
+        Return: nothing
+        """
+
+        if not isinstance(track_scores, bool):
+            raise TypeError("Argument must be a boolean!")
+
+        self.track_scores = track_scores
+
+    def get_sketch_filename(self, filename = LEADERBOARD_FILENAME):
+        """
+        Method: get_sketch_filename
+            Get the score sketch filename of the current game configuration.
+        Parameter:
+            filename (str) -- the leaderboard filename, used without shards
+        Return:
+            A string representing the score sketch filename
+        """
+
+        return self.get_shard_filename(filename) + SKETCH_SUFFIX
+
+    def get_sketch(self, filename = LEADERBOARD_FILENAME):
+        """
+        Method: get_sketch
+            Get the in-memory score sketch; the sketch file is only read
+            the first time, or when another file is asked for. With a
+            worker, it is read in the background and taken by poll_worker.
+        Parameter:
+            filename (str) -- the leaderboard filename, used without shards
+        Return:
+            A ScoreSketch, or None if scores are not tracked or the
+            sketch is not read yet
+        """
+
+        if not self.track_scores:
+            return None
+
+        sketch_filename = self.get_sketch_filename(filename)
+        if self.sketch is None or self.sketch_filename != sketch_filename:
+            if not self.uses_worker():
+                self.sketch = read_sketch(sketch_filename)
+                self.sketch_filename = sketch_filename
+            elif sketch_filename not in self.sketch_requests:
+                if self.worker.submit("sketch", read_sketch, sketch_filename):
+                    self.sketch_requests.append(sketch_filename)
+                return None
+            else:
+                return None
+
+        return self.sketch
+
+    def record_score(self, filename = LEADERBOARD_FILENAME):
+        """
+        Method: record_score
+            Count the finished game's score in the score sketch file, merged
+            with the games of other processes. With a worker, the file is
+            merged in the background, and the in-memory sketch counts the
+            game until then.
+        Parameter:
+            filename (str) -- the leaderboard filename, used without shards
+        Return: nothing
+        """
+
+        sketch_filename = self.get_sketch_filename(filename)
+        game = ScoreSketch()
+        game.add(self.model.score, self.game_status)
+
+        if self.uses_worker() and self.worker.submit(
+                "sketch", merge_sketch_file, sketch_filename, game):
+            self.sketch_requests.append(sketch_filename)
+            if self.sketch is not None and \
+                    self.sketch_filename == sketch_filename:
+                self.sketch.merge(game)
+        else:
+            self.sketch = merge_sketch_file(sketch_filename, game)
+            self.sketch_filename = sketch_filename
+
+    def get_score_summary(self, filename = LEADERBOARD_FILENAME):
+        """
+        Method: get_score_summary
+            Get a line about the scores of every finished game: the median
+            score, and after a win, the percentage of games the player beat.
+        Parameter:
+            filename (str) -- the leaderboard filename, used without shards
+        Return:
+            A string representing the summary, empty if there is none
+        """
+
+        sketch = self.get_sketch(filename)
+        if sketch is None or sketch.win_num() == 0:
+            return ""
+
+        summary = "Median: {}".format(sketch.median())
+        if self.game_status == "win":
+            summary += "   You beat {:.0f}%".format(
+                sketch.percentile(self.model.score))
+        return summary
+
+    def uses_worker(self):
+        """
+        Method: uses_worker
+            Check whether the leaderboard file is loaded and saved by the
+            worker; a journal or a database keeps its own storage.
+        Parameter: nothing
+        Return:
+            A boolean representing whether the worker is used
+        """
+
+        return isinstance(self.persistence, WorkerPersistence)
+
+    def request_leaderboard(self, filename = LEADERBOARD_FILENAME):
+        """
+        Method: request_leaderboard
+            Ask the worker to load a leaderboard file, once.
+            If the worker's queue is full, the file is loaded here.
+        Parameter:
+            filename (str) -- the leaderboard filename, storing previous records
+        Return: nothing
+        """
+
+        self.validate_filename(filename)
+
+        if self.leaders_requested != filename:
+            if self.worker.submit("load", self.read_leaderboard, filename):
+                self.leaders_requested = filename
+            else:
+                self.get_leaderboard(filename)
+                self.apply_pending_wins()
+
+    def read_leaderboard(self, filename = LEADERBOARD_FILENAME):
+        """
+        Method: read_leaderboard
+            Read a leaderboard file with its fingerprint, taken first so
+            a change made while reading is seen by the next check.
+        Parameter:
+            filename (str) -- the leaderboard filename, storing previous records
+        Return:
+            A 2-tuple: the fingerprint of the file, and the list of records
+        """
+
+        fingerprint = get_file_fingerprint([filename])
+        return fingerprint, self.load_leaderboard_file(filename)
+
+    def save_in_background(self, top_leaders, filename = LEADERBOARD_FILENAME):
+        """
+        Method: save_in_background
+            Ask the worker to save the leaders' records to leaderboard file.
+            If the worker's queue is full, the file is saved here.
+        Parameters:
+            top_leaders (list) -- the list of top leader' records
+            filename (str) -- the leaderboard filename storing updated records
+        Return: nothing
+        """
+
+        if not self.worker.submit("save", save_records, filename, top_leaders):
+            self.leaders_fingerprint = save_records(filename, top_leaders)
+
+    def apply_pending_wins(self):
+        """
+        Method: apply_pending_wins
+            Insert the wins that waited for the leaderboard to be loaded,
+            and save the leaderboard if they change it.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        for player, score, outfile_name in self.pending_wins:
+            if self.leaderboard.insert(player, score):
+                self.save_in_background(self.leaderboard.records(), outfile_name)
+                self.leaders_filename = outfile_name
+        self.pending_wins = []
+
+    def poll_worker(self):
+        """
+        Method: poll_worker
+            Take the results of the worker's finished loads and saves.
+            A loaded leaderboard becomes the in-memory leaderboard, and a
+            read or merged score sketch the in-memory sketch.
+        Parameter: nothing
+        Return:
+            A boolean representing whether the in-memory leaderboard
+            or score sketch changed
+        """
+
+        if self.worker is None:
+            return False
+
+        changed = False
+        errors = []
+        for tag, result, error in self.worker.poll():
+            if error is not None:
+                errors.append(error)
+            elif tag == "load":
+                self.leaders_fingerprint, records = result
+                self.leaderboard = Leaderboard(self.leader_num)
+                self.leaderboard.extend(records)
+                self.leaders_filename = self.leaders_requested
+                self.apply_pending_wins()
+                changed = True
+            elif tag == "save":
+                self.leaders_fingerprint = result
+            elif tag == "sketch":
+                self.sketch = result
+                self.sketch_filename = self.sketch_requests[0]
+                changed = True
+            elif tag == "check" and result != self.leaders_fingerprint and \
+                    self.leaderboard is not None:
+                # written by another process: load it again, the current
+                # leaderboard is kept until then
+                self.request_leaderboard(self.leaders_filename)
+
+            if tag == "load":
+                self.leaders_requested = None
+            elif tag == "check":
+                self.check_requested = False
+            elif tag == "sketch":
+                self.sketch_requests.pop(0)
+
+        # the first error is raised once every result is taken
+        if errors:
+            raise errors[0]
+        return changed
+
+    def close(self, wait = True):
+        """
+        Method: close
+            Finish the leaderboard writes before the game stops: the
+            worker's queued saves, a shared leaderboard's pending records,
+            and the recorder's buffered events; and save the game in
+            progress in the snapshot file. With a worker, these writes are
+            queued after its saves; without waiting, the worker finishes
+            them after close returns, before the process exits.
+        Parameter:
+            wait (bool) -- whether to wait for the worker's writes
+        Return: nothing
+        """
+
+        if self.recorder is not None:
+            self.recorder.flush()
+        if self.snapshot_filename is not None and self.model is not None:
+            self.save_snapshot(self.snapshot_filename)
+        if isinstance(self.journal, SharedLeaderboard) and \
+                (self.worker is None or
+                 not self.worker.submit("journal", self.journal.close)):
+            self.journal.close()
+
+        if self.worker is not None:
+            # records a full queue refused are written once the worker is done
+            if self.recorder is not None and self.recorder.buffer:
+                wait = True
+            self.worker.close(wait)
+            self.worker = None
+            if self.journal is not None:
+                self.journal.add_worker(None)
+            if self.recorder is not None:
+                self.recorder.add_worker(None)
+                self.recorder.flush()
+            self.select_persistence()
+
+    def get_leaders_fingerprint(self):
+        """
+        Method: get_leaders_fingerprint
+            Get a cheap fingerprint of the leaderboard storage, which changes
+            when another process writes it: the data version of a database,
+            or the modification times and sizes of the files.
+        Parameter: nothing
+        Return:
+            A tuple representing the fingerprint
+        """
+
+        return self.persistence.get_fingerprint()
+
+    def check_leaderboard(self):
+        """
+        Method: check_leaderboard
+            Check whether another process changed the leaderboard storage
+            since it was last read or written, and read it again if so.
+            With a worker, the check and the load are done in the background
+            and taken by poll_worker.
+        Parameter: nothing
+        Return:
+            A boolean representing whether the leaderboard was read again
+        """
+
+        if self.leaderboard is None or not self.persistence.is_changed():
+            return False
+
+        self.persistence.refresh()
+        filename = self.leaders_filename
+        self.leaderboard = None
+        self.get_leaderboard(filename)
+        return True
+
+    def get_leaders_version(self):
+        """
+        Method: get_leaders_version
+            Get the version of the in-memory leaderboard, which changes
+            whenever its records change.
+        Parameter: nothing
+        Return:
+            An integer representing the version, or None if the
+            leaderboard is not loaded
+        """
+
+        return None if self.leaderboard is None else self.leaderboard.version
 
     def reset_guess(self):
         """
@@ -97,6 +718,8 @@ class Controller:
             raise ValueError("The guess is not contained in the code range!")
 
         self.current_guess[index] = color
+        if self.recorder is not None:
+            self.recorder.record_guess(self.session, index, color)
 
     def validate_filename(self, filename):
         """
@@ -115,6 +738,8 @@ class Controller:
         Method: load_leaderboard_file
             Retrieve data list from leaderboard file;
             if the file don't exist, create a new file.
+            With a database, the top leaders of the game's configuration
+            are queried from the database instead.
         Parameter:
             filename (str) -- the leaderboard filename, storing previous records
         Return:
@@ -122,32 +747,76 @@ class Controller:
         """
 
         self.validate_filename(filename)
-        leaders_list = []
 
-        try:
-            with open(filename, "r") as infile:
-                name = infile.readline().strip("\n")
-                score = infile.readline().strip("\n")
-                while name != "":  # not reach the end of file
-                    leaders_list.append([name, score])
-                    name = infile.readline().strip("\n")
-                    score = infile.readline().strip("\n")
+        return self.persistence.load_records(filename)
+
+    def get_leaderboard(self, filename = LEADERBOARD_FILENAME):
+        """
+        Method: get_leaderboard
+            Get the in-memory leaderboard; the leaderboard file is only
+            read the first time, or when another file is asked for.
+            With a database, it is also read again when the game's
+            configuration changes.
+        Parameter:
+            filename (str) -- the leaderboard filename, storing previous records
+        Return:
+            A Leaderboard holding the top leaders' records
+        """
+
+        self.validate_filename(filename)
+
+        config = self.get_leaders_config()
+        if self.leaderboard is None or self.leaders_filename != filename or \
+                self.leaders_config != config:
+            self.leaders_filename = filename
+            self.leaders_config = config
+            self.leaders_fingerprint = self.get_leaders_fingerprint()
+            self.leaderboard = self.persistence.read_leaderboard(filename)
+
+        return self.leaderboard
+
+    def get_leaders_config(self):
+        """
+        Method: get_leaders_config
+            Get the game configuration whose leaders are shown: the current
+            game's with a database, None for a leaderboard file, which
+            holds its own configuration's leaders.
+        Parameter: nothing
+        Return:
+            A string representing the configuration, or None
+        """
+
+        return self.persistence.get_config()
+
+    def get_leaders(self, filename = LEADERBOARD_FILENAME):
+        """
+        Method: get_leaders
+            Get the leaders' records from the in-memory leaderboard.
+            With a worker, a leaderboard not loaded yet is asked for in
+            the background, and no records are returned until then.
+            With shards, the records of the current configuration are got.
+        Parameter:
+            filename (str) -- the leaderboard filename, storing previous records
+        Return:
+            A list representing the leaders' records, best first
+        """
 
-        except FileNotFoundError:
-            outfile = open(filename, "w")
-            outfile.close()
+        filename = self.get_shard_filename(filename)
 
-        return leaders_list
+        if not self.persistence.is_loaded(filename):
+            return []
+
+        return self.get_leaderboard(filename).records()
 
     def create_top_leaders_list(self, previous_leaders):
         """
         Method: create_top_leaders_list
-            Sort the scores of the current player and previous players,
-            and create a list of top five players' records.
+            Rank the scores of the current player and previous players,
+            and create a list of the top players' records.
         Parameter:
             previous_leaders (list) -- a list of previous leaders record
         Return:
-            A list representing the top five leaders' records
+            A list representing the top leaders' records
         """
 
         if not isinstance(previous_leaders, list):
@@ -157,25 +826,19 @@ class Controller:
                 if not (isinstance(name, str) and isinstance(score, str)):
                     raise TypeError("Each element in the argument list must be str!")
 
-        # current leaders_list = [[current_player, current_score]]
-        # extend previous leaders to current leaders' list
-        leaders_list = [[self.player, str(self.model.score)]]
-        leaders_list.extend(previous_leaders)
-
-        # sort the current leaders' list by ascending score
         # if there is a tie between the new player and existing leaders
         # the new player will show up ahead of old records
-        # because Python uses a stable sort for ties
-        # items will show up in the same order they occurred
-        leaders_list.sort(key=lambda x: int(x[1]))
+        leaderboard = Leaderboard(self.leader_num)
+        leaderboard.extend(previous_leaders)
+        leaderboard.insert(self.player, self.model.score)
 
-        # return the top five leaders
-        return leaders_list[:5]
+        return leaderboard.records()
 
     def save_leaderboard_file(self, top_leaders, filename = LEADERBOARD_FILENAME):
         """
         Method: save_leaderboard_file
-            Save the updated leaders' records to leaderboard file.
+            Save the updated leaders' records to leaderboard file,
+            through a temporary file, so it is never left half-written.
         Parameters:
             top_leaders (list) -- the list of top leader' records
             filename (str) -- the leaderboard filename storing updated records
@@ -191,10 +854,24 @@ class Controller:
                     raise TypeError("Each element in the argument list must be str!")
 
         if self.game_status == "win":
-            with open(filename, "w") as outfile:
-                for each in top_leaders:
-                    outfile.write(each[0] + "\n")
-                    outfile.write(each[1] + "\n")
+            write_atomic(filename, write_records(top_leaders))
+
+    def update_game(self):
+        """
+        Method: update_game
+            Play the current guess: update GameModel, update game_status,
+            reset guess list, update round counter.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        if self.game_status == "running":
+            # update GameModel
+            self.model.update(self.current_guess)
+            # update Controller attributes
+            self.game_status = self.model.check_status()
+            self.reset_guess()
+            self.current_round += 1
 
     def update_round(self, infile_name = LEADERBOARD_FILENAME,
                      outfile_name = LEADERBOARD_FILENAME):
@@ -202,6 +879,15 @@ class Controller:
         Method: update_round
             Update current game round, including update GameModel, update game_status,
             reset guess list , save leaderboard_file, update round counter.
+            The leaderboard is only touched on a win, and the file is only
+            written when the win changes the top leaders. With a journal,
+            the win is appended to the journal instead. With a database,
+            every finished game is recorded in the database instead.
+            With a worker, the file is loaded and saved in the background.
+            With shards, the file of the game's configuration is used
+            for both. With score tracking, every finished game's score is
+            counted in the score sketch. With a recorder, the round is
+            recorded in the session log.
         Parameters:
             infile_name (str) -- the leaderboard filename storing previous records
             outfile_name (str) -- the leaderboard filename storing updated records        
@@ -212,16 +898,21 @@ class Controller:
         self.validate_filename(outfile_name)
 
         if self.game_status == "running":
-            # update GameModel
-            self.model.update(self.current_guess)
-            # update Controller attributes
-            self.game_status = self.model.check_status()
-            self.reset_guess()
-            self.current_round += 1
+            self.update_game()
+            if self.recorder is not None:
+                self.recorder.record_round(self.session, self.model.guess,
+                                           self.model.bull_num,
+                                           self.model.cow_num, self.game_status)
+
+            if self.track_scores and self.game_status != "running":
+                self.record_score(infile_name)
+
+            if self.shards is not None and self.game_status == "win":
+                infile_name = outfile_name = self.get_shard_filename(infile_name)
+
             # save top leaders' records
-            previous_leaders = self.load_leaderboard_file(infile_name)
-            top_leaders = self.create_top_leaders_list(previous_leaders)
-            self.save_leaderboard_file(top_leaders, outfile_name)
+            if self.game_status != "running":
+                self.persistence.save_game(infile_name, outfile_name)
 
     def get_bulls_and_cows(self):
         """
@@ -261,6 +952,8 @@ class Controller:
         self.current_round = 1
         self.game_status = "running"
         self.model.restart()
+        if self.recorder is not None:
+            self.recorder.record_restart(self.session, self.model.code)
 
     def __str__(self):
         """
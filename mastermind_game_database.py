@@ -0,0 +1,256 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Leaderboard Database
+    Record every finished Mastermind game in a SQLite database,
+    and answer the leaderboard queries from its indexes.
+"""
+
+import sqlite3
+import time
+from mastermind_game_model import GameModel, STATUS_NAMES
+
+DATABASE_FILENAME = "leaderboard.db"
+
+# every query below is answered from one of the partial indexes on won games:
+# top leaders, top leaders of a configuration, and a player's best score
+# on a tie, the newer game goes ahead of the older ones
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS games ("
+    "id INTEGER PRIMARY KEY, player TEXT NOT NULL, score INTEGER NOT NULL, "
+    "status TEXT NOT NULL, config TEXT NOT NULL, finished REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS games_top ON games (score, id DESC) "
+    "WHERE status = 'win'",
+    "CREATE INDEX IF NOT EXISTS games_config_top ON games "
+    "(config, score, id DESC) WHERE status = 'win'",
+    "CREATE INDEX IF NOT EXISTS games_player_best ON games "
+    "(player, config, score) WHERE status = 'win'"]
+
+TOP_QUERY = "SELECT player, score FROM games WHERE status = 'win' " \
+            "ORDER BY score, id DESC LIMIT ?"
+CONFIG_TOP_QUERY = "SELECT player, score FROM games WHERE status = 'win' " \
+                   "AND config = ? ORDER BY score, id DESC LIMIT ?"
+PLAYER_BEST_QUERY = "SELECT MIN(score) FROM games WHERE status = 'win' " \
+                    "AND player = ?"
+CONFIG_PLAYER_BEST_QUERY = "SELECT MIN(score) FROM games " \
+                           "WHERE status = 'win' AND player = ? AND config = ?"
+
+
+class LeaderboardDatabase:
+    """
+    A class that records every finished game, with its player, score,
+    status, configuration and time, in a SQLite database.
+    The leaderboards are single queries on indexes of the won games,
+    however many games are recorded.
+    Attributes: name(str), filename(str), connection(sqlite3.Connection)
+    Methods: __init__, add_game, add_games, top_leaders, player_best,
+             game_num, data_version, close, __str__, __eq__
+    """
+
+    def __init__(self, filename = DATABASE_FILENAME):
+        """
+        Method: __init__
+            Create an instance of LeaderboardDatabase, creating the
+            database file and its indexes if missing.
+        Parameter:
+            filename (str) -- the database filename, or ":memory:"
+        Return: nothing
+        """
+
+        if not isinstance(filename, str):
+            raise TypeError("Filename must be a string!")
+
+        self.name = "Leaderboard Database"
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        # many game processes can share the file
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+
+    def add_game(self, player, score, status, config, finished = None):
+        """
+        Method: add_game
+            Record a finished game.
+        Parameters:
+            player (str) -- the player's name
+            score (int) -- the guesses used
+            status (str) -- the game status, "win" or "lost"
+            config (str) -- the game configuration, as from get_game_config
+            finished (int or float) -- the time the game finished,
+                                       in seconds since the epoch, now if
+                                       not given
+        Return: nothing
+        """
+
+        self.add_games([[player, score, status, config,
+                         time.time() if finished is None else finished]])
+
+    def add_games(self, games):
+        """
+        Method: add_games
+            Record many finished games in one transaction.
+        Parameter:
+            games (list) -- a list of [player, score, status, config,
+                            finished] games, as in add_game
+        Return: nothing
+        """
+
+        if not isinstance(games, list):
+            raise TypeError("Games argument must be a list!")
+        for player, score, status, config, finished in games:
+            if not (isinstance(player, str) and isinstance(score, int) and
+                    isinstance(config, str) and
+                    isinstance(finished, (int, float))):
+                raise TypeError("Player and config must be str, score " +
+                                "must be int, finished must be a number!")
+            elif status not in STATUS_NAMES[1:]:
+                raise ValueError("Status must be one of: " +
+                                 ", ".join(STATUS_NAMES[1:]) + "!")
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO games (player, score, status, config, finished) "
+                "VALUES (?, ?, ?, ?, ?)", games)
+
+    def top_leaders(self, limit, config = None):
+        """
+        Method: top_leaders
+            Get the best won games.
+        Parameters:
+            limit (int) -- the number of leaders
+            config (str) -- the game configuration, every configuration
+                            if not given
+        Return:
+            A list of [player, score] records, with score as int, best first
+        """
+
+        if not isinstance(limit, int) or \
+                (config is not None and not isinstance(config, str)):
+            raise TypeError("Limit must be an integer, config must be a string!")
+
+        if config is None:
+            rows = self.connection.execute(TOP_QUERY, (limit,))
+        else:
+            rows = self.connection.execute(CONFIG_TOP_QUERY, (config, limit))
+        return [list(row) for row in rows]
+
+    def player_best(self, player, config = None):
+        """
+        Method: player_best
+            Get the best score of a player.
+        Parameters:
+            player (str) -- the player's name
+            config (str) -- the game configuration, every configuration
+                            if not given
+        Return:
+            An integer representing the fewest guesses of a won game,
+            or None if the player never won
+        """
+
+        if not isinstance(player, str) or \
+                (config is not None and not isinstance(config, str)):
+            raise TypeError("Player and config must be strings!")
+
+        if config is None:
+            row = self.connection.execute(PLAYER_BEST_QUERY, (player,))
+        else:
+            row = self.connection.execute(CONFIG_PLAYER_BEST_QUERY,
+                                          (player, config))
+        return row.fetchone()[0]
+
+    def game_num(self):
+        """
+        Method: game_num
+            Get the number of recorded games.
+        Parameter: nothing
+        Return:
+            An integer representing the number of games
+        """
+
+        return self.connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def data_version(self):
+        """
+        Method: data_version
+            Get the data version of the database, which changes when
+            another connection commits games.
+        Parameter: nothing
+        Return:
+            An integer representing the data version
+        """
+
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        """
+        Method: close
+            Close the database connection.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.connection.close()
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of LeaderboardDatabase instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tFile: {}".format(self.name, self.filename)
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current LeaderboardDatabase instance to another one.
+        Parameter:
+            other (LeaderboardDatabase) -- another instance of LeaderboardDatabase
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, LeaderboardDatabase) and \
+               self.filename == other.filename
+
+
+def get_game_config(model):
+    """
+    Function: get_game_config
+        Get the configuration name of a game: the colors of its palette,
+        with "-" for the blank color, the code length, and the guesses
+        allowed, e.g. "[red,blue,-]x4/10". Palettes of the same size but
+        other colors are other configurations.
+    Parameter:
+        model (GameModel) -- the GameModel of the game
+    Return:
+        A string representing the configuration
+    """
+
+    if not isinstance(model, GameModel):
+        raise TypeError("Argument must be of GameModel class!")
+
+    return format_game_config(model.code_range, len(model.code),
+                              model.max_guess)
+
+
+def format_game_config(code_range, length, max_guess):
+    """
+    Function: format_game_config
+        Get the configuration name of a game from its palette, code length
+        and guesses allowed, e.g. of a game decoded from a session log.
+    Parameters:
+        code_range (list of str) -- the colors of the palette
+        length (int) -- the code length
+        max_guess (int) -- the guesses allowed
+    Return:
+        A string representing the configuration, as from get_game_config
+    """
+
+    palette = ",".join(color if color != "" else "-" for color in code_range)
+    return "[{}]x{}/{}".format(palette, length, max_guess)
@@ -0,0 +1,1089 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Leaderboard
+    Keep the top leaders of the Mastermind game.
+"""
+
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from heapq import heappush, heapreplace
+from itertools import count
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+TOP_LEADERS_NUM = 5  # the number of leaders kept on the leaderboard
+COMPACT_LIMIT = 1000  # the journal records before a new snapshot is written
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_HEADER = "#snapshot "
+LOCK_SUFFIX = ".lock"
+BATCH_SIZE = 20  # the records a SharedLeaderboard writes under one lock
+BATCH_SECONDS = 1.0  # the longest a SharedLeaderboard keeps a record pending
+QUEUE_SIZE = 16  # the tasks a PersistenceWorker holds before refusing more
+SHARD_DIRECTORY = "leaderboards"
+SHARD_INDEX_FILENAME = "index.txt"
+
+# the versions of every Leaderboard, so no two states share a version
+_versions = count(1)
+
+
+class Leaderboard:
+    """
+    A class that keeps the K best (lowest) scores with their players.
+    The records are held in a heap with the worst record on top, so a new
+    score is compared to the worst one in O(1), and inserted in O(log K).
+    On a tie, a newer player goes ahead of the older ones with the same score.
+    The ranked list is only sorted when it is read after a change.
+    Each change gives the leaderboard a new version, never used before
+    by any Leaderboard, so a view can tell whether it is up to date.
+    Attributes: name(str), capacity(int), heap(list of tuple),
+                insert_num(int), extend_num(int), ranked(list),
+                ranked_records(list), version(int)
+    Methods: __init__, insert, extend, can_enter, leaders, records,
+             __len__, __iter__, __str__, __eq__
+    """
+
+    def __init__(self, capacity = TOP_LEADERS_NUM):
+        """
+        Method: __init__
+            Create an instance of Leaderboard.
+        Parameter:
+            capacity (int) -- the number of leaders kept
+        Return: nothing
+        """
+
+        if not isinstance(capacity, int):
+            raise TypeError("Capacity must be an integer!")
+        elif capacity <= 0:
+            raise ValueError("Capacity must be positive!")
+
+        self.name = "Leaderboard"
+        self.capacity = capacity
+
+        # heap of (-score, insertion order, player): the top is the worst
+        # record, the highest score, and the oldest on a tie
+        self.heap = []
+        # inserted records count up, extended records count down
+        self.insert_num = 0
+        self.extend_num = 0
+        # the cached ranked lists, None after a change
+        self.ranked = []
+        self.ranked_records = []
+        self.version = next(_versions)
+
+    def can_enter(self, score):
+        """
+        Method: can_enter
+            Check whether a new score would enter the leaderboard.
+        Parameter:
+            score (int) -- the new score
+        Return:
+            A boolean representing whether the score enters
+        """
+
+        # a new score ties ahead of the older ones
+        return len(self.heap) < self.capacity or score <= -self.heap[0][0]
+
+    def insert(self, player, score):
+        """
+        Method: insert
+            Insert a new record, dropping the worst record if the leaderboard
+            is full.
+        Parameters:
+            player (str) -- the player's name
+            score (int) -- the player's score
+        Return:
+            A boolean representing whether the record entered the leaderboard
+        """
+
+        if not (isinstance(player, str) and isinstance(score, int)):
+            raise TypeError("Player and score must be str and int!")
+
+        if not self.can_enter(score):
+            return False
+
+        self.insert_num += 1
+        record = (-score, self.insert_num, player)
+        if len(self.heap) < self.capacity:
+            heappush(self.heap, record)
+        else:
+            heapreplace(self.heap, record)
+        self.ranked = self.ranked_records = None
+        self.version = next(_versions)
+        return True
+
+    def extend(self, records):
+        """
+        Method: extend
+            Add ranked records, e.g. from a leaderboard file: on a tie,
+            an earlier record ranks ahead of a later one, and every record
+            ranks behind the new players inserted later.
+        Parameter:
+            records (list) -- a list of [player, score] records,
+                              with score as int or str
+        Return: nothing
+        """
+
+        if not isinstance(records, list):
+            raise TypeError("Records must be a list!")
+
+        for player, score in records:
+            if not (isinstance(player, str) and isinstance(score, (int, str))):
+                raise TypeError("Each record must be a str and an int or str!")
+            # older than every record so far, so it ranks behind on a tie
+            self.extend_num += 1
+            record = (-int(score), -self.extend_num, player)
+            if len(self.heap) < self.capacity:
+                heappush(self.heap, record)
+            elif record > self.heap[0]:
+                heapreplace(self.heap, record)
+            else:
+                continue
+            self.ranked = self.ranked_records = None
+            self.version = next(_versions)
+
+    def leaders(self):
+        """
+        Method: leaders
+            Get the ranked records, best first.
+        Parameter: nothing
+        Return:
+            A list of [player, score] records, with score as int
+        """
+
+        if self.ranked is None:
+            self.ranked = [[player, -negative_score] for negative_score, order,
+                           player in sorted(self.heap, reverse=True)]
+        return self.ranked
+
+    def records(self):
+        """
+        Method: records
+            Get the ranked records in the leaderboard file format.
+        Parameter: nothing
+        Return:
+            A list of [player, score] records, with score as str
+        """
+
+        if self.ranked_records is None:
+            self.ranked_records = [[player, str(score)]
+                                   for player, score in self.leaders()]
+        return self.ranked_records
+
+    def __len__(self):
+        """
+        Method: __len__
+            Get the number of records on the leaderboard.
+        Parameter: nothing
+        Return:
+            An integer representing the number of records
+        """
+
+        return len(self.heap)
+
+    def __iter__(self):
+        """
+        Method: __iter__
+            Iterate over the ranked records, best first.
+        Parameter: nothing
+        Return:
+            An iterator of [player, score] records
+        """
+
+        return iter(self.leaders())
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of Leaderboard instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tCapacity: {}\tLeaders: {}".format(self.name, self.capacity,
+                                                      len(self.heap))
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current Leaderboard instance to another one.
+            Two instances are equal if they have the same capacity
+            and the same ranked records.
+        Parameter:
+            other (Leaderboard) -- another instance of Leaderboard
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, Leaderboard) and \
+               self.capacity == other.capacity and \
+               self.leaders() == other.leaders()
+
+
+class LeaderboardJournal:
+    """
+    A class that keeps a leaderboard file up to date without rewriting it
+    for every game. The leaderboard file is a snapshot; each new record is
+    appended to a journal file next to it. The leaderboard is rebuilt from
+    the snapshot plus the journal, and every compact_limit records the
+    snapshot is written again, atomically, and the journal restarted.
+    The journal starts with the digest of the snapshot it follows, so a
+    journal already compacted into the snapshot is never applied twice.
+    With a worker, the snapshot is written in its background thread, and
+    the records appended meanwhile are written with it.
+    Attributes: name(str), filename(str), journal_filename(str),
+                capacity(int), compact_limit(int), leaderboard(Leaderboard),
+                journal_num(int), journal_ready(bool),
+                worker(PersistenceWorker), compact_pending(bool),
+                lock(threading.RLock)
+    Methods: __init__, add_worker, load, read_files, get_leaderboard, append,
+             write_journal, request_compaction, finish_compaction, compact,
+             __str__, __eq__
+    """
+
+    def __init__(self, filename, capacity = TOP_LEADERS_NUM,
+                 compact_limit = COMPACT_LIMIT):
+        """
+        Method: __init__
+            Create an instance of LeaderboardJournal.
+        Parameters:
+            filename (str) -- the leaderboard filename, the snapshot
+            capacity (int) -- the number of leaders kept
+            compact_limit (int) -- the journal records before compaction
+        Return: nothing
+        """
+
+        if not (isinstance(filename, str) and isinstance(capacity, int) and
+                isinstance(compact_limit, int)):
+            raise TypeError("Filename must be a string, capacity and " +
+                            "compact limit must be integers!")
+        elif capacity <= 0 or compact_limit <= 0:
+            raise ValueError("Capacity and compact limit must be positive!")
+
+        self.name = "Leaderboard Journal"
+        self.filename = filename
+        self.journal_filename = filename + JOURNAL_SUFFIX
+        self.capacity = capacity
+        self.compact_limit = compact_limit
+
+        # None until the leaderboard is first needed
+        self.leaderboard = None
+        self.journal_num = 0
+        # whether records can be appended to the journal file as it is
+        self.journal_ready = False
+
+        # the worker the snapshot is written by, None to write it here,
+        # and whether a compaction is queued on it
+        self.worker = None
+        self.compact_pending = False
+        # held while the leaderboard or the files change, by the game's
+        # thread or the worker's
+        self.lock = threading.RLock()
+
+    def add_worker(self, worker):
+        """
+        Method: add_worker
+            Let the journal write the snapshot in a worker's background
+            thread, so an append never waits for a compaction.
+        Parameter:
+            worker (PersistenceWorker) -- the worker, or None to compact here
+        Return: nothing
+        """
+
+        if worker is not None and not isinstance(worker, PersistenceWorker):
+            raise TypeError("Argument must be of PersistenceWorker class!")
+
+        self.worker = worker
+
+    def load(self):
+        """
+        Method: load
+            Rebuild the leaderboard from the snapshot and the journal.
+            A journal of another snapshot is skipped, and an incomplete
+            last record, from an interrupted write, is dropped. A queued
+            compaction is done first, so its records are not lost.
+        Parameter: nothing
+        Return:
+            A Leaderboard holding the top leaders' records
+        """
+
+        with self.lock:
+            if self.compact_pending:
+                self.compact()
+            return self.read_files()
+
+    def read_files(self):
+        """
+        Method: read_files
+            Rebuild the leaderboard from the snapshot and the journal files.
+        Parameter: nothing
+        Return:
+            A Leaderboard holding the top leaders' records
+        """
+
+        try:
+            with open(self.filename, "r") as infile:
+                snapshot = infile.read()
+        except FileNotFoundError:
+            snapshot = ""
+
+        self.leaderboard = Leaderboard(self.capacity)
+        self.leaderboard.extend(read_records(snapshot)[0])
+        self.journal_num = 0
+        self.journal_ready = False
+
+        try:
+            with open(self.journal_filename, "r") as infile:
+                header = infile.readline()
+                journal = infile.read()
+        except FileNotFoundError:
+            header = ""
+
+        if header == get_journal_header(snapshot):
+            records, complete = read_records(journal)
+            for player, score in records:
+                self.leaderboard.insert(player, int(score))
+            self.journal_num = len(records)
+            self.journal_ready = complete
+
+        return self.leaderboard
+
+    def get_leaderboard(self):
+        """
+        Method: get_leaderboard
+            Get the leaderboard, loaded from the files the first time.
+        Parameter: nothing
+        Return:
+            A Leaderboard holding the top leaders' records
+        """
+
+        if self.leaderboard is None:
+            self.load()
+        return self.leaderboard
+
+    def append(self, player, score):
+        """
+        Method: append
+            Add a new record: insert it in the leaderboard, and append it to
+            the journal if it enters. The journal is compacted every
+            compact_limit records.
+        Parameters:
+            player (str) -- the player's name
+            score (int) -- the player's score
+        Return:
+            A boolean representing whether the record entered the leaderboard
+        """
+
+        if not (isinstance(player, str) and isinstance(score, int)):
+            raise TypeError("Player and score must be str and int!")
+        elif "\n" in player:
+            raise ValueError("Player must be a single line!")
+
+        with self.lock:
+            if not self.get_leaderboard().insert(player, score):
+                return False
+
+            self.write_journal([[player, str(score)]])
+        return True
+
+    def write_journal(self, records):
+        """
+        Method: write_journal
+            Append records, already in the leaderboard, to the journal
+            in one write; compact instead once the journal is full.
+            While a compaction is queued, the records are left to it.
+        Parameter:
+            records (list) -- a list of [player, score] records,
+                              with score as str
+        Return: nothing
+        """
+
+        if not records or self.compact_pending:
+            return
+        elif not self.journal_ready or \
+                self.journal_num + len(records) >= self.compact_limit:
+            self.request_compaction()
+        else:
+            with open(self.journal_filename, "a") as outfile:
+                outfile.write(write_records(records))
+            self.journal_num += len(records)
+
+    def request_compaction(self):
+        """
+        Method: request_compaction
+            Compact the journal in the worker's thread, or here without a
+            worker or if its queue is full.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        if self.worker is not None and \
+                self.worker.submit("compact", self.finish_compaction):
+            self.compact_pending = True
+        else:
+            self.compact()
+
+    def finish_compaction(self):
+        """
+        Method: finish_compaction
+            Do the queued compaction, in the worker's thread, unless a
+            load did it already.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        with self.lock:
+            if self.compact_pending:
+                self.compact()
+
+    def compact(self):
+        """
+        Method: compact
+            Write the leaderboard as a new snapshot, then restart the journal
+            for it. Both files are replaced atomically, so a reader sees
+            either the old or the new files, never a half-written one.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        with self.lock:
+            snapshot = write_records(self.get_leaderboard().records())
+            write_atomic(self.filename, snapshot)
+            write_atomic(self.journal_filename, get_journal_header(snapshot))
+            self.journal_num = 0
+            self.journal_ready = True
+            self.compact_pending = False
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of LeaderboardJournal instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tFile: {}\tJournal records: {}".format(
+            self.name, self.filename, self.journal_num)
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current LeaderboardJournal instance to another one.
+        Parameter:
+            other (LeaderboardJournal) -- another instance of LeaderboardJournal
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, LeaderboardJournal) and \
+               self.filename == other.filename and \
+               self.capacity == other.capacity
+
+
+class SharedLeaderboard(LeaderboardJournal):
+    """
+    A class of leaderboard journal shared by many game processes.
+    The records are kept pending, and written in batches: under an
+    exclusive file lock, the leaderboard is loaded again from the files,
+    so no other process's record is lost, then the pending records are
+    inserted and appended to the journal. The files are only written
+    under the lock, while readers never wait for it. With a worker, a
+    record is written right away in the worker's thread, together with
+    the records pending when the worker gets to it.
+    Attributes: name(str), filename(str), journal_filename(str),
+                lock_filename(str), capacity(int), compact_limit(int),
+                batch_size(int), batch_seconds(float),
+                leaderboard(Leaderboard), journal_num(int),
+                journal_ready(bool), worker(PersistenceWorker),
+                compact_pending(bool), lock(threading.RLock), pending(list),
+                pending_time(float), flush_pending(bool)
+    Methods: __init__, append, flush, finish_flush, request_compaction,
+             close, __str__
+    """
+
+    def __init__(self, filename, capacity = TOP_LEADERS_NUM,
+                 compact_limit = COMPACT_LIMIT, batch_size = BATCH_SIZE,
+                 batch_seconds = BATCH_SECONDS):
+        """
+        Method: __init__
+            Create an instance of SharedLeaderboard.
+        Parameters:
+            filename (str) -- the leaderboard filename, the snapshot
+            capacity (int) -- the number of leaders kept
+            compact_limit (int) -- the journal records before compaction
+            batch_size (int) -- the pending records written together
+            batch_seconds (int or float) -- the longest a record is pending
+        Return: nothing
+        """
+
+        super().__init__(filename, capacity, compact_limit)
+
+        if not (isinstance(batch_size, int) and
+                isinstance(batch_seconds, (int, float))):
+            raise TypeError("Batch size must be an integer, " +
+                            "batch seconds must be a number!")
+        elif batch_size <= 0 or batch_seconds < 0:
+            raise ValueError("Batch size and seconds must be positive!")
+
+        self.name = "Shared Leaderboard"
+        self.lock_filename = filename + LOCK_SUFFIX
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self.pending = []
+        self.pending_time = 0.0
+        # whether a flush is queued on the worker
+        self.flush_pending = False
+
+    def append(self, player, score):
+        """
+        Method: append
+            Add a new record: insert it in this process's leaderboard, and
+            keep it pending if it enters. With a worker, the pending records
+            are written in its thread right away, so other processes see
+            the new top leaders; without one, or if its queue is full, once
+            there are batch_size of them, or the oldest has waited
+            batch_seconds.
+        Parameters:
+            player (str) -- the player's name
+            score (int) -- the player's score
+        Return:
+            A boolean representing whether the record entered the leaderboard
+            of this process
+        """
+
+        if not (isinstance(player, str) and isinstance(score, int)):
+            raise TypeError("Player and score must be str and int!")
+        elif "\n" in player:
+            raise ValueError("Player must be a single line!")
+
+        with self.lock:
+            # records of other processes only make the leaderboard better,
+            # so a record that doesn't enter here doesn't enter the file
+            if not self.get_leaderboard().insert(player, score):
+                return False
+
+            if not self.pending:
+                self.pending_time = time.monotonic()
+            self.pending.append([player, score])
+            if self.flush_pending:
+                return True
+            if self.worker is not None and \
+                    self.worker.submit("flush", self.finish_flush):
+                self.flush_pending = True
+            elif len(self.pending) >= self.batch_size or \
+                    time.monotonic() - self.pending_time >= self.batch_seconds:
+                self.flush()
+        return True
+
+    def flush(self):
+        """
+        Method: flush
+            Write the pending records under the file lock, merged with the
+            records other processes wrote since the last load.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        with self.lock:
+            if not self.pending:
+                return
+
+            with lock_file(self.lock_filename):
+                leaderboard = self.load()
+                entered = [[player, str(score)] for player, score in self.pending
+                           if leaderboard.insert(player, score)]
+                self.write_journal(entered)
+            self.pending = []
+
+    def finish_flush(self):
+        """
+        Method: finish_flush
+            Write the pending records, in the worker's thread, including
+            the ones appended after the flush was queued.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        with self.lock:
+            self.flush_pending = False
+            self.flush()
+
+    def request_compaction(self):
+        """
+        Method: request_compaction
+            Compact the journal here, under the file lock the records are
+            written under, so no other process's records are lost.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.compact()
+
+    def close(self):
+        """
+        Method: close
+            Write the pending records before the process stops.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.flush()
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of SharedLeaderboard instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tFile: {}\tPending records: {}".format(
+            self.name, self.filename, len(self.pending))
+
+
+class PersistenceWorker:
+    """
+    A class that runs the leaderboard loads and saves in a background
+    thread, so the game window never waits on the disk. Tasks wait in
+    a bounded queue; their results wait in another queue until the
+    window's timer polls them.
+    Attributes: name(str), tasks(queue.Queue), results(queue.SimpleQueue),
+                thread(threading.Thread), stopper(threading.Thread)
+    Methods: __init__, submit, poll, run, close, stop, __str__, __eq__
+    """
+
+    def __init__(self, queue_size = QUEUE_SIZE):
+        """
+        Method: __init__
+            Create an instance of PersistenceWorker and start its thread.
+        Parameter:
+            queue_size (int) -- the tasks held before submit refuses more
+        Return: nothing
+        """
+
+        if not isinstance(queue_size, int):
+            raise TypeError("Queue size must be an integer!")
+        elif queue_size <= 0:
+            raise ValueError("Queue size must be positive!")
+
+        self.name = "Persistence Worker"
+        self.tasks = queue.Queue(queue_size)
+        self.results = queue.SimpleQueue()
+        # a daemon thread doesn't keep a closed window's process alive
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        # the thread that stops the background thread once closed
+        self.stopper = None
+
+    def submit(self, tag, function, *args):
+        """
+        Method: submit
+            Queue a task for the background thread, without waiting.
+        Parameters:
+            tag (str) -- the tag the result is handed back with
+            function (function) -- the task, called with args;
+                                   it must not change shared state
+            args -- the arguments of the task
+        Return:
+            A boolean representing whether the task was queued,
+            False if the queue is full or the worker closed
+        """
+
+        if not isinstance(tag, str):
+            raise TypeError("Tag must be a string!")
+        elif self.thread is None:
+            return False
+
+        try:
+            self.tasks.put_nowait((tag, function, args))
+        except queue.Full:
+            return False
+        return True
+
+    def poll(self):
+        """
+        Method: poll
+            Take the results of the finished tasks, without waiting.
+        Parameter: nothing
+        Return:
+            A list of 3-tuples: (tag, result, error), with error the
+            exception raised by the task, or None
+        """
+
+        finished = []
+        while True:
+            try:
+                finished.append(self.results.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def run(self):
+        """
+        Method: run
+            Run the queued tasks, in the background thread, until closed.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                self.tasks.task_done()
+                return
+            tag, function, args = task
+            try:
+                self.results.put((tag, function(*args), None))
+            except Exception as error:
+                self.results.put((tag, None, error))
+            # a task is done once its result can be polled
+            self.tasks.task_done()
+
+    def close(self, wait = True):
+        """
+        Method: close
+            Finish the queued tasks, then stop the background thread.
+            Without waiting, the tasks are finished after close returns,
+            by a stopper thread that is not a daemon, so the process does
+            not exit before them; a later close waits for them.
+        Parameter:
+            wait (bool) -- whether to wait for the queued tasks
+        Return: nothing
+        """
+
+        if self.thread is not None:
+            self.stopper = threading.Thread(target=self.stop,
+                                            args=(self.thread,))
+            self.thread = None
+            self.stopper.start()
+        if wait and self.stopper is not None:
+            self.stopper.join()
+
+    def stop(self, thread):
+        """
+        Method: stop
+            Stop the background thread after the queued tasks, and wait
+            for it, in the stopper thread.
+        Parameter:
+            thread (threading.Thread) -- the background thread
+        Return: nothing
+        """
+
+        self.tasks.put(None)
+        thread.join()
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of PersistenceWorker instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tQueued tasks: {}".format(self.name, self.tasks.qsize())
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current PersistenceWorker instance to another one.
+        Parameter:
+            other (PersistenceWorker) -- another instance of PersistenceWorker
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        # two workers are only equal if they are the same object
+        return self is other
+
+
+class LeaderboardShards:
+    """
+    A class that keeps one leaderboard file per game configuration, in a
+    directory. The file of a configuration is named from a digest of its
+    key, so it is found without reading anything; an index file lists
+    the configurations that have a leaderboard.
+    Attributes: name(str), directory(str), index_filename(str),
+                shards(dict)
+    Methods: __init__, load_index, get_filename, configs, __str__, __eq__
+    """
+
+    def __init__(self, directory = SHARD_DIRECTORY):
+        """
+        Method: __init__
+            Create an instance of LeaderboardShards, and its directory
+            if missing.
+        Parameter:
+            directory (str) -- the directory of the leaderboard files
+        Return: nothing
+        """
+
+        if not isinstance(directory, str):
+            raise TypeError("Directory must be a string!")
+
+        self.name = "Leaderboard Shards"
+        self.directory = directory
+        self.index_filename = os.path.join(directory, SHARD_INDEX_FILENAME)
+        os.makedirs(directory, exist_ok=True)
+
+        # dictionary: key = config key, value = leaderboard filename
+        # None until the index is first needed
+        self.shards = None
+
+    def load_index(self):
+        """
+        Method: load_index
+            Read the index of the configurations with a leaderboard.
+        Parameter: nothing
+        Return:
+            A dictionary with key = config key, value = leaderboard filename
+        """
+
+        self.shards = {}
+        try:
+            with open(self.index_filename, "r") as infile:
+                for line in infile:
+                    # an incomplete last line, from an interrupted write,
+                    # is skipped
+                    if line.endswith("\n") and "\t" in line:
+                        config, basename = line[:-1].split("\t")
+                        self.shards[config] = os.path.join(self.directory,
+                                                           basename)
+        except FileNotFoundError:
+            pass
+
+        return self.shards
+
+    def get_filename(self, config):
+        """
+        Method: get_filename
+            Get the leaderboard filename of a configuration, adding the
+            configuration to the index the first time.
+        Parameter:
+            config (str) -- the game configuration, as from get_game_config
+        Return:
+            A string representing the leaderboard filename
+        """
+
+        if not isinstance(config, str):
+            raise TypeError("Config must be a string!")
+        elif "\t" in config or "\n" in config:
+            raise ValueError("Config must be a single line without tabs!")
+
+        if self.shards is None:
+            self.load_index()
+
+        if config not in self.shards:
+            basename = "leaderboard_" + \
+                hashlib.sha256(config.encode()).hexdigest()[:16] + ".txt"
+            # other processes may add configurations at the same time
+            with lock_file(self.index_filename + LOCK_SUFFIX):
+                if config not in self.load_index():
+                    with open(self.index_filename, "a") as outfile:
+                        outfile.write(config + "\t" + basename + "\n")
+                    self.shards[config] = os.path.join(self.directory,
+                                                       basename)
+
+        return self.shards[config]
+
+    def configs(self):
+        """
+        Method: configs
+            Get the configurations with a leaderboard, from the index.
+        Parameter: nothing
+        Return:
+            A sorted list of config keys
+        """
+
+        return sorted(self.load_index())
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of LeaderboardShards instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tDirectory: {}".format(self.name, self.directory)
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current LeaderboardShards instance to another one.
+        Parameter:
+            other (LeaderboardShards) -- another instance of LeaderboardShards
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, LeaderboardShards) and \
+               os.path.abspath(self.directory) == os.path.abspath(other.directory)
+
+
+def read_records(text):
+    """
+    Function: read_records
+        Read the records of a leaderboard file: a line of player's name,
+        then a line of score, for each record.
+    Parameter:
+        text (str) -- the text of the file
+    Return:
+        A 2-tuple: a list of [player, score] records, with score as str;
+        and a boolean, whether the text ended with a complete record
+    """
+
+    lines = text.split("\n")
+    # the text after the last newline is incomplete, or empty
+    complete = lines.pop() == "" and len(lines) % 2 == 0
+    records = []
+    for i in range(0, len(lines) - 1, 2):
+        try:
+            int(lines[i + 1])
+        except ValueError:
+            return records, False
+        records.append([lines[i], lines[i + 1]])
+
+    return records, complete
+
+
+def write_records(records):
+    """
+    Function: write_records
+        Write records in the leaderboard file format.
+    Parameter:
+        records (list) -- a list of [player, score] records, with score as str
+    Return:
+        A string of the file text
+    """
+
+    return "".join(player + "\n" + score + "\n" for player, score in records)
+
+
+def get_journal_header(snapshot):
+    """
+    Function: get_journal_header
+        Get the first line of the journal following a snapshot.
+    Parameter:
+        snapshot (str) -- the text of the snapshot
+    Return:
+        A string of the header line
+    """
+
+    return JOURNAL_HEADER + hashlib.sha256(snapshot.encode()).hexdigest() + "\n"
+
+
+def write_atomic(filename, text):
+    """
+    Function: write_atomic
+        Write a file through a temporary file renamed over it,
+        so the file is never seen half-written.
+    Parameters:
+        filename (str) -- the filename
+        text (str or bytes) -- the text of the file, or its bytes
+    Return: nothing
+    """
+
+    # a temporary file of its own, in the same directory to be renamed
+    directory, basename = os.path.split(filename)
+    handle, temp_filename = tempfile.mkstemp(prefix=basename + ".",
+                                             suffix=".tmp",
+                                             dir=directory or ".")
+    try:
+        with os.fdopen(handle, "wb" if isinstance(text, bytes) else "w") \
+                as outfile:
+            outfile.write(text)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+
+@contextmanager
+def lock_file(filename, blocking = True):
+    """
+    Function: lock_file
+        Hold an exclusive lock on a lock file, shared by every process,
+        for the body of a with statement.
+    Parameters:
+        filename (str) -- the lock filename, created if missing
+        blocking (bool) -- whether to wait for the lock, or to raise
+                           BlockingIOError if another holder has it
+    Return:
+        A context manager
+    """
+
+    with open(filename, "a") as lockfile:
+        if fcntl is not None:
+            fcntl.flock(lockfile.fileno(), fcntl.LOCK_EX if blocking
+                        else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lockfile.seek(0)
+            try:
+                msvcrt.locking(lockfile.fileno(), msvcrt.LK_LOCK if blocking
+                               else msvcrt.LK_NBLCK, 1)
+            except OSError:
+                if blocking:
+                    raise
+                raise BlockingIOError("The lock is held by another holder!")
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lockfile.fileno(), fcntl.LOCK_UN)
+            else:
+                lockfile.seek(0)
+                msvcrt.locking(lockfile.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def get_file_fingerprint(filenames):
+    """
+    Function: get_file_fingerprint
+        Get a cheap fingerprint of files, from their modification times
+        and sizes, which changes when any of them is written.
+    Parameter:
+        filenames (list of str) -- the filenames
+    Return:
+        A tuple with one (modification time in ns, size) per file,
+        or None for a missing file
+    """
+
+    fingerprint = []
+    for filename in filenames:
+        try:
+            status = os.stat(filename)
+            fingerprint.append((status.st_mtime_ns, status.st_size))
+        except FileNotFoundError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+
+def save_records(filename, records):
+    """
+    Function: save_records
+        Save records to a leaderboard file atomically.
+    Parameters:
+        filename (str) -- the leaderboard filename
+        records (list) -- a list of [player, score] records, with score as str
+    Return:
+        A tuple, the fingerprint of the saved file
+    """
+
+    write_atomic(filename, write_records(records))
+    return get_file_fingerprint([filename])
@@ -6,34 +6,59 @@
     Create the game model of the Mastermind game.
 """
 
+import hashlib
 import random
+from array import array
+from bisect import bisect_left
+from itertools import repeat
+from operator import add, mul
+from mastermind_game_score import CodeArray, PACKED_LENGTH_LIMIT, \
+    get_code_array, get_score_table
 
 COLORS = ["red", "blue", "green", "yellow", "purple", "black", ""]
 CODE_LENGTH = 4
 MAX_GUESS = 10
+HISTOGRAM_LENGTH = 8  # the shortest code scored with color-count histograms
+TRACKER_LIMIT = 2 ** 20  # the largest code space whose candidates are tracked
+STATUS_NAMES = ["running", "win", "lost"]  # the game status of each status byte
+
+# byte translation tables: running status -> 1 or 255, otherwise 0
+_RUNNING_TABLE = bytes([1] + [0] * 255)
+_RUNNING_MASK_TABLE = bytes([255] + [0] * 255)
 
 
 class GameModel:
     """
     A class that implement the Mastermind game rules.
     Attributes: name(str), code(list), code_range(list of str), guess(list of str),
-                max_guess(int), score(int), bull_num(int), cow_num(int)
+                max_guess(int), score(int), bull_num(int), cow_num(int),
+                history(list of tuple), track_candidates(bool), candidates(CandidateTracker),
+                rng(random.Random or the random module)
     Methods: __init__, create_code, update, check_status, restart, __str__, __eq__
     """
 
-    def __init__(self, max_guess = MAX_GUESS, code_range = COLORS):
+    def __init__(self, max_guess = MAX_GUESS, code_range = COLORS,
+                 track_candidates = False, rng = None):
         """
         Method: __init__
             Create an instance of GameModel.
         Parameters:
             max_guess (int) -- the maximum guess allowed in the game
             code_range (list) -- the range of the code values            
+            track_candidates (bool) -- whether to track the codes still
+                                       consistent with all feedback
+            rng (random.Random) -- the random number generator of the codes,
+                                   the global random module if not given
         Return: nothing
         """
 
         if not (isinstance(max_guess, int) and isinstance(code_range, list)):
             raise TypeError("Max guess and code range arguments must be" +
                             "integer and list!")
+        elif not isinstance(track_candidates, bool):
+            raise TypeError("Track candidates argument must be bool!")
+        elif rng is not None and not isinstance(rng, random.Random):
+            raise TypeError("Rng argument must be of random.Random class!")
         elif max_guess < 0:
             raise ValueError("Argument must be non-negative!")
 
@@ -50,6 +75,14 @@ class GameModel:
         self.score = 0
         self.bull_num = 0
         self.cow_num = 0
+        # the guesses played, with their bulls and cows, oldest first
+        self.history = []
+
+        # the CandidateTracker of the current code, if tracking candidates
+        self.track_candidates = track_candidates
+        self.candidates = None
+
+        self.rng = random if rng is None else rng
 
     def create_code(self, length = CODE_LENGTH):
         """
@@ -67,13 +100,17 @@ class GameModel:
         elif length <= 0:
             raise ValueError("The length of code must be positive!")
 
-        self.code = random.choices(self.code_range, k=length)
+        self.code = self.rng.choices(self.code_range, k=length)
         #print(self.code)
 
+        if self.track_candidates:
+            self.candidates = CandidateTracker(self.code_range, length)
+
     def update(self, guess):
         """
         Method: update
-            Update the guess with its bulls and cows, and the current score.
+            Update the guess with its bulls and cows, the guess history,
+            and the current score.
         Parameter:
             guess (list) -- the code-guess from the player
         Return: nothing
@@ -86,11 +123,18 @@ class GameModel:
             raise ValueError("The guess argument must have" +
                              " the same length of the code!")
 
+        elif self.candidates is not None and \
+                not set(guess).issubset(self.code_range):
+            raise ValueError("The guess is not contained in the code range!")
+
         elif self.score < self.max_guess:
             self.score += 1
             self.guess = guess
-            self.bull_num, self.cow_num = count_bulls_and_cows(
-                self.code, self.guess)
+            self.bull_num, self.cow_num = score_guess(
+                self.code, self.guess, self.code_range)
+            self.history.append((guess, self.bull_num, self.cow_num))
+            if self.candidates is not None:
+                self.candidates.update(guess, self.bull_num, self.cow_num)
 
     def check_status(self):
         """
@@ -111,15 +155,17 @@ class GameModel:
     def restart(self):
         """
         Method: restart
-            Restart the game model, including code recreation;
-            guess, score, bull_num, and cow_num reset.
+            Restart the game model, including code recreation
+            of the same length; guess, score, bull_num, cow_num,
+            the guess history, and the tracked candidates reset.
         Parameter: nothing
         Return: nothing  
         """
 
-        self.create_code()
+        self.create_code(len(self.code) or CODE_LENGTH)
         self.guess = []
         self.score, self.bull_num, self.cow_num = 0, 0, 0
+        self.history = []
 
     def __str__(self):
         """
@@ -148,6 +194,361 @@ class GameModel:
                self.guess == other.guess and self.score == other.score
 
 
+class GameBatch:
+    """
+    A class that plays many games of the Mastermind game rules at once.
+    The games are kept in parallel arrays instead of one GameModel each:
+    the secret codes as a CodeArray, and one lane per game for the score,
+    the bulls, the cows, and the status (an index of STATUS_NAMES).
+    Every method works on the whole batch with lane operations.
+    Attributes: name(str), game_num(int), code_range(list of str),
+                length(int), max_guess(int),
+                rng(random.Random or the random module), codes(CodeArray),
+                scores(array of int), bull_nums(bytes), cow_nums(bytes),
+                statuses(bytes)
+    Methods: __init__, create_codes, update_all, update_status,
+             check_status_all, restart, __len__, __str__, __eq__
+    """
+
+    def __init__(self, game_num, max_guess = MAX_GUESS, code_range = COLORS,
+                 length = CODE_LENGTH, rng = None):
+        """
+        Method: __init__
+            Create an instance of GameBatch, with a random code for each game.
+        Parameters:
+            game_num (int) -- the number of games
+            max_guess (int) -- the maximum guess allowed in each game
+            code_range (list) -- the range of the code values
+            length (int) -- the length of the codes
+            rng (random.Random) -- the random number generator of the codes,
+                                   the global random module if not given
+        Return: nothing
+        """
+
+        if not (isinstance(game_num, int) and isinstance(max_guess, int) and
+                isinstance(code_range, list) and isinstance(length, int)):
+            raise TypeError("Game number, max guess, code range and length " +
+                            "arguments must be integer, integer, list " +
+                            "and integer!")
+        elif rng is not None and not isinstance(rng, random.Random):
+            raise TypeError("Rng argument must be of random.Random class!")
+        elif game_num < 0 or max_guess < 0:
+            raise ValueError("Arguments must be non-negative!")
+        elif len(code_range) == 0:
+            raise ValueError("Code range cannot be empty list!")
+        elif not 0 < length <= PACKED_LENGTH_LIMIT:
+            raise ValueError("The length of code must be between 1 and " +
+                             str(PACKED_LENGTH_LIMIT) + "!")
+
+        self.name = "Mastermind Game Batch"
+        self.game_num = game_num
+        self.code_range = code_range
+        self.length = length
+        self.max_guess = max_guess
+        self.rng = random if rng is None else rng
+
+        self.restart()
+
+    def create_codes(self):
+        """
+        Method: create_codes
+            Create a randomized code for every game.
+            Duplicate and blanks in the codes are allowed.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        color_num = len(dict.fromkeys(self.code_range))
+        digits = [bytes(self.rng.choices(range(color_num), k=self.game_num))
+                  for position in range(self.length)]
+
+        codes = repeat(0, self.game_num)
+        for each in digits:
+            codes = map(add, map(mul, codes, repeat(color_num)), each)
+        self.codes = CodeArray(self.code_range, self.length, codes, digits)
+
+    def update_all(self, guesses):
+        """
+        Method: update_all
+            Update every running game with its guess: the bulls and cows,
+            and the score. Games already won or lost are left as they are.
+        Parameter:
+            guesses (CodeArray or list) -- one guess for each game: a CodeArray,
+                                           or a list of encoded guesses
+                                           or color guesses
+        Return: nothing
+        """
+
+        if isinstance(guesses, list):
+            try:
+                guesses = CodeArray(self.code_range, self.length,
+                                    [self.codes.encode(guess)
+                                     if isinstance(guess, list) else guess
+                                     for guess in guesses])
+            except KeyError:
+                raise ValueError("The guess is not contained in the code range!")
+            except OverflowError:
+                raise ValueError("The guess is out of the code space!")
+            if len(guesses) > 0 and \
+                    max(guesses.codes) >= self.codes.color_num ** self.length:
+                raise ValueError("The guess is out of the code space!")
+        elif not isinstance(guesses, CodeArray):
+            raise TypeError("Argument must be list or CodeArray!")
+
+        if len(guesses) != self.game_num:
+            raise ValueError("The guesses must be one for each game!")
+
+        packed = self.codes.score_each(guesses)
+        bull_table = bytes(value // (self.length + 1) for value in range(256))
+        cow_table = bytes(value % (self.length + 1) for value in range(256))
+
+        # only the lanes of running games take the new bulls and cows
+        size = self.game_num
+        mask = int.from_bytes(self.statuses.translate(_RUNNING_MASK_TABLE),
+                              "little")
+        keep = ((1 << (8 * size)) - 1) ^ mask
+        self.bull_nums = ((int.from_bytes(packed.translate(bull_table), "little")
+                           & mask) |
+                          (int.from_bytes(self.bull_nums, "little") & keep)
+                          ).to_bytes(size, "little")
+        self.cow_nums = ((int.from_bytes(packed.translate(cow_table), "little")
+                          & mask) |
+                         (int.from_bytes(self.cow_nums, "little") & keep)
+                         ).to_bytes(size, "little")
+        self.scores = array("I", map(add, self.scores,
+                                     self.statuses.translate(_RUNNING_TABLE)))
+
+        self.update_status()
+
+    def update_status(self):
+        """
+        Method: update_status
+            Update the status of every game: "win" if the bulls are the
+            code length, "lost" if max_guess is used up without a win,
+            otherwise "running".
+        Parameter: nothing
+        Return: nothing
+        """
+
+        size = self.game_num
+        win_table = bytes(int(value == self.length) for value in range(256))
+        wins = int.from_bytes(self.bull_nums.translate(win_table), "little")
+        used_up = int.from_bytes(bytes(map(self.max_guess.__eq__, self.scores)),
+                                 "little")
+        self.statuses = (wins + 2 * (used_up & ~wins)).to_bytes(size, "little")
+
+    def check_status_all(self):
+        """
+        Method: check_status_all
+            Check the current status of every game.
+        Parameter: nothing
+        Return:
+            A list of strings representing the game statuses:
+            "win", "lost", or "running"
+        """
+
+        return list(map(STATUS_NAMES.__getitem__, self.statuses))
+
+    def restart(self):
+        """
+        Method: restart
+            Restart every game, including code recreation; score, bull_num,
+            cow_num and status reset.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.create_codes()
+        self.scores = array("I", bytes(4 * self.game_num))
+        self.bull_nums = bytes(self.game_num)
+        self.cow_nums = bytes(self.game_num)
+        self.update_status()
+
+    def __len__(self):
+        """
+        Method: __len__
+            Get the number of games of the batch.
+        Parameter: nothing
+        Return:
+            An integer representing the number of games
+        """
+
+        return self.game_num
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of GameBatch instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tGames: {}\tRunning: {}\tWon: {}\tLost: {}".format(
+            self.name, self.game_num, self.statuses.count(0),
+            self.statuses.count(1), self.statuses.count(2))
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current GameBatch instance to another one.
+            Two instances are equal if they have the same codes, scores,
+            bulls and cows.
+        Parameter:
+            other (GameBatch) -- another instance of GameBatch
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, GameBatch) and self.codes == other.codes and \
+               self.scores == other.scores and \
+               self.bull_nums == other.bull_nums and \
+               self.cow_nums == other.cow_nums
+
+
+class CandidateTracker:
+    """
+    A class that tracks the codes still consistent with all feedback of a game,
+    narrowing a compact array of encoded codes on every update.
+    Each update only scores the codes that survived the previous one.
+    Attributes: code_range(list of str), length(int), codes(CodeArray)
+    Methods: __init__, update, reset, __len__, __iter__, __contains__,
+             __str__, __eq__
+    """
+
+    def __init__(self, code_range, length):
+        """
+        Method: __init__
+            Create an instance of CandidateTracker, with every code consistent.
+        Parameters:
+            code_range (list) -- the range of the code values
+            length (int) -- the length of the code
+        Return: nothing
+        """
+
+        if not (isinstance(code_range, list) and isinstance(length, int)):
+            raise TypeError("Code range and length arguments must be " +
+                            "list and integer!")
+        elif len(code_range) == 0:
+            raise ValueError("Code range cannot be empty list!")
+        elif length <= 0:
+            raise ValueError("The length of code must be positive!")
+        elif len(set(code_range)) ** length > TRACKER_LIMIT:
+            raise ValueError("The code space is too large to track!")
+
+        self.code_range = code_range
+        self.length = length
+        self.codes = get_code_array(code_range, length)
+
+    def update(self, guess, bull_num, cow_num):
+        """
+        Method: update
+            Keep only the codes that give the same bulls and cows to the guess.
+        Parameters:
+            guess (list of str) -- the code-guess from the player
+            bull_num (int) -- the number of bulls of the guess
+            cow_num (int) -- the number of cows of the guess
+        Return: nothing
+        """
+
+        self.codes = self.codes.filter(guess, bull_num, cow_num)
+
+    def reset(self):
+        """
+        Method: reset
+            Make every code consistent again.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.codes = get_code_array(self.code_range, self.length)
+
+    def __len__(self):
+        """
+        Method: __len__
+            Get the number of codes still consistent.
+        Parameter: nothing
+        Return:
+            An integer representing the number of consistent codes
+        """
+
+        return len(self.codes)
+
+    def __iter__(self):
+        """
+        Method: __iter__
+            Iterate over the codes still consistent, in encoded order.
+        Parameter: nothing
+        Return:
+            An iterator of lists of str
+        """
+
+        return map(self.codes.decode, self.codes.codes)
+
+    def __contains__(self, code):
+        """
+        Method: __contains__
+            Check whether a code is still consistent.
+        Parameter:
+            code (list of str) -- the color code
+        Return:
+            A boolean representing whether the code is consistent
+        """
+
+        try:
+            index = self.codes.encode(code)
+        except (KeyError, ValueError):
+            return False
+
+        # the codes are in ascending order
+        position = bisect_left(self.codes.codes, index)
+        return position < len(self.codes) and self.codes.codes[position] == index
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of CandidateTracker instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "Candidate Tracker\tCandidates: {}".format(len(self.codes))
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current CandidateTracker instance to another one.
+        Parameter:
+            other (CandidateTracker) -- another instance of CandidateTracker
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, CandidateTracker) and self.codes == other.codes
+
+
+def game_seed(master_seed, game_index):
+    """
+    Function: game_seed
+        Split the master seed of a batch run into the seed of one game.
+        The seed is a hash of both numbers, so every game has its own
+        independent stream, whichever worker process plays it.
+    Parameters:
+        master_seed (int) -- the seed of the whole run
+        game_index (int) -- the index of the game in the run
+    Return:
+        A 64-bit integer seed
+    """
+
+    if not (isinstance(master_seed, int) and isinstance(game_index, int)):
+        raise TypeError("Master seed and game index must be integers!")
+
+    digest = hashlib.sha256("{}:{}".format(master_seed, game_index)
+                            .encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
 def count_bulls_and_cows(secret_code, guess):
     """
     Function: count_bulls_and_cows
@@ -161,8 +562,8 @@ def count_bulls_and_cows(secret_code, guess):
         A 2-tuple containing the number of bulls and cows
     """
 
-    # SAME as the function count_bulls_and_cows in mastermind_game.py
-    # Repeat this function here to AVOID circular import
+    # count_bulls_and_cows in mastermind_game.py delegates to score_guess,
+    # which falls back to this function
 
     if not (isinstance(secret_code, list) and isinstance(guess, list)):
         raise TypeError("Color code and color guess must be lists!")
@@ -190,3 +591,97 @@ def count_bulls_and_cows(secret_code, guess):
                 code_copy.remove(each)
 
     return bull_num, cow_num
+
+
+def count_bulls_and_cows_histogram(secret_code, guess):
+    """
+    Function: count_bulls_and_cows_histogram
+        Calculate the num of bulls and cows in mastermind game with
+        color-count histograms: one pass over the positions counts the bulls
+        and the colors of the other positions, then the cows are the shared
+        counts of each color. It takes O(length + colors) time, so long codes
+        don't pay for the list.remove scans of count_bulls_and_cows.
+    Parameters:
+        secret_code (list of str) -- the color code generated from GameModel
+        guess (list of str) -- the color guess from the player
+    Return:
+        A 2-tuple containing the number of bulls and cows
+    """
+
+    if not (isinstance(secret_code, list) and isinstance(guess, list)):
+        raise TypeError("Color code and color guess must be lists!")
+
+    elif len(secret_code) != len(guess):
+        raise ValueError("The length of color code and color guess must be equal!")
+
+    bull_num, cow_num = 0, 0
+    # dictionary: key = color, value = count of the color out of the bulls
+    code_counts, guess_counts = {}, {}
+
+    for code_color, guess_color in zip(secret_code, guess):
+        if code_color == guess_color:
+            bull_num += 1
+        else:
+            code_counts[code_color] = code_counts.get(code_color, 0) + 1
+            guess_counts[guess_color] = guess_counts.get(guess_color, 0) + 1
+
+    # each color is a cow as many times as both sides have it left
+    for color, count in code_counts.items():
+        cow_num += min(count, guess_counts.get(color, 0))
+
+    return bull_num, cow_num
+
+
+def count_bulls_and_cows_batch(secret_codes, guess, code_range = COLORS):
+    """
+    Function: count_bulls_and_cows_batch
+        Calculate the num of bulls and cows of one guess against many secret
+        codes in a single pass over their per-position and per-color lanes.
+    Parameters:
+        secret_codes (CodeArray or iterable of int) -- the encoded secret codes
+        guess (list of str) -- the color guess from the player
+        code_range (list) -- the range of the code values
+    Return:
+        A list of 2-tuples containing the number of bulls and cows,
+        one for each secret code
+    """
+
+    if not isinstance(guess, list):
+        raise TypeError("Color guess must be a list!")
+
+    # reuse the lanes of a CodeArray instead of decoding the codes again
+    if not isinstance(secret_codes, CodeArray):
+        secret_codes = CodeArray(code_range, len(guess), secret_codes)
+
+    return secret_codes.count(guess)
+
+
+def score_guess(secret_code, guess, code_range = COLORS):
+    """
+    Function: score_guess
+        Look up the num of bulls and cows in the shared score table of the
+        game configuration. If the configuration has no score table or the
+        codes are out of the range, count them with
+        count_bulls_and_cows_histogram for codes of HISTOGRAM_LENGTH or longer,
+        and with count_bulls_and_cows for shorter ones.
+    Parameters:
+        secret_code (list of str) -- the color code generated from GameModel
+        guess (list of str) -- the color guess from the player
+        code_range (list) -- the range of the code values
+    Return:
+        A 2-tuple containing the number of bulls and cows
+    """
+
+    if isinstance(secret_code, list) and isinstance(guess, list):
+        table = get_score_table(code_range, len(secret_code))
+        if table is not None:
+            try:
+                return table.count(secret_code, guess)
+            # a color out of the code range, or a guess of another length
+            except (KeyError, ValueError):
+                pass
+
+        if len(secret_code) >= HISTOGRAM_LENGTH:
+            return count_bulls_and_cows_histogram(secret_code, guess)
+
+    return count_bulls_and_cows(secret_code, guess)
@@ -0,0 +1,208 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Parallel Evaluation
+    Share out the guess evaluation of the Mastermind game solvers to
+    worker processes.
+"""
+
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from mastermind_game_model import GameModel
+from mastermind_game_solver import Solver
+
+# dictionary: key = (code range, code length), value = Solver of a worker
+_worker_solvers = {}
+
+
+class ParallelEvaluator:
+    """
+    A class that counts the partitions of a Solver's guesses in a pool of
+    worker processes. The guesses are split into one shard per worker;
+    the encoded candidates are put once in shared memory, which every
+    worker reads instead of getting a pickled copy.
+    Attributes: name(str), worker_num(int), executor(ProcessPoolExecutor)
+    Methods: __init__, partition_counts, close, __str__, __eq__
+    """
+
+    def __init__(self, worker_num = None):
+        """
+        Method: __init__
+            Create an instance of ParallelEvaluator and start its workers.
+        Parameter:
+            worker_num (int) -- the number of worker processes,
+                                the number of CPUs if not given
+        Return: nothing
+        """
+
+        if worker_num is None:
+            worker_num = os.cpu_count() or 1
+        if not isinstance(worker_num, int):
+            raise TypeError("Worker number must be an integer!")
+        elif worker_num < 1:
+            raise ValueError("Worker number must be positive!")
+
+        self.name = "Parallel Evaluator"
+        self.worker_num = worker_num
+        self.executor = ProcessPoolExecutor(worker_num)
+
+    def partition_counts(self, solver, guesses = None):
+        """
+        Method: partition_counts
+            Count how the candidates of a Solver split by the feedback to
+            each guess, one shard of guesses per worker.
+        Parameters:
+            solver (Solver) -- the Solver whose candidates are split
+            guesses (list or range of int) -- the encoded guesses to count,
+                                              every code if not given
+        Return:
+            A list with one list per feedback in the Solver's score_values,
+            as returned by Solver.partition_counts
+        """
+
+        if not isinstance(solver, Solver):
+            raise TypeError("Argument must be of Solver class!")
+        elif self.executor is None:
+            raise ValueError("The evaluator is closed!")
+
+        guesses = range(len(solver.codes)) if guesses is None else guesses
+        candidates = array("Q", solver.candidates.codes)
+        config = (solver.codes.code_range, solver.length)
+
+        memory = shared_memory.SharedMemory(create=True,
+                                            size=max(1, len(candidates) * 8))
+        try:
+            memory.buf[:len(candidates) * 8] = candidates.tobytes()
+            shard_num = min(self.worker_num, max(1, len(guesses)))
+            futures = [self.executor.submit(
+                count_shard, config, memory.name, len(candidates),
+                guesses[i * len(guesses) // shard_num:
+                        (i + 1) * len(guesses) // shard_num])
+                for i in range(shard_num)]
+
+            counts = [[] for value in solver.score_values]
+            for future in futures:
+                for each, shard_counts in zip(counts, future.result()):
+                    each.extend(shard_counts)
+        finally:
+            memory.close()
+            memory.unlink()
+
+        return counts
+
+    def close(self):
+        """
+        Method: close
+            Stop the worker processes.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of ParallelEvaluator instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tWorkers: {}".format(self.name, self.worker_num)
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current ParallelEvaluator instance to another one.
+        Parameter:
+            other (ParallelEvaluator) -- another instance of ParallelEvaluator
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, ParallelEvaluator) and \
+               self.worker_num == other.worker_num
+
+
+def count_shard(config, memory_name, candidate_num, guesses):
+    """
+    Function: count_shard
+        Count the partitions of one shard of guesses, in a worker process.
+        The worker keeps one Solver per configuration over the calls,
+        so its score table is built once.
+    Parameters:
+        config (tuple) -- the code range and code length of the Solver
+        memory_name (str) -- the name of the shared memory of the candidates
+        candidate_num (int) -- the number of candidates
+        guesses (list or range of int) -- the encoded guesses of the shard
+    Return:
+        A list with one list per feedback in score_values, holding the
+        number of candidates with that feedback for each guess of the shard
+    """
+
+    code_range, length = config
+    key = (tuple(code_range), length)
+    if key not in _worker_solvers:
+        model = GameModel(code_range = code_range)
+        model.code = [code_range[0]] * length
+        _worker_solvers[key] = Solver(model)
+    solver = _worker_solvers[key]
+
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        view = memory.buf[:candidate_num * 8].cast("Q")
+        # the whole code space is in order, so a code is its own position
+        solver.candidates = solver.codes.take(view)
+        view.release()
+    finally:
+        memory.close()
+
+    return solver.partition_counts(guesses)
+
+
+def measure_speedup(solver, worker_nums, guesses = None):
+    """
+    Function: measure_speedup
+        Time the partition counts of a Solver's current candidates with
+        different numbers of workers, against counting in this process.
+    Parameters:
+        solver (Solver) -- the Solver to measure
+        worker_nums (list of int) -- the numbers of workers to try
+        guesses (list or range of int) -- the encoded guesses to count,
+                                          every code if not given
+    Return:
+        A list with one list per number of workers: [number of workers,
+        seconds, speedup over counting in this process]
+    """
+
+    if not isinstance(worker_nums, list):
+        raise TypeError("Worker numbers argument must be a list!")
+
+    evaluator = solver.evaluator
+    solver.evaluator = None
+    start = time.perf_counter()
+    solver.partition_counts(guesses)
+    serial_time = time.perf_counter() - start
+    solver.evaluator = evaluator
+
+    results = []
+    for worker_num in worker_nums:
+        parallel = ParallelEvaluator(worker_num)
+        try:
+            # the first call starts the workers and builds their tables
+            parallel.partition_counts(solver, guesses)
+            start = time.perf_counter()
+            parallel.partition_counts(solver, guesses)
+            seconds = time.perf_counter() - start
+        finally:
+            parallel.close()
+        results.append([worker_num, seconds, serial_time / seconds])
+
+    return results
@@ -0,0 +1,403 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Leaderboard Persistence
+    Keep the leaderboard of the Mastermind game controller in one storage:
+    the leaderboard file, a journal, a background worker or a database.
+"""
+
+from mastermind_game_leaderboard import Leaderboard, SharedLeaderboard, \
+    get_file_fingerprint
+from mastermind_game_database import get_game_config
+
+
+class FilePersistence:
+    """
+    A class that keeps the leaderboard of a Controller in the leaderboard
+    file, rewritten when a win changes the top leaders.
+    The other storages only change what differs from the file.
+    Attributes: controller(Controller)
+    Methods: __init__, get_config, get_fingerprint, load_records,
+             read_leaderboard, is_loaded, is_changed, refresh, save_game
+    """
+
+    def __init__(self, controller):
+        """
+        Method: __init__
+            Create an instance of FilePersistence.
+        Parameter:
+            controller (Controller) -- the Controller of the leaderboard
+        Return: nothing
+        """
+
+        self.controller = controller
+
+    def get_config(self):
+        """
+        Method: get_config
+            Get the game configuration whose leaders are kept; a leaderboard
+            file holds its own configuration's leaders.
+        Parameter: nothing
+        Return:
+            A string representing the configuration, or None
+        """
+
+        return None
+
+    def get_fingerprint(self):
+        """
+        Method: get_fingerprint
+            Get a cheap fingerprint of the storage, which changes when
+            another process writes it: the modification time and size
+            of the leaderboard file.
+        Parameter: nothing
+        Return:
+            A tuple representing the fingerprint
+        """
+
+        return get_file_fingerprint([self.controller.leaders_filename])
+
+    def load_records(self, filename):
+        """
+        Method: load_records
+            Retrieve data list from leaderboard file;
+            if the file don't exist, create a new file.
+        Parameter:
+            filename (str) -- the leaderboard filename, storing previous records
+        Return:
+            A list representing the data retrieved from the leaderboard file
+        """
+
+        leaders_list = []
+        try:
+            with open(filename, "r") as infile:
+                name = infile.readline().strip("\n")
+                score = infile.readline().strip("\n")
+                while name != "":  # not reach the end of file
+                    leaders_list.append([name, score])
+                    name = infile.readline().strip("\n")
+                    score = infile.readline().strip("\n")
+
+        except FileNotFoundError:
+            outfile = open(filename, "w")
+            outfile.close()
+
+        return leaders_list
+
+    def read_leaderboard(self, filename):
+        """
+        Method: read_leaderboard
+            Read the leaderboard of a leaderboard file.
+        Parameter:
+            filename (str) -- the leaderboard filename, storing previous records
+        Return:
+            A Leaderboard holding the top leaders' records
+        """
+
+        leaderboard = Leaderboard(self.controller.leader_num)
+        leaderboard.extend(self.load_records(filename))
+        return leaderboard
+
+    def is_loaded(self, filename):
+        """
+        Method: is_loaded
+            Check whether the leaderboard of a file can be got now;
+            a file is read when it is got.
+        Parameter:
+            filename (str) -- the leaderboard filename, storing previous records
+        Return:
+            A boolean representing whether the leaderboard can be got
+        """
+
+        return True
+
+    def is_changed(self):
+        """
+        Method: is_changed
+            Check whether another process changed the storage since it
+            was last read or written.
+        Parameter: nothing
+        Return:
+            A boolean representing whether the storage changed
+        """
+
+        return self.get_fingerprint() != self.controller.leaders_fingerprint
+
+    def refresh(self):
+        """
+        Method: refresh
+            Bring the storage up to date before the leaderboard is read
+            again; a leaderboard file needs nothing.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        pass
+
+    def save_game(self, infile_name, outfile_name):
+        """
+        Method: save_game
+            Save the finished game of the Controller: a win is inserted in
+            the leaderboard, and the file is only written when the win
+            changes the top leaders.
+        Parameters:
+            infile_name (str) -- the leaderboard filename storing previous records
+            outfile_name (str) -- the leaderboard filename storing updated records
+        Return: nothing
+        """
+
+        controller = self.controller
+        if controller.game_status != "win":
+            return
+
+        leaderboard = controller.get_leaderboard(infile_name)
+        if leaderboard.insert(controller.player, controller.model.score):
+            controller.save_leaderboard_file(leaderboard.records(),
+                                             outfile_name)
+            controller.leaders_filename = outfile_name
+            controller.leaders_fingerprint = self.get_fingerprint()
+
+
+class JournalPersistence(FilePersistence):
+    """
+    A class that keeps the leaderboard of a Controller in a leaderboard
+    journal, the wins being appended instead of rewriting the file.
+    Attributes: controller(Controller), journal(LeaderboardJournal)
+    Methods: __init__, get_fingerprint, read_leaderboard, refresh, save_game
+    """
+
+    def __init__(self, controller, journal):
+        """
+        Method: __init__
+            Create an instance of JournalPersistence.
+        Parameters:
+            controller (Controller) -- the Controller of the leaderboard
+            journal (LeaderboardJournal) -- the journal of the leaderboard file
+        Return: nothing
+        """
+
+        super().__init__(controller)
+        self.journal = journal
+
+    def get_fingerprint(self):
+        """
+        Method: get_fingerprint
+            Get the fingerprint of the leaderboard file and its journal.
+        Parameter: nothing
+        Return:
+            A tuple representing the fingerprint
+        """
+
+        return get_file_fingerprint([self.journal.filename,
+                                     self.journal.journal_filename])
+
+    def read_leaderboard(self, filename):
+        """
+        Method: read_leaderboard
+            Get the journal's leaderboard, or read another leaderboard file.
+        Parameter:
+            filename (str) -- the leaderboard filename, storing previous records
+        Return:
+            A Leaderboard holding the top leaders' records
+        """
+
+        if self.journal.filename == filename:
+            return self.journal.get_leaderboard()
+        return super().read_leaderboard(filename)
+
+    def refresh(self):
+        """
+        Method: refresh
+            Load the journal again, or with a shared leaderboard's pending
+            records, flush them, which merges the records on disk.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        if self.journal.filename != self.controller.leaders_filename:
+            return
+
+        if isinstance(self.journal, SharedLeaderboard) and self.journal.pending:
+            self.journal.flush()
+        else:
+            self.journal.load()
+
+    def save_game(self, infile_name, outfile_name):
+        """
+        Method: save_game
+            Append a win of the Controller to the journal.
+        Parameters:
+            infile_name (str) -- the leaderboard filename storing previous records
+            outfile_name (str) -- the leaderboard filename storing updated records
+        Return: nothing
+        """
+
+        controller = self.controller
+        if controller.game_status != "win":
+            return
+
+        self.journal.append(controller.player, controller.model.score)
+        controller.leaderboard = self.journal.get_leaderboard()
+        controller.leaders_filename = self.journal.filename
+        controller.leaders_fingerprint = self.get_fingerprint()
+
+
+class WorkerPersistence(FilePersistence):
+    """
+    A class that keeps the leaderboard of a Controller in the leaderboard
+    file, loaded and saved by a background worker, so no call waits on
+    the disk. The results are taken by the Controller's poll_worker.
+    Attributes: controller(Controller), worker(PersistenceWorker)
+    Methods: __init__, is_loaded, is_changed, save_game
+    """
+
+    def __init__(self, controller, worker):
+        """
+        Method: __init__
+            Create an instance of WorkerPersistence.
+        Parameters:
+            controller (Controller) -- the Controller of the leaderboard
+            worker (PersistenceWorker) -- the worker of the leaderboard file
+        Return: nothing
+        """
+
+        super().__init__(controller)
+        self.worker = worker
+
+    def is_loaded(self, filename):
+        """
+        Method: is_loaded
+            Check whether the leaderboard of a file is loaded, asking the
+            worker for it if not.
+        Parameter:
+            filename (str) -- the leaderboard filename, storing previous records
+        Return:
+            A boolean representing whether the leaderboard is loaded
+        """
+
+        controller = self.controller
+        if controller.leaderboard is None or \
+                controller.leaders_filename != filename:
+            controller.request_leaderboard(filename)
+        return controller.leaderboard is not None and \
+            controller.leaders_filename == filename
+
+    def is_changed(self):
+        """
+        Method: is_changed
+            Ask the worker to check the leaderboard file, once; the file
+            is loaded again by poll_worker if it changed.
+        Parameter: nothing
+        Return:
+            False, as the change is only known in the background
+        """
+
+        controller = self.controller
+        if not controller.check_requested:
+            controller.check_requested = self.worker.submit(
+                "check", get_file_fingerprint, [controller.leaders_filename])
+        return False
+
+    def save_game(self, infile_name, outfile_name):
+        """
+        Method: save_game
+            Save a win of the Controller in the background; a win before
+            the leaderboard is loaded waits for it.
+        Parameters:
+            infile_name (str) -- the leaderboard filename storing previous records
+            outfile_name (str) -- the leaderboard filename storing updated records
+        Return: nothing
+        """
+
+        controller = self.controller
+        if controller.game_status != "win":
+            return
+
+        controller.pending_wins.append([controller.player,
+                                        controller.model.score, outfile_name])
+        if controller.leaderboard is not None and \
+                controller.leaders_filename == infile_name:
+            controller.apply_pending_wins()
+        else:
+            controller.request_leaderboard(infile_name)
+
+
+class DatabasePersistence(FilePersistence):
+    """
+    A class that records every finished game of a Controller in a
+    database, and reads the leaders of the game's configuration from it
+    instead of the leaderboard file.
+    Attributes: controller(Controller), database(LeaderboardDatabase)
+    Methods: __init__, get_config, get_fingerprint, load_records, save_game
+    """
+
+    def __init__(self, controller, database):
+        """
+        Method: __init__
+            Create an instance of DatabasePersistence.
+        Parameters:
+            controller (Controller) -- the Controller of the leaderboard
+            database (LeaderboardDatabase) -- the database of the games
+        Return: nothing
+        """
+
+        super().__init__(controller)
+        self.database = database
+
+    def get_config(self):
+        """
+        Method: get_config
+            Get the configuration of the current game, whose leaders are kept.
+        Parameter: nothing
+        Return:
+            A string representing the configuration, or None without a game
+        """
+
+        if self.controller.model is None:
+            return None
+        return get_game_config(self.controller.model)
+
+    def get_fingerprint(self):
+        """
+        Method: get_fingerprint
+            Get the data version of the database.
+        Parameter: nothing
+        Return:
+            A tuple representing the fingerprint
+        """
+
+        return ("database", self.database.data_version())
+
+    def load_records(self, filename):
+        """
+        Method: load_records
+            Query the top leaders of the game's configuration.
+        Parameter:
+            filename (str) -- the leaderboard filename, not used
+        Return:
+            A list representing the leaders' records, best first
+        """
+
+        return [[name, str(score)] for name, score in
+                self.database.top_leaders(self.controller.leader_num,
+                                          self.get_config())]
+
+    def save_game(self, infile_name, outfile_name):
+        """
+        Method: save_game
+            Record the finished game of the Controller, won or lost,
+            and insert a win in the in-memory leaderboard.
+        Parameters:
+            infile_name (str) -- the leaderboard filename storing previous records
+            outfile_name (str) -- the leaderboard filename storing updated records
+        Return: nothing
+        """
+
+        controller = self.controller
+        # the leaderboard is read before the game is recorded
+        leaderboard = controller.get_leaderboard(infile_name)
+        self.database.add_game(controller.player, controller.model.score,
+                               controller.game_status, self.get_config())
+        if controller.game_status == "win":
+            leaderboard.insert(controller.player, controller.model.score)
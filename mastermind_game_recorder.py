@@ -0,0 +1,587 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Session Recorder
+    Record every event of the Mastermind game sessions in a compact,
+    append-only binary log.
+"""
+
+import os
+import mmap
+import struct
+import time
+from contextlib import ExitStack
+from mastermind_game_model import GameModel, STATUS_NAMES
+from mastermind_game_leaderboard import PersistenceWorker, LOCK_SUFFIX, \
+    lock_file
+
+SESSION_FILENAME = "sessions.bin"
+SESSION_MAGIC = b"MMSR"
+SESSION_VERSION = 2
+BUFFER_SIZE = 64 * 1024  # the bytes buffered before they are written
+
+# header: magic, version
+SESSION_HEADER = struct.Struct("<4sH")
+
+# the event of each kind byte
+# open: a recorder opened the log, its sessions are numbered from 0 again
+# palette: the colors the next codes and guesses are indexes of
+EVENT_NAMES = ["open", "palette", "create", "guess", "round", "restart"]
+
+
+class SessionRecorder:
+    """
+    A class that appends the events of game sessions to a binary log:
+    the creation of a game with its secret code, each guess added, each
+    round played with its bulls and cows, and each restart.
+    A record is its kind byte, the milliseconds since the last record, the
+    session number, and the event's values, the numbers as varints and
+    the colors as indexes of the last palette written, so most records
+    take a few bytes. Records are buffered and written in whole records,
+    and written at the end of each game. A record torn by a crash is cut
+    off when the log is opened again. The session numbers, palettes and
+    times are relative to the recorder's open record, so a recorder holds
+    a lock on its log and no other recorder appends to it meanwhile.
+    With a worker, the records are written in its background thread.
+    Attributes: name(str), filename(str), buffer_size(int), buffer(bytearray),
+                lock(ExitStack), outfile(file), worker(PersistenceWorker),
+                session_num(int), last_time(int), palette(list),
+                palettes(dict)
+    Methods: __init__, add_worker, record_create, record_guess, record_round,
+             record_restart, write_record, use_palette, encode_colors, flush,
+             write_data, close, __str__, __eq__
+    """
+
+    def __init__(self, filename = SESSION_FILENAME, buffer_size = BUFFER_SIZE):
+        """
+        Method: __init__
+            Create an instance of SessionRecorder, opening the log to append,
+            creating it with its header if missing, and cutting off a
+            record torn by a crash. Raise BlockingIOError if another
+            recorder has the log open.
+        Parameters:
+            filename (str) -- the session log filename
+            buffer_size (int) -- the bytes buffered before they are written
+        Return: nothing
+        """
+
+        if not (isinstance(filename, str) and isinstance(buffer_size, int)):
+            raise TypeError("Filename and buffer size must be str and int!")
+        elif buffer_size < 0:
+            raise ValueError("Buffer size must be non-negative!")
+
+        self.name = "Session Recorder"
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+
+        # the lock on the log, held until the recorder is closed
+        self.lock = ExitStack()
+        try:
+            self.lock.enter_context(lock_file(filename + LOCK_SUFFIX,
+                                              blocking = False))
+        except BlockingIOError:
+            raise BlockingIOError("The session log is used by another recorder!")
+
+        self.outfile = open(filename, "ab+")
+        self.outfile.seek(0)
+        header = self.outfile.read(SESSION_HEADER.size)
+        full_header = SESSION_HEADER.pack(SESSION_MAGIC, SESSION_VERSION)
+        if len(header) < SESSION_HEADER.size and full_header.startswith(header):
+            # a missing log, or a header torn by a crash
+            self.outfile.truncate(0)
+            self.outfile.write(full_header)
+            self.outfile.flush()
+        elif header != full_header:
+            self.outfile.close()
+            self.lock.close()
+            raise ValueError("The file is not a valid session log!")
+        else:
+            # a record torn by a crash would end the log, and every record
+            # appended after it would be lost, so the log is cut before it
+            with mmap.mmap(self.outfile.fileno(), 0,
+                           access = mmap.ACCESS_READ) as data:
+                size = len(data)
+                end = find_records_end(data)
+            if end < size:
+                self.outfile.truncate(end)
+
+        # the worker the records are written by, None to write them here
+        self.worker = None
+
+        # the sessions started, and the time of the last record, in ms
+        self.session_num = 0
+        self.last_time = 0
+        # the last palette written, and the palette of each session
+        self.palette = None
+        self.palettes = {}
+
+        self.write_record("open", 0, b"")
+
+    def add_worker(self, worker):
+        """
+        Method: add_worker
+            Let the recorder write its records in a worker's background
+            thread, so no game event waits on the disk.
+        Parameter:
+            worker (PersistenceWorker) -- the worker, or None to write the
+                                          records here, once its queued
+                                          writes are finished
+        Return: nothing
+        """
+
+        if worker is not None and not isinstance(worker, PersistenceWorker):
+            raise TypeError("Argument must be of PersistenceWorker class!")
+
+        self.worker = worker
+
+    def record_create(self, player, model):
+        """
+        Method: record_create
+            Start a session: record the player, the guesses allowed,
+            and the secret code of a created game.
+        Parameters:
+            player (str) -- the player's name
+            model (GameModel) -- the GameModel of the game
+        Return:
+            An integer representing the session number
+        """
+
+        if not (isinstance(player, str) and isinstance(model, GameModel)):
+            raise TypeError("Player and model arguments must be " +
+                            "str type and GameModel class!")
+
+        session = self.session_num
+        self.session_num += 1
+        self.palettes[session] = list(model.code_range)
+        self.use_palette(session)
+        self.write_record("create", session,
+                          encode_string(player) + encode_varint(model.max_guess) +
+                          encode_varint(len(model.code)) +
+                          self.encode_colors(model.code))
+        return session
+
+    def record_guess(self, session, index, color):
+        """
+        Method: record_guess
+            Record a guess added in a position of the current guess.
+        Parameters:
+            session (int) -- the session number
+            index (int) -- the position index of the guess
+            color (str) -- the guess
+        Return: nothing
+        """
+
+        self.use_palette(session)
+        self.write_record("guess", session,
+                          encode_varint(index) + self.encode_colors([color]))
+
+    def record_round(self, session, guess, bull_num, cow_num, status):
+        """
+        Method: record_round
+            Record a round played: the guess, its bulls and cows, and
+            the game status after it. The records of a finished game are
+            written at once, so a crash does not lose them.
+        Parameters:
+            session (int) -- the session number
+            guess (list of str) -- the guess played, as long as the code
+            bull_num (int) -- the number of bulls
+            cow_num (int) -- the number of cows
+            status (str) -- the game status, one of STATUS_NAMES
+        Return: nothing
+        """
+
+        if status not in STATUS_NAMES:
+            raise ValueError("Status must be one of: " +
+                             ", ".join(STATUS_NAMES) + "!")
+
+        self.use_palette(session)
+        self.write_record("round", session,
+                          encode_varint(len(guess)) +
+                          self.encode_colors(guess) + encode_varint(bull_num) +
+                          encode_varint(cow_num) +
+                          bytes([STATUS_NAMES.index(status)]))
+        if status != "running":
+            self.flush()
+
+    def record_restart(self, session, code):
+        """
+        Method: record_restart
+            Record a restart of the session's game with its new secret code.
+        Parameters:
+            session (int) -- the session number
+            code (list of str) -- the new secret code
+        Return: nothing
+        """
+
+        self.use_palette(session)
+        self.write_record("restart", session,
+                          encode_varint(len(code)) + self.encode_colors(code))
+
+    def write_record(self, kind, session, values):
+        """
+        Method: write_record
+            Add a record to the buffer, and write the buffer to the log
+            if it holds buffer_size bytes.
+        Parameters:
+            kind (str) -- the event, one of EVENT_NAMES
+            session (int) -- the session number
+            values (bytes) -- the encoded values of the event
+        Return: nothing
+        """
+
+        # the first record holds the time since the epoch, the others
+        # the time since the last record, never negative
+        now = int(time.time() * 1000)
+        self.buffer.append(EVENT_NAMES.index(kind))
+        self.buffer += encode_varint(max(now - self.last_time, 0))
+        self.buffer += encode_varint(session)
+        self.buffer += values
+        self.last_time = max(now, self.last_time)
+
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def use_palette(self, session):
+        """
+        Method: use_palette
+            Write the session's palette, unless it is the last one written.
+        Parameter:
+            session (int) -- the session number
+        Return: nothing
+        """
+
+        if session not in self.palettes:
+            raise ValueError("The session is not started by this recorder!")
+
+        palette = self.palettes[session]
+        if palette != self.palette:
+            self.palette = palette
+            self.write_record("palette", session,
+                              encode_varint(len(palette)) +
+                              b"".join(encode_string(color) for color in palette))
+
+    def encode_colors(self, colors):
+        """
+        Method: encode_colors
+            Encode colors as their indexes in the last palette written.
+        Parameter:
+            colors (list of str) -- the colors
+        Return:
+            A bytes of varints
+        """
+
+        try:
+            return b"".join(encode_varint(self.palette.index(color))
+                            for color in colors)
+        except ValueError:
+            raise ValueError("The color is not contained in the code range!")
+
+    def flush(self):
+        """
+        Method: flush
+            Write the buffered records to the log. With a worker, they are
+            queued for its background thread; if its queue is full, they
+            stay buffered until the next flush, so the records are
+            written in order.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        if self.buffer:
+            if self.worker is None:
+                self.write_data(self.buffer)
+            elif not self.worker.submit("record", self.write_data,
+                                        bytes(self.buffer)):
+                return
+            self.buffer = bytearray()
+
+    def write_data(self, data):
+        """
+        Method: write_data
+            Write whole records to the log, e.g. in the worker's thread.
+        Parameter:
+            data (bytes-like) -- the encoded records
+        Return: nothing
+        """
+
+        self.outfile.write(data)
+        self.outfile.flush()
+
+    def close(self):
+        """
+        Method: close
+            Write the buffered records, close the log, and release its lock.
+            The worker the records are written by must be closed first.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        if not self.outfile.closed:
+            self.worker = None
+            self.flush()
+            self.outfile.close()
+            self.lock.close()
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of SessionRecorder instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tFile: {}\tSessions: {}".format(self.name, self.filename,
+                                                    self.session_num)
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current SessionRecorder instance to another one.
+        Parameter:
+            other (SessionRecorder) -- another instance of SessionRecorder
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        # two recorders appending to one log would mix their sessions
+        return self is other
+
+
+def open_recorder(filename = SESSION_FILENAME, buffer_size = BUFFER_SIZE):
+    """
+    Function: open_recorder
+        Open a SessionRecorder on the first session log no other recorder
+        has open: the log filename, then the log filename numbered from 1,
+        e.g. "sessions_1.bin", so each running game has a log of its own.
+    Parameters:
+        filename (str) -- the session log filename
+        buffer_size (int) -- the bytes buffered before they are written
+    Return:
+        A SessionRecorder
+    """
+
+    root, extension = os.path.splitext(filename)
+    log_filename = filename
+    log_num = 0
+    while True:
+        try:
+            return SessionRecorder(log_filename, buffer_size)
+        except BlockingIOError:
+            log_num += 1
+            log_filename = "{}_{}{}".format(root, log_num, extension)
+
+
+def encode_varint(num):
+    """
+    Function: encode_varint
+        Encode a non-negative integer in 7-bit groups, lowest first,
+        with the high bit set on every byte but the last.
+    Parameter:
+        num (int) -- the integer
+    Return:
+        A bytes of one byte for numbers below 128
+    """
+
+    if not isinstance(num, int):
+        raise TypeError("Varint must be an integer!")
+    elif num < 0:
+        raise ValueError("Varint must be non-negative!")
+
+    data = bytearray()
+    while num >= 0x80:
+        data.append(num & 0x7f | 0x80)
+        num >>= 7
+    data.append(num)
+    return bytes(data)
+
+
+def decode_varint(data, offset):
+    """
+    Function: decode_varint
+        Decode a varint.
+    Parameters:
+        data (bytes-like) -- the encoded data, e.g. bytes, mmap or memoryview
+        offset (int) -- the offset of the varint
+    Return:
+        A 2-tuple: the integer, and the offset after it
+    """
+
+    num = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("The varint is truncated!")
+        byte = data[offset]
+        offset += 1
+        num |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return num, offset
+        shift += 7
+
+
+def encode_string(text):
+    """
+    Function: encode_string
+        Encode a string as its UTF-8 length, as a varint, and its UTF-8 bytes.
+    Parameter:
+        text (str) -- the string
+    Return:
+        A bytes
+    """
+
+    data = text.encode("utf-8")
+    return encode_varint(len(data)) + data
+
+
+def decode_string(data, offset):
+    """
+    Function: decode_string
+        Decode a string.
+    Parameters:
+        data (bytes-like) -- the encoded data, e.g. bytes, mmap or memoryview
+        offset (int) -- the offset of the string
+    Return:
+        A 2-tuple: the string, and the offset after it
+    """
+
+    length, offset = decode_varint(data, offset)
+    if offset + length > len(data):
+        raise ValueError("The string is truncated!")
+    return str(data[offset:offset + length], "utf-8"), offset + length
+
+
+def decode_records(data, offset = SESSION_HEADER.size, palette = None,
+                   session_base = 0, record_time = 0, session_end = None):
+    """
+    Function: decode_records
+        Decode the records of a session log, one at a time. The sessions
+        of each recorder that opened the log are numbered after those of
+        the recorders before it, so a session number is unique in the log.
+        A record torn by a crash ends the log.
+        To start in the middle of the log, at a create or restart record,
+        or after the last record of an index, the state of the log before
+        that record is given.
+    Parameters:
+        data (bytes-like) -- the log, e.g. bytes, mmap or memoryview
+        offset (int) -- the offset of the first record
+        palette (list of str) -- the last palette before the first record
+        session_base (int) -- the number of the first session of the
+                              recorder that wrote the first record
+        record_time (int) -- the time of the record before the first record
+        session_end (int) -- the number after the last session started
+                             before the first record, session_base if
+                             not given
+    Return:
+        A generator of (offset, kind, time, session, values) tuples: the
+        record's offset, event name, time in ms since the epoch, session
+        number, and the event's values:
+            open -- ()
+            palette -- (colors,)
+            create -- (player, max_guess, code)
+            guess -- (index, color)
+            round -- (guess, bull_num, cow_num, status)
+            restart -- (code,)
+        which returns the offset after the last whole record when done
+    """
+
+    palette = [] if palette is None else palette
+    session_end = session_base if session_end is None else session_end
+
+    while offset < len(data):
+        try:
+            kind = EVENT_NAMES[data[offset]]
+            delta, end = decode_varint(data, offset + 1)
+            session, end = decode_varint(data, end)
+            values = ()
+
+            if kind == "palette":
+                color_num, end = decode_varint(data, end)
+                colors = []
+                for i in range(color_num):
+                    color, end = decode_string(data, end)
+                    colors.append(color)
+                values = (colors,)
+            elif kind == "create":
+                player, end = decode_string(data, end)
+                max_guess, end = decode_varint(data, end)
+                length, end = decode_varint(data, end)
+                code, end = decode_colors(data, end, length, palette)
+                values = (player, max_guess, code)
+            elif kind == "guess":
+                index, end = decode_varint(data, end)
+                color, end = decode_colors(data, end, 1, palette)
+                values = (index, color[0])
+            elif kind == "round":
+                length, end = decode_varint(data, end)
+                guess, end = decode_colors(data, end, length, palette)
+                bull_num, end = decode_varint(data, end)
+                cow_num, end = decode_varint(data, end)
+                if end >= len(data):
+                    raise ValueError("The record is truncated!")
+                values = (guess, bull_num, cow_num, STATUS_NAMES[data[end]])
+                end += 1
+            elif kind == "restart":
+                length, end = decode_varint(data, end)
+                code, end = decode_colors(data, end, length, palette)
+                values = (code,)
+        except (ValueError, IndexError):
+            return offset
+
+        if kind == "open":
+            session_base = session_end
+            palette = []
+            record_time = delta
+        else:
+            record_time += delta
+        if kind == "palette":
+            palette = values[0]
+        elif kind == "create":
+            session_end = max(session_end, session_base + session + 1)
+
+        yield offset, kind, record_time, session_base + session, values
+        offset = end
+
+    return offset
+
+
+def find_records_end(data, offset = SESSION_HEADER.size):
+    """
+    Function: find_records_end
+        Find the end of the last whole record of a session log, where a
+        record torn by a crash starts.
+    Parameters:
+        data (bytes-like) -- the log, e.g. bytes, mmap or memoryview
+        offset (int) -- the offset of the first record
+    Return:
+        An integer representing the offset after the last whole record
+    """
+
+    records = decode_records(data, offset)
+    while True:
+        try:
+            next(records)
+        except StopIteration as stop:
+            return stop.value
+
+
+def decode_colors(data, offset, color_num, palette):
+    """
+    Function: decode_colors
+        Decode colors encoded as their indexes in a palette.
+    Parameters:
+        data (bytes-like) -- the encoded data, e.g. bytes, mmap or memoryview
+        offset (int) -- the offset of the first color
+        color_num (int) -- the number of colors
+        palette (list of str) -- the palette
+    Return:
+        A 2-tuple: the list of colors, and the offset after them
+    """
+
+    colors = []
+    for i in range(color_num):
+        index, offset = decode_varint(data, offset)
+        colors.append(palette[index])
+    return colors, offset
@@ -0,0 +1,608 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Score Table
+    Encode the codes as integers and precompute the bulls-and-cows scores.
+"""
+
+from array import array
+from collections import OrderedDict
+from itertools import compress, repeat
+from operator import add, floordiv, mod, mul
+
+SCORE_TABLE_LIMIT = 4096  # the largest code space that gets a full score table
+PACKED_LENGTH_LIMIT = 15  # the longest code whose packed score fits one byte
+CACHE_SIZE = 8  # the most game configurations kept in each shared cache
+
+# byte translation tables: value == c -> 1, value > m -> 1, otherwise 0
+_EQUAL_TABLES = [bytes(int(value == c) for value in range(256))
+                 for c in range(256)]
+_GREATER_TABLES = [bytes(int(value > m) for value in range(256))
+                   for m in range(256)]
+
+# least recently used first: key = (tuple of colors, code length),
+# value = ScoreTable
+_score_tables = OrderedDict()
+# least recently used first: key = (tuple of colors, code length),
+# value = CodeArray
+_code_arrays = OrderedDict()
+
+
+class CodeArray:
+    """
+    A class that holds an array of encoded codes as byte lanes:
+    one bytes object per position with the color digit of every code,
+    and one bytes object per color with the count of that color in every code.
+    A guess is scored against all codes at once by adding these lanes as
+    big integers, instead of calling count_bulls_and_cows once per code.
+    Attributes: code_range(list of str), length(int), color_num(int),
+                color_index(dict), codes(array or list), digits(list of bytes),
+                counts(list of bytes), planes(dict)
+    Methods: __init__, encode, decode, position_plane, count_plane, score,
+             score_each, count, take, filter, __len__, __iter__, __str__,
+             __eq__
+    """
+
+    def __init__(self, code_range, length, codes, digits = None, counts = None):
+        """
+        Method: __init__
+            Create an instance of CodeArray.
+        Parameters:
+            code_range (list) -- the range of the code values
+            length (int) -- the length of the code
+            codes (iterable of int) -- the encoded codes
+            digits (list of bytes) -- the precomputed digit lanes of the codes,
+                                      computed from the codes if not given
+            counts (list of bytes) -- the precomputed count lanes of the codes,
+                                      computed from the digits if not given
+        Return: nothing
+        """
+
+        if not (isinstance(code_range, list) and isinstance(length, int)):
+            raise TypeError("Code range and length arguments must be " +
+                            "list and integer!")
+        elif len(code_range) == 0:
+            raise ValueError("Code range cannot be empty list!")
+        elif length <= 0:
+            raise ValueError("The length of code must be positive!")
+
+        # duplicate colors in the code range are the same color
+        self.code_range = list(dict.fromkeys(code_range))
+        self.length = length
+        self.color_num = len(self.code_range)
+        self.color_index = {color: i for i, color in enumerate(self.code_range)}
+        if self.color_num > 255:
+            raise ValueError("Code range cannot have more than 255 colors!")
+
+        # codes beyond 64 bits are kept in a plain list
+        if self.color_num ** length <= 2 ** 64:
+            self.codes = array("Q", codes)
+        else:
+            self.codes = list(codes)
+        if digits is None:
+            # peel off the last digit of every code at once
+            digits = [b""] * length
+            rest = self.codes
+            for position in range(length - 1, -1, -1):
+                digits[position] = bytes(map(mod, rest, repeat(self.color_num)))
+                rest = list(map(floordiv, rest, repeat(self.color_num)))
+        self.digits = digits
+
+        # dictionary: key = ("position", position, color) or
+        # ("count", color, m), value = the lanes as a big integer
+        self.planes = {}
+
+        if counts is None:
+            counts = []
+            for color in range(self.color_num):
+                color_count = sum(self.position_plane(position, color)
+                                  for position in range(length))
+                counts.append(color_count.to_bytes(len(self.codes), "little"))
+        self.counts = counts
+
+    def encode(self, code):
+        """
+        Method: encode
+            Encode a code as an integer: the code is read as a number in base
+            color_num, with the first position as the most significant digit.
+        Parameter:
+            code (list of str) -- the color code
+        Return:
+            An integer representing the code
+        """
+
+        if len(code) != self.length:
+            raise ValueError("The code must have the length of " +
+                             str(self.length) + "!")
+
+        index = 0
+        for color in code:
+            index = index * self.color_num + self.color_index[color]
+        return index
+
+    def decode(self, index):
+        """
+        Method: decode
+            Decode an integer back to its color code.
+        Parameter:
+            index (int) -- the integer representing the code
+        Return:
+            A list of str representing the code
+        """
+
+        if index not in range(self.color_num ** self.length):
+            raise IndexError("The code index is out of the code space!")
+
+        code = [""] * self.length
+        for position in range(self.length - 1, -1, -1):
+            index, digit = divmod(index, self.color_num)
+            code[position] = self.code_range[digit]
+        return code
+
+    def position_plane(self, position, color):
+        """
+        Method: position_plane
+            Get the lanes where the code has the color at the position.
+        Parameters:
+            position (int) -- the position in the code
+            color (int) -- the index of the color in the code range
+        Return:
+            A big integer with lane i set to 1 if code i has the color
+            at the position, otherwise 0
+        """
+
+        key = ("position", position, color)
+        if key not in self.planes:
+            self.planes[key] = int.from_bytes(
+                self.digits[position].translate(_EQUAL_TABLES[color]), "little")
+        return self.planes[key]
+
+    def count_plane(self, color, m):
+        """
+        Method: count_plane
+            Get the lanes where the code has more than m pegs of the color.
+        Parameters:
+            color (int) -- the index of the color in the code range
+            m (int) -- the number of pegs
+        Return:
+            A big integer with lane i set to 1 if code i has more than m pegs
+            of the color, otherwise 0
+        """
+
+        key = ("count", color, m)
+        if key not in self.planes:
+            self.planes[key] = int.from_bytes(
+                self.counts[color].translate(_GREATER_TABLES[m]), "little")
+        return self.planes[key]
+
+    def score(self, guess):
+        """
+        Method: score
+            Score one guess against every code in a single pass.
+        Parameter:
+            guess (list of str) -- the color guess
+        Return:
+            The packed scores of the guess against each code, in code order:
+            a bytes object, or an array of unsigned shorts if the code is
+            longer than PACKED_LENGTH_LIMIT
+        """
+
+        if len(guess) != self.length:
+            raise ValueError("The guess must have the length of " +
+                             str(self.length) + "!")
+
+        bulls, matches = 0, 0
+        for position in range(self.length):
+            bulls += self.position_plane(position, self.color_index[guess[position]])
+        for color in set(guess):
+            for m in range(guess.count(color)):
+                matches += self.count_plane(self.color_index[color], m)
+
+        # bulls * (length + 1) + cows == bulls * length + matches
+        size = len(self.codes)
+        if self.length <= PACKED_LENGTH_LIMIT:
+            return (bulls * self.length + matches).to_bytes(size, "little")
+
+        # the packed scores overflow one byte lane
+        bulls = bulls.to_bytes(size, "little")
+        matches = matches.to_bytes(size, "little")
+        return array("H", map(add, map(mul, bulls, repeat(self.length)),
+                              matches))
+
+    def score_each(self, guesses):
+        """
+        Method: score_each
+            Score each code against its own guess, the code at the same
+            position of another CodeArray, in a single pass: the digit lanes
+            are compared by XOR, and the color matches min(a, b) of the
+            color counts a and b are the number of m with a > m and b > m,
+            found by AND of the count planes.
+        Parameter:
+            guesses (CodeArray) -- one guess for each code
+        Return:
+            A bytes object of the packed score of each code against its guess
+        """
+
+        if not isinstance(guesses, CodeArray):
+            raise TypeError("Guesses must be of CodeArray class!")
+        elif guesses.code_range != self.code_range or \
+                guesses.length != self.length or len(guesses) != len(self):
+            raise ValueError("The guesses must be one code of the same " +
+                             "configuration for each code!")
+        elif self.length > PACKED_LENGTH_LIMIT:
+            raise ValueError("The code is too long to score each!")
+
+        size = len(self.codes)
+        bulls, matches = 0, 0
+        for mine, theirs in zip(self.digits, guesses.digits):
+            same = (int.from_bytes(mine, "little") ^
+                    int.from_bytes(theirs, "little")).to_bytes(size, "little")
+            bulls += int.from_bytes(same.translate(_EQUAL_TABLES[0]), "little")
+        for color in range(self.color_num):
+            for m in range(self.length):
+                matches += self.count_plane(color, m) & \
+                           guesses.count_plane(color, m)
+
+        # bulls * (length + 1) + cows == bulls * length + matches
+        return (bulls * self.length + matches).to_bytes(size, "little")
+
+    def count(self, guess):
+        """
+        Method: count
+            Calculate the num of bulls and cows of one guess against every code.
+        Parameter:
+            guess (list of str) -- the color guess
+        Return:
+            A list of 2-tuples containing the number of bulls and cows,
+            in code order
+        """
+
+        return list(map(divmod, self.score(guess), repeat(self.length + 1)))
+
+    def take(self, positions):
+        """
+        Method: take
+            Create a CodeArray of the codes at the given positions,
+            gathering their lanes instead of decoding the codes again.
+        Parameter:
+            positions (iterable of int) -- the positions in this CodeArray
+        Return:
+            A new CodeArray
+        """
+
+        positions = list(positions)
+        codes = map(self.codes.__getitem__, positions)
+        digits = [bytes(map(each.__getitem__, positions)) for each in self.digits]
+        counts = [bytes(map(each.__getitem__, positions)) for each in self.counts]
+        return CodeArray(self.code_range, self.length, codes, digits, counts)
+
+    def filter(self, guess, bull_num, cow_num):
+        """
+        Method: filter
+            Create a CodeArray of the codes that give the same bulls and cows
+            to the guess, i.e. the codes still consistent with the feedback.
+        Parameters:
+            guess (list of str) -- the color guess
+            bull_num (int) -- the number of bulls of the guess
+            cow_num (int) -- the number of cows of the guess
+        Return:
+            A new CodeArray
+        """
+
+        packed = pack_score(bull_num, cow_num, self.length)
+        scores = self.score(guess)
+        return self.take(compress(range(len(scores)), map(packed.__eq__, scores)))
+
+    def __len__(self):
+        """
+        Method: __len__
+            Get the number of codes in the CodeArray.
+        Parameter: nothing
+        Return:
+            An integer representing the number of codes
+        """
+
+        return len(self.codes)
+
+    def __iter__(self):
+        """
+        Method: __iter__
+            Iterate over the encoded codes in the CodeArray.
+        Parameter: nothing
+        Return:
+            An iterator of integers
+        """
+
+        return iter(self.codes)
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of CodeArray instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "Code Array\tColors: {}\tLength: {}\tCodes: {}".format(
+            self.color_num, self.length, len(self.codes))
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current CodeArray instance to another one.
+            Two instances are equal if they hold the same codes
+            of the same configuration.
+        Parameter:
+            other (CodeArray) -- another instance of CodeArray
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, CodeArray) and \
+               self.code_range == other.code_range and \
+               self.length == other.length and self.codes == other.codes
+
+
+class ScoreTable:
+    """
+    A class that stores the packed score of every (secret code, guess) pair
+    of one game configuration.
+    Attributes: code_range(list of str), length(int), color_num(int), size(int),
+                codes(CodeArray), table(bytes)
+    Methods: __init__, encode, decode, score, count, row, build_table,
+             __str__, __eq__
+    """
+
+    def __init__(self, code_range, length):
+        """
+        Method: __init__
+            Create an instance of ScoreTable and build its full score table.
+        Parameters:
+            code_range (list) -- the range of the code values
+            length (int) -- the length of the code
+        Return: nothing
+        """
+
+        if not (isinstance(code_range, list) and isinstance(length, int)):
+            raise TypeError("Code range and length arguments must be " +
+                            "list and integer!")
+        elif len(code_range) == 0:
+            raise ValueError("Code range cannot be empty list!")
+        elif not 0 < length <= PACKED_LENGTH_LIMIT:
+            raise ValueError("The length of code must be between 1 and " +
+                             str(PACKED_LENGTH_LIMIT) + "!")
+
+        self.codes = get_code_array(code_range, length)
+        self.code_range = self.codes.code_range
+        self.length = length
+        self.color_num = self.codes.color_num
+        self.size = len(self.codes)
+        self.table = self.build_table()
+
+    def encode(self, code):
+        """
+        Method: encode
+            Encode a code as an integer.
+        Parameter:
+            code (list of str) -- the color code
+        Return:
+            An integer representing the code
+        """
+
+        return self.codes.encode(code)
+
+    def decode(self, index):
+        """
+        Method: decode
+            Decode an integer back to its color code.
+        Parameter:
+            index (int) -- the integer representing the code
+        Return:
+            A list of str representing the code
+        """
+
+        return self.codes.decode(index)
+
+    def score(self, secret_index, guess_index):
+        """
+        Method: score
+            Look up the packed score of an encoded guess against an encoded
+            secret code.
+        Parameters:
+            secret_index (int) -- the encoded secret code
+            guess_index (int) -- the encoded guess
+        Return:
+            An integer representing the packed bulls and cows
+        """
+
+        return self.table[guess_index * self.size + secret_index]
+
+    def count(self, secret_code, guess):
+        """
+        Method: count
+            Look up the num of bulls and cows of a guess against a secret code.
+        Parameters:
+            secret_code (list of str) -- the color code generated from GameModel
+            guess (list of str) -- the color guess from the player
+        Return:
+            A 2-tuple containing the number of bulls and cows
+        """
+
+        packed = self.score(self.encode(secret_code), self.encode(guess))
+        return unpack_score(packed, self.length)
+
+    def row(self, guess_index):
+        """
+        Method: row
+            Get the packed scores of an encoded guess against every code,
+            without copying the table.
+        Parameter:
+            guess_index (int) -- the encoded guess
+        Return:
+            A memoryview of size bytes, indexed by the encoded secret code
+        """
+
+        start = guess_index * self.size
+        return memoryview(self.table)[start:start + self.size]
+
+    def build_table(self):
+        """
+        Method: build_table
+            Build the full score table, one row per guess, each row scored
+            against the whole code space in a single CodeArray pass.
+        Parameter: nothing
+        Return:
+            A bytes object of size * size packed scores
+        """
+
+        return b"".join(self.codes.score(self.decode(guess_index))
+                        for guess_index in range(self.size))
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of ScoreTable instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "Score Table\tColors: {}\tLength: {}\tSize: {}".format(
+            self.color_num, self.length, self.size)
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current ScoreTable instance to another one.
+        Parameter:
+            other (ScoreTable) -- another instance of ScoreTable
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, ScoreTable) and \
+               self.code_range == other.code_range and self.length == other.length
+
+
+def pack_score(bull_num, cow_num, length):
+    """
+    Function: pack_score
+        Pack the num of bulls and cows into one small integer.
+    Parameters:
+        bull_num (int) -- the number of bulls
+        cow_num (int) -- the number of cows
+        length (int) -- the length of the code
+    Return:
+        An integer representing the packed score
+    """
+
+    return bull_num * (length + 1) + cow_num
+
+
+def unpack_score(score, length):
+    """
+    Function: unpack_score
+        Unpack a packed score into the num of bulls and cows.
+    Parameters:
+        score (int) -- the packed score
+        length (int) -- the length of the code
+    Return:
+        A 2-tuple containing the number of bulls and cows
+    """
+
+    return divmod(score, length + 1)
+
+
+def cache_value(cache, key, value):
+    """
+    Function: cache_value
+        Put a value in a shared cache of game configurations, dropping the
+        least recently used ones so that at most CACHE_SIZE stay alive.
+    Parameters:
+        cache (OrderedDict) -- the cache, least recently used first
+        key (tuple) -- the key of the game configuration
+        value (object) -- the value to cache
+    Return:
+        None
+    """
+
+    cache[key] = value
+    while len(cache) > CACHE_SIZE:
+        cache.popitem(last = False)
+
+
+def get_score_table(code_range, length):
+    """
+    Function: get_score_table
+        Get the shared ScoreTable of a game configuration, building it
+        the first time the configuration is used.
+    Parameters:
+        code_range (list) -- the range of the code values
+        length (int) -- the length of the code
+    Return:
+        The ScoreTable of the configuration, or None if the code space
+        is too large for a full score table
+    """
+
+    key = (tuple(code_range), length)
+    if key not in _score_tables:
+        color_num = len(set(code_range))
+        if color_num == 0 or not 0 < length <= PACKED_LENGTH_LIMIT or \
+                color_num ** length > SCORE_TABLE_LIMIT:
+            return None
+        cache_value(_score_tables, key, ScoreTable(list(code_range), length))
+
+    _score_tables.move_to_end(key)
+    return _score_tables[key]
+
+
+def full_code_array(code_range, length):
+    """
+    Function: full_code_array
+        Create the CodeArray of the whole code space of a game configuration,
+        with codes 0, 1, 2, ... in order. The digit lanes are repeated
+        byte patterns, so no code has to be decoded one by one.
+    Parameters:
+        code_range (list) -- the range of the code values
+        length (int) -- the length of the code
+    Return:
+        A CodeArray of color_num ** length codes
+    """
+
+    if not (isinstance(code_range, list) and isinstance(length, int)):
+        raise TypeError("Code range and length arguments must be " +
+                        "list and integer!")
+    elif length <= 0:
+        raise ValueError("The length of code must be positive!")
+
+    color_num = len(dict.fromkeys(code_range))
+    digits = []
+    for position in range(length):
+        # the digit at the position changes every block codes
+        block = color_num ** (length - 1 - position)
+        pattern = b"".join(bytes([color]) * block for color in range(color_num))
+        digits.append(pattern * color_num ** position)
+
+    return CodeArray(code_range, length, range(color_num ** length), digits)
+
+
+def get_code_array(code_range, length):
+    """
+    Function: get_code_array
+        Get the shared CodeArray of the whole code space of a game
+        configuration, creating it the first time the configuration is used.
+    Parameters:
+        code_range (list) -- the range of the code values
+        length (int) -- the length of the code
+    Return:
+        The CodeArray of color_num ** length codes
+    """
+
+    key = (tuple(code_range), length)
+    if key not in _code_arrays:
+        cache_value(_code_arrays, key, full_code_array(list(code_range), length))
+
+    _code_arrays.move_to_end(key)
+    return _code_arrays[key]
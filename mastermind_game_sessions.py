@@ -0,0 +1,568 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Session Log
+    Read recorded Mastermind game sessions through mmap, and find the
+    games of a player, code, outcome or score through a sidecar index.
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from mastermind_game_model import STATUS_NAMES
+from mastermind_game_leaderboard import write_atomic
+from mastermind_game_recorder import SESSION_HEADER, SESSION_MAGIC, \
+    SESSION_VERSION, SESSION_FILENAME, decode_records
+
+INDEX_SUFFIX = ".index"
+INDEX_MAGIC = b"MMSI"
+INDEX_VERSION = 2
+
+# header: magic, version, size and start time of the log indexed,
+# number of games, number of keys, and the state of the log at the size
+# indexed to index the records after it: offset of the last palette,
+# session base, end of the sessions started, time of the last record
+INDEX_HEADER = struct.Struct("<4sHQQIIQIIQ")
+# game: session, offsets of its first and last records and of the palette
+# before it, session base and time before its first record, time of its
+# first record, player key, code key, score, status byte
+INDEX_GAME = struct.Struct("<IQQQIQQIIHB")
+# key: kind byte, string offset, string length, postings offset, postings num
+# sorted by kind and string, the postings are the games' numbers in log order
+INDEX_KEY = struct.Struct("<BIIII")
+
+# the key of each kind byte
+KEY_NAMES = ["player", "code", "status", "score"]
+
+
+class SessionLog:
+    """
+    A class that reads a session log through mmap: the records are decoded
+    from a memoryview of the file when they are asked for, without
+    reading or copying the rest of the log.
+    Attributes: name(str), filename(str), data(mmap), view(memoryview)
+    Methods: __init__, records, game_records, get_start_time, close, __len__,
+             __str__, __eq__
+    """
+
+    def __init__(self, filename = SESSION_FILENAME):
+        """
+        Method: __init__
+            Open a session log.
+        Parameter:
+            filename (str) -- the session log filename
+        Return: nothing
+        """
+
+        if not isinstance(filename, str):
+            raise TypeError("Filename must be a string!")
+
+        self.name = "Session Log"
+        self.filename = filename
+
+        with open(filename, "rb") as infile:
+            if os.fstat(infile.fileno()).st_size < SESSION_HEADER.size:
+                raise ValueError("The session log file is truncated!")
+            self.data = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.data)
+
+        if SESSION_HEADER.unpack_from(self.view, 0) != (SESSION_MAGIC,
+                                                       SESSION_VERSION):
+            self.close()
+            raise ValueError("The file is not a valid session log!")
+
+    def records(self, offset = SESSION_HEADER.size):
+        """
+        Method: records
+            Decode the records of the log, one at a time.
+        Parameter:
+            offset (int) -- the offset of the first record
+        Return:
+            A generator of (offset, kind, time, session, values) tuples,
+            as from decode_records
+        """
+
+        return decode_records(self.view, offset)
+
+    def game_records(self, game):
+        """
+        Method: game_records
+            Decode the records of one game, starting at its first record,
+            and skipping the records of other sessions between them.
+        Parameter:
+            game (dict) -- the game, as from SessionIndex.get_game
+        Return:
+            A generator of (offset, kind, time, session, values) tuples,
+            as from decode_records
+        """
+
+        palette = next(decode_records(self.view, game["palette_offset"]))[4][0]
+        for record in decode_records(self.view, game["start"], palette,
+                                     game["session_base"], game["base_time"]):
+            if record[0] > game["end"]:
+                return
+            elif record[3] == game["session"] and record[1] != "palette":
+                yield record
+
+    def get_start_time(self):
+        """
+        Method: get_start_time
+            Get the time the log was first opened, which tells a log
+            from another one of the same size.
+        Parameter: nothing
+        Return:
+            An integer representing the time in ms since the epoch,
+            or 0 if the log has no records
+        """
+
+        for offset, kind, record_time, session, values in self.records():
+            return record_time
+        return 0
+
+    def close(self):
+        """
+        Method: close
+            Close the mmap of the log file.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.view.release()
+        self.data.close()
+
+    def __len__(self):
+        """
+        Method: __len__
+            Get the size of the log.
+        Parameter: nothing
+        Return:
+            An integer representing the size in bytes
+        """
+
+        return len(self.data)
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of SessionLog instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tFile: {}\tSize: {}".format(self.name, self.filename,
+                                                len(self.data))
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current SessionLog instance to another one.
+        Parameter:
+            other (SessionLog) -- another instance of SessionLog
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, SessionLog) and self.filename == other.filename
+
+
+class SessionIndex:
+    """
+    A class that reads the sidecar index of a session log through mmap.
+    Each game of the log has a fixed-size entry; the players, codes,
+    outcomes and scores are keys sorted for binary search, each with the
+    numbers of its games, so a query reads the entries of the matching
+    games only, and seeks straight to their records in the log.
+    Attributes: name(str), filename(str), log_size(int), log_time(int),
+                game_num(int), key_num(int), palette_offset(int),
+                session_base(int), session_end(int), record_time(int),
+                data(mmap)
+    Methods: __init__, find_key, get_key_offset, get_key, get_key_string,
+             get_game, get_entries, query, close, __len__, __str__, __eq__
+    """
+
+    def __init__(self, filename):
+        """
+        Method: __init__
+            Open a session index file.
+        Parameter:
+            filename (str) -- the session index filename
+        Return: nothing
+        """
+
+        if not isinstance(filename, str):
+            raise TypeError("Filename must be a string!")
+
+        self.name = "Session Index"
+        self.filename = filename
+
+        with open(filename, "rb") as infile:
+            if os.fstat(infile.fileno()).st_size < INDEX_HEADER.size:
+                raise ValueError("The session index file is truncated!")
+            self.data = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.log_size, self.log_time, self.game_num, \
+            self.key_num, self.palette_offset, self.session_base, \
+            self.session_end, self.record_time = \
+            INDEX_HEADER.unpack_from(self.data, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION or \
+                len(self.data) < INDEX_HEADER.size + \
+                self.game_num * INDEX_GAME.size + self.key_num * INDEX_KEY.size:
+            self.close()
+            raise ValueError("The file is not a valid session index!")
+
+    def find_key(self, kind, value):
+        """
+        Method: find_key
+            Look up a key by binary search.
+        Parameters:
+            kind (str) -- the key kind, one of KEY_NAMES
+            value (str) -- the key string
+        Return:
+            An integer representing the key number, or None if no game has it
+        """
+
+        target = (KEY_NAMES.index(kind), value.encode("utf-8"))
+        low, high = 0, self.key_num
+        while low < high:
+            middle = (low + high) // 2
+            key_kind, string_offset, string_length = INDEX_KEY.unpack_from(
+                self.data, self.get_key_offset(middle))[:3]
+            key = (key_kind, self.data[string_offset:string_offset +
+                                       string_length])
+            if key == target:
+                return middle
+            elif key < target:
+                low = middle + 1
+            else:
+                high = middle
+
+        return None
+
+    def get_key_offset(self, number):
+        """
+        Method: get_key_offset
+            Get the offset of a key in the index file.
+        Parameter:
+            number (int) -- the key number
+        Return:
+            An integer representing the offset
+        """
+
+        return INDEX_HEADER.size + self.game_num * INDEX_GAME.size + \
+            number * INDEX_KEY.size
+
+    def get_key(self, number):
+        """
+        Method: get_key
+            Read a key.
+        Parameter:
+            number (int) -- the key number
+        Return:
+            A 3-tuple: the kind byte, the key string, and an array of the
+            numbers of its games
+        """
+
+        kind, string_offset, string_length, postings_offset, postings_num = \
+            INDEX_KEY.unpack_from(self.data, self.get_key_offset(number))
+        postings = array("I")
+        postings.frombytes(self.data[postings_offset:postings_offset +
+                                     postings_num * postings.itemsize])
+        return kind, str(self.data[string_offset:string_offset + string_length],
+                         "utf-8"), postings
+
+    def get_key_string(self, number):
+        """
+        Method: get_key_string
+            Read a key's string, without the numbers of its games.
+        Parameter:
+            number (int) -- the key number
+        Return:
+            A string representing the key
+        """
+
+        string_offset, string_length = INDEX_KEY.unpack_from(
+            self.data, self.get_key_offset(number))[1:3]
+        return str(self.data[string_offset:string_offset + string_length],
+                   "utf-8")
+
+    def get_game(self, number):
+        """
+        Method: get_game
+            Read a game's entry.
+        Parameter:
+            number (int) -- the game number, in log order
+        Return:
+            A dict of the game's session, player, code (list of str),
+            status, score, start_time, and the start, end, palette_offset,
+            session_base and base_time to read its records
+        """
+
+        session, start, end, palette_offset, session_base, base_time, \
+            start_time, player_key, code_key, score, status = \
+            INDEX_GAME.unpack_from(self.data, INDEX_HEADER.size +
+                                   number * INDEX_GAME.size)
+        code = self.get_key(code_key)[1]
+        return {"session": session, "player": self.get_key(player_key)[1],
+                "code": code.split(",") if code != "" else [],
+                "status": STATUS_NAMES[status], "score": score,
+                "start_time": start_time, "start": start, "end": end,
+                "palette_offset": palette_offset,
+                "session_base": session_base, "base_time": base_time}
+
+    def get_entries(self):
+        """
+        Method: get_entries
+            Read every game's entry, with its player and code strings,
+            as build_session_index keeps them.
+        Parameter: nothing
+        Return:
+            A list of [session, start, end, palette offset, session base,
+            base time, start time, player, code, score, status byte] lists
+        """
+
+        strings = [self.get_key_string(number)
+                   for number in range(self.key_num)]
+        entries = []
+        for number in range(self.game_num):
+            entry = list(INDEX_GAME.unpack_from(self.data, INDEX_HEADER.size +
+                                                number * INDEX_GAME.size))
+            entry[7] = strings[entry[7]]
+            entry[8] = strings[entry[8]]
+            entries.append(entry)
+        return entries
+
+    def query(self, player = None, code = None, status = None, score = None):
+        """
+        Method: query
+            Find the games matching every criterion given: the games of
+            the criterion with the fewest games are read, and checked
+            against the others.
+        Parameters:
+            player (str) -- the player's name
+            code (list of str) -- the secret code
+            status (str) -- the game status, one of STATUS_NAMES
+            score (int) -- the guesses used
+        Return:
+            A list of the games' dicts, as from get_game, in log order
+        """
+
+        criteria = {"player": player, "status": status,
+                    "code": None if code is None else ",".join(code),
+                    "score": None if score is None else str(score)}
+        postings = None
+        for kind in KEY_NAMES:
+            if criteria[kind] is not None:
+                number = self.find_key(kind, criteria[kind])
+                if number is None:
+                    return []
+                key_postings = self.get_key(number)[2]
+                if postings is None or len(key_postings) < len(postings):
+                    postings = key_postings
+        if postings is None:
+            postings = range(self.game_num)
+
+        games = []
+        for number in postings:
+            game = self.get_game(number)
+            if (player is None or game["player"] == player) and \
+                    (code is None or game["code"] == list(code)) and \
+                    (status is None or game["status"] == status) and \
+                    (score is None or game["score"] == score):
+                games.append(game)
+        return games
+
+    def close(self):
+        """
+        Method: close
+            Close the mmap of the index file.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.data.close()
+
+    def __len__(self):
+        """
+        Method: __len__
+            Get the number of games in the index.
+        Parameter: nothing
+        Return:
+            An integer representing the number of games
+        """
+
+        return self.game_num
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of SessionIndex instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tFile: {}\tGames: {}".format(self.name, self.filename,
+                                                 self.game_num)
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current SessionIndex instance to another one.
+        Parameter:
+            other (SessionIndex) -- another instance of SessionIndex
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, SessionIndex) and \
+               self.filename == other.filename
+
+
+def build_session_index(log, filename = None, index = None):
+    """
+    Function: build_session_index
+        Read a session log once, and save the index of its games.
+        A game is a create or restart record, and the session's records
+        after it. Given an index of the log's first records, only the
+        records after them are read. The file is written to a temporary
+        file first, then renamed over the old index.
+    Parameters:
+        log (SessionLog) -- the session log
+        filename (str) -- the index filename, the log's filename
+                          with INDEX_SUFFIX if not given
+        index (SessionIndex) -- an index of the log's first records,
+                                closed once it is read
+    Return: nothing
+    """
+
+    if not isinstance(log, SessionLog):
+        raise TypeError("Argument must be of SessionLog class!")
+    elif index is not None and not isinstance(index, SessionIndex):
+        raise TypeError("Index must be of SessionIndex class!")
+
+    if filename is None:
+        filename = log.filename + INDEX_SUFFIX
+
+    # list of [session, start, end, palette offset, session base, base time,
+    # start time, player, code, score, status byte]
+    games = []
+    # the game being played in each session, and the session's player
+    session_games = {}
+    players = {}
+    offset = SESSION_HEADER.size
+    palette_offset = session_base = session_end = record_time = 0
+    palette = []
+    if index is not None:
+        # go on from the end of the index, in the log's state there
+        games = index.get_entries()
+        offset, palette_offset, session_base, session_end, record_time = \
+            index.log_size, index.palette_offset, index.session_base, \
+            index.session_end, index.record_time
+        index.close()
+        for number, game in enumerate(games):
+            session_games[game[0]] = number
+            players[game[0]] = game[7]
+        if palette_offset > 0:
+            palette = next(decode_records(log.view, palette_offset))[4][0]
+
+    records = decode_records(log.view, offset, palette, session_base,
+                             record_time, session_end)
+    while True:
+        try:
+            offset, kind, next_time, session, values = next(records)
+        except StopIteration as stop:
+            # the end of the last whole record, where the next index goes on
+            log_size = stop.value
+            break
+
+        if kind == "open":
+            session_base = session
+        elif kind == "palette":
+            palette_offset = offset
+        elif kind in ("create", "restart"):
+            if kind == "create":
+                players[session] = values[0]
+                session_end = max(session_end, session + 1)
+            session_games[session] = len(games)
+            games.append([session, offset, offset, palette_offset, session_base,
+                          record_time, next_time, players[session],
+                          ",".join(values[-1]), 0, 0])
+        elif session in session_games:
+            game = games[session_games[session]]
+            game[2] = offset
+            if kind == "round":
+                game[9] += 1
+                game[10] = STATUS_NAMES.index(values[3])
+        record_time = next_time
+
+    # the games of each key
+    postings = {}
+    for number, game in enumerate(games):
+        for kind, value in [(0, game[7]), (1, game[8]),
+                            (2, STATUS_NAMES[game[10]]), (3, str(game[9]))]:
+            postings.setdefault((kind, value.encode("utf-8")), []).append(number)
+    keys = sorted(postings)
+    key_numbers = {key: number for number, key in enumerate(keys)}
+
+    strings_offset = INDEX_HEADER.size + len(games) * INDEX_GAME.size + \
+        len(keys) * INDEX_KEY.size
+    postings_offset = strings_offset + sum(len(value) for kind, value in keys)
+
+    data = [INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, log_size,
+                              log.get_start_time(), len(games), len(keys),
+                              palette_offset, session_base, session_end,
+                              record_time)]
+    for game in games:
+        data.append(INDEX_GAME.pack(
+            *game[:7], key_numbers[(0, game[7].encode("utf-8"))],
+            key_numbers[(1, game[8].encode("utf-8"))], *game[9:]))
+    for kind, value in keys:
+        data.append(INDEX_KEY.pack(kind, strings_offset, len(value),
+                                   postings_offset,
+                                   len(postings[(kind, value)])))
+        strings_offset += len(value)
+        postings_offset += len(postings[(kind, value)]) * array("I").itemsize
+    data += [value for kind, value in keys]
+    data += [array("I", postings[key]).tobytes() for key in keys]
+    write_atomic(filename, b"".join(data))
+
+
+def load_session_index(log, filename = None):
+    """
+    Function: load_session_index
+        Open the index of a session log. If the log grew since it was
+        indexed, only the records after the index are indexed. If the
+        file doesn't exist, is damaged, or indexes another log or a longer
+        one, the whole log is indexed again first.
+    Parameters:
+        log (SessionLog) -- the session log
+        filename (str) -- the index filename, the log's filename
+                          with INDEX_SUFFIX if not given
+    Return:
+        A SessionIndex
+    """
+
+    if not isinstance(log, SessionLog):
+        raise TypeError("Argument must be of SessionLog class!")
+
+    if filename is None:
+        filename = log.filename + INDEX_SUFFIX
+
+    try:
+        index = SessionIndex(filename)
+    except (FileNotFoundError, ValueError):
+        index = None
+
+    if index is not None:
+        if index.log_time != log.get_start_time() or \
+                index.log_size > len(log):
+            index.close()
+            index = None
+        elif index.log_size == len(log):
+            return index
+
+    build_session_index(log, filename, index)
+    return SessionIndex(filename)
@@ -0,0 +1,322 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Game Simulator
+    Play batches of Mastermind games headless, with a Solver strategy,
+    from the command line. The turtle Board is never imported.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from mastermind_game_model import GameModel, CODE_LENGTH, MAX_GUESS, COLORS, \
+    game_seed
+from mastermind_game_controller import Controller
+from mastermind_game_solver import RandomSolver, ScriptedSolver, \
+    MinimaxSolver, EntropySolver
+from mastermind_game_book import OpeningBook, load_opening_book
+
+STRATEGIES = {"random-consistent": RandomSolver, "minimax": MinimaxSolver,
+              "entropy": EntropySolver, "scripted": ScriptedSolver}
+CHUNK_SIZE = 100  # the number of games a worker plays per task
+
+# dictionary: key = simulation config, value = (Controller, Solver) of a worker
+_worker_players = {}
+
+
+def create_player(config):
+    """
+    Function: create_player
+        Create the Controller and the Solver that play the games of a config.
+    Parameter:
+        config (tuple) -- (strategy, code length, max guess, tuple of
+                          scripted guesses as tuples, book filename or None)
+    Return:
+        A 2-tuple of Controller and Solver
+    """
+
+    strategy, length, max_guess, script, book_filename = config
+    if strategy not in STRATEGIES:
+        raise ValueError("Strategy must be one of: " +
+                         ", ".join(STRATEGIES) + "!")
+
+    model = GameModel(max_guess = max_guess)
+    model.create_code(length)
+    controller = Controller(model)
+
+    if strategy == "scripted":
+        solver = ScriptedSolver(model, [list(guess) for guess in script])
+    else:
+        solver = STRATEGIES[strategy](model)
+    if book_filename is not None:
+        solver.add_book(OpeningBook(book_filename))
+
+    return controller, solver
+
+
+def play_game(controller, solver):
+    """
+    Function: play_game
+        Play a new game through the Controller, with the Solver's guesses.
+    Parameters:
+        controller (Controller) -- the Controller of the game
+        solver (Solver) -- the Solver playing the Controller's GameModel
+    Return:
+        A list representing the game: [secret code, guesses used, game status]
+    """
+
+    controller.restart()
+    controller.reset_guess()
+    solver.reset()
+
+    while controller.game_status == "running":
+        guess = solver.next_guess()
+        for i, color in enumerate(guess):
+            controller.add_guess(color, i)
+        controller.update_game()
+        solver.add_feedback(guess, *controller.get_bulls_and_cows())
+
+    return [controller.model.code[:], controller.model.score,
+            controller.game_status]
+
+
+def play_games(config, seed, first_index, game_num):
+    """
+    Function: play_games
+        Play a chunk of games, in a worker process. The worker keeps one
+        Controller and Solver per config over the calls. Each game draws
+        from its own random stream, split from the seed of the run,
+        so a game plays the same whichever worker plays it.
+    Parameters:
+        config (tuple) -- the simulation config, as in create_player
+        seed (int) -- the master seed of the run
+        first_index (int) -- the index of the chunk's first game in the run
+        game_num (int) -- the number of games to play
+    Return:
+        A list of games, as returned by play_game
+    """
+
+    if config not in _worker_players:
+        _worker_players[config] = create_player(config)
+    controller, solver = _worker_players[config]
+
+    games = []
+    for game_index in range(first_index, first_index + game_num):
+        controller.model.rng = random.Random(game_seed(seed, game_index))
+        games.append(play_game(controller, solver))
+    return games
+
+
+def format_game(game_id, game):
+    """
+    Function: format_game
+        Format the result of one game as a tab-separated line.
+    Parameters:
+        game_id (int) -- the number of the game in the run
+        game (list) -- the game, as returned by play_game
+    Return:
+        A string: game id, comma-separated secret code, guesses used, status
+    """
+
+    code, guess_num, status = game
+    return "{}\t{}\t{}\t{}\n".format(game_id, ",".join(code), guess_num, status)
+
+
+def run_simulation(config, game_num, worker_num = None,
+                   chunk_size = CHUNK_SIZE, outfile = None, seed = None):
+    """
+    Function: run_simulation
+        Play games in a pool of worker processes, streaming the result of
+        each game as soon as its chunk is done. With the same seed,
+        the games are the same for any number of workers.
+    Parameters:
+        config (tuple) -- the simulation config, as in create_player
+        game_num (int) -- the number of games to play
+        worker_num (int) -- the number of worker processes,
+                            the number of CPUs if not given
+        chunk_size (int) -- the number of games a worker plays per task
+        outfile (file) -- the file the game results are written to,
+                          or None not to write them
+        seed (int) -- the master seed of the run, a random seed if not given
+    Return:
+        A 3-tuple: a dictionary with key = number of guesses of a won game,
+        value = number of won games; the number of lost games;
+        and the seconds taken
+    """
+
+    if not (isinstance(game_num, int) and isinstance(chunk_size, int)):
+        raise TypeError("Game number and chunk size must be integers!")
+    elif game_num < 0 or chunk_size < 1:
+        raise ValueError("Game number and chunk size must be positive!")
+
+    if worker_num is None:
+        worker_num = os.cpu_count() or 1
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 63)
+
+    # check the config once, before starting the workers
+    create_player(config)
+
+    starts = list(range(0, game_num, chunk_size))
+    chunks = [min(chunk_size, game_num - start) for start in starts]
+    distribution = {}
+    lost_num = 0
+    game_id = 0
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(worker_num) as executor:
+        for games in executor.map(play_games, [config] * len(chunks),
+                                  [seed] * len(chunks), starts, chunks):
+            for game in games:
+                game_id += 1
+                if outfile is not None:
+                    outfile.write(format_game(game_id, game))
+                if game[2] == "win":
+                    distribution[game[1]] = distribution.get(game[1], 0) + 1
+                else:
+                    lost_num += 1
+    seconds = time.perf_counter() - start
+
+    return distribution, lost_num, seconds
+
+
+def format_summary(distribution, lost_num, seconds):
+    """
+    Function: format_summary
+        Format the guess-count distribution and throughput of a run.
+    Parameters:
+        distribution (dict) -- key = number of guesses of a won game,
+                               value = number of won games
+        lost_num (int) -- the number of lost games
+        seconds (float) -- the seconds the run took
+    Return:
+        A string of summary lines
+    """
+
+    won_num = sum(distribution.values())
+    game_num = won_num + lost_num
+    lines = ["Games: {}\tWon: {}\tLost: {}".format(game_num, won_num, lost_num)]
+    if won_num > 0:
+        average = sum(score * num for score, num in distribution.items()) / won_num
+        lines.append("Average guesses: {:.4f}\tMost guesses: {}".format(
+            average, max(distribution)))
+    for score in sorted(distribution):
+        lines.append("{} guesses: {}\t{:.2%}".format(
+            score, distribution[score], distribution[score] / game_num))
+    lines.append("Games/sec: {:.1f}".format(game_num / max(seconds, 1e-9)))
+
+    return "\n".join(lines) + "\n"
+
+
+def parse_script(text):
+    """
+    Function: parse_script
+        Parse a scripted guess list: guesses separated by ";", colors of
+        a guess separated by ",", and an empty color for a blank.
+    Parameter:
+        text (str) -- the script text
+    Return:
+        A tuple of tuple of str representing the guesses
+    """
+
+    return tuple(tuple(guess.split(",")) for guess in text.split(";")
+                 if guess != "")
+
+
+def parse_arguments(args = None):
+    """
+    Function: parse_arguments
+        Parse the command-line arguments of the simulator. A scripted
+        guess of an unknown color or of another length than the code's
+        is reported like the other bad arguments.
+    Parameter:
+        args (list of str) -- the arguments, sys.argv if not given
+    Return:
+        An argparse.Namespace
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Play Mastermind games headless with a solver strategy.")
+    parser.add_argument("-n", "--games", type=int, default=1000,
+                        help="number of games to play")
+    parser.add_argument("-s", "--strategy", choices=list(STRATEGIES),
+                        default="random-consistent", help="guessing strategy")
+    parser.add_argument("--script", default="",
+                        help="scripted guesses, e.g. 'red,red,blue,blue;...'")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="number of worker processes (default: all CPUs)")
+    parser.add_argument("--length", type=int, default=CODE_LENGTH,
+                        help="code length")
+    parser.add_argument("--max-guess", type=int, default=MAX_GUESS,
+                        help="guesses allowed per game")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="games per worker task")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="master seed, for reproducible runs")
+    parser.add_argument("--book", default=None,
+                        help="opening book file to use, built if missing")
+    parser.add_argument("-o", "--output", default="-",
+                        help="file for per-game results ('-' for stdout, " +
+                             "'' for none)")
+    arguments = parser.parse_args(args)
+
+    for guess in parse_script(arguments.script):
+        for color in guess:
+            if color not in COLORS:
+                parser.error("argument --script: invalid color: {!r} "
+                             "(choose from {})".format(
+                                 color, ", ".join(map(repr, COLORS))))
+        if len(guess) != arguments.length:
+            parser.error("argument --script: each guess must have {} "
+                         "colors".format(arguments.length))
+
+    return arguments
+
+
+def main(args = None):
+    """
+    Function: main
+        Run the simulator from the command line: stream per-game results,
+        then print the seed, the guess-count distribution and games/sec.
+    Parameter:
+        args (list of str) -- the arguments, sys.argv if not given
+    Return: nothing
+    """
+
+    arguments = parse_arguments(args)
+    script = parse_script(arguments.script)
+    config = (arguments.strategy, arguments.length, arguments.max_guess,
+              script, arguments.book)
+    seed = arguments.seed
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 63)
+
+    if arguments.book is not None:
+        controller, solver = create_player(config[:4] + (None,))
+        load_opening_book(solver, filename = arguments.book).close()
+
+    if arguments.output == "-":
+        outfile = sys.stdout
+    elif arguments.output == "":
+        outfile = None
+    else:
+        outfile = open(arguments.output, "w")
+
+    try:
+        distribution, lost_num, seconds = run_simulation(
+            config, arguments.games, arguments.workers,
+            arguments.chunk_size, outfile, seed)
+    finally:
+        if outfile is not None and outfile is not sys.stdout:
+            outfile.close()
+
+    sys.stdout.write("Seed: {}\n".format(seed))
+    sys.stdout.write(format_summary(distribution, lost_num, seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Score Sketch
+    Keep the distribution of every finished game's score in constant memory.
+"""
+
+from mastermind_game_leaderboard import LOCK_SUFFIX, lock_file, write_atomic
+
+SKETCH_SUFFIX = ".sketch"
+
+
+class ScoreSketch:
+    """
+    A class that keeps the distribution of the scores of finished games.
+    A score is a number of guesses, at most the guesses allowed, so a
+    count per score is exact and takes constant memory: quantiles and
+    percentiles are answered from the counts, and two sketches merge by
+    adding their counts.
+    Attributes: name(str), counts(list of int), lost_num(int)
+    Methods: __init__, add, merge, win_num, game_num, quantile, median,
+             percentile, to_text, __str__, __eq__
+    """
+
+    def __init__(self):
+        """
+        Method: __init__
+            Create an instance of ScoreSketch, without games.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.name = "Score Sketch"
+        # counts[score] = the number of games won with that score
+        self.counts = [0]
+        self.lost_num = 0
+
+    def add(self, score, status = "win"):
+        """
+        Method: add
+            Count a finished game.
+        Parameters:
+            score (int) -- the guesses used
+            status (str) -- the game status, "win" or "lost"
+        Return: nothing
+        """
+
+        if not isinstance(score, int):
+            raise TypeError("Score must be an integer!")
+        elif score < 1:
+            raise ValueError("Score must be positive!")
+
+        if status == "win":
+            if score >= len(self.counts):
+                self.counts.extend([0] * (score + 1 - len(self.counts)))
+            self.counts[score] += 1
+        elif status == "lost":
+            self.lost_num += 1
+        else:
+            raise ValueError("Status must be win or lost!")
+
+    def merge(self, other):
+        """
+        Method: merge
+            Add the games of another sketch, e.g. of another process.
+        Parameter:
+            other (ScoreSketch) -- the sketch to merge
+        Return: nothing
+        """
+
+        if not isinstance(other, ScoreSketch):
+            raise TypeError("Argument must be of ScoreSketch class!")
+
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for score, num in enumerate(other.counts):
+            self.counts[score] += num
+        self.lost_num += other.lost_num
+
+    def win_num(self):
+        """
+        Method: win_num
+            Get the number of won games.
+        Parameter: nothing
+        Return:
+            An integer representing the number of won games
+        """
+
+        return sum(self.counts)
+
+    def game_num(self):
+        """
+        Method: game_num
+            Get the number of finished games.
+        Parameter: nothing
+        Return:
+            An integer representing the number of finished games
+        """
+
+        return sum(self.counts) + self.lost_num
+
+    def quantile(self, fraction):
+        """
+        Method: quantile
+            Get a quantile of the scores of the won games: the lowest
+            score that at least the fraction of won games is not above.
+        Parameter:
+            fraction (int or float) -- the fraction, from 0 to 1
+        Return:
+            An integer representing the score, or None without won games
+        """
+
+        if not isinstance(fraction, (int, float)):
+            raise TypeError("Fraction must be a number!")
+        elif not 0 <= fraction <= 1:
+            raise ValueError("Fraction must be from 0 to 1!")
+
+        target = fraction * self.win_num()
+        cumulative = 0
+        for score, num in enumerate(self.counts):
+            cumulative += num
+            if cumulative > 0 and cumulative >= target:
+                return score
+        return None
+
+    def median(self):
+        """
+        Method: median
+            Get the median score of the won games.
+        Parameter: nothing
+        Return:
+            An integer representing the score, or None without won games
+        """
+
+        return self.quantile(0.5)
+
+    def percentile(self, score):
+        """
+        Method: percentile
+            Get the percentage of finished games a won game's score beats:
+            the games won with more guesses, and the games lost.
+        Parameter:
+            score (int) -- the guesses used
+        Return:
+            A float representing the percentage, or None without games
+        """
+
+        if not isinstance(score, int):
+            raise TypeError("Score must be an integer!")
+
+        if self.game_num() == 0:
+            return None
+        beaten = sum(self.counts[score + 1:]) + self.lost_num
+        return 100 * beaten / self.game_num()
+
+    def to_text(self):
+        """
+        Method: to_text
+            Get the text of the sketch file: the number of lost games,
+            then the number of games won with each score from 1.
+        Parameter: nothing
+        Return:
+            A string of one line
+        """
+
+        return " ".join(str(num) for num in [self.lost_num] + self.counts[1:]) \
+            + "\n"
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of ScoreSketch instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tGames: {}\tMedian: {}".format(self.name, self.game_num(),
+                                                  self.median())
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current ScoreSketch instance to another one.
+            Two instances are equal if they counted the same games.
+        Parameter:
+            other (ScoreSketch) -- another instance of ScoreSketch
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        if not isinstance(other, ScoreSketch):
+            return False
+        length = max(len(self.counts), len(other.counts))
+        return self.lost_num == other.lost_num and \
+               self.counts + [0] * (length - len(self.counts)) == \
+               other.counts + [0] * (length - len(other.counts))
+
+
+def parse_sketch(text):
+    """
+    Function: parse_sketch
+        Parse the text of a sketch file.
+    Parameter:
+        text (str) -- the text, as from ScoreSketch.to_text
+    Return:
+        A ScoreSketch
+    """
+
+    if not isinstance(text, str):
+        raise TypeError("Text must be a string!")
+
+    nums = [int(num) for num in text.split()]
+    if not nums or min(nums) < 0:
+        raise ValueError("Sketch text must be non-negative integers!")
+
+    sketch = ScoreSketch()
+    sketch.lost_num = nums[0]
+    sketch.counts = [0] + nums[1:]
+    return sketch
+
+
+def read_sketch(filename):
+    """
+    Function: read_sketch
+        Read a sketch file.
+    Parameter:
+        filename (str) -- the sketch filename
+    Return:
+        A ScoreSketch, without games if the file is missing
+    """
+
+    try:
+        with open(filename, "r") as infile:
+            return parse_sketch(infile.read())
+    except FileNotFoundError:
+        return ScoreSketch()
+
+
+def merge_sketch_file(filename, sketch):
+    """
+    Function: merge_sketch_file
+        Add the games of a sketch to a sketch file, under a file lock,
+        so sketches of many processes merge without losing games.
+    Parameters:
+        filename (str) -- the sketch filename
+        sketch (ScoreSketch) -- the games to add
+    Return:
+        A ScoreSketch with every game of the file
+    """
+
+    with lock_file(filename + LOCK_SUFFIX):
+        merged = read_sketch(filename)
+        merged.merge(sketch)
+        write_atomic(filename, merged.to_text())
+    return merged
@@ -0,0 +1,184 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Game Snapshot
+    Save the Mastermind game in progress in a compact binary snapshot,
+    and restore it when the game starts again.
+"""
+
+import os
+import struct
+from mastermind_game_model import GameModel, CandidateTracker, STATUS_NAMES
+from mastermind_game_leaderboard import write_atomic
+from mastermind_game_recorder import encode_varint, decode_varint, \
+    encode_string, decode_string, decode_colors
+
+SNAPSHOT_FILENAME = "snapshot.bin"
+SNAPSHOT_MAGIC = b"MMSS"
+SNAPSHOT_VERSION = 1
+
+# header: magic, version
+SNAPSHOT_HEADER = struct.Struct("<4sH")
+
+
+def encode_snapshot(controller):
+    """
+    Function: encode_snapshot
+        Encode the game of a Controller: the player, the current guess,
+        round and game status of the Controller, and the guesses allowed,
+        code range, secret code, score, bulls, cows and guess history of
+        its GameModel. The numbers are varints and the colors indexes of
+        the code range, so a game of 10 rounds takes about 150 bytes.
+    Parameter:
+        controller (Controller) -- the Controller of the game
+    Return:
+        A bytes of the snapshot
+    """
+
+    model = controller.model
+    if model is None:
+        raise ValueError("The Controller has no game to save!")
+
+    code_range = model.code_range
+    try:
+        # the encoded index of each color, so each color is looked up once
+        color_index = {color: encode_varint(i)
+                       for i, color in enumerate(code_range)}.__getitem__
+
+        data = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION),
+                encode_string(controller.player),
+                encode_varint(model.max_guess),
+                encode_varint(len(code_range))]
+        data += [encode_string(color) for color in code_range]
+        data += [encode_varint(len(model.code)),
+                 b"".join(map(color_index, model.code)),
+                 encode_varint(model.score), encode_varint(model.bull_num),
+                 encode_varint(model.cow_num),
+                 encode_varint(len(model.history))]
+        for guess, bull_num, cow_num in model.history:
+            data += [b"".join(map(color_index, guess)), encode_varint(bull_num),
+                     encode_varint(cow_num)]
+        data += [encode_varint(len(controller.current_guess)),
+                 b"".join(map(color_index, controller.current_guess)),
+                 encode_varint(controller.current_round),
+                 bytes([STATUS_NAMES.index(controller.game_status),
+                        model.track_candidates])]
+    except KeyError:
+        raise ValueError("The color is not contained in the code range!")
+
+    return b"".join(data)
+
+
+def decode_snapshot(data):
+    """
+    Function: decode_snapshot
+        Decode a snapshot, creating the GameModel of the game. With
+        tracked candidates, they are filtered again by the guess history.
+    Parameter:
+        data (bytes-like) -- the snapshot, as from encode_snapshot
+    Return:
+        A dictionary of the game: player (str), model (GameModel),
+        current_guess (list of str), current_round (int), game_status (str)
+    """
+
+    if len(data) < SNAPSHOT_HEADER.size or \
+            SNAPSHOT_HEADER.unpack_from(data) != (SNAPSHOT_MAGIC,
+                                                  SNAPSHOT_VERSION):
+        raise ValueError("The data is not a game snapshot!")
+
+    try:
+        player, offset = decode_string(data, SNAPSHOT_HEADER.size)
+        max_guess, offset = decode_varint(data, offset)
+        color_num, offset = decode_varint(data, offset)
+        code_range = []
+        for i in range(color_num):
+            color, offset = decode_string(data, offset)
+            code_range.append(color)
+
+        code_length, offset = decode_varint(data, offset)
+        code, offset = decode_colors(data, offset, code_length, code_range)
+        score, offset = decode_varint(data, offset)
+        bull_num, offset = decode_varint(data, offset)
+        cow_num, offset = decode_varint(data, offset)
+        history_num, offset = decode_varint(data, offset)
+        history = []
+        for i in range(history_num):
+            guess, offset = decode_colors(data, offset, code_length, code_range)
+            guess_bull_num, offset = decode_varint(data, offset)
+            guess_cow_num, offset = decode_varint(data, offset)
+            history.append((guess, guess_bull_num, guess_cow_num))
+
+        guess_length, offset = decode_varint(data, offset)
+        current_guess, offset = decode_colors(data, offset, guess_length,
+                                              code_range)
+        current_round, offset = decode_varint(data, offset)
+        game_status = STATUS_NAMES[data[offset]]
+        track_candidates = bool(data[offset + 1])
+    except IndexError:
+        raise ValueError("The game snapshot is truncated or invalid!")
+
+    if offset + 2 != len(data):
+        raise ValueError("The game snapshot is truncated or invalid!")
+
+    model = GameModel(max_guess, code_range, track_candidates)
+    model.code = code
+    model.score, model.bull_num, model.cow_num = score, bull_num, cow_num
+    model.history = history
+    model.guess = history[-1][0] if history else []
+    if track_candidates:
+        model.candidates = CandidateTracker(code_range, code_length)
+        for guess, guess_bull_num, guess_cow_num in history:
+            model.candidates.update(guess, guess_bull_num, guess_cow_num)
+
+    return {"player": player, "model": model, "current_guess": current_guess,
+            "current_round": current_round, "game_status": game_status}
+
+
+def save_snapshot(controller, filename = SNAPSHOT_FILENAME):
+    """
+    Function: save_snapshot
+        Save the game of a Controller in a snapshot file, written through
+        a temporary file so a crash never leaves half a snapshot.
+    Parameters:
+        controller (Controller) -- the Controller of the game
+        filename (str) -- the snapshot filename
+    Return: nothing
+    """
+
+    write_snapshot(encode_snapshot(controller), filename)
+
+
+def write_snapshot(data, filename = SNAPSHOT_FILENAME):
+    """
+    Function: write_snapshot
+        Write an encoded snapshot to a snapshot file, through a temporary
+        file, e.g. in a worker's thread. Without a snapshot, a finished
+        game has nothing to resume, so the file is removed instead.
+    Parameters:
+        data (bytes) -- the snapshot, as from encode_snapshot, or None
+        filename (str) -- the snapshot filename
+    Return: nothing
+    """
+
+    if data is not None:
+        write_atomic(filename, data)
+    elif os.path.exists(filename):
+        os.remove(filename)
+
+
+def load_snapshot(filename = SNAPSHOT_FILENAME):
+    """
+    Function: load_snapshot
+        Load the game saved in a snapshot file.
+    Parameter:
+        filename (str) -- the snapshot filename
+    Return:
+        A dictionary of the game, as from decode_snapshot,
+        or None if there is no snapshot file
+    """
+
+    if not os.path.exists(filename):
+        return None
+    with open(filename, "rb") as infile:
+        return decode_snapshot(infile.read())
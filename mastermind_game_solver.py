@@ -0,0 +1,745 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Game Solver
+    Create the solvers that play the Mastermind game model automatically.
+"""
+
+import hashlib
+from bisect import bisect_left
+from itertools import compress, repeat
+from math import log2
+from operator import add, mul
+from mastermind_game_model import GameModel
+from mastermind_game_score import PACKED_LENGTH_LIMIT, full_code_array, \
+    get_score_table, pack_score
+from mastermind_game_symmetry import CodeSymmetry
+
+MATRIX_LIMIT = 2 ** 24  # the most bytes of scores held at once
+SYMMETRY_CANDIDATE_LIMIT = 64  # the fewest candidates worth a symmetry pass
+PARALLEL_LIMIT = 2 ** 24  # the fewest (guess, candidate) pairs sent to workers
+
+
+class Solver:
+    """
+    A class that plays the GameModel automatically: keeps the codes still
+    consistent with all feedback, and guesses the first of them.
+    Subclasses pick better guesses by overriding choose_guess.
+    Attributes: name(str), model(GameModel), length(int), table(ScoreTable),
+                codes(CodeArray), candidates(CodeArray),
+                score_values(list of int), history(list of tuple),
+                first_guess(list of str), book(OpeningBook),
+                symmetry(CodeSymmetry), evaluator(ParallelEvaluator)
+    Methods: __init__, reset, get_digest, add_book, book_guess, add_symmetry,
+             add_evaluator, guess_classes, candidate_scores, partition_sizes,
+             partition_counts, choose_guess, next_guess, new_game,
+             add_feedback, play, __str__, __eq__
+    """
+
+    def __init__(self, model):
+        """
+        Method: __init__
+            Create an instance of Solver.
+        Parameter:
+            model (GameModel) -- the GameModel to play, with its code created
+        Return: nothing
+        """
+
+        if not isinstance(model, GameModel):
+            raise TypeError("Model must be of GameModel class!")
+        elif not 0 < len(model.code) <= PACKED_LENGTH_LIMIT:
+            raise ValueError("The model must have a code of length 1 to " +
+                             str(PACKED_LENGTH_LIMIT) + " to solve!")
+
+        self.name = "Mastermind Solver"
+        self.model = model
+        self.length = len(model.code)
+
+        # the shared score table, or None for large code spaces
+        self.table = get_score_table(model.code_range, self.length)
+        if self.table is not None:
+            self.codes = self.table.codes
+        else:
+            self.codes = full_code_array(model.code_range, self.length)
+
+        # all packed scores a guess can get
+        # length - 1 bulls and 1 cow is impossible
+        self.score_values = [pack_score(bull_num, cow_num, self.length)
+                             for bull_num in range(self.length + 1)
+                             for cow_num in range(self.length + 1 - bull_num)
+                             if (bull_num, cow_num) != (self.length - 1, 1)]
+
+        # the first guess only depends on the configuration
+        # so it is computed once and kept over the restarts
+        self.first_guess = None
+        self.book = None
+        self.symmetry = None
+        self.evaluator = None
+        self.candidates = self.codes
+        self.history = []
+
+    def reset(self):
+        """
+        Method: reset
+            Reset the Solver for a new game of the same configuration.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.candidates = self.codes
+        self.history = []
+
+    def get_digest(self):
+        """
+        Method: get_digest
+            Get the digest identifying the configuration and strategy
+            of the Solver, which its opening book must match.
+        Parameter: nothing
+        Return:
+            A 20-byte digest
+        """
+
+        config = repr((self.codes.code_range, self.length, self.name))
+        return hashlib.sha1(config.encode("utf-8")).digest()
+
+    def add_book(self, book):
+        """
+        Method: add_book
+            Let the Solver take its first guesses from an opening book.
+        Parameter:
+            book (OpeningBook) -- the opening book of the Solver's
+                                  configuration and strategy
+        Return: nothing
+        """
+
+        if book.digest != self.get_digest():
+            raise ValueError("The opening book is not for this Solver!")
+
+        self.book = book
+
+    def book_guess(self):
+        """
+        Method: book_guess
+            Look up the next guess in the opening book, if every guess so far
+            was the book's guess.
+        Parameter: nothing
+        Return:
+            An integer representing the encoded guess, or None if the
+            game has left the book
+        """
+
+        feedback = []
+        for guess, bull_num, cow_num in self.history:
+            if self.book.find(feedback) != self.codes.encode(guess):
+                return None
+            feedback.append((bull_num, cow_num))
+
+        return self.book.find(feedback)
+
+    def add_symmetry(self, symmetry):
+        """
+        Method: add_symmetry
+            Let the Solver rate one guess of each class of equivalent guesses,
+            instead of every code.
+        Parameter:
+            symmetry (CodeSymmetry) -- the CodeSymmetry of the Solver's
+                                       configuration
+        Return: nothing
+        """
+
+        if not isinstance(symmetry, CodeSymmetry):
+            raise TypeError("Symmetry must be of CodeSymmetry class!")
+        elif symmetry.codes.code_range != self.codes.code_range or \
+                symmetry.codes.length != self.length:
+            raise ValueError("The symmetry is not for this Solver!")
+
+        self.symmetry = symmetry
+
+    def add_evaluator(self, evaluator):
+        """
+        Method: add_evaluator
+            Let the Solver share out its large partition counts to the
+            worker processes of a ParallelEvaluator.
+        Parameter:
+            evaluator (ParallelEvaluator) -- the evaluator to use,
+                                             or None to count in this process
+        Return: nothing
+        """
+
+        if evaluator is not None and evaluator.executor is None:
+            raise ValueError("The evaluator is closed!")
+
+        self.evaluator = evaluator
+
+    def guess_classes(self):
+        """
+        Method: guess_classes
+            Get the guesses worth rating: one code of each class of
+            equivalent guesses, given the guesses played. Equivalent guesses
+            split the candidates alike, so they have the same rating.
+        Parameter: nothing
+        Return:
+            A sorted list of encoded guesses, or None to rate every code
+            when there is no symmetry, or too few candidates to pay for it
+        """
+
+        if self.symmetry is None or \
+                len(self.candidates) < SYMMETRY_CANDIDATE_LIMIT:
+            return None
+
+        guesses = self.symmetry.representatives(
+            [guess for guess, bull_num, cow_num in self.history])
+        return None if len(guesses) == len(self.codes) else guesses
+
+    def candidate_scores(self, code_index):
+        """
+        Method: candidate_scores
+            Get the packed scores of every code, as a guess, against one code.
+            Scores are symmetric, so this is the score-table row of the code.
+        Parameter:
+            code_index (int) -- the encoded code
+        Return:
+            A bytes-like object of packed scores, indexed by the encoded guess
+        """
+
+        if self.table is not None:
+            return self.table.row(code_index)
+
+        return self.codes.score(self.codes.decode(code_index))
+
+    def partition_sizes(self, guess):
+        """
+        Method: partition_sizes
+            Count how the candidates split by the feedback to one guess.
+        Parameter:
+            guess (list of str) -- the color guess
+        Return:
+            A list of integers, the number of candidates for each
+            feedback in score_values
+        """
+
+        scores = self.candidates.score(guess)
+        return [scores.count(value) for value in self.score_values]
+
+    def partition_counts(self, guesses = None):
+        """
+        Method: partition_counts
+            Count how the candidates split by the feedback to each guess,
+            in one batched pass: the score rows of the candidates are
+            laid out as a matrix with one contiguous row per guess, then each
+            feedback is counted per guess row with bytearray.count,
+            so there is no Python work per (guess, candidate) pair.
+            With a ParallelEvaluator added, large counts are shared out
+            to its worker processes.
+        Parameter:
+            guesses (list or range of int) -- the encoded guesses to count,
+                                              every code if not given
+        Return:
+            A list with one list per feedback in score_values, holding the
+            number of candidates with that feedback for each guess
+        """
+
+        guesses = range(len(self.codes)) if guesses is None else guesses
+        size, width = len(guesses), len(self.candidates)
+
+        if self.evaluator is not None and size * width >= PARALLEL_LIMIT:
+            return self.evaluator.partition_counts(self, guesses)
+
+        counts = [[] for value in self.score_values]
+        contiguous = isinstance(guesses, range) and guesses.step == 1
+
+        # the guesses are done in blocks to bound the matrix size
+        block = max(1, MATRIX_LIMIT // max(1, width))
+        for start in range(0, size, block):
+            stop = min(start + block, size)
+            matrix = bytearray((stop - start) * width)
+
+            if self.table is None:
+                # scores are symmetric: score the block's guesses against
+                # each candidate, instead of every code
+                block_codes = self.codes.take(guesses[start:stop])
+                for column, candidate in enumerate(self.candidates.codes):
+                    matrix[column::width] = block_codes.score(
+                        self.codes.decode(candidate))
+            elif contiguous:
+                first, last = guesses[start], guesses[stop - 1] + 1
+                for column, candidate in enumerate(self.candidates.codes):
+                    matrix[column::width] = self.table.row(candidate)[first:last]
+            else:
+                for column, candidate in enumerate(self.candidates.codes):
+                    scores = self.table.row(candidate)
+                    matrix[column::width] = bytes(map(scores.__getitem__,
+                                                      guesses[start:stop]))
+
+            row_starts = range(0, len(matrix), width)
+            row_ends = range(width, len(matrix) + 1, width)
+            for i, value in enumerate(self.score_values):
+                counts[i].extend(map(matrix.count, repeat(value),
+                                     row_starts, row_ends))
+
+        return counts
+
+    def choose_guess(self):
+        """
+        Method: choose_guess
+            Choose the next guess among the codes: the first candidate.
+        Parameter: nothing
+        Return:
+            A list of str representing the guess
+        """
+
+        return self.codes.decode(self.candidates.codes[0])
+
+    def next_guess(self):
+        """
+        Method: next_guess
+            Get the next guess of the Solver.
+        Parameter: nothing
+        Return:
+            A list of str representing the guess
+        """
+
+        if len(self.candidates) == 0:
+            raise ValueError("No code is consistent with the feedback!")
+
+        # the only candidate left must be the code
+        elif len(self.candidates) == 1:
+            return self.codes.decode(self.candidates.codes[0])
+
+        if self.book is not None:
+            guess_index = self.book_guess()
+            if guess_index is not None:
+                return self.codes.decode(guess_index)
+
+        if len(self.history) == 0:
+            if self.first_guess is None:
+                self.first_guess = self.choose_guess()
+            return self.first_guess[:]
+
+        return self.choose_guess()
+
+    def new_game(self, code = None):
+        """
+        Method: new_game
+            Restart the GameModel and the Solver for a new game, with every
+            code consistent again in the GameModel's tracked candidates.
+        Parameter:
+            code (list of str) -- the secret code of the new game,
+                                  a random code if not given
+        Return: nothing
+        """
+
+        self.model.restart()
+        if code is not None:
+            self.model.code = code
+        if self.model.candidates is not None:
+            self.model.candidates.reset()
+        self.reset()
+
+    def add_feedback(self, guess, bull_num, cow_num):
+        """
+        Method: add_feedback
+            Keep only the candidates consistent with the feedback to a guess.
+        Parameters:
+            guess (list of str) -- the color guess
+            bull_num (int) -- the number of bulls of the guess
+            cow_num (int) -- the number of cows of the guess
+        Return: nothing
+        """
+
+        self.candidates = self.candidates.filter(guess, bull_num, cow_num)
+        self.history.append((guess, bull_num, cow_num))
+
+    def play(self):
+        """
+        Method: play
+            Play the GameModel from its current state until the game ends.
+        Parameter: nothing
+        Return:
+            A string representing the game status: "win" or "lost"
+        """
+
+        while self.model.check_status() == "running":
+            guess = self.next_guess()
+            self.model.update(guess)
+            self.add_feedback(guess, self.model.bull_num, self.model.cow_num)
+
+        return self.model.check_status()
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of Solver instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tCandidates: {}\tGuesses: {}".format(
+            self.name, len(self.candidates), len(self.history))
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current Solver instance to another one.
+        Parameter:
+            other (Solver) -- another instance of Solver
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        # two Solvers are equal, only if they are the same kind of Solver
+        # and play exactly the same object of GameModel
+        return type(self) == type(other) and self.model is other.model
+
+
+class RandomSolver(Solver):
+    """
+    A class that plays the GameModel by guessing a random code still
+    consistent with all feedback, drawn from the GameModel's rng.
+    Attributes: name, model, length, table, codes, candidates, score_values,
+                history, first_guess, book, symmetry, evaluator
+    Methods: __init__, choose_guess, next_guess, and other methods from Solver
+    """
+
+    def __init__(self, model):
+        """
+        Method: __init__
+            Create an instance of RandomSolver.
+        Parameter:
+            model (GameModel) -- the GameModel to play, with its code created
+        Return: nothing
+        """
+
+        super().__init__(model)
+        self.name = "Random Solver"
+
+    def choose_guess(self):
+        """
+        Method: choose_guess
+            Choose a random candidate.
+        Parameter: nothing
+        Return:
+            A list of str representing the guess
+        """
+
+        return self.codes.decode(self.model.rng.choice(self.candidates.codes))
+
+    def next_guess(self):
+        """
+        Method: next_guess
+            Get the next guess of the Solver.
+        Parameter: nothing
+        Return:
+            A list of str representing the guess
+        """
+
+        guess = super().next_guess()
+        # every game starts with its own random guess
+        self.first_guess = None
+        return guess
+
+
+class ScriptedSolver(Solver):
+    """
+    A class that plays the GameModel by a fixed list of guesses, then by
+    the first candidate once the list is used up.
+    Attributes: name, model, length, table, codes, candidates, score_values,
+                history, first_guess, book, symmetry, evaluator,
+                script(list of list)
+    Methods: __init__, choose_guess, and other methods from Solver
+    """
+
+    def __init__(self, model, script):
+        """
+        Method: __init__
+            Create an instance of ScriptedSolver.
+        Parameters:
+            model (GameModel) -- the GameModel to play, with its code created
+            script (list of list) -- the color guesses to play in order
+        Return: nothing
+        """
+
+        super().__init__(model)
+        if not isinstance(script, list):
+            raise TypeError("Script must be a list!")
+        for guess in script:
+            if not isinstance(guess, list) or len(guess) != self.length:
+                raise ValueError("Each guess of the script must be a list " +
+                                 "of the code length!")
+            elif not set(guess) <= set(self.codes.code_range):
+                raise ValueError("The guess is not contained in the code range!")
+
+        self.name = "Scripted Solver"
+        self.script = script
+
+    def choose_guess(self):
+        """
+        Method: choose_guess
+            Choose the next guess of the script, or the first candidate.
+        Parameter: nothing
+        Return:
+            A list of str representing the guess
+        """
+
+        if len(self.history) < len(self.script):
+            return self.script[len(self.history)][:]
+
+        return super().choose_guess()
+
+
+class PartitionSolver(Solver):
+    """
+    A class that plays the GameModel by rating every code as a guess from
+    how it partitions the candidates, and guessing the best-rated code,
+    preferring consistent codes, then smaller codes, on ties.
+    By default a guess is rated by its largest partition; subclasses
+    define other ratings by overriding rate_guesses.
+    Attributes: name, model, length, table, codes, candidates, score_values,
+                history, first_guess, book, symmetry, evaluator
+    Methods: __init__, rate_guesses, best_guess, choose_guess,
+             and other methods from Solver
+    With a CodeSymmetry added, only one guess of each class of equivalent
+    guesses is rated: its smallest code, so the guess chosen is the same.
+    """
+
+    def __init__(self, model):
+        """
+        Method: __init__
+            Create an instance of PartitionSolver.
+        Parameter:
+            model (GameModel) -- the GameModel to play, with its code created
+        Return: nothing
+        """
+
+        super().__init__(model)
+        self.name = "Partition Solver"
+
+    def rate_guesses(self, counts):
+        """
+        Method: rate_guesses
+            Rate each guess counted by its largest partition, the most
+            candidates it can leave; lower is better.
+        Parameter:
+            counts (list of list) -- the partition counts of the guesses,
+                                     as returned by partition_counts
+        Return:
+            A list of numbers, the rating of each guess
+        """
+
+        return list(map(max, *counts))
+
+    def best_guess(self, ratings, guesses = None):
+        """
+        Method: best_guess
+            Get the best-rated guess, preferring consistent codes,
+            then smaller codes, on ties.
+        Parameters:
+            ratings (list) -- the rating of each guess
+            guesses (list of int) -- the encoded guesses rated, in ascending
+                                     order, every code if not given
+        Return:
+            A list of str representing the guess
+        """
+
+        best_rating = min(ratings)
+
+        if guesses is None:
+            # candidates are in ascending order
+            for candidate in self.candidates.codes:
+                if ratings[candidate] == best_rating:
+                    return self.codes.decode(candidate)
+            return self.codes.decode(ratings.index(best_rating))
+
+        best = list(compress(guesses, map(best_rating.__eq__, ratings)))
+        candidates = self.candidates.codes
+        for guess in best:
+            position = bisect_left(candidates, guess)
+            if position < len(candidates) and candidates[position] == guess:
+                return self.codes.decode(guess)
+        return self.codes.decode(best[0])
+
+    def choose_guess(self):
+        """
+        Method: choose_guess
+            Choose the best-rated code over all codes.
+        Parameter: nothing
+        Return:
+            A list of str representing the guess
+        """
+
+        # with two candidates left, guessing one of them can't be beaten
+        if len(self.candidates) <= 2:
+            return self.codes.decode(self.candidates.codes[0])
+
+        guesses = self.guess_classes()
+        return self.best_guess(self.rate_guesses(self.partition_counts(guesses)),
+                               guesses)
+
+
+class MinimaxSolver(PartitionSolver):
+    """
+    A class that plays the GameModel with Knuth's worst-case strategy:
+    guess the code that minimizes the largest partition of the candidates,
+    the rating of PartitionSolver.
+    Attributes: name, model, length, table, codes, candidates, score_values,
+                history, first_guess, book, symmetry, evaluator
+    Methods: __init__, and other methods from PartitionSolver
+    """
+
+    def __init__(self, model):
+        """
+        Method: __init__
+            Create an instance of MinimaxSolver.
+        Parameter:
+            model (GameModel) -- the GameModel to play, with its code created
+        Return: nothing
+        """
+
+        super().__init__(model)
+        self.name = "Minimax Solver"
+
+
+class EntropySolver(PartitionSolver):
+    """
+    A class that plays the GameModel by maximum information: guess the code
+    whose feedback has the largest entropy over the candidates.
+    Attributes: name, model, length, table, codes, candidates, score_values,
+                history, first_guess, book, symmetry, evaluator
+    Methods: __init__, rate_guesses, and other methods from PartitionSolver
+    """
+
+    def __init__(self, model):
+        """
+        Method: __init__
+            Create an instance of EntropySolver.
+        Parameter:
+            model (GameModel) -- the GameModel to play, with its code created
+        Return: nothing
+        """
+
+        super().__init__(model)
+        self.name = "Entropy Solver"
+
+    def rate_guesses(self, counts):
+        """
+        Method: rate_guesses
+            Rate each guess by the sum of n * log2(n) over its
+            partition sizes n. The entropy of the feedback is
+            log2(candidates) - sum / candidates, so a lower sum is
+            a larger entropy.
+        Parameter:
+            counts (list of list) -- the partition counts of the guesses,
+                                     as returned by partition_counts
+        Return:
+            A list of floats, the rating of each guess
+        """
+
+        n_log_n = [0.0] + [n * log2(n) for n in range(1, len(self.candidates) + 1)]
+        ratings = [0.0] * len(counts[0])
+        for each in counts:
+            ratings = list(map(add, ratings, map(n_log_n.__getitem__, each)))
+        return ratings
+
+
+class ExpectedSizeSolver(PartitionSolver):
+    """
+    A class that plays the GameModel by minimum expected size: guess the code
+    that leaves the fewest candidates on average.
+    Attributes: name, model, length, table, codes, candidates, score_values,
+                history, first_guess, book, symmetry, evaluator
+    Methods: __init__, rate_guesses, and other methods from PartitionSolver
+    """
+
+    def __init__(self, model):
+        """
+        Method: __init__
+            Create an instance of ExpectedSizeSolver.
+        Parameter:
+            model (GameModel) -- the GameModel to play, with its code created
+        Return: nothing
+        """
+
+        super().__init__(model)
+        self.name = "Expected Size Solver"
+
+    def rate_guesses(self, counts):
+        """
+        Method: rate_guesses
+            Rate each guess by the sum of n * n over its partition
+            sizes n. The expected number of candidates left is
+            sum / candidates.
+        Parameter:
+            counts (list of list) -- the partition counts of the guesses,
+                                     as returned by partition_counts
+        Return:
+            A list of integers, the rating of each guess
+        """
+
+        ratings = [0] * len(counts[0])
+        for each in counts:
+            ratings = list(map(add, ratings, map(mul, each, each)))
+        return ratings
+
+
+def evaluate_solver(solver, codes = None):
+    """
+    Function: evaluate_solver
+        Let a Solver play its GameModel once for every code of the code space,
+        or for the given codes, and count the guesses it used.
+    Parameters:
+        solver (Solver) -- the Solver to evaluate
+        codes (iterable of int) -- the encoded codes to play,
+                                   all codes of the code space if not given
+    Return:
+        A 2-tuple: a dictionary with key = number of guesses of a won game,
+        value = number of won games; and the number of lost games
+    """
+
+    if not isinstance(solver, Solver):
+        raise TypeError("Argument must be of Solver class!")
+
+    distribution = {}
+    lost_num = 0
+    for code_index in solver.codes.codes if codes is None else codes:
+        solver.new_game(solver.codes.decode(code_index))
+        if solver.play() == "win":
+            score = solver.model.score
+            distribution[score] = distribution.get(score, 0) + 1
+        else:
+            lost_num += 1
+
+    return distribution, lost_num
+
+
+def compare_solvers(model, solver_classes, codes = None):
+    """
+    Function: compare_solvers
+        Compare Solver strategies on the same GameModel configuration,
+        each playing every code of the code space, or the given codes.
+    Parameters:
+        model (GameModel) -- the GameModel to play, with its code created
+        solver_classes (list) -- the Solver classes to compare
+        codes (iterable of int) -- the encoded codes to play,
+                                   all codes of the code space if not given
+    Return:
+        A list with one list per Solver class: [name, average guesses of won
+        games, most guesses of won games, lost games, max_guess of the model]
+    """
+
+    if not isinstance(solver_classes, list):
+        raise TypeError("Solver classes argument must be a list!")
+
+    codes = None if codes is None else list(codes)
+    results = []
+    for solver_class in solver_classes:
+        solver = solver_class(model)
+        distribution, lost_num = evaluate_solver(solver, codes)
+        won_num = sum(distribution.values())
+        average = sum(score * num for score, num in distribution.items()) / \
+                  max(1, won_num)
+        results.append([solver.name, average, max(distribution, default=0),
+                        lost_num, model.max_guess])
+
+    return results
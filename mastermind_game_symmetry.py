@@ -0,0 +1,203 @@
+"""
+    CS 5001
+    Spring 2021
+    Fangying Li
+    Project: Mastermind Game -- Code Symmetry
+    Group the guesses of the Mastermind game solvers by the symmetries
+    left by the guesses played.
+"""
+
+from itertools import permutations, repeat
+from operator import add, mul
+from mastermind_game_score import CodeArray
+
+SYMMETRY_LENGTH_LIMIT = 6  # the longest code whose positions are permuted
+
+
+class CodeSymmetry:
+    """
+    A class that groups the codes of a configuration into classes of
+    equivalent guesses. Permuting the positions, and the colors, of a code
+    doesn't change how a guess splits the candidates, as long as the
+    permutation leaves every guess played so far unchanged. Such
+    permutations are: a position permutation with the color bijection
+    it forces on the colors played, times any permutation of the colors
+    never played. Each class is represented by its smallest code.
+    Attributes: name(str), codes(CodeArray), free_tables(dict)
+    Methods: __init__, stabilizer, image, free_relabel, representatives,
+             __str__, __eq__
+    """
+
+    def __init__(self, codes):
+        """
+        Method: __init__
+            Create an instance of CodeSymmetry.
+        Parameter:
+            codes (CodeArray) -- the CodeArray of the whole code space
+        Return: nothing
+        """
+
+        if not isinstance(codes, CodeArray):
+            raise TypeError("Codes argument must be of CodeArray class!")
+        elif len(codes) != codes.color_num ** codes.length:
+            raise ValueError("Codes argument must be the whole code space!")
+
+        self.name = "Code Symmetry"
+        self.codes = codes
+
+        # dictionary: key = tuple of free colors,
+        # value = list of the free-relabeled code of each code
+        self.free_tables = {}
+
+    def stabilizer(self, guesses):
+        """
+        Method: stabilizer
+            Find the position permutations, with their color bijections,
+            that leave every guess unchanged.
+            Positions are only permuted up to SYMMETRY_LENGTH_LIMIT.
+        Parameter:
+            guesses (list of list) -- the color guesses played
+        Return:
+            A list of 2-tuples: (position permutation, dictionary of color
+            bijection on the colors played), where position j of the image
+            of a code takes the mapped color at position permutation[j]
+        """
+
+        digits = [[self.codes.color_index[color] for color in guess]
+                  for guess in guesses]
+        length = self.codes.length
+
+        if length <= SYMMETRY_LENGTH_LIMIT:
+            position_perms = permutations(range(length))
+        else:
+            position_perms = [tuple(range(length))]
+
+        elements = []
+        for perm in position_perms:
+            bijection = {}
+            for guess in digits:
+                for j in range(length):
+                    # the color at perm[j] must become the color at j
+                    if bijection.setdefault(guess[perm[j]], guess[j]) != guess[j]:
+                        break
+                else:
+                    continue
+                break
+            else:
+                if len(set(bijection.values())) == len(bijection):
+                    elements.append((perm, bijection))
+
+        return elements
+
+    def image(self, codes, perm, bijection):
+        """
+        Method: image
+            Apply a symmetry to many codes at once, using their digit lanes.
+        Parameters:
+            codes (CodeArray) -- the codes to map
+            perm (tuple of int) -- the position permutation
+            bijection (dict) -- the color bijection on the colors played
+        Return:
+            A list of integers, the encoded image of each code
+        """
+
+        table = bytearray(range(256))
+        for color, new_color in bijection.items():
+            table[color] = new_color
+
+        image = repeat(0, len(codes))
+        for j in range(codes.length):
+            new_digits = codes.digits[perm[j]].translate(table)
+            image = map(add, map(mul, image, repeat(self.codes.color_num)),
+                        new_digits)
+        return list(image)
+
+    def free_relabel(self, free_colors):
+        """
+        Method: free_relabel
+            Relabel the free colors of every code to their smallest code:
+            the free colors, in order of first appearance, become the free
+            colors in ascending order. It is computed once for each set
+            of free colors.
+        Parameter:
+            free_colors (tuple of int) -- the colors never played, ascending
+        Return:
+            A list of integers, the relabeled code of each code
+        """
+
+        if free_colors not in self.free_tables:
+            free_set = set(free_colors)
+            table = []
+            for i in range(len(self.codes)):
+                relabel = {}
+                index = 0
+                for digits in self.codes.digits:
+                    color = digits[i]
+                    if color in free_set:
+                        if color not in relabel:
+                            relabel[color] = free_colors[len(relabel)]
+                        color = relabel[color]
+                    index = index * self.codes.color_num + color
+                table.append(index)
+            self.free_tables[free_colors] = table
+
+        return self.free_tables[free_colors]
+
+    def representatives(self, guesses):
+        """
+        Method: representatives
+            Get one code of each class of equivalent guesses: the smallest.
+            The codes are first relabeled on the free colors, which leaves
+            few codes, then the position symmetries are applied to those.
+        Parameter:
+            guesses (list of list) -- the color guesses played
+        Return:
+            A sorted list of encoded codes
+        """
+
+        played = set(self.codes.color_index[color] for guess in guesses
+                     for color in guess)
+        free_colors = tuple(color for color in range(self.codes.color_num)
+                            if color not in played)
+
+        if len(free_colors) > 1:
+            relabel = self.free_relabel(free_colors)
+            codes = self.codes.take(sorted(set(relabel)))
+        else:
+            relabel = None
+            codes = self.codes
+
+        canonical = list(codes.codes)
+        for perm, bijection in self.stabilizer(guesses):
+            image = self.image(codes, perm, bijection)
+            if relabel is not None:
+                image = map(relabel.__getitem__, image)
+            canonical = list(map(min, canonical, image))
+
+        return sorted(set(canonical))
+
+    def __str__(self):
+        """
+        Method: __str__
+            Return a string representation of CodeSymmetry instance.
+        Parameter: nothing
+        Return:
+            A string representation
+        """
+
+        return "{}\tColors: {}\tLength: {}".format(self.name, self.codes.color_num,
+                                                   self.codes.length)
+
+    def __eq__(self, other):
+        """
+        Method: __eq__
+            Compare current CodeSymmetry instance to another one.
+        Parameter:
+            other (CodeSymmetry) -- another instance of CodeSymmetry
+        Return:
+            A boolean representing whether the two instances are equal
+        """
+
+        return isinstance(other, CodeSymmetry) and \
+               self.codes.code_range == other.codes.code_range and \
+               self.codes.length == other.codes.length
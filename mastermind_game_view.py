@@ -11,6 +11,7 @@ import time
 import tkinter
 from mastermind_game_helper import Point, validate_position
 from mastermind_game_controller import Controller
+from mastermind_game_leaderboard import TOP_LEADERS_NUM
 
 WINDOW_TITLE = "CS5001 MasterMind Code Game"
 WINDOW_WIDTH, WINDOW_HEIGHT = 800, 750
@@ -43,6 +44,9 @@ ROW_MARKER_START = (-350, 325)
 
 WRITTEN_START = (270, 315)
 WRITTEN_LINE_SPACE = 50
+WRITTEN_LEADERS_NUM = TOP_LEADERS_NUM  # the leaders written on the LeaderBoard
+POLL_INTERVAL = 100  # milliseconds between polls of the leaderboard worker
+CHECK_INTERVAL = 2000  # milliseconds between checks for other processes' writes
 
 PICTURES = ["file_error.gif", "leaderboard_error.gif", "winner.gif", "lose.gif",
             "you_quit.gif", "marble_blue.gif", "marble_red.gif", "marble_green.gif",
@@ -347,6 +351,10 @@ class Check(BoardObject):
         # show end message 
         self.board.show_end_message()
 
+        # show the finished game's percentile, only the changed rows are written
+        if self.board.controller.game_status != "running":
+            self.board.leaderboard.write_leaders()
+
         # if game isn't end
         # update the row-marker for new round 
         self.board.buttons["row_marker"].update()
@@ -484,6 +492,9 @@ class Quit(BoardObject):
         """
 
         self.board.pop_message("you_quit.gif")
+        # the leaderboard saves are finished in the background, so the
+        # window closes at once
+        self.board.controller.close(wait = False)
         turtle.bye()
 
 
@@ -538,13 +549,14 @@ class Board:
     A class that represents the Mastermind Game Board, is in charge of the
     user interface of the game.
     Attributes: name, row_num, column_num, window, pen, leaderboard, status_area,
-                marbles, buttons, controller, is_end
+                marbles, buttons, controller, is_end, check_interval
     Methods: __init__, new_pen, new_window, ask_player, add_controller,
              register_pictures, pop_message, initialize_board, draw_area,
              validate_area, initialize_marbles, validate_marbles, initialize_buttons,
              new_check_button, new_cancel_button, new_restart_button,
              new_quit_button, new_row_marker, erase_current_stamps, reset_board,
-             show_end_message, clear_marbles_stamp_memory, operate_board_objects,
+             restore_board, show_end_message, clear_marbles_stamp_memory,
+             operate_board_objects, close_window, poll_worker, check_leaders,
              __str__, __eq__
     """
 
@@ -571,6 +583,9 @@ class Board:
         self.buttons = {}  # dictionary: key = button name, value = button object
 
         self.is_end = False
+        # milliseconds between checks of the leaderboard storage for
+        # other processes' writes, None not to check
+        self.check_interval = CHECK_INTERVAL
 
     def new_pen(self):
         """
@@ -730,7 +745,7 @@ class Board:
         """
         Method: initialize_board
             Initialize the Board, including create and draw the board areas and
-            board objects.
+            board objects, and the rounds of a restored game.
         Parameter: nothing
         Return: nothing
         """
@@ -741,6 +756,10 @@ class Board:
         self.leaderboard = LeaderBoard(self)
         self.leaderboard.draw_area()
         self.leaderboard.write_leaders()
+        if self.controller.worker is not None:
+            self.window.ontimer(self.poll_worker, POLL_INTERVAL)
+        if self.check_interval is not None:
+            self.window.ontimer(self.check_leaders, self.check_interval)
 
         # initialize status area
         self.status_area = BoardStatusArea(self)
@@ -754,6 +773,11 @@ class Board:
         self.initialize_marbles()
         self.initialize_buttons()
 
+        # draw the rounds of a restored game in one batch
+        if self.controller.model.history or \
+                self.controller.get_current_guess_index() >= 0:
+            self.restore_board()
+
     def draw_area(self, start, sides):
         """
         Method: draw_area
@@ -1030,6 +1054,48 @@ class Board:
         # reset the leaderboard area
         self.leaderboard.write_leaders()
 
+    def restore_board(self):
+        """
+        Method: restore_board
+            Draw a restored game on the initialized Board in one batch:
+            the Marble stamps and pegs of each round played, the stamps of
+            the current guess, and the Row-Marker, drawn with the window's
+            animation off and shown in a single window update.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.window.tracer(0)
+        self.is_end = False
+
+        history = self.controller.model.history
+        for row in range(min(len(history), self.row_num)):
+            self.status_area.draw_pegs(row, feedback = history[row][1:])
+
+        marbles = {a_marble.default_color: a_marble for a_marble in self.marbles}
+        used_marbles = set()
+        rows = [guess for guess, bull_num, cow_num in history]
+        rows.append(self.controller.current_guess)
+        for row in range(min(len(rows), self.row_num)):
+            for column, color in enumerate(rows[row]):
+                if color in marbles:
+                    a_marble = marbles[color]
+                    stamp_point = self.status_area.pits_position[row][column]
+                    a_marble.goto(stamp_point.x, stamp_point.y)
+                    stampid = a_marble.stamp()
+                    used_marbles.add(color)
+                    # only the current guess's stamps can be canceled
+                    if row == len(rows) - 1:
+                        a_marble.stamps.append(stampid)
+        for color in used_marbles:
+            marbles[color].goto(marbles[color].position)
+
+        self.buttons["row_marker"].update()
+        self.is_end = self.controller.game_status != "running"
+
+        self.window.update()
+        self.window.tracer(1)
+
     def show_end_message(self):
         """
         Method: show_end_message
@@ -1073,6 +1139,62 @@ class Board:
         self.buttons["quit"].onclick(
             self.buttons["quit"].click_quit)
 
+        # closing the window stops the game like the Quit-Button
+        self.window.getcanvas().winfo_toplevel().protocol(
+            "WM_DELETE_WINDOW", self.close_window)
+
+    def close_window(self):
+        """
+        Method: close_window
+            Stop the game when the window is closed: finish the
+            leaderboard saves and save the game in progress in the
+            background, and close at once.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        self.controller.close(wait = False)
+        turtle.bye()
+
+    def poll_worker(self):
+        """
+        Method: poll_worker
+            Take the leaderboard loads and saves finished in the background,
+            rewrite the LeaderBoard if the leaders changed, and poll again
+            after POLL_INTERVAL, from the window's timer.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        try:
+            if self.controller.poll_worker():
+                self.leaderboard.write_leaders()
+        except IOError:
+            self.pop_message("leaderboard_error.gif")
+
+        if self.controller.worker is not None:
+            self.window.ontimer(self.poll_worker, POLL_INTERVAL)
+
+    def check_leaders(self):
+        """
+        Method: check_leaders
+            Check whether another process changed the leaderboard, rewrite
+            the LeaderBoard if so, and check again after check_interval,
+            from the window's timer. With a worker, the change is taken by
+            poll_worker.
+        Parameter: nothing
+        Return: nothing
+        """
+
+        try:
+            if self.controller.check_leaderboard():
+                self.leaderboard.write_leaders()
+        except IOError:
+            self.pop_message("leaderboard_error.gif")
+
+        if self.check_interval is not None:
+            self.window.ontimer(self.check_leaders, self.check_interval)
+
     def __str__(self):
         """
         Method: __str__
@@ -1101,9 +1223,13 @@ class Board:
 class LeaderBoard(Board):
     """
     A class that represents the LeaderBoard area on the Mastermind Game Board,
-    displaying the leaders records.
-    Attributes: name, pen, written_pen, board
-    Methods: __init__, draw_area, get_leaders_data, write_leaders, validate_writing,
+    displaying the leaders records, and under them the median score and
+    the player's percentile. Each row has a pen of its own,
+    so only the rows that changed are written again.
+    Attributes: name, pen, written_pen, board, row_pens, written_rows,
+                written_version, written_layout, summary_pen, written_summary
+    Methods: __init__, draw_area, get_leaders_data, get_score_summary,
+             write_leaders, validate_writing,
              __str__, __eq__, and other methods from Board class
     """
 
@@ -1124,6 +1250,17 @@ class LeaderBoard(Board):
         self.written_pen = self.new_pen()
         self.board = board
 
+        # one pen and one written message per row
+        self.row_pens = []
+        self.written_rows = []
+        # the version of the leaderboard written, None before any
+        self.written_version = None
+        # the written_start and written_line_space of the written rows
+        self.written_layout = None
+        # the pen and the written message of the score summary row
+        self.summary_pen = self.new_pen()
+        self.written_summary = ""
+
     def draw_area(self, start = LEADERBOARD_START, sides = LEADERBOARD_SIDES):
         """
         Method: draw_area
@@ -1142,24 +1279,45 @@ class LeaderBoard(Board):
     def get_leaders_data(self):
         """
         Method: get_leaders_data
-            Retrieve the leaders data from leaderboard file.
+            Retrieve the leaders data from the Controller's in-memory
+            leaderboard, loaded from leaderboard file the first time.
         Parameter: nothing
         Return: nothing
         """
 
         try:
-            leaderboard_data = self.board.controller.load_leaderboard_file()
+            leaderboard_data = self.board.controller.get_leaders()
         except IOError:
             self.board.pop_message("leaderboard_error.gif")
             leaderboard_data = []
 
         return leaderboard_data
 
+    def get_score_summary(self):
+        """
+        Method: get_score_summary
+            Retrieve the score summary from the Controller's score sketch,
+            read from the sketch file the first time.
+        Parameter: nothing
+        Return:
+            A string representing the summary, empty if there is none
+        """
+
+        try:
+            summary = self.board.controller.get_score_summary()
+        except IOError:
+            self.board.pop_message("leaderboard_error.gif")
+            summary = ""
+
+        return summary
+
     def write_leaders(self, written_start = WRITTEN_START,
                       written_line_space = WRITTEN_LINE_SPACE):
         """
         Method: write_leaders
-            Write the leaders records on the LeaderBoard.
+            Write the leaders records on the LeaderBoard: nothing if the
+            leaderboard's version and the score summary are the ones
+            written, else only the rows that changed.
         Parameters:
             written_start (tuple) -- the tuple of two numbers(int or float),
                                     representing the starting position of writing
@@ -1169,26 +1327,64 @@ class LeaderBoard(Board):
 
         self.validate_writing(written_start, written_line_space)
 
-        self.written_pen.clear()
-        self.written_pen.up()
-        self.written_pen.pencolor("dark red")
-
-        # write the leaderboard title
-        self.written_pen.goto(written_start)
-        self.written_pen.write("TOP LEADERS", False, "center",
-                               font=("Comic Sans MS", 18, "bold"))
-
         # retrieve the leaderboard data
-        # write the leader records
-        leaderboard_data = self.get_leaders_data()
-        for i in range(len(leaderboard_data)):
-            written_x = written_start[0]
-            written_y = written_start[1] - written_line_space * (i + 1)
-            self.written_pen.goto(written_x, written_y)
-            leaderboard_message = leaderboard_data[i][0] + ": " + \
-                                  leaderboard_data[i][1]
-            self.written_pen.write(leaderboard_message, False, "center",
-                                   font=("Comic Sans MS", 14, "bold"))
+        leaderboard_data = self.get_leaders_data()[:WRITTEN_LEADERS_NUM]
+        version = self.board.controller.get_leaders_version()
+        summary = self.get_score_summary()
+        layout = (written_start, written_line_space)
+
+        if layout != self.written_layout:
+            # write the leaderboard title, and every row again
+            self.written_pen.clear()
+            self.written_pen.up()
+            self.written_pen.pencolor("dark red")
+            self.written_pen.goto(written_start)
+            self.written_pen.write("TOP LEADERS", False, "center",
+                                   font=("Comic Sans MS", 18, "bold"))
+            for row_pen in self.row_pens:
+                row_pen.clear()
+            self.written_rows = [""] * len(self.row_pens)
+            self.summary_pen.clear()
+            self.written_summary = ""
+            self.written_layout = layout
+        elif version is not None and version == self.written_version and \
+                summary == self.written_summary:
+            return
+
+        # write the leader records that fit on the LeaderBoard,
+        # only the rows that changed
+        messages = [name + ": " + score for name, score in leaderboard_data]
+        messages.extend([""] * (len(self.written_rows) - len(messages)))
+        for i in range(len(messages)):
+            if i == len(self.row_pens):
+                row_pen = self.new_pen()
+                row_pen.up()
+                row_pen.pencolor("dark red")
+                self.row_pens.append(row_pen)
+                self.written_rows.append("")
+            if messages[i] != self.written_rows[i]:
+                self.row_pens[i].clear()
+                if messages[i] != "":
+                    written_x = written_start[0]
+                    written_y = written_start[1] - written_line_space * (i + 1)
+                    self.row_pens[i].goto(written_x, written_y)
+                    self.row_pens[i].write(messages[i], False, "center",
+                                           font=("Comic Sans MS", 14, "bold"))
+                self.written_rows[i] = messages[i]
+
+        # write the score summary under the last leader row there can be
+        if summary != self.written_summary:
+            self.summary_pen.clear()
+            if summary != "":
+                self.summary_pen.up()
+                self.summary_pen.pencolor("dark red")
+                self.summary_pen.goto(written_start[0], written_start[1] -
+                                      written_line_space * (WRITTEN_LEADERS_NUM + 1))
+                self.summary_pen.write(summary, False, "center",
+                                       font=("Comic Sans MS", 12, "bold"))
+            self.written_summary = summary
+
+        self.written_version = version
 
     def validate_writing(self, written_start, written_line_space):
         """
@@ -1378,7 +1574,9 @@ class BoardStatusArea(Board):
     def initialize_pegs(self):
         """
         Method: initialize_pegs
-            Initialize all pegs on the status-area of the Board.
+            Initialize all pegs on the status-area of the Board: white pegs
+            on the rows not played yet. The pegs of the rounds played, of
+            a restored game, are drawn by the Board's restore_board.
         Parameter: nothing
         Return: nothing
         """
@@ -1388,16 +1586,19 @@ class BoardStatusArea(Board):
         self.peg_pen.shape("circle")
         self.peg_pen.shapesize(0.5)
 
-        for row in range(self.board.row_num):
-            self.draw_pegs(row)
+        history = self.board.controller.model.history
+        for row in range(len(history), self.board.row_num):
+            self.draw_pegs(row, feedback = (0, 0))
 
-    def draw_pegs(self, row, peg_space = PEG_SPACE):
+    def draw_pegs(self, row, peg_space = PEG_SPACE, feedback = None):
         """
         Method: draw_pegs
             Draw all pegs in a given row on the Board .
         Parameters: 
             row (int) -- the index of current row
             peg_space (int) -- the space between each two pegs
+            feedback (tuple of int) -- the bulls and cows of the pegs,
+                                       the last round's if not given
         Return: nothing
         """
 
@@ -1416,7 +1617,7 @@ class BoardStatusArea(Board):
             # draw all pegs in the given row
             # peg position in one row corresponds to vertices of the polygon
             # peg_num = vertex_num = board_column = length of code
-            for a_color in self.get_peg_colors():
+            for a_color in self.get_peg_colors(feedback):
                 self.peg_pen.color(a_color)
                 self.peg_pen.stamp()
                 # peg space = side length of the polygon
@@ -1424,15 +1625,20 @@ class BoardStatusArea(Board):
                 # turn angle = internal angle of the polygon
                 self.peg_pen.right(360 / self.board.column_num)
 
-    def get_peg_colors(self):
+    def get_peg_colors(self, feedback = None):
         """
         Method: get_peg_colors
-            Get the peg colors generated from the last round.
-        Parameter: nothing
+            Get the peg colors generated from the last round,
+            or from the given bulls and cows.
+        Parameter:
+            feedback (tuple of int) -- the bulls and cows,
+                                       the last round's if not given
         Return: nothing
         """
 
-        bull_num, cow_num = self.board.controller.get_bulls_and_cows()
+        if feedback is None:
+            feedback = self.board.controller.get_bulls_and_cows()
+        bull_num, cow_num = feedback
         # black-pegs = bull_num
         # red-pegs = cow_num 
         # white-pegs = code length - bull_num - cow_num
@@ -6,12 +6,59 @@
     Test classes and functions in Mastermind Game.
 """
 
-from mastermind_game_model import GameModel
+from mastermind_game_model import GameModel, GameBatch, CandidateTracker, \
+    MAX_GUESS, STATUS_NAMES, score_guess, game_seed, \
+    count_bulls_and_cows_batch, count_bulls_and_cows_histogram
 from mastermind_game_controller import Controller
+from mastermind_game_leaderboard import Leaderboard, LeaderboardJournal, \
+    SharedLeaderboard, PersistenceWorker, TOP_LEADERS_NUM, JOURNAL_SUFFIX, \
+    LOCK_SUFFIX, \
+    read_records, write_records, get_journal_header, write_atomic, lock_file, \
+    get_file_fingerprint, save_records, LeaderboardShards, \
+    SHARD_INDEX_FILENAME
 from mastermind_game import count_bulls_and_cows
 from mastermind_game_helper import Point, validate_position
+from mastermind_game_solver import Solver, PartitionSolver, MinimaxSolver, \
+    EntropySolver, ExpectedSizeSolver, RandomSolver, ScriptedSolver, \
+    evaluate_solver, compare_solvers
+from mastermind_game_simulator import create_player, play_game, play_games, \
+    format_game, run_simulation, format_summary, parse_script, \
+    parse_arguments, main as simulator_main
+from mastermind_game_book import OpeningBook, build_opening_book, \
+    load_opening_book
+from mastermind_game_score import ScoreTable, CodeArray, get_score_table, \
+    pack_score, unpack_score, full_code_array, CACHE_SIZE
+from mastermind_game_symmetry import CodeSymmetry
+from mastermind_game_parallel import ParallelEvaluator, count_shard, \
+    measure_speedup
+from mastermind_game_database import LeaderboardDatabase, get_game_config, \
+    format_game_config, \
+    TOP_QUERY, CONFIG_TOP_QUERY, CONFIG_PLAYER_BEST_QUERY
+from mastermind_game_persistence import FilePersistence, JournalPersistence, \
+    WorkerPersistence, DatabasePersistence
+from mastermind_game_sketch import ScoreSketch, SKETCH_SUFFIX, parse_sketch, \
+    read_sketch, merge_sketch_file
+from mastermind_game_recorder import SessionRecorder, SESSION_HEADER, \
+    open_recorder, encode_varint, decode_varint, encode_string, \
+    decode_string, decode_records, find_records_end
+from mastermind_game_sessions import SessionLog, SessionIndex, INDEX_SUFFIX, \
+    build_session_index, load_session_index
+from mastermind_game_analytics import GameStats, iter_games, analyze_log, \
+    analyze_logs, main as analytics_main
+from mastermind_game_snapshot import SNAPSHOT_HEADER, encode_snapshot, \
+    decode_snapshot, save_snapshot, write_snapshot, load_snapshot
+import mastermind_game_solver
 import unittest
 import random
+import os
+import multiprocessing
+import threading
+import shutil
+import io
+import contextlib
+import tempfile
+from array import array
+from multiprocessing import shared_memory
 
 guess = ["", "black", "", "red"]
 guess2 = ["red", "black", "black", "blue"]
@@ -30,12 +77,45 @@ model4 = GameModel()
 random.seed(0)
 model4.create_code()
 
+# the temporary directory the tests write their files in, and the
+# directory the tests were started from
+test_dir = None
+start_dir = None
+
+
+def setUpModule():
+    """
+    Function: setUpModule
+        Run the tests in a temporary directory, so the files they write
+        never land in the repository.
+    Parameter: nothing
+    Return: nothing
+    """
+
+    global test_dir, start_dir
+    start_dir = os.getcwd()
+    test_dir = tempfile.TemporaryDirectory()
+    os.chdir(test_dir.name)
+
+
+def tearDownModule():
+    """
+    Function: tearDownModule
+        Go back to the starting directory and remove the temporary
+        directory with every file the tests wrote.
+    Parameter: nothing
+    Return: nothing
+    """
+
+    os.chdir(start_dir)
+    test_dir.cleanup()
+
 
 class GameModelTest(unittest.TestCase):
     """
     A TestCase class that test the methods in class GameModel.
     Methods: test_init, test_create_code, test_update, test_check_status,
-    test_restart, test_str, test_eq
+    test_restart, test_track_candidates, test_str, test_eq
     """
 
     def test_init(self):
@@ -48,10 +128,16 @@ class GameModelTest(unittest.TestCase):
         self.assertEqual(model.score, 0)
         self.assertEqual(model.bull_num, 0)
         self.assertEqual(model.cow_num, 0)
+        self.assertEqual(model.history, [])
         self.assertEqual(model.max_guess, 10)
+        self.assertEqual(model.track_candidates, False)
+        self.assertEqual(model.candidates, None)
+        self.assertTrue(model.rng is random)
 
     def test_bad_init(self):
 
+        self.assertRaises(TypeError, GameModel, track_candidates=1)
+        self.assertRaises(TypeError, GameModel, rng=1)
         self.assertRaises(TypeError, GameModel, max_guess="a")
         self.assertRaises(ValueError, GameModel, max_guess=-10)
         self.assertRaises(TypeError, GameModel, code_range="a")
@@ -65,6 +151,19 @@ class GameModelTest(unittest.TestCase):
         self.assertRaises(TypeError, model.create_code, "a")
         self.assertRaises(ValueError, model.create_code, -2)
 
+        # models with equally seeded generators create the same codes,
+        # whatever the global random module does in between
+        model5 = GameModel(rng = random.Random(3))
+        model6 = GameModel(rng = random.Random(3))
+        codes5, codes6 = [], []
+        for i in range(5):
+            model5.create_code()
+            codes5.append(model5.code)
+            random.random()
+            model6.create_code()
+            codes6.append(model6.code)
+        self.assertEqual(codes5, codes6)
+
     def test_update(self):
 
         model2.update(guess)
@@ -78,6 +177,8 @@ class GameModelTest(unittest.TestCase):
         self.assertEqual(model2.score, 2)
         self.assertEqual(model2.bull_num, 2)
         self.assertEqual(model2.cow_num, 1)
+        self.assertEqual(model2.history, [(["", "black", "", "red"], 1, 0),
+                                          (["red", "black", "black", "blue"], 2, 1)])
 
         self.assertRaises(TypeError, model.update, "a")
         self.assertRaises(ValueError, model2.update, ["red"])
@@ -104,6 +205,28 @@ class GameModelTest(unittest.TestCase):
         self.assertEqual(model3.score, 0)
         self.assertEqual(model3.bull_num, 0)
         self.assertEqual(model3.cow_num, 0)
+        self.assertEqual(model3.history, [])
+
+    def test_track_candidates(self):
+
+        model5 = GameModel(track_candidates=True)
+        random.seed(0)
+        model5.create_code()
+        self.assertEqual(len(model5.candidates), 2401)
+
+        model5.update(guess)
+        self.assertEqual(len(model5.candidates), 378)
+        self.assertTrue(model5.code in model5.candidates)
+        for each in model5.candidates:
+            self.assertEqual(count_bulls_and_cows(each, guess), (1, 0))
+
+        model5.update(guess2)
+        self.assertTrue(model5.code in model5.candidates)
+        self.assertTrue(len(model5.candidates) < 378)
+        self.assertRaises(ValueError, model5.update, ["white", "", "", ""])
+
+        model5.restart()
+        self.assertEqual(len(model5.candidates), 2401)
 
     def test_str(self):
 
@@ -127,13 +250,148 @@ class GameModelTest(unittest.TestCase):
         self.assertFalse(model2.__eq__("a"))
 
 
+class GameBatchTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class GameBatch.
+    Methods: test_init, test_bad_init, test_create_codes, test_update_all,
+             test_check_status_all, test_restart, test_len, test_str, test_eq
+    """
+
+    def test_init(self):
+        batch = GameBatch(5, rng = random.Random(0))
+
+        self.assertEqual(batch.name, "Mastermind Game Batch")
+        self.assertEqual(batch.game_num, 5)
+        self.assertEqual(batch.length, 4)
+        self.assertEqual(batch.max_guess, MAX_GUESS)
+        self.assertEqual(len(batch.codes), 5)
+        self.assertEqual(list(batch.scores), [0] * 5)
+        self.assertEqual(batch.bull_nums, bytes(5))
+        self.assertEqual(batch.cow_nums, bytes(5))
+        self.assertEqual(batch.check_status_all(), ["running"] * 5)
+        self.assertTrue(GameBatch(2).rng is random)
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, GameBatch, "a")
+        self.assertRaises(TypeError, GameBatch, 5, rng = 1)
+        self.assertRaises(ValueError, GameBatch, -1)
+        self.assertRaises(ValueError, GameBatch, 5, max_guess = -1)
+        self.assertRaises(ValueError, GameBatch, 5, code_range = [])
+        self.assertRaises(ValueError, GameBatch, 5, length = 16)
+
+    def test_create_codes(self):
+        batch = GameBatch(300, rng = random.Random(4))
+        batch2 = GameBatch(300, rng = random.Random(4))
+
+        self.assertEqual(batch.codes, batch2.codes)
+        for index in batch.codes:
+            self.assertEqual(len(batch.codes.decode(index)), 4)
+        # every color shows up at every position
+        for digits in batch.codes.digits:
+            self.assertEqual(set(digits), set(range(7)))
+
+    def test_update_all(self):
+        # the batch plays by the same rules as one GameModel per game
+        rng = random.Random(2)
+        batch = GameBatch(200, max_guess = 4, rng = rng)
+        models = []
+        for index in batch.codes:
+            each = GameModel(max_guess = 4)
+            each.code = batch.codes.decode(index)
+            models.append(each)
+
+        for i in range(6):
+            guesses = [index if rng.random() < 0.2 else rng.randrange(2401)
+                       for index in batch.codes]
+            batch.update_all(guesses)
+            for each, guess_index in zip(models, guesses):
+                if each.check_status() == "running":
+                    each.update(batch.codes.decode(guess_index))
+
+            self.assertEqual(list(batch.scores), [each.score for each in models])
+            self.assertEqual(list(batch.bull_nums),
+                             [each.bull_num for each in models])
+            self.assertEqual(list(batch.cow_nums),
+                             [each.cow_num for each in models])
+            self.assertEqual(batch.check_status_all(),
+                             [each.check_status() for each in models])
+
+        # color guesses and a CodeArray of guesses
+        batch2 = GameBatch(2, rng = random.Random(0))
+        batch2.update_all([batch2.codes.decode(batch2.codes.codes[0]),
+                           ["", "", "", ""]])
+        self.assertEqual(batch2.bull_nums[0], 4)
+        batch2.update_all(batch2.codes.take([0, 1]))
+        self.assertEqual(batch2.check_status_all(), ["win", "win"])
+        self.assertEqual(list(batch2.scores), [1, 2])
+
+        self.assertRaises(TypeError, batch2.update_all, "a")
+        self.assertRaises(ValueError, batch2.update_all, [0])
+        self.assertRaises(ValueError, batch2.update_all,
+                          [["white", "red", "red", "red"], 0])
+        self.assertRaises(ValueError, batch2.update_all, [-1, 0])
+        self.assertRaises(ValueError, batch2.update_all, [2401, 0])
+
+    def test_check_status_all(self):
+        batch = GameBatch(3, max_guess = 1, code_range = ["red", "blue"],
+                          length = 2, rng = random.Random(0))
+        batch.codes = CodeArray(["red", "blue"], 2, [0, 1, 2])
+        batch.update_all([0, 0, 0])
+
+        self.assertEqual(batch.check_status_all(), ["win", "lost", "lost"])
+        self.assertEqual(list(batch.statuses), [1, 2, 2])
+        self.assertEqual(STATUS_NAMES, ["running", "win", "lost"])
+        self.assertEqual(GameBatch(2, max_guess = 0).check_status_all(),
+                         ["lost", "lost"])
+
+    def test_restart(self):
+        batch = GameBatch(50, max_guess = 1, rng = random.Random(0))
+        batch.update_all([0] * 50)
+        batch.restart()
+
+        self.assertEqual(list(batch.scores), [0] * 50)
+        self.assertEqual(batch.bull_nums, bytes(50))
+        self.assertEqual(batch.check_status_all(), ["running"] * 50)
+
+    def test_len(self):
+        self.assertEqual(len(GameBatch(7)), 7)
+        self.assertEqual(len(GameBatch(0)), 0)
+
+    def test_str(self):
+        batch = GameBatch(3, max_guess = 1, code_range = ["red", "blue"],
+                          length = 2, rng = random.Random(0))
+        batch.codes = CodeArray(["red", "blue"], 2, [0, 1, 3])
+        batch.update_all([0, 0, 3])
+        msg = "Mastermind Game Batch\tGames: 3\tRunning: 0\tWon: 2\tLost: 1"
+
+        self.assertEqual(batch.__str__(), msg)
+
+    def test_eq(self):
+        batch = GameBatch(10, rng = random.Random(1))
+        batch2 = GameBatch(10, rng = random.Random(1))
+
+        self.assertTrue(batch == batch2)
+        batch2.update_all([0] * 10)
+        self.assertFalse(batch == batch2)
+        self.assertFalse(batch == GameBatch(10, rng = random.Random(2)))
+        self.assertFalse(batch.__eq__("a"))
+
+
 class ControllerTest(unittest.TestCase):
     """
     A TestCase class that test the methods in class Controller.
-    Methods: test_init, test_bad_init, test_add_model, test_reset_guess,
+    Methods: test_init, test_bad_init, test_add_model, test_add_recorder,
+             test_record_game, test_set_snapshot_file, test_save_snapshot,
+             test_load_snapshot, test_add_journal, test_add_database,
+             test_add_worker, test_select_persistence, test_poll_worker,
+             test_close,
+             test_check_leaderboard, test_check_leaderboard_worker,
+             test_get_leaders_version, test_add_shards, test_set_score_tracking,
+             test_get_score_summary, test_record_score_worker, test_reset_guess,
              test_add_guess, test_validate_filename, test_load_leaderboard_file,
-             test_save_leaderboard_file, test_create_top_leaders_list, 
-             test_update_round, test_get_bulls_and_cows,
+             test_get_leaderboard, test_get_leaders, test_save_leaderboard_file,
+             test_create_top_leaders_list, 
+             test_update_game, test_update_round, test_get_bulls_and_cows,
              test_get_current_guess_index, test_restart, test_str, test_eq
     """
 
@@ -156,10 +414,14 @@ class ControllerTest(unittest.TestCase):
         self.assertEqual(controller2.current_guess, [])
         self.assertEqual(controller2.current_round, 1)
         self.assertEqual(controller2.game_status, "running")
+        self.assertEqual(controller2.leader_num, TOP_LEADERS_NUM)
+        self.assertEqual(Controller(model, "abc", 1000).leader_num, 1000)
 
     def test_bad_init(self):
         self.assertRaises(TypeError, Controller, 10, "abc")
         self.assertRaises(TypeError, Controller, model, 50)
+        self.assertRaises(TypeError, Controller, model, "abc", "5")
+        self.assertRaises(ValueError, Controller, model, "abc", 0)
 
     def test_add_model(self):
         model = GameModel()
@@ -170,6 +432,602 @@ class ControllerTest(unittest.TestCase):
         # test bad argument
         self.assertRaises(TypeError, controller.add_model, "a")
 
+    def test_add_recorder(self):
+        if os.path.exists("test_sessions.bin"):
+            os.remove("test_sessions.bin")
+        recorder = SessionRecorder("test_sessions.bin")
+        model = GameModel(max_guess = 3)
+        model.code = ["black", "black", "green", "blue"]
+        controller = Controller(model, "abc")
+        controller.add_recorder(recorder)
+        self.assertTrue(controller.recorder is recorder)
+        self.assertEqual(controller.session, 0)
+
+        # every game event is recorded
+        controller.reset_guess()
+        controller.add_guess("red", 0)
+        controller.update_round("test_leaderboard13.txt", "test_leaderboard13.txt")
+        controller.restart()
+        code = list(model.code)
+        controller.add_model(GameModel())
+        self.assertEqual(controller.session, 1)
+        controller.close()
+
+        with open("test_sessions.bin", "rb") as infile:
+            records = [record[1:] for record in decode_records(infile.read())]
+        self.assertEqual([kind for kind, record_time, session, values in records],
+                         ["open", "palette", "create", "guess", "round",
+                          "restart", "create"])
+        self.assertEqual(records[2][2:], (0, ("abc", 3, ["black", "black",
+                                                         "green", "blue"])))
+        self.assertEqual(records[3][2:], (0, (0, "red")))
+        self.assertEqual(records[4][2:], (0, (["red", "", "", ""], 0, 0, "running")))
+        self.assertEqual(records[5][2:], (0, (code,)))
+        self.assertEqual(records[6][2:], (1, ("abc", 10, [])))
+
+        controller.add_recorder(None)
+        self.assertEqual(controller.session, None)
+        controller.add_guess("red", 0)
+        recorder.close()
+
+        # test bad argument
+        self.assertRaises(TypeError, controller.add_recorder, "a")
+
+    def test_record_game(self):
+        if os.path.exists("test_sessions.bin"):
+            os.remove("test_sessions.bin")
+        model = GameModel(max_guess = 3)
+        model.code = ["black", "black", "green", "blue"]
+        model.update(["red", "", "", ""])
+        model.update(["black", "", "", ""])
+        controller = Controller(model, "abc")
+
+        # the rounds played before the recorder are recorded with the game
+        recorder = SessionRecorder("test_sessions.bin")
+        controller.add_recorder(recorder)
+        recorder.close()
+
+        with open("test_sessions.bin", "rb") as infile:
+            records = [record[1:] for record in decode_records(infile.read())]
+        self.assertEqual([kind for kind, record_time, session, values in records],
+                         ["open", "palette", "create", "round", "round"])
+        self.assertEqual(records[3][2:], (0, (["red", "", "", ""], 0, 0,
+                                              "running")))
+        self.assertEqual(records[4][2:], (0, (["black", "", "", ""], 1, 0,
+                                              "running")))
+
+    def test_set_snapshot_file(self):
+        controller = Controller()
+        self.assertEqual(controller.snapshot_filename, None)
+        controller.set_snapshot_file("test_snapshot.bin")
+        self.assertEqual(controller.snapshot_filename, "test_snapshot.bin")
+        controller.set_snapshot_file(None)
+        self.assertEqual(controller.snapshot_filename, None)
+
+        # test bad argument
+        self.assertRaises(TypeError, controller.set_snapshot_file, 1)
+
+    def test_save_snapshot(self):
+        if os.path.exists("test_snapshot.bin"):
+            os.remove("test_snapshot.bin")
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        controller = Controller(model, "abc")
+        controller.reset_guess()
+        controller.add_guess("red", 0)
+        controller.update_round("test_leaderboard13.txt", "test_leaderboard13.txt")
+
+        # the game in progress is saved when the Controller closes
+        controller.set_snapshot_file("test_snapshot.bin")
+        controller.close()
+        self.assertEqual(load_snapshot("test_snapshot.bin")["model"].history,
+                         [(["red", "", "", ""], 0, 0)])
+
+        # a finished game has nothing to resume
+        controller.add_guess("black", 0)
+        controller.add_guess("black", 1)
+        controller.add_guess("green", 2)
+        controller.add_guess("blue", 3)
+        controller.update_round("test_leaderboard13.txt", "test_leaderboard13.txt")
+        controller.save_snapshot("test_snapshot.bin")
+        self.assertFalse(os.path.exists("test_snapshot.bin"))
+        controller.save_snapshot("test_snapshot.bin")
+
+        # test bad argument
+        self.assertRaises(TypeError, controller.save_snapshot, 1)
+        self.assertRaises(ValueError, Controller().save_snapshot,
+                          "test_snapshot.bin")
+
+    def test_load_snapshot(self):
+        if os.path.exists("test_snapshot.bin"):
+            os.remove("test_snapshot.bin")
+        controller = Controller()
+        self.assertFalse(controller.load_snapshot("test_snapshot.bin"))
+
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        controller2 = Controller(model, "abc")
+        controller2.reset_guess()
+        controller2.add_guess("red", 0)
+        controller2.update_round("test_leaderboard13.txt", "test_leaderboard13.txt")
+        controller2.add_guess("black", 0)
+        controller2.save_snapshot("test_snapshot.bin")
+
+        if os.path.exists("test_sessions.bin"):
+            os.remove("test_sessions.bin")
+        recorder = SessionRecorder("test_sessions.bin")
+        controller.add_recorder(recorder)
+        self.assertTrue(controller.load_snapshot("test_snapshot.bin"))
+        self.assertEqual(controller.player, "abc")
+        self.assertEqual(controller.model, model)
+        self.assertEqual(controller.model.history, model.history)
+        self.assertEqual(controller.current_guess, ["black", "", "", ""])
+        self.assertEqual(controller.current_round, 2)
+        self.assertEqual(controller.game_status, "running")
+        self.assertEqual(controller.session, 0)
+
+        # the resumed game plays on
+        controller.add_guess("black", 1)
+        controller.add_guess("green", 2)
+        controller.add_guess("blue", 3)
+        controller.update_round("test_leaderboard13.txt", "test_leaderboard13.txt")
+        self.assertEqual(controller.game_status, "win")
+        self.assertEqual(controller.model.score, 2)
+        recorder.close()
+
+        # the resumed game's rounds are all in the session log
+        games = list(iter_games(SessionLog("test_sessions.bin").records()))
+        self.assertEqual(games[0]["score"], 2)
+        self.assertEqual(games[0]["first_guess"], ["red", "", "", ""])
+
+        # test bad argument
+        self.assertRaises(TypeError, controller.load_snapshot, 1)
+
+    def test_add_journal(self):
+        for filename in ["test_journal1.txt", "test_journal1.txt" + JOURNAL_SUFFIX]:
+            if os.path.exists(filename):
+                os.remove(filename)
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        controller = Controller(model, "abc")
+        journal = LeaderboardJournal("test_journal1.txt")
+        controller.add_journal(journal)
+        self.assertTrue(controller.journal is journal)
+
+        # a win is appended to the journal
+        controller.current_guess = ["black", "black", "green", "blue"]
+        controller.update_round("test_journal1.txt", "test_journal1.txt")
+        self.assertEqual(controller.get_leaders("test_journal1.txt"),
+                         [["abc", "1"]])
+        self.assertTrue(controller.get_leaderboard("test_journal1.txt")
+                        is journal.leaderboard)
+        self.assertEqual(LeaderboardJournal("test_journal1.txt").load(),
+                         journal.leaderboard)
+
+        controller.add_journal(None)
+        self.assertEqual(controller.journal, None)
+
+        # test bad argument
+        self.assertRaises(TypeError, controller.add_journal, "a")
+        self.assertRaises(ValueError, controller.add_journal,
+                          LeaderboardJournal("test_journal1.txt", 10))
+
+    def test_add_database(self):
+        model = GameModel(max_guess = 2)
+        model.code = ["black", "black", "green", "blue"]
+        model2 = GameModel()
+        model2.code = ["black", "black", "green", "blue"]
+        database = LeaderboardDatabase(":memory:")
+        database.add_game("aaa", 3, "win", get_game_config(model))
+        database.add_game("bbb", 1, "win", get_game_config(model2))
+        controller = Controller(model, "abc")
+        controller.add_database(database)
+        self.assertTrue(controller.database is database)
+
+        # the leaders of the game's configuration come from the database
+        self.assertEqual(controller.load_leaderboard_file("test_leaderboard1.txt"),
+                         [["aaa", "3"]])
+
+        # every finished game is recorded
+        controller.current_guess = ["black", "", "", ""]
+        controller.update_round("test_leaderboard1.txt", "test_leaderboard1.txt")
+        self.assertEqual(database.game_num(), 2)
+        controller.current_guess = ["black", "black", "green", "blue"]
+        controller.update_round("test_leaderboard1.txt", "test_leaderboard1.txt")
+        self.assertEqual(database.game_num(), 3)
+        self.assertEqual(controller.get_leaders("test_leaderboard1.txt"),
+                         [["abc", "2"], ["aaa", "3"]])
+        self.assertEqual(controller.load_leaderboard_file("test_leaderboard1.txt"),
+                         [["abc", "2"], ["aaa", "3"]])
+
+        # the leaders of another configuration are read when it changes
+        model3 = GameModel(max_guess = 2)
+        model3.code = ["black", "black", "green"]
+        controller.add_model(model3)
+        self.assertEqual(controller.get_leaders_config(), get_game_config(model3))
+        self.assertEqual(controller.get_leaders("test_leaderboard1.txt"), [])
+        controller.add_model(model)
+        self.assertEqual(controller.get_leaders("test_leaderboard1.txt"),
+                         [["abc", "2"], ["aaa", "3"]])
+
+        model.restart()
+        controller.restart()
+        controller.current_guess = ["", "", "", ""]
+        controller.update_round("test_leaderboard1.txt", "test_leaderboard1.txt")
+        controller.update_round("test_leaderboard1.txt", "test_leaderboard1.txt")
+        self.assertEqual(controller.game_status, "lost")
+        self.assertEqual(database.game_num(), 4)
+
+        controller.add_database(None)
+        self.assertEqual(controller.database, None)
+        database.close()
+
+        # test bad argument
+        self.assertRaises(TypeError, controller.add_database, "a")
+
+    def test_add_worker(self):
+        with open("test_leaderboard10.txt", "w") as outfile:
+            outfile.write("aaa\n3\nbbb\n1\n")
+        controller = Controller(GameModel(), "abc")
+        worker = PersistenceWorker()
+        controller.add_worker(worker)
+        self.assertTrue(controller.worker is worker)
+        self.assertTrue(controller.uses_worker())
+
+        # the leaders are loaded in the background
+        self.assertEqual(controller.get_leaders("test_leaderboard10.txt"), [])
+        self.assertEqual(controller.leaders_requested, "test_leaderboard10.txt")
+        # asked for only once
+        controller.get_leaders("test_leaderboard10.txt")
+        worker.close()
+        self.assertEqual(len(worker.poll()), 1)
+        controller.close()
+        self.assertEqual(controller.worker, None)
+        self.assertTrue(controller.poll_worker() is False)
+
+        # a journal keeps its own storage, and compacts it in the worker
+        worker = PersistenceWorker()
+        controller.add_worker(worker)
+        controller.add_journal(LeaderboardJournal("test_journal1.txt"))
+        self.assertFalse(controller.uses_worker())
+        self.assertTrue(controller.journal.worker is worker)
+        controller.close()
+        self.assertEqual(controller.journal.worker, None)
+
+        # test bad argument
+        self.assertRaises(TypeError, controller.add_worker, "a")
+
+    def test_select_persistence(self):
+        controller = Controller(GameModel(), "abc")
+        self.assertEqual(type(controller.persistence), FilePersistence)
+
+        # a database goes ahead of a journal, and a journal of a worker
+        worker = PersistenceWorker()
+        controller.add_worker(worker)
+        self.assertEqual(type(controller.persistence), WorkerPersistence)
+        self.assertTrue(controller.persistence.worker is worker)
+        journal = LeaderboardJournal("test_journal1.txt")
+        controller.add_journal(journal)
+        self.assertEqual(type(controller.persistence), JournalPersistence)
+        self.assertTrue(controller.persistence.journal is journal)
+        database = LeaderboardDatabase(":memory:")
+        controller.add_database(database)
+        self.assertEqual(type(controller.persistence), DatabasePersistence)
+        self.assertEqual(controller.persistence.get_config(),
+                         get_game_config(controller.model))
+
+        # each storage detached falls back to the next one
+        controller.add_database(None)
+        self.assertEqual(type(controller.persistence), JournalPersistence)
+        controller.add_journal(None)
+        self.assertEqual(type(controller.persistence), WorkerPersistence)
+        controller.close()
+        self.assertEqual(type(controller.persistence), FilePersistence)
+        self.assertEqual(controller.persistence.get_config(), None)
+        database.close()
+
+    def test_poll_worker(self):
+        with open("test_leaderboard10.txt", "w") as outfile:
+            outfile.write("aaa\n3\nbbb\n1\n")
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        controller = Controller(model, "abc")
+        worker = PersistenceWorker()
+        controller.add_worker(worker)
+
+        # a win before the leaderboard is loaded waits for it
+        controller.current_guess = ["black", "black", "green", "blue"]
+        controller.update_round("test_leaderboard10.txt", "test_leaderboard10.txt")
+        self.assertEqual(controller.pending_wins,
+                         [["abc", 1, "test_leaderboard10.txt"]])
+        worker.tasks.join()
+        self.assertTrue(controller.poll_worker())
+        self.assertEqual(controller.pending_wins, [])
+        self.assertEqual(controller.get_leaders("test_leaderboard10.txt"),
+                         [["abc", "1"], ["bbb", "1"], ["aaa", "3"]])
+
+        # a win with the leaderboard loaded is saved in the background
+        model.restart()
+        controller.restart()
+        model.code = ["black", "black", "green", "green"]
+        controller.player = "def"
+        controller.current_guess = ["black", "black", "green", "green"]
+        controller.update_round("test_leaderboard10.txt", "test_leaderboard10.txt")
+        self.assertEqual(controller.get_leaders("test_leaderboard10.txt")[0],
+                         ["def", "1"])
+        controller.close()
+        self.assertEqual(controller.load_leaderboard_file("test_leaderboard10.txt"),
+                         [["def", "1"], ["abc", "1"], ["bbb", "1"], ["aaa", "3"]])
+
+        # an error of the worker is raised when polled
+        worker = PersistenceWorker()
+        controller.add_worker(worker)
+        controller.request_leaderboard("no_such_folder/test_leaderboard.txt")
+        worker.tasks.join()
+        self.assertRaises(IOError, controller.poll_worker)
+        self.assertEqual(controller.leaders_requested, None)
+
+    def test_close(self):
+        for filename in ["test_sessions.bin", "test_snapshot.bin"]:
+            if os.path.exists(filename):
+                os.remove(filename)
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        controller = Controller(model, "abc")
+        worker = PersistenceWorker()
+        release = threading.Event()
+        worker.submit("hold", release.wait)
+        controller.add_worker(worker)
+        controller.add_recorder(SessionRecorder("test_sessions.bin"))
+        self.assertTrue(controller.recorder.worker is worker)
+        controller.set_snapshot_file("test_snapshot.bin")
+
+        # a finished game's records are written in the worker's thread
+        controller.current_guess = ["black", "black", "green", "blue"]
+        controller.update_round("test_leaderboard13.txt", "test_leaderboard13.txt")
+        self.assertEqual(controller.recorder.buffer, bytearray())
+        size = os.path.getsize("test_sessions.bin")
+
+        # without waiting, close returns before the worker writes
+        controller.restart()
+        controller.add_guess("red", 0)
+        controller.close(wait = False)
+        self.assertEqual(controller.worker, None)
+        self.assertEqual(controller.recorder.worker, None)
+        self.assertEqual(os.path.getsize("test_sessions.bin"), size)
+        self.assertFalse(os.path.exists("test_snapshot.bin"))
+        release.set()
+        worker.close()
+        self.assertEqual([tag for tag, result, error in worker.poll()],
+                         ["hold", "record", "load", "record", "snapshot"])
+        self.assertEqual(load_snapshot("test_snapshot.bin")["current_guess"],
+                         ["red", "", "", ""])
+        with open("test_sessions.bin", "rb") as infile:
+            self.assertEqual([record[1] for record in decode_records(
+                infile.read())][-3:], ["round", "restart", "guess"])
+        controller.recorder.close()
+
+    def test_check_leaderboard(self):
+        with open("test_leaderboard11.txt", "w") as outfile:
+            outfile.write("aaa\n3\n")
+        controller = Controller(GameModel(), "abc")
+        self.assertFalse(controller.check_leaderboard())
+        controller.get_leaders("test_leaderboard11.txt")
+        self.assertEqual(controller.leaders_fingerprint,
+                         get_file_fingerprint(["test_leaderboard11.txt"]))
+        self.assertFalse(controller.check_leaderboard())
+
+        # another process writes the file
+        save_records("test_leaderboard11.txt", [["bbb", "1"], ["aaa", "3"]])
+        self.assertTrue(controller.check_leaderboard())
+        self.assertEqual(controller.get_leaders("test_leaderboard11.txt"),
+                         [["bbb", "1"], ["aaa", "3"]])
+        self.assertFalse(controller.check_leaderboard())
+
+        # the Controller's own save is not a change
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        controller.add_model(model)
+        controller.current_guess = ["black", "black", "green", "blue"]
+        controller.update_round("test_leaderboard11.txt", "test_leaderboard11.txt")
+        self.assertFalse(controller.check_leaderboard())
+
+        # another connection writes the database
+        database = LeaderboardDatabase("test_leaderboard.db")
+        database2 = LeaderboardDatabase("test_leaderboard.db")
+        controller.add_database(database)
+        controller.get_leaders("test_leaderboard11.txt")
+        self.assertFalse(controller.check_leaderboard())
+        database2.add_game("ccc", 1, "win", get_game_config(model))
+        self.assertTrue(controller.check_leaderboard())
+        self.assertEqual(controller.get_leaders("test_leaderboard11.txt")[0],
+                         ["ccc", "1"])
+        database.close()
+        database2.close()
+
+    def test_check_leaderboard_worker(self):
+        with open("test_leaderboard12.txt", "w") as outfile:
+            outfile.write("aaa\n3\n")
+        controller = Controller(GameModel(), "abc")
+        worker = PersistenceWorker()
+        controller.add_worker(worker)
+        controller.get_leaders("test_leaderboard12.txt")
+        worker.tasks.join()
+        controller.poll_worker()
+
+        # the check and the load are done in the background
+        save_records("test_leaderboard12.txt", [["bbb", "1"]])
+        self.assertFalse(controller.check_leaderboard())
+        self.assertTrue(controller.check_requested)
+        worker.tasks.join()
+        self.assertFalse(controller.poll_worker())
+        self.assertFalse(controller.check_requested)
+        self.assertEqual(controller.leaders_requested, "test_leaderboard12.txt")
+        # the old leaders are kept until the new ones are loaded
+        self.assertEqual(controller.get_leaders("test_leaderboard12.txt"),
+                         [["aaa", "3"]])
+        worker.tasks.join()
+        self.assertTrue(controller.poll_worker())
+        self.assertEqual(controller.get_leaders("test_leaderboard12.txt"),
+                         [["bbb", "1"]])
+        controller.close()
+
+    def test_get_leaders_version(self):
+        with open("test_leaderboard11.txt", "w") as outfile:
+            outfile.write("aaa\n3\n")
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        controller = Controller(model, "abc")
+        self.assertEqual(controller.get_leaders_version(), None)
+
+        controller.get_leaders("test_leaderboard11.txt")
+        version = controller.get_leaders_version()
+        self.assertEqual(version, controller.leaderboard.version)
+        controller.get_leaders("test_leaderboard11.txt")
+        self.assertEqual(controller.get_leaders_version(), version)
+
+        # a win changes the version
+        controller.current_guess = ["black", "black", "green", "blue"]
+        controller.update_round("test_leaderboard11.txt", "test_leaderboard11.txt")
+        self.assertNotEqual(controller.get_leaders_version(), version)
+
+    def test_add_shards(self):
+        if os.path.exists("test_leaderboards1"):
+            shutil.rmtree("test_leaderboards1")
+        shards = LeaderboardShards("test_leaderboards1")
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        controller = Controller(model, "abc")
+        controller.add_shards(shards)
+        self.assertTrue(controller.shards is shards)
+        filename = shards.get_filename(get_game_config(model))
+        self.assertEqual(controller.get_shard_filename(), filename)
+
+        # a win is saved in the file of its configuration
+        controller.current_guess = ["black", "black", "green", "blue"]
+        controller.update_round()
+        self.assertEqual(controller.load_leaderboard_file(filename),
+                         [["abc", "1"]])
+        self.assertEqual(controller.get_leaders(), [["abc", "1"]])
+
+        # another configuration has a leaderboard of its own
+        model2 = GameModel(max_guess = 8)
+        controller.add_model(model2)
+        controller.restart()
+        model2.code = ["red", "red", "red", "red", "red"]
+        self.assertEqual(controller.get_leaders(), [])
+        controller.current_guess = ["red", "", "", "", ""]
+        controller.update_round()
+        controller.current_guess = ["red", "red", "red", "red", "red"]
+        controller.update_round()
+        self.assertEqual(controller.get_leaders(), [["abc", "2"]])
+        self.assertEqual(len(shards.configs()), 2)
+        
+        # switching back only loads the file of that configuration
+        controller.add_model(model)
+        self.assertEqual(controller.get_leaders(), [["abc", "1"]])
+        self.assertEqual(controller.leaders_filename, filename)
+
+        controller.add_shards(None)
+        self.assertEqual(controller.get_shard_filename("test_leaderboard1.txt"),
+                         "test_leaderboard1.txt")
+
+        # test bad argument
+        self.assertRaises(TypeError, controller.add_shards, "a")
+
+    def test_set_score_tracking(self):
+        if os.path.exists("test_leaderboard13.txt" + SKETCH_SUFFIX):
+            os.remove("test_leaderboard13.txt" + SKETCH_SUFFIX)
+        model = GameModel(max_guess = 2)
+        model.code = ["black", "black", "green", "blue"]
+        controller = Controller(model, "abc")
+        self.assertFalse(controller.track_scores)
+        self.assertEqual(controller.get_sketch("test_leaderboard13.txt"), None)
+        controller.set_score_tracking(True)
+        self.assertEqual(controller.get_sketch_filename("test_leaderboard13.txt"),
+                         "test_leaderboard13.txt" + SKETCH_SUFFIX)
+
+        # every finished game is counted, won or lost
+        controller.current_guess = ["black", "black", "green", "blue"]
+        controller.update_round("test_leaderboard13.txt", "test_leaderboard13.txt")
+        controller.restart()
+        model.code = ["black", "black", "green", "blue"]
+        for i in range(2):
+            controller.current_guess = ["red", "red", "red", "red"]
+            controller.update_round("test_leaderboard13.txt",
+                                    "test_leaderboard13.txt")
+        self.assertEqual(controller.game_status, "lost")
+        expected = ScoreSketch()
+        expected.add(1)
+        expected.add(2, "lost")
+        self.assertEqual(controller.get_sketch("test_leaderboard13.txt"), expected)
+        self.assertEqual(read_sketch("test_leaderboard13.txt" + SKETCH_SUFFIX),
+                         expected)
+
+        # test bad argument
+        self.assertRaises(TypeError, controller.set_score_tracking, "a")
+
+    def test_get_score_summary(self):
+        if os.path.exists("test_leaderboard13.txt" + SKETCH_SUFFIX):
+            os.remove("test_leaderboard13.txt" + SKETCH_SUFFIX)
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        controller = Controller(model, "abc")
+        self.assertEqual(controller.get_score_summary("test_leaderboard13.txt"), "")
+        controller.set_score_tracking(True)
+        self.assertEqual(controller.get_score_summary("test_leaderboard13.txt"), "")
+
+        # the sketch file is read once, so a new controller sees other games
+        sketch = ScoreSketch()
+        for score in [2, 4, 4, 6]:
+            sketch.add(score)
+        merge_sketch_file("test_leaderboard13.txt" + SKETCH_SUFFIX, sketch)
+        controller = Controller(model, "abc")
+        controller.set_score_tracking(True)
+        self.assertEqual(controller.get_score_summary("test_leaderboard13.txt"),
+                         "Median: 4")
+        # a win of 3 guesses beats 3 of the 5 games
+        controller.current_guess = ["red", "", "", ""]
+        controller.update_round("test_leaderboard13.txt", "test_leaderboard13.txt")
+        controller.current_guess = ["", "", "", ""]
+        controller.update_round("test_leaderboard13.txt", "test_leaderboard13.txt")
+        controller.current_guess = ["black", "black", "green", "blue"]
+        controller.update_round("test_leaderboard13.txt", "test_leaderboard13.txt")
+        self.assertEqual(controller.get_score_summary("test_leaderboard13.txt"),
+                         "Median: 4   You beat 60%")
+
+    def test_record_score_worker(self):
+        if os.path.exists("test_leaderboard13.txt" + SKETCH_SUFFIX):
+            os.remove("test_leaderboard13.txt" + SKETCH_SUFFIX)
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        controller = Controller(model, "abc")
+        controller.set_score_tracking(True)
+        worker = PersistenceWorker()
+        controller.add_worker(worker)
+
+        # the sketch file is read in the background
+        self.assertEqual(controller.get_sketch("test_leaderboard13.txt"), None)
+        self.assertEqual(controller.sketch_requests,
+                         ["test_leaderboard13.txt" + SKETCH_SUFFIX])
+        worker.tasks.join()
+        self.assertTrue(controller.poll_worker())
+        self.assertEqual(controller.get_sketch("test_leaderboard13.txt"),
+                         ScoreSketch())
+
+        # the game is counted at once, and merged in the background
+        controller.current_guess = ["black", "black", "green", "blue"]
+        controller.update_round("test_leaderboard13.txt", "test_leaderboard13.txt")
+        expected = ScoreSketch()
+        expected.add(1)
+        self.assertEqual(controller.get_sketch("test_leaderboard13.txt"), expected)
+        worker.tasks.join()
+        controller.poll_worker()
+        self.assertEqual(controller.sketch_requests, [])
+        self.assertEqual(read_sketch("test_leaderboard13.txt" + SKETCH_SUFFIX),
+                         expected)
+        controller.close()
+
     def test_reset_guess(self):
         controller = Controller()
         controller.reset_guess()
@@ -215,6 +1073,41 @@ class ControllerTest(unittest.TestCase):
         # test bad argument
         self.assertRaises(TypeError, controller.load_leaderboard_file, filename = 123)
 
+    def test_get_leaderboard(self):
+        with open("test_leaderboard9.txt", "w") as outfile:
+            outfile.write("aaa\n3\nbbb\n1\nccc\n2\n")
+        controller = Controller(GameModel(), "abc", 2)
+        self.assertEqual(controller.leaderboard, None)
+
+        leaderboard = controller.get_leaderboard("test_leaderboard9.txt")
+        self.assertEqual(leaderboard.capacity, 2)
+        self.assertEqual(leaderboard.leaders(), [["bbb", 1], ["ccc", 2]])
+        self.assertTrue(controller.get_leaderboard("test_leaderboard9.txt")
+                        is leaderboard)
+
+        self.assertRaises(TypeError, controller.get_leaderboard, 123)
+
+    def test_get_leaders(self):
+        with open("test_leaderboard7.txt", "w") as outfile:
+            outfile.write("aaa\n3\n")
+        controller = Controller(GameModel(), "abc")
+        self.assertEqual(controller.leaderboard, None)
+
+        leaders = controller.get_leaders("test_leaderboard7.txt")
+        self.assertEqual(leaders, [["aaa", "3"]])
+        self.assertEqual(controller.leaders_filename, "test_leaderboard7.txt")
+
+        # the file is read only once
+        with open("test_leaderboard7.txt", "w") as outfile:
+            outfile.write("bbb\n1\n")
+        self.assertTrue(controller.get_leaders("test_leaderboard7.txt") is leaders)
+        # another file is read again, and ranked
+        previous = controller.load_leaderboard_file("test_leaderboard1.txt")
+        self.assertEqual(controller.get_leaders("test_leaderboard1.txt"),
+                         sorted(previous, key=lambda x: int(x[1]))[:5])
+
+        self.assertRaises(TypeError, controller.get_leaders, 123)
+
     def test_save_leaderboard_file(self):
         # delete the file "test_leaderboard1.txt" in the folder for testing
 
@@ -262,6 +1155,33 @@ class ControllerTest(unittest.TestCase):
         self.assertRaises(TypeError, controller.create_top_leaders_list,
                           [[1, 2], [3, 4]])
 
+        # a new player goes ahead of old records with the same score
+        model.score = 5
+        controller2 = Controller(model, "abc", 3)
+        self.assertEqual(controller2.create_top_leaders_list(starting_data),
+                         [["ccc", "1"], ["ddd", "3"], ["abc", "5"]])
+
+    def test_update_game(self):
+        model = GameModel(max_guess = 2)
+        model.code = ["black", "black", "green", "blue"]
+        controller = Controller(model, "abc")
+        controller.current_guess = ["black", "", "", "blue"]
+        controller.update_game()
+
+        self.assertEqual(model.score, 1)
+        self.assertEqual(controller.get_bulls_and_cows(), (2, 0))
+        self.assertEqual(controller.game_status, "running")
+        self.assertEqual(controller.current_guess, ["", "", "", ""])
+        self.assertEqual(controller.current_round, 2)
+
+        controller.current_guess = ["", "", "", ""]
+        controller.update_game()
+        self.assertEqual(controller.game_status, "lost")
+        # no more guesses once the game is over
+        controller.update_game()
+        self.assertEqual(model.score, 2)
+        self.assertEqual(controller.current_round, 3)
+
     def test_update_round(self):
         # delete the files "test_leaderboard1.txt", "test_leaderboard2.txt"
         # "test_leaderboard3.txt", "test_leaderboard4.txt" in the folder for testing
@@ -323,7 +1243,33 @@ class ControllerTest(unittest.TestCase):
         data3 = controller2.load_leaderboard_file(filename = "test_leaderboard4.txt")
         self.assertEqual(data3, [])
 
-        # 4. test bad argument
+        # 4. the leaderboard files are only touched by a winning guess
+        # that changes the top leaders
+        for filename in ["test_leaderboard5.txt", "test_leaderboard6.txt"]:
+            if os.path.exists(filename):
+                os.remove(filename)
+        model3 = GameModel()
+        model3.code = ["black", "black", "green", "blue"]
+        model3.score = 8
+        controller3 = Controller(model3, "fff")
+        controller3.current_guess = ["", "", "", ""]
+        controller3.update_round(infile_name = "test_leaderboard5.txt",
+                                 outfile_name = "test_leaderboard6.txt")
+        self.assertFalse(os.path.exists("test_leaderboard5.txt"))
+        self.assertEqual(controller3.leaderboard, None)
+
+        # a score of 9 doesn't make the top five
+        with open("test_leaderboard8.txt", "w") as outfile:
+            for i in range(1, 6):
+                outfile.write("p" + str(i) + "\n" + str(i) + "\n")
+        controller3.current_guess = ["black", "black", "green", "blue"]
+        controller3.update_round(infile_name = "test_leaderboard8.txt",
+                                 outfile_name = "test_leaderboard6.txt")
+        self.assertEqual(controller3.game_status, "win")
+        self.assertFalse(os.path.exists("test_leaderboard6.txt"))
+        self.assertEqual(controller3.leaders_filename, "test_leaderboard8.txt")
+
+        # 5. test bad argument
         self.assertRaises(TypeError, controller2.update_round, in_filename=123,
                           out_filename = "test_leaderboard4.txt")
         self.assertRaises(TypeError, controller2.update_round,
@@ -405,42 +1351,2861 @@ class ControllerTest(unittest.TestCase):
         self.assertFalse(controller == controller4)
 
 
-class PointTest(unittest.TestCase):
+class LeaderboardTest(unittest.TestCase):
     """
-    A TestCase class that test the methods in class Point.
-    Methods: test_init, test_get_distance, test_str, test_eq
+    A TestCase class that test the methods in class Leaderboard.
+    Methods: test_init, test_bad_init, test_insert, test_extend,
+             test_can_enter, test_records, test_version, test_str, test_eq
     """
 
     def test_init(self):
-        point = Point()
-        point2 = Point(1, 2)
-        point3 = Point(0.5, 3.5)
-        point4 = Point(-10, 0.5)
+        leaderboard = Leaderboard()
 
-        self.assertEqual(point.x, 0)
-        self.assertEqual(point.y, 0)
-        self.assertEqual(point2.x, 1)
-        self.assertEqual(point2.y, 2)
-        self.assertEqual(point3.x, 0.5)
-        self.assertEqual(point3.y, 3.5)
-        self.assertEqual(point4.x, -10)
-        self.assertEqual(point4.y, 0.5)
+        self.assertEqual(leaderboard.name, "Leaderboard")
+        self.assertEqual(leaderboard.capacity, TOP_LEADERS_NUM)
+        self.assertEqual(len(leaderboard), 0)
+        self.assertEqual(leaderboard.leaders(), [])
+        self.assertEqual(Leaderboard(1000).capacity, 1000)
 
-        self.assertRaises(TypeError, Point, "a", 1)
-        self.assertRaises(TypeError, Point, 1, [])
+    def test_bad_init(self):
+        self.assertRaises(TypeError, Leaderboard, "5")
+        self.assertRaises(ValueError, Leaderboard, 0)
 
-    def test_get_distance(self):
-        point = Point()
-        point2 = Point(1, 2)
-        point3 = Point(0.5, 3.5)
-        point4 = Point(-10, 0.5)
+    def test_insert(self):
+        leaderboard = Leaderboard(3)
+        self.assertTrue(leaderboard.insert("aaa", 5))
+        self.assertTrue(leaderboard.insert("bbb", 3))
+        self.assertTrue(leaderboard.insert("ccc", 5))
+        # a new player goes ahead of old records with the same score
+        self.assertEqual(leaderboard.leaders(),
+                         [["bbb", 3], ["ccc", 5], ["aaa", 5]])
 
-        self.assertAlmostEqual(point.get_distance(point2), 2.23606798)
-        self.assertAlmostEqual(point2.get_distance(point3), 1.58113883)
-        self.assertAlmostEqual(point.get_distance(point4), 10.01249220)
+        # the oldest of the worst records drops out
+        self.assertTrue(leaderboard.insert("ddd", 5))
+        self.assertEqual(leaderboard.leaders(),
+                         [["bbb", 3], ["ddd", 5], ["ccc", 5]])
+        self.assertFalse(leaderboard.insert("eee", 6))
+        self.assertTrue(leaderboard.insert("fff", 1))
+        self.assertEqual(leaderboard.leaders(),
+                         [["fff", 1], ["bbb", 3], ["ddd", 5]])
+        self.assertEqual(len(leaderboard), 3)
 
-    def test_str(self):
-        point = Point()
+        # the same as sorting every record, for many records
+        rng = random.Random(0)
+        leaderboard = Leaderboard(100)
+        records = []
+        for i in range(2000):
+            score = rng.randrange(1, 11)
+            leaderboard.insert(str(i), score)
+            records.insert(0, [str(i), score])
+        records.sort(key=lambda x: x[1])
+        self.assertEqual(leaderboard.leaders(), records[:100])
+
+        # test bad argument
+        self.assertRaises(TypeError, leaderboard.insert, 1, 2)
+        self.assertRaises(TypeError, leaderboard.insert, "abc", "2")
+
+    def test_extend(self):
+        leaderboard = Leaderboard(3)
+        leaderboard.extend([["aaa", "5"], ["bbb", "3"], ["ccc", "5"],
+                            ["ddd", "5"]])
+        # an earlier record ranks ahead of a later one with the same score
+        self.assertEqual(leaderboard.leaders(),
+                         [["bbb", 3], ["aaa", 5], ["ccc", 5]])
+        # a new player goes ahead of the extended records
+        leaderboard.insert("eee", 5)
+        self.assertEqual(leaderboard.leaders(),
+                         [["bbb", 3], ["eee", 5], ["aaa", 5]])
+
+        # test bad argument
+        self.assertRaises(TypeError, leaderboard.extend, "abc")
+        self.assertRaises(TypeError, leaderboard.extend, [[1, 2]])
+
+    def test_can_enter(self):
+        leaderboard = Leaderboard(2)
+        self.assertTrue(leaderboard.can_enter(100))
+        leaderboard.insert("aaa", 3)
+        leaderboard.insert("bbb", 5)
+        self.assertTrue(leaderboard.can_enter(5))
+        self.assertTrue(leaderboard.can_enter(4))
+        self.assertFalse(leaderboard.can_enter(6))
+
+    def test_records(self):
+        leaderboard = Leaderboard()
+        leaderboard.insert("aaa", 5)
+        leaderboard.insert("bbb", 3)
+        records = leaderboard.records()
+        self.assertEqual(records, [["bbb", "3"], ["aaa", "5"]])
+        self.assertEqual(list(leaderboard), [["bbb", 3], ["aaa", 5]])
+        # the records are only ranked again after a change
+        self.assertTrue(leaderboard.records() is records)
+        leaderboard.insert("ccc", 4)
+        self.assertEqual(leaderboard.records(),
+                         [["bbb", "3"], ["ccc", "4"], ["aaa", "5"]])
+
+    def test_version(self):
+        leaderboard = Leaderboard(2)
+        version = leaderboard.version
+        # a new Leaderboard never has the version of another one
+        self.assertNotEqual(Leaderboard(2).version, version)
+
+        leaderboard.insert("aaa", 3)
+        self.assertNotEqual(leaderboard.version, version)
+        version = leaderboard.version
+        leaderboard.extend([["bbb", "5"]])
+        self.assertNotEqual(leaderboard.version, version)
+
+        # nothing changes, the version stays
+        version = leaderboard.version
+        self.assertFalse(leaderboard.insert("ccc", 6))
+        leaderboard.extend([["ddd", "7"]])
+        leaderboard.leaders()
+        self.assertEqual(leaderboard.version, version)
+
+    def test_str(self):
+        leaderboard = Leaderboard(10)
+        leaderboard.insert("aaa", 5)
+        self.assertEqual(leaderboard.__str__(),
+                         "Leaderboard\tCapacity: 10\tLeaders: 1")
+
+    def test_eq(self):
+        leaderboard = Leaderboard()
+        leaderboard.insert("aaa", 5)
+        leaderboard2 = Leaderboard()
+        leaderboard2.extend([["aaa", "5"]])
+        leaderboard3 = Leaderboard(10)
+        leaderboard3.insert("aaa", 5)
+
+        self.assertTrue(leaderboard.__eq__(leaderboard2))
+        self.assertFalse(leaderboard == leaderboard3)
+        self.assertFalse(leaderboard == "a")
+
+
+class LeaderboardJournalTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class LeaderboardJournal.
+    Methods: setUp, test_init, test_bad_init, test_load, test_append,
+             test_compact, test_compact_in_background, test_stale_journal,
+             test_torn_journal, test_str, test_eq
+    """
+
+    def setUp(self):
+        # start each test without the files of the last one
+        for filename in ["test_journal.txt", "test_journal.txt" + JOURNAL_SUFFIX]:
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def test_init(self):
+        journal = LeaderboardJournal("test_journal.txt")
+
+        self.assertEqual(journal.name, "Leaderboard Journal")
+        self.assertEqual(journal.filename, "test_journal.txt")
+        self.assertEqual(journal.journal_filename,
+                         "test_journal.txt" + JOURNAL_SUFFIX)
+        self.assertEqual(journal.capacity, TOP_LEADERS_NUM)
+        self.assertEqual(journal.leaderboard, None)
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, LeaderboardJournal, 123)
+        self.assertRaises(TypeError, LeaderboardJournal, "test_journal.txt", "5")
+        self.assertRaises(ValueError, LeaderboardJournal, "test_journal.txt", 0)
+        self.assertRaises(ValueError, LeaderboardJournal, "test_journal.txt",
+                          5, 0)
+
+    def test_load(self):
+        # no files, an empty leaderboard
+        self.assertEqual(LeaderboardJournal("test_journal.txt").load().leaders(),
+                         [])
+
+        # a leaderboard file without a journal is the snapshot
+        with open("test_journal.txt", "w") as outfile:
+            outfile.write("aaa\n3\nbbb\n1\n")
+        journal = LeaderboardJournal("test_journal.txt")
+        self.assertEqual(journal.load().leaders(), [["bbb", 1], ["aaa", 3]])
+
+    def test_append(self):
+        with open("test_journal.txt", "w") as outfile:
+            outfile.write("aaa\n3\nbbb\n1\n")
+        journal = LeaderboardJournal("test_journal.txt", 3)
+        self.assertTrue(journal.append("ccc", 3))
+        self.assertTrue(journal.append("ddd", 2))
+        self.assertFalse(journal.append("eee", 4))
+        self.assertEqual(journal.get_leaderboard().leaders(),
+                         [["bbb", 1], ["ddd", 2], ["ccc", 3]])
+
+        # the first record starts the journal with a new snapshot,
+        # the next records are only appended to the journal
+        with open("test_journal.txt", "r") as infile:
+            self.assertEqual(infile.read(), "bbb\n1\nccc\n3\naaa\n3\n")
+        self.assertEqual(journal.journal_num, 1)
+        journal2 = LeaderboardJournal("test_journal.txt", 3)
+        self.assertEqual(journal2.load(), journal.get_leaderboard())
+
+        # test bad argument
+        self.assertRaises(TypeError, journal.append, 1, 2)
+        self.assertRaises(ValueError, journal.append, "a\nb", 2)
+
+    def test_compact(self):
+        journal = LeaderboardJournal("test_journal.txt", 5, 3)
+        for i in range(5):
+            journal.append("p" + str(i), 10 - i)
+        # compacted on the third record after the journal was started
+        self.assertEqual(journal.journal_num, 1)
+        self.assertEqual(LeaderboardJournal("test_journal.txt", 5).load(),
+                         journal.get_leaderboard())
+
+        journal.compact()
+        self.assertEqual(journal.journal_num, 0)
+        with open("test_journal.txt", "r") as infile:
+            snapshot = infile.read()
+        self.assertEqual(snapshot, write_records(journal.leaderboard.records()))
+        with open(journal.journal_filename, "r") as infile:
+            self.assertEqual(infile.read(), get_journal_header(snapshot))
+        self.assertFalse(os.path.exists("test_journal.txt.tmp"))
+
+    def test_compact_in_background(self):
+        journal = LeaderboardJournal("test_journal.txt", 5, 3)
+        journal.append("p0", 10)
+        worker = PersistenceWorker()
+        journal.add_worker(worker)
+        self.assertTrue(journal.worker is worker)
+        release = threading.Event()
+        worker.submit("hold", release.wait)
+        journal.append("p1", 9)
+        journal.append("p2", 8)
+        with open("test_journal.txt", "r") as infile:
+            snapshot = infile.read()
+        with open(journal.journal_filename, "r") as infile:
+            journal_text = infile.read()
+
+        # append returns without rewriting the snapshot, and leaves the
+        # records appended meanwhile to the queued compaction
+        self.assertTrue(journal.append("p3", 7))
+        self.assertTrue(journal.compact_pending)
+        self.assertTrue(journal.append("p4", 6))
+        with open("test_journal.txt", "r") as infile:
+            self.assertEqual(infile.read(), snapshot)
+        with open(journal.journal_filename, "r") as infile:
+            self.assertEqual(infile.read(), journal_text)
+
+        release.set()
+        worker.tasks.join()
+        self.assertEqual([tag for tag, result, error in worker.poll()],
+                         ["hold", "compact"])
+        self.assertFalse(journal.compact_pending)
+        self.assertEqual(journal.journal_num, 0)
+        self.assertEqual(LeaderboardJournal("test_journal.txt", 5).load(),
+                         journal.get_leaderboard())
+        self.assertEqual(len(journal.get_leaderboard()), 5)
+
+        # a load does a queued compaction first, so no record is lost
+        release = threading.Event()
+        worker.submit("hold", release.wait)
+        for i in range(3):
+            journal.append("q" + str(i), i)
+        self.assertTrue(journal.compact_pending)
+        self.assertEqual(journal.load().leaders()[:3],
+                         [["q0", 0], ["q1", 1], ["q2", 2]])
+        self.assertFalse(journal.compact_pending)
+        release.set()
+        worker.close()
+        journal.add_worker(None)
+        self.assertEqual(LeaderboardJournal("test_journal.txt", 5).load(),
+                         journal.get_leaderboard())
+
+        # test bad argument
+        self.assertRaises(TypeError, journal.add_worker, "a")
+
+    def test_stale_journal(self):
+        journal = LeaderboardJournal("test_journal.txt")
+        journal.append("aaa", 3)
+        journal.append("bbb", 5)
+        # the snapshot is replaced without its journal: the journal
+        # belongs to another snapshot and is skipped
+        write_atomic("test_journal.txt", "bbb\n5\n")
+        self.assertEqual(LeaderboardJournal("test_journal.txt").load().leaders(),
+                         [["bbb", 5]])
+
+    def test_torn_journal(self):
+        journal = LeaderboardJournal("test_journal.txt")
+        journal.append("aaa", 3)
+        journal.append("bbb", 5)
+        with open(journal.journal_filename, "a") as outfile:
+            outfile.write("ccc\n1")
+
+        # the incomplete record is dropped
+        journal2 = LeaderboardJournal("test_journal.txt")
+        self.assertEqual(journal2.load().leaders(), [["aaa", 3], ["bbb", 5]])
+        self.assertFalse(journal2.journal_ready)
+        # the next record is not appended after the incomplete one
+        journal2.append("ddd", 4)
+        self.assertEqual(LeaderboardJournal("test_journal.txt").load().leaders(),
+                         [["aaa", 3], ["ddd", 4], ["bbb", 5]])
+
+    def test_str(self):
+        journal = LeaderboardJournal("test_journal.txt")
+        self.assertEqual(journal.__str__(), "Leaderboard Journal\t" +
+                         "File: test_journal.txt\tJournal records: 0")
+
+    def test_eq(self):
+        journal = LeaderboardJournal("test_journal.txt")
+
+        self.assertTrue(journal.__eq__(LeaderboardJournal("test_journal.txt")))
+        self.assertFalse(journal == LeaderboardJournal("test_journal.txt", 10))
+        self.assertFalse(journal == LeaderboardJournal("test_journal2.txt"))
+        self.assertFalse(journal == "a")
+
+
+class LeaderboardShardsTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class LeaderboardShards.
+    Methods: setUp, test_init, test_bad_init, test_get_filename,
+             test_load_index, test_configs, test_str, test_eq
+    """
+
+    def setUp(self):
+        # start each test without the files of the last one
+        if os.path.exists("test_leaderboards"):
+            shutil.rmtree("test_leaderboards")
+
+    def test_init(self):
+        shards = LeaderboardShards("test_leaderboards")
+
+        self.assertEqual(shards.name, "Leaderboard Shards")
+        self.assertEqual(shards.directory, "test_leaderboards")
+        self.assertEqual(shards.index_filename,
+                         os.path.join("test_leaderboards", SHARD_INDEX_FILENAME))
+        self.assertEqual(shards.shards, None)
+        self.assertTrue(os.path.isdir("test_leaderboards"))
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, LeaderboardShards, 123)
+
+    def test_get_filename(self):
+        shards = LeaderboardShards("test_leaderboards")
+        filename = shards.get_filename("[-,red]x4/10")
+        filename2 = shards.get_filename("[-,red]x5/10")
+
+        self.assertNotEqual(filename, filename2)
+        self.assertEqual(os.path.dirname(filename), "test_leaderboards")
+        self.assertEqual(shards.get_filename("[-,red]x4/10"),
+                         filename)
+        # the same file in another process, the index written once
+        shards2 = LeaderboardShards("test_leaderboards")
+        self.assertEqual(shards2.get_filename("[-,red]x4/10"),
+                         filename)
+        with open(shards.index_filename, "r") as infile:
+            self.assertEqual(len(infile.readlines()), 2)
+
+        # test bad argument
+        self.assertRaises(TypeError, shards.get_filename, 4)
+        self.assertRaises(ValueError, shards.get_filename, "a\tb")
+
+    def test_load_index(self):
+        shards = LeaderboardShards("test_leaderboards")
+        self.assertEqual(shards.load_index(), {})
+        filename = shards.get_filename("aaa")
+        # an incomplete last line is skipped
+        with open(shards.index_filename, "a") as outfile:
+            outfile.write("bbb\tleader")
+
+        self.assertEqual(LeaderboardShards("test_leaderboards").load_index(),
+                         {"aaa": filename})
+
+    def test_configs(self):
+        shards = LeaderboardShards("test_leaderboards")
+        shards.get_filename("bbb")
+        LeaderboardShards("test_leaderboards").get_filename("aaa")
+
+        self.assertEqual(shards.configs(), ["aaa", "bbb"])
+
+    def test_str(self):
+        shards = LeaderboardShards("test_leaderboards")
+        self.assertEqual(shards.__str__(),
+                         "Leaderboard Shards\tDirectory: test_leaderboards")
+
+    def test_eq(self):
+        shards = LeaderboardShards("test_leaderboards")
+
+        self.assertTrue(shards.__eq__(LeaderboardShards("test_leaderboards")))
+        self.assertFalse(shards == LeaderboardShards("test_leaderboards/other"))
+        self.assertFalse(shards == "a")
+
+
+class PersistenceWorkerTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class PersistenceWorker.
+    Methods: test_init, test_bad_init, test_submit, test_full_queue,
+             test_close, test_str, test_eq
+    """
+
+    def test_init(self):
+        worker = PersistenceWorker()
+
+        self.assertEqual(worker.name, "Persistence Worker")
+        self.assertEqual(worker.tasks.maxsize, 16)
+        self.assertTrue(worker.thread.daemon)
+        self.assertEqual(worker.poll(), [])
+        worker.close()
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, PersistenceWorker, "16")
+        self.assertRaises(ValueError, PersistenceWorker, 0)
+
+    def test_submit(self):
+        worker = PersistenceWorker()
+        self.assertTrue(worker.submit("add", sum, [1, 2, 3]))
+        self.assertTrue(worker.submit("int", int, "a"))
+        worker.tasks.join()
+
+        # the results are handed back in order, with the errors
+        (tag, result, error), (tag2, result2, error2) = worker.poll()
+        self.assertEqual((tag, result, error), ("add", 6, None))
+        self.assertEqual((tag2, result2), ("int", None))
+        self.assertTrue(isinstance(error2, ValueError))
+        self.assertEqual(worker.poll(), [])
+        worker.close()
+
+        # test bad argument
+        self.assertRaises(TypeError, worker.submit, 1, sum, [1])
+
+    def test_full_queue(self):
+        worker = PersistenceWorker(2)
+        started = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            started.set()
+            release.wait()
+
+        worker.submit("hold", hold)
+        started.wait()
+        # submit never waits: a full queue refuses the task
+        self.assertTrue(worker.submit("add", sum, [1]))
+        self.assertTrue(worker.submit("add", sum, [2]))
+        self.assertFalse(worker.submit("add", sum, [3]))
+        release.set()
+        worker.close()
+        self.assertEqual([result for tag, result, error in worker.poll()],
+                         [None, 1, 2])
+
+    def test_close(self):
+        worker = PersistenceWorker()
+        for i in range(10):
+            worker.submit("add", sum, [i])
+        # the queued tasks are finished before the thread stops
+        worker.close()
+        self.assertEqual(len(worker.poll()), 10)
+        self.assertEqual(worker.thread, None)
+        self.assertFalse(worker.submit("add", sum, [1]))
+        worker.close()
+
+        # without waiting, a stopper thread that is not a daemon finishes
+        # the tasks, and a later close waits for it
+        worker = PersistenceWorker()
+        release = threading.Event()
+        worker.submit("hold", release.wait)
+        worker.submit("add", sum, [1])
+        worker.close(wait = False)
+        self.assertEqual(worker.thread, None)
+        self.assertFalse(worker.stopper.daemon)
+        self.assertFalse(worker.submit("add", sum, [2]))
+        self.assertEqual(worker.poll(), [])
+        release.set()
+        worker.close()
+        self.assertFalse(worker.stopper.is_alive())
+        self.assertEqual([result for tag, result, error in worker.poll()],
+                         [True, 1])
+
+    def test_str(self):
+        worker = PersistenceWorker()
+        self.assertEqual(worker.__str__(), "Persistence Worker\tQueued tasks: 0")
+        worker.close()
+
+    def test_eq(self):
+        worker = PersistenceWorker()
+        worker2 = PersistenceWorker()
+
+        self.assertTrue(worker.__eq__(worker))
+        self.assertFalse(worker == worker2)
+        self.assertFalse(worker == "a")
+        worker.close()
+        worker2.close()
+
+
+class LeaderboardDatabaseTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class LeaderboardDatabase.
+    Methods: test_init, test_bad_init, test_add_game, test_add_games,
+             test_top_leaders, test_player_best, test_query_plans,
+             test_str, test_eq
+    """
+
+    def test_init(self):
+        if os.path.exists("test_leaderboard.db"):
+            os.remove("test_leaderboard.db")
+        database = LeaderboardDatabase("test_leaderboard.db")
+
+        self.assertEqual(database.name, "Leaderboard Database")
+        self.assertEqual(database.filename, "test_leaderboard.db")
+        self.assertEqual(database.game_num(), 0)
+        database.add_game("aaa", 3, "win", "7x4/10")
+        database.close()
+
+        # the games are kept in the file
+        database = LeaderboardDatabase("test_leaderboard.db")
+        self.assertEqual(database.top_leaders(5), [["aaa", 3]])
+        database.close()
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, LeaderboardDatabase, 123)
+
+    def test_add_game(self):
+        database = LeaderboardDatabase(":memory:")
+        database.add_game("aaa", 3, "win", "7x4/10")
+        database.add_game("bbb", 10, "lost", "7x4/10", 100)
+        self.assertEqual(database.game_num(), 2)
+        self.assertEqual(database.connection.execute(
+            "SELECT player, score, status, config, finished FROM games "
+            "WHERE id = 2").fetchone(), ("bbb", 10, "lost", "7x4/10", 100))
+
+        # test bad argument
+        self.assertRaises(TypeError, database.add_game, 1, 3, "win", "7x4/10")
+        self.assertRaises(TypeError, database.add_game, "aaa", "3", "win",
+                          "7x4/10")
+        self.assertRaises(ValueError, database.add_game, "aaa", 3, "running",
+                          "7x4/10")
+        self.assertEqual(database.game_num(), 2)
+
+    def test_add_games(self):
+        database = LeaderboardDatabase(":memory:")
+        database.add_games([["p" + str(i), i % 7 + 1, "win", "7x4/10", i]
+                            for i in range(1000)])
+        self.assertEqual(database.game_num(), 1000)
+
+        # a bad game records none of the games
+        self.assertRaises(ValueError, database.add_games,
+                          [["aaa", 3, "win", "7x4/10", 0],
+                           ["bbb", 3, "draw", "7x4/10", 0]])
+        self.assertRaises(TypeError, database.add_games, "a")
+        self.assertEqual(database.game_num(), 1000)
+
+    def test_top_leaders(self):
+        database = LeaderboardDatabase(":memory:")
+        database.add_game("aaa", 5, "win", "7x4/10")
+        database.add_game("bbb", 3, "win", "7x4/10")
+        database.add_game("ccc", 5, "win", "7x4/10")
+        database.add_game("ddd", 1, "lost", "7x4/10")
+        database.add_game("eee", 2, "win", "7x5/10")
+
+        # a newer game goes ahead of older ones with the same score
+        self.assertEqual(database.top_leaders(3, "7x4/10"),
+                         [["bbb", 3], ["ccc", 5], ["aaa", 5]])
+        self.assertEqual(database.top_leaders(2),
+                         [["eee", 2], ["bbb", 3]])
+        self.assertEqual(database.top_leaders(5, "6x4/10"), [])
+
+        # the same as a Leaderboard of the won games
+        leaderboard = Leaderboard(3)
+        for player, score in [["aaa", 5], ["bbb", 3], ["ccc", 5]]:
+            leaderboard.insert(player, score)
+        self.assertEqual(database.top_leaders(3, "7x4/10"), leaderboard.leaders())
+
+        # test bad argument
+        self.assertRaises(TypeError, database.top_leaders, "3")
+        self.assertRaises(TypeError, database.top_leaders, 3, 7)
+
+    def test_player_best(self):
+        database = LeaderboardDatabase(":memory:")
+        database.add_game("aaa", 5, "win", "7x4/10")
+        database.add_game("aaa", 3, "win", "7x5/10")
+        database.add_game("aaa", 1, "lost", "7x4/10")
+
+        self.assertEqual(database.player_best("aaa"), 3)
+        self.assertEqual(database.player_best("aaa", "7x4/10"), 5)
+        self.assertEqual(database.player_best("bbb"), None)
+
+        # test bad argument
+        self.assertRaises(TypeError, database.player_best, 1)
+
+    def test_query_plans(self):
+        database = LeaderboardDatabase(":memory:")
+        for query, arguments, index in [
+                (TOP_QUERY, (5,), "games_top"),
+                (CONFIG_TOP_QUERY, ("7x4/10", 5), "games_config_top"),
+                (CONFIG_PLAYER_BEST_QUERY, ("aaa", "7x4/10"),
+                 "games_player_best")]:
+            plan = " ".join(row[-1] for row in database.connection.execute(
+                "EXPLAIN QUERY PLAN " + query, arguments))
+            # one index search, no table scan and no sort
+            self.assertTrue(index in plan)
+            self.assertFalse("TEMP B-TREE" in plan)
+
+    def test_str(self):
+        database = LeaderboardDatabase(":memory:")
+        self.assertEqual(database.__str__(), "Leaderboard Database\tFile: :memory:")
+
+    def test_eq(self):
+        database = LeaderboardDatabase(":memory:")
+
+        self.assertTrue(database.__eq__(LeaderboardDatabase(":memory:")))
+        self.assertFalse(database == LeaderboardDatabase("test_leaderboard.db"))
+        self.assertFalse(database == "a")
+
+
+def write_shared_records(filename, writer, record_num):
+    """
+    Function: write_shared_records
+        Write records to a SharedLeaderboard, in a writer process of
+        SharedLeaderboardTest.
+    Parameters:
+        filename (str) -- the leaderboard filename
+        writer (int) -- the number of the writer
+        record_num (int) -- the number of records to write
+    Return: nothing
+    """
+
+    shared = SharedLeaderboard(filename, 1000, 50, 7)
+    for i in range(record_num):
+        shared.append("w{}-{}".format(writer, i), writer * record_num + i)
+    shared.close()
+
+
+class SharedLeaderboardTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class SharedLeaderboard.
+    Methods: setUp, test_init, test_bad_init, test_append, test_flush,
+             test_flush_in_background, test_many_writers, test_str
+    """
+
+    def setUp(self):
+        # start each test without the files of the last one
+        for filename in ["test_shared.txt", "test_shared.txt" + JOURNAL_SUFFIX]:
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def test_init(self):
+        shared = SharedLeaderboard("test_shared.txt")
+
+        self.assertEqual(shared.name, "Shared Leaderboard")
+        self.assertEqual(shared.lock_filename, "test_shared.txt" + LOCK_SUFFIX)
+        self.assertEqual(shared.pending, [])
+        self.assertTrue(isinstance(shared, LeaderboardJournal))
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, SharedLeaderboard, "test_shared.txt",
+                          5, 10, "20")
+        self.assertRaises(ValueError, SharedLeaderboard, "test_shared.txt",
+                          5, 10, 0)
+        self.assertRaises(ValueError, SharedLeaderboard, "test_shared.txt",
+                          5, 10, 20, -1)
+
+    def test_append(self):
+        shared = SharedLeaderboard("test_shared.txt", 3, 100, 3, 60)
+        self.assertTrue(shared.append("aaa", 3))
+        self.assertTrue(shared.append("bbb", 1))
+        # the records are pending until the batch is full
+        self.assertEqual(len(shared.pending), 2)
+        self.assertFalse(os.path.exists("test_shared.txt"))
+        self.assertTrue(shared.append("ccc", 2))
+        self.assertEqual(shared.pending, [])
+        self.assertEqual(SharedLeaderboard("test_shared.txt", 3).load(),
+                         shared.leaderboard)
+        # a record that doesn't enter here is not kept
+        self.assertFalse(shared.append("ddd", 4))
+        self.assertEqual(shared.pending, [])
+
+        # a record waiting batch_seconds is written with the next one
+        shared2 = SharedLeaderboard("test_shared.txt", 3, 100, 3, 0)
+        shared2.append("eee", 0)
+        self.assertEqual(shared2.pending, [])
+
+        # test bad argument
+        self.assertRaises(TypeError, shared.append, 1, 2)
+        self.assertRaises(ValueError, shared.append, "a\nb", 2)
+
+    def test_flush(self):
+        shared = SharedLeaderboard("test_shared.txt", 5, 100, 10)
+        shared2 = SharedLeaderboard("test_shared.txt", 5, 100, 10)
+        shared.append("aaa", 3)
+        shared2.append("bbb", 1)
+        shared.flush()
+        shared2.flush()
+        shared2.flush()
+
+        # the second flush keeps the first one's records
+        self.assertEqual(shared2.leaderboard.leaders(), [["bbb", 1], ["aaa", 3]])
+        self.assertEqual(SharedLeaderboard("test_shared.txt").load().leaders(),
+                         [["bbb", 1], ["aaa", 3]])
+
+        # the lock is released after a flush
+        with lock_file(shared.lock_filename):
+            pass
+
+    def test_flush_in_background(self):
+        shared = SharedLeaderboard("test_shared.txt", 5, 100, 10, 60)
+        worker = PersistenceWorker()
+        shared.add_worker(worker)
+        release = threading.Event()
+        worker.submit("hold", release.wait)
+
+        # a new top leader is queued to be written at once, and the records
+        # appended meanwhile are written by the same flush
+        self.assertTrue(shared.append("aaa", 3))
+        self.assertTrue(shared.flush_pending)
+        self.assertTrue(shared.append("bbb", 1))
+        self.assertEqual(len(shared.pending), 2)
+        self.assertFalse(os.path.exists("test_shared.txt"))
+
+        release.set()
+        worker.tasks.join()
+        self.assertEqual([tag for tag, result, error in worker.poll()],
+                         ["hold", "flush"])
+        self.assertFalse(shared.flush_pending)
+        self.assertEqual(shared.pending, [])
+        self.assertEqual(SharedLeaderboard("test_shared.txt").load().leaders(),
+                         [["bbb", 1], ["aaa", 3]])
+
+        # the next record queues another flush
+        self.assertTrue(shared.append("ccc", 2))
+        worker.close()
+        self.assertEqual(SharedLeaderboard("test_shared.txt").load().leaders(),
+                         [["bbb", 1], ["ccc", 2], ["aaa", 3]])
+
+    def test_many_writers(self):
+        # dozens of processes write to one file at the same time
+        writer_num = 24
+        record_num = 30
+        writers = [multiprocessing.Process(target=write_shared_records,
+                                           args=("test_shared.txt", i, record_num))
+                   for i in range(writer_num)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+            self.assertEqual(writer.exitcode, 0)
+
+        # no record is lost
+        leaders = SharedLeaderboard("test_shared.txt", 1000).load().leaders()
+        self.assertEqual(len(leaders), writer_num * record_num)
+        self.assertEqual([score for player, score in leaders],
+                         list(range(writer_num * record_num)))
+        self.assertEqual(set(player for player, score in leaders),
+                         set("w{}-{}".format(i, j) for i in range(writer_num)
+                             for j in range(record_num)))
+        self.assertEqual([name for name in os.listdir(".")
+                          if name.startswith("test_shared.txt.")
+                          and name.endswith(".tmp")], [])
+
+    def test_str(self):
+        shared = SharedLeaderboard("test_shared.txt", 5, 100, 10)
+        shared.append("aaa", 3)
+        self.assertEqual(shared.__str__(), "Shared Leaderboard\t" +
+                         "File: test_shared.txt\tPending records: 1")
+
+
+def merge_sketch_games(filename, game_num):
+    """
+    Function: merge_sketch_games
+        Merge games into a sketch file one at a time, from another process.
+    Parameters:
+        filename (str) -- the sketch filename
+        game_num (int) -- the number of games
+    Return: nothing
+    """
+
+    for i in range(game_num):
+        game = ScoreSketch()
+        game.add(i % 10 + 1)
+        merge_sketch_file(filename, game)
+
+
+class ScoreSketchTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class ScoreSketch,
+    and the functions parse_sketch, read_sketch, merge_sketch_file.
+    Methods: test_init, test_add, test_merge, test_quantile, test_percentile,
+             test_to_text, test_parse_sketch, test_read_sketch,
+             test_merge_sketch_file, test_merge_processes, test_str, test_eq
+    """
+
+    def test_init(self):
+        sketch = ScoreSketch()
+
+        self.assertEqual(sketch.name, "Score Sketch")
+        self.assertEqual(sketch.counts, [0])
+        self.assertEqual(sketch.lost_num, 0)
+        self.assertEqual(sketch.game_num(), 0)
+
+    def test_add(self):
+        sketch = ScoreSketch()
+        sketch.add(3)
+        sketch.add(3)
+        sketch.add(1, "win")
+        sketch.add(10, "lost")
+
+        self.assertEqual(sketch.counts, [0, 1, 0, 2])
+        self.assertEqual(sketch.lost_num, 1)
+        self.assertEqual(sketch.win_num(), 3)
+        self.assertEqual(sketch.game_num(), 4)
+
+        # test bad arguments
+        self.assertRaises(TypeError, sketch.add, "3")
+        self.assertRaises(ValueError, sketch.add, 0)
+        self.assertRaises(ValueError, sketch.add, 3, "running")
+
+    def test_merge(self):
+        sketch = ScoreSketch()
+        sketch.add(2)
+        sketch2 = ScoreSketch()
+        sketch2.add(5)
+        sketch2.add(2)
+        sketch2.add(4, "lost")
+        sketch.merge(sketch2)
+
+        self.assertEqual(sketch.counts, [0, 0, 2, 0, 0, 1])
+        self.assertEqual(sketch.lost_num, 1)
+        self.assertEqual(sketch2.game_num(), 3)
+
+        self.assertRaises(TypeError, sketch.merge, [0, 1])
+
+    def test_quantile(self):
+        sketch = ScoreSketch()
+        self.assertEqual(sketch.median(), None)
+        for score in [1, 2, 2, 3, 7, 7, 7, 9]:
+            sketch.add(score)
+        sketch.add(5, "lost")
+
+        self.assertEqual(sketch.quantile(0), 1)
+        self.assertEqual(sketch.quantile(0.25), 2)
+        self.assertEqual(sketch.median(), 3)
+        self.assertEqual(sketch.quantile(0.75), 7)
+        self.assertEqual(sketch.quantile(1), 9)
+
+        # test bad arguments
+        self.assertRaises(TypeError, sketch.quantile, "0.5")
+        self.assertRaises(ValueError, sketch.quantile, 1.5)
+
+    def test_percentile(self):
+        sketch = ScoreSketch()
+        self.assertEqual(sketch.percentile(3), None)
+        for score in [2, 3, 3, 6]:
+            sketch.add(score)
+        sketch.add(10, "lost")
+
+        # beats the games won with more guesses, and the lost game
+        self.assertEqual(sketch.percentile(1), 100)
+        self.assertEqual(sketch.percentile(3), 40)
+        self.assertEqual(sketch.percentile(6), 20)
+        self.assertEqual(sketch.percentile(12), 20)
+
+        self.assertRaises(TypeError, sketch.percentile, "3")
+
+    def test_to_text(self):
+        sketch = ScoreSketch()
+        self.assertEqual(sketch.to_text(), "0\n")
+        sketch.add(3)
+        sketch.add(1, "lost")
+        self.assertEqual(sketch.to_text(), "1 0 0 1\n")
+        self.assertEqual(parse_sketch(sketch.to_text()), sketch)
+
+    def test_parse_sketch(self):
+        sketch = parse_sketch("2 1 0 3\n")
+        self.assertEqual(sketch.lost_num, 2)
+        self.assertEqual(sketch.counts, [0, 1, 0, 3])
+
+        # test bad arguments
+        self.assertRaises(TypeError, parse_sketch, 3)
+        self.assertRaises(ValueError, parse_sketch, "")
+        self.assertRaises(ValueError, parse_sketch, "1 -1")
+        self.assertRaises(ValueError, parse_sketch, "1 a")
+
+    def test_read_sketch(self):
+        if os.path.exists("test_sketch.txt"):
+            os.remove("test_sketch.txt")
+        self.assertEqual(read_sketch("test_sketch.txt"), ScoreSketch())
+
+        write_atomic("test_sketch.txt", "0 1 2\n")
+        self.assertEqual(read_sketch("test_sketch.txt").counts, [0, 1, 2])
+
+    def test_merge_sketch_file(self):
+        if os.path.exists("test_sketch.txt"):
+            os.remove("test_sketch.txt")
+        sketch = ScoreSketch()
+        sketch.add(4)
+        merged = merge_sketch_file("test_sketch.txt", sketch)
+        self.assertEqual(merged, sketch)
+        merged = merge_sketch_file("test_sketch.txt", sketch)
+
+        self.assertEqual(merged.counts, [0, 0, 0, 0, 2])
+        self.assertEqual(read_sketch("test_sketch.txt"), merged)
+
+    def test_merge_processes(self):
+        if os.path.exists("test_sketch2.txt"):
+            os.remove("test_sketch2.txt")
+        writer_num, game_num = 4, 50
+        writers = [multiprocessing.Process(target = merge_sketch_games,
+                                           args = ("test_sketch2.txt", game_num))
+                   for i in range(writer_num)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+            self.assertEqual(writer.exitcode, 0)
+
+        # no game is lost
+        sketch = read_sketch("test_sketch2.txt")
+        self.assertEqual(sketch.game_num(), writer_num * game_num)
+        self.assertEqual(sketch.counts, [0] + [writer_num * game_num // 10] * 10)
+
+    def test_str(self):
+        sketch = ScoreSketch()
+        sketch.add(4)
+        self.assertEqual(sketch.__str__(), "Score Sketch\tGames: 1\tMedian: 4")
+
+    def test_eq(self):
+        sketch = ScoreSketch()
+        sketch.add(2)
+        sketch2 = parse_sketch("0 0 1 0 0\n")
+
+        self.assertTrue(sketch.__eq__(sketch2))
+        sketch2.add(2, "lost")
+        self.assertFalse(sketch == sketch2)
+        self.assertFalse(sketch == "a")
+
+
+class SessionRecorderTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class SessionRecorder,
+    and the functions open_recorder, encode_varint, decode_varint,
+    encode_string, decode_string, decode_records, find_records_end.
+    Methods: setUp, test_init, test_bad_init, test_add_worker,
+             test_record_create, test_record_events, test_palette,
+             test_flush, test_reopen,
+             test_lock, test_open_recorder, test_torn_record,
+             test_append_after_torn_record, test_varint, test_string,
+             test_str, test_eq
+    """
+
+    def setUp(self):
+        # start each test without the log of the last one
+        if os.path.exists("test_sessions.bin"):
+            os.remove("test_sessions.bin")
+
+    def test_init(self):
+        recorder = SessionRecorder("test_sessions.bin", 100)
+
+        self.assertEqual(recorder.name, "Session Recorder")
+        self.assertEqual(recorder.filename, "test_sessions.bin")
+        self.assertEqual(recorder.buffer_size, 100)
+        self.assertEqual(recorder.session_num, 0)
+        # the header is written, the open record is buffered
+        self.assertEqual(os.path.getsize("test_sessions.bin"), SESSION_HEADER.size)
+        self.assertEqual(recorder.buffer[0], 0)
+        recorder.close()
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, SessionRecorder, 123)
+        self.assertRaises(TypeError, SessionRecorder, "test_sessions.bin", "a")
+        self.assertRaises(ValueError, SessionRecorder, "test_sessions.bin", -1)
+        with open("test_sessions.bin", "wb") as outfile:
+            outfile.write(b"MMBK\x01\x00")
+        self.assertRaises(ValueError, SessionRecorder, "test_sessions.bin")
+
+    def test_add_worker(self):
+        recorder = SessionRecorder("test_sessions.bin")
+        worker = PersistenceWorker(1)
+        recorder.add_worker(worker)
+        self.assertTrue(recorder.worker is worker)
+        size = os.path.getsize("test_sessions.bin")
+
+        # the records are written in the worker's thread
+        started = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            started.set()
+            release.wait()
+
+        worker.submit("hold", hold)
+        started.wait()
+        recorder.flush()
+        self.assertEqual(recorder.buffer, bytearray())
+        self.assertEqual(os.path.getsize("test_sessions.bin"), size)
+        # a full queue keeps them buffered, in order
+        recorder.record_create("abc", GameModel())
+        recorder.flush()
+        self.assertGreater(len(recorder.buffer), 0)
+        release.set()
+        worker.close()
+        self.assertEqual([tag for tag, result, error in worker.poll()],
+                         ["hold", "record"])
+
+        # a closed recorder writes the rest itself
+        recorder.close()
+        self.assertEqual(recorder.worker, None)
+        with open("test_sessions.bin", "rb") as infile:
+            self.assertEqual([record[1] for record in decode_records(
+                infile.read())], ["open", "palette", "create"])
+
+        # test bad argument
+        self.assertRaises(TypeError, recorder.add_worker, "a")
+
+    def test_record_create(self):
+        recorder = SessionRecorder("test_sessions.bin")
+        model = GameModel()
+        model.code = ["red", "", "blue", "blue"]
+
+        self.assertEqual(recorder.record_create("abc", model), 0)
+        self.assertEqual(recorder.record_create("def", model), 1)
+        recorder.close()
+        with open("test_sessions.bin", "rb") as infile:
+            records = list(decode_records(infile.read()))
+        self.assertEqual(records[2][3:], (0, ("abc", 10, ["red", "", "blue",
+                                                          "blue"])))
+        self.assertEqual(records[3][3:], (1, ("def", 10, ["red", "", "blue",
+                                                          "blue"])))
+
+        # test bad arguments
+        self.assertRaises(TypeError, recorder.record_create, 1, model)
+        self.assertRaises(TypeError, recorder.record_create, "abc", "a")
+
+    def test_record_events(self):
+        recorder = SessionRecorder("test_sessions.bin")
+        model = GameModel()
+        model.code = ["red", "red", "red", "red"]
+        session = recorder.record_create("abc", model)
+        size = len(recorder.buffer)
+        recorder.record_guess(session, 3, "green")
+        recorder.record_round(session, ["red", "red", "", "green"], 2, 0, "running")
+        recorder.record_restart(session, ["", "blue", "blue", "purple"])
+        # a record takes a few bytes
+        self.assertLessEqual(len(recorder.buffer) - size, 3 * 10)
+        recorder.close()
+
+        with open("test_sessions.bin", "rb") as infile:
+            records = list(decode_records(infile.read()))
+        self.assertEqual([record[1] for record in records],
+                         ["open", "palette", "create", "guess", "round", "restart"])
+        self.assertEqual(records[3][3:], (0, (3, "green")))
+        self.assertEqual(records[4][3:], (0, (["red", "red", "", "green"],
+                                              2, 0, "running")))
+        self.assertEqual(records[5][3:], (0, (["", "blue", "blue", "purple"],)))
+        # the times are absolute, and never go back
+        times = [record[2] for record in records]
+        self.assertEqual(times, sorted(times))
+        self.assertGreater(times[0], 0)
+
+        # test bad arguments
+        self.assertRaises(ValueError, recorder.record_guess, 5, 0, "red")
+        self.assertRaises(ValueError, recorder.record_guess, session, 0, "pink")
+        self.assertRaises(ValueError, recorder.record_round, session,
+                          ["red", "red", "red", "red"], 4, 0, "won")
+
+    def test_palette(self):
+        recorder = SessionRecorder("test_sessions.bin")
+        model = GameModel(code_range = ["", "red", "blue"])
+        model.code = ["red", "blue"]
+        model2 = GameModel()
+        model2.code = ["red", "black"]
+        session = recorder.record_create("abc", model)
+        session2 = recorder.record_create("def", model2)
+        recorder.record_guess(session2, 0, "black")
+        recorder.record_guess(session, 0, "blue")
+        recorder.record_guess(session, 1, "blue")
+        recorder.close()
+
+        # a palette is written when the session's palette is not the last one
+        with open("test_sessions.bin", "rb") as infile:
+            records = list(decode_records(infile.read()))
+        self.assertEqual([record[1] for record in records],
+                         ["open", "palette", "create", "palette", "create",
+                          "guess", "palette", "guess", "guess"])
+        self.assertEqual(records[5][4], (0, "black"))
+        self.assertEqual(records[7][4], (0, "blue"))
+        self.assertEqual(records[6][4], (["", "red", "blue"],))
+
+    def test_flush(self):
+        recorder = SessionRecorder("test_sessions.bin", 20)
+        model = GameModel()
+        model.code = ["red", "red", "red", "red"]
+        session = recorder.record_create("abc", model)
+        # the buffer is written in whole records once it holds 20 bytes:
+        # the palette is written, the create record is buffered
+        self.assertTrue(0 < len(recorder.buffer) < 20)
+        size = os.path.getsize("test_sessions.bin")
+        with open("test_sessions.bin", "rb") as infile:
+            self.assertEqual([record[1] for record in decode_records(
+                infile.read())], ["open", "palette"])
+        recorder.record_guess(session, 0, "red")
+        self.assertEqual(os.path.getsize("test_sessions.bin"), size)
+        recorder.flush()
+        self.assertEqual(recorder.buffer, bytearray())
+        self.assertGreater(os.path.getsize("test_sessions.bin"), size)
+
+        # a finished game is written at once
+        recorder.record_round(session, ["red", "", "", ""], 1, 0, "lost")
+        self.assertEqual(recorder.buffer, bytearray())
+        recorder.close()
+        recorder.close()
+
+    def test_reopen(self):
+        model = GameModel()
+        model.code = ["red", "red", "red", "red"]
+        for player in ["abc", "def"]:
+            recorder = SessionRecorder("test_sessions.bin")
+            recorder.record_create(player, model)
+            recorder.close()
+
+        # the sessions of each recorder are numbered after the ones before
+        with open("test_sessions.bin", "rb") as infile:
+            records = [record for record in decode_records(infile.read())
+                       if record[1] == "create"]
+        self.assertEqual([(record[3], record[4][0]) for record in records],
+                         [(0, "abc"), (1, "def")])
+
+    def test_lock(self):
+        recorder = SessionRecorder("test_sessions.bin")
+
+        # no other recorder appends to the log while it is open
+        self.assertRaises(BlockingIOError, SessionRecorder, "test_sessions.bin")
+        recorder.close()
+        recorder = SessionRecorder("test_sessions.bin")
+        recorder.close()
+
+        # a bad log is not left locked
+        with open("test_sessions.bin", "wb") as outfile:
+            outfile.write(b"MMBK\x01\x00")
+        self.assertRaises(ValueError, SessionRecorder, "test_sessions.bin")
+        with lock_file("test_sessions.bin" + LOCK_SUFFIX, blocking = False):
+            pass
+
+    def test_open_recorder(self):
+        if os.path.exists("test_sessions_1.bin"):
+            os.remove("test_sessions_1.bin")
+        recorder = open_recorder("test_sessions.bin")
+        self.assertEqual(recorder.filename, "test_sessions.bin")
+
+        # a log already open is left to its recorder
+        recorder2 = open_recorder("test_sessions.bin")
+        self.assertEqual(recorder2.filename, "test_sessions_1.bin")
+        recorder.close()
+        recorder3 = open_recorder("test_sessions.bin")
+        self.assertEqual(recorder3.filename, "test_sessions.bin")
+        recorder2.close()
+        recorder3.close()
+
+    def test_torn_record(self):
+        recorder = SessionRecorder("test_sessions.bin")
+        model = GameModel()
+        model.code = ["red", "red", "red", "red"]
+        session = recorder.record_create("abc", model)
+        recorder.record_round(session, ["red", "red", "", ""], 2, 0, "running")
+        recorder.close()
+        with open("test_sessions.bin", "rb") as infile:
+            data = infile.read()
+
+        # a record torn by a crash ends the log
+        self.assertEqual(len(list(decode_records(data))), 4)
+        for end in range(len(data) - 5, len(data)):
+            self.assertEqual([record[1] for record in decode_records(data[:end])],
+                             ["open", "palette", "create"])
+
+    def test_append_after_torn_record(self):
+        model = GameModel()
+        model.code = ["red", "red", "red", "red"]
+        recorder = SessionRecorder("test_sessions.bin")
+        session = recorder.record_create("abc", model)
+        recorder.record_round(session, ["red", "red", "", ""], 2, 0, "running")
+        recorder.close()
+        with open("test_sessions.bin", "rb") as infile:
+            data = infile.read()
+        self.assertEqual(find_records_end(data), len(data))
+
+        # a crash tears the last record, the next recorder cuts it off
+        with open("test_sessions.bin", "wb") as outfile:
+            outfile.write(data[:-2])
+        recorder = SessionRecorder("test_sessions.bin")
+        session = recorder.record_create("def", model)
+        recorder.record_round(session, ["red", "red", "red", "red"], 4, 0, "win")
+        recorder.close()
+
+        # both sessions are decoded, only the torn round is lost
+        with open("test_sessions.bin", "rb") as infile:
+            records = list(decode_records(infile.read()))
+        self.assertEqual([(record[1], record[3]) for record in records],
+                         [("open", 0), ("palette", 0), ("create", 0),
+                          ("open", 1), ("palette", 1), ("create", 1),
+                          ("round", 1)])
+        self.assertEqual(records[5][4][0], "def")
+        self.assertEqual(records[6][4][1:], (4, 0, "win"))
+
+        # a torn header is written again
+        with open("test_sessions.bin", "wb") as outfile:
+            outfile.write(SESSION_HEADER.pack(b"MMSR", 2)[:3])
+        recorder = SessionRecorder("test_sessions.bin")
+        recorder.close()
+        with open("test_sessions.bin", "rb") as infile:
+            data = infile.read()
+        self.assertEqual(data[:SESSION_HEADER.size], SESSION_HEADER.pack(b"MMSR", 2))
+        self.assertEqual([record[1] for record in decode_records(data)], ["open"])
+
+    def test_varint(self):
+        for num in [0, 1, 127, 128, 300, 2 ** 40]:
+            data = encode_varint(num)
+            self.assertEqual(decode_varint(b"x" + data, 1), (num, 1 + len(data)))
+        self.assertEqual(encode_varint(127), b"\x7f")
+        self.assertEqual(encode_varint(300), b"\xac\x02")
+        self.assertEqual(decode_varint(memoryview(b"\xac\x02"), 0), (300, 2))
+
+        # test bad arguments
+        self.assertRaises(TypeError, encode_varint, "1")
+        self.assertRaises(ValueError, encode_varint, -1)
+        self.assertRaises(ValueError, decode_varint, b"\xac", 0)
+
+    def test_string(self):
+        data = encode_string("héllo")
+        self.assertEqual(data[0], 6)
+        self.assertEqual(decode_string(data, 0), ("héllo", 7))
+        self.assertEqual(decode_string(memoryview(data), 0), ("héllo", 7))
+        self.assertRaises(ValueError, decode_string, data[:-1], 0)
+
+    def test_str(self):
+        recorder = SessionRecorder("test_sessions.bin")
+        self.assertEqual(recorder.__str__(), "Session Recorder\t" +
+                         "File: test_sessions.bin\tSessions: 0")
+        recorder.close()
+
+    def test_eq(self):
+        recorder = SessionRecorder("test_sessions.bin")
+        recorder2 = SessionRecorder("test_sessions_1.bin")
+
+        self.assertTrue(recorder.__eq__(recorder))
+        self.assertFalse(recorder == recorder2)
+        self.assertFalse(recorder == "a")
+        recorder.close()
+        recorder2.close()
+
+
+def record_sessions(filename):
+    """
+    Function: record_sessions
+        Record a session log of two recorders: abc wins in 2 rounds and
+        loses in 2 rounds, def loses in 2 rounds, then abc wins in 1 round.
+    Parameter:
+        filename (str) -- the session log filename
+    Return: nothing
+    """
+
+    if os.path.exists(filename):
+        os.remove(filename)
+    recorder = SessionRecorder(filename)
+    model = GameModel(max_guess = 2)
+    model.code = ["red", "red", "blue", "blue"]
+    model2 = GameModel(max_guess = 2, code_range = ["", "red", "blue"])
+    model2.code = ["blue", "blue", "blue", "blue"]
+    session = recorder.record_create("abc", model)
+    session2 = recorder.record_create("def", model2)
+    recorder.record_round(session, ["red", "", "", ""], 1, 0, "running")
+    recorder.record_round(session2, ["red", "", "", ""], 0, 0, "running")
+    recorder.record_round(session, ["red", "red", "blue", "blue"], 4, 0, "win")
+    recorder.record_restart(session, ["green", "green", "green", "green"])
+    recorder.record_round(session2, ["red", "", "", ""], 0, 0, "lost")
+    recorder.record_guess(session, 0, "red")
+    recorder.record_round(session, ["red", "", "", ""], 0, 0, "running")
+    recorder.record_round(session, ["red", "", "", ""], 0, 0, "lost")
+    recorder.close()
+
+    recorder = SessionRecorder(filename)
+    session = recorder.record_create("abc", model)
+    recorder.record_round(session, ["red", "red", "blue", "blue"], 4, 0, "win")
+    recorder.close()
+
+
+class SessionLogTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class SessionLog.
+    Methods: setUp, test_init, test_bad_init, test_records,
+             test_game_records, test_str, test_eq
+    """
+
+    def setUp(self):
+        record_sessions("test_sessions2.bin")
+        if os.path.exists("test_sessions2.bin" + INDEX_SUFFIX):
+            os.remove("test_sessions2.bin" + INDEX_SUFFIX)
+
+    def test_init(self):
+        log = SessionLog("test_sessions2.bin")
+
+        self.assertEqual(log.name, "Session Log")
+        self.assertEqual(log.filename, "test_sessions2.bin")
+        self.assertEqual(len(log), os.path.getsize("test_sessions2.bin"))
+        self.assertEqual(log.view.readonly, True)
+        log.close()
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, SessionLog, 123)
+        with open("test_sessions3.bin", "wb") as outfile:
+            outfile.write(b"MMSR")
+        self.assertRaises(ValueError, SessionLog, "test_sessions3.bin")
+        with open("test_sessions3.bin", "wb") as outfile:
+            outfile.write(b"MMBK\x01\x00")
+        self.assertRaises(ValueError, SessionLog, "test_sessions3.bin")
+
+    def test_records(self):
+        log = SessionLog("test_sessions2.bin")
+        with open("test_sessions2.bin", "rb") as infile:
+            self.assertEqual(list(log.records()),
+                             list(decode_records(infile.read())))
+        self.assertEqual([record[3] for record in log.records()
+                          if record[1] == "create"], [0, 1, 2])
+        self.assertEqual(log.get_start_time(), next(log.records())[2])
+        log.close()
+
+    def test_game_records(self):
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+
+        # only the game's records, the other session's are skipped
+        game = index.get_game(2)
+        records = list(log.game_records(game))
+        self.assertEqual([record[1] for record in records],
+                         ["restart", "guess", "round", "round"])
+        self.assertEqual(records[0][4], (["green", "green", "green", "green"],))
+        self.assertEqual(records[0][2], game["start_time"])
+        self.assertEqual(records, [record for record in log.records()
+                                   if record[0] >= game["start"] and
+                                   record[3] == 0 and record[1] != "palette"])
+        # a game of another palette and another recorder
+        self.assertEqual([record[4] for record in log.game_records(
+            index.get_game(1))], [("def", 2, ["blue", "blue", "blue", "blue"]),
+                                  (["red", "", "", ""], 0, 0, "running"),
+                                  (["red", "", "", ""], 0, 0, "lost")])
+        self.assertEqual([record[3] for record in log.game_records(
+            index.get_game(3))], [2, 2])
+        index.close()
+        log.close()
+
+    def test_str(self):
+        log = SessionLog("test_sessions2.bin")
+        self.assertEqual(log.__str__(), "Session Log\tFile: test_sessions2.bin" +
+                         "\tSize: {}".format(len(log)))
+        log.close()
+
+    def test_eq(self):
+        log = SessionLog("test_sessions2.bin")
+        log2 = SessionLog("test_sessions2.bin")
+
+        self.assertTrue(log.__eq__(log2))
+        self.assertFalse(log == "a")
+        log.close()
+        log2.close()
+
+
+class SessionIndexTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class SessionIndex,
+    and the functions build_session_index, load_session_index.
+    Methods: setUp, test_init, test_bad_init, test_find_key, test_get_game,
+             test_get_entries, test_query, test_build_session_index,
+             test_load_session_index, test_index_appended_records,
+             test_str, test_eq
+    """
+
+    def setUp(self):
+        record_sessions("test_sessions2.bin")
+        if os.path.exists("test_sessions2.bin" + INDEX_SUFFIX):
+            os.remove("test_sessions2.bin" + INDEX_SUFFIX)
+
+    def test_init(self):
+        log = SessionLog("test_sessions2.bin")
+        build_session_index(log)
+        index = SessionIndex("test_sessions2.bin" + INDEX_SUFFIX)
+
+        self.assertEqual(index.name, "Session Index")
+        self.assertEqual(index.log_size, len(log))
+        self.assertEqual(index.log_time, log.get_start_time())
+        self.assertEqual(len(index), 4)
+        index.close()
+        log.close()
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, SessionIndex, 123)
+        self.assertRaises(FileNotFoundError, SessionIndex, "test_sessions2.bin" +
+                          INDEX_SUFFIX)
+        self.assertRaises(ValueError, SessionIndex, "test_sessions2.bin")
+
+    def test_find_key(self):
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+
+        number = index.find_key("player", "abc")
+        self.assertEqual(index.get_key(number)[1], "abc")
+        self.assertEqual(list(index.get_key(number)[2]), [0, 2, 3])
+        self.assertEqual(list(index.get_key(index.find_key("status", "lost"))[2]),
+                         [1, 2])
+        self.assertEqual(index.find_key("player", "xyz"), None)
+        self.assertEqual(index.find_key("score", "abc"), None)
+        self.assertEqual(index.get_key_string(number), "abc")
+        index.close()
+        log.close()
+
+    def test_get_game(self):
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+
+        game = index.get_game(0)
+        self.assertEqual([game["session"], game["player"], game["code"],
+                          game["status"], game["score"]],
+                         [0, "abc", ["red", "red", "blue", "blue"], "win", 2])
+        game = index.get_game(3)
+        self.assertEqual([game["session"], game["player"], game["status"],
+                          game["score"], game["session_base"]],
+                         [2, "abc", "win", 1, 2])
+        index.close()
+        log.close()
+
+    def test_get_entries(self):
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+
+        entries = index.get_entries()
+        self.assertEqual(len(entries), 4)
+        for number, entry in enumerate(entries):
+            game = index.get_game(number)
+            self.assertEqual(entry[:7], [game["session"], game["start"],
+                                         game["end"], game["palette_offset"],
+                                         game["session_base"], game["base_time"],
+                                         game["start_time"]])
+            self.assertEqual(entry[7:10], [game["player"], ",".join(game["code"]),
+                                           game["score"]])
+            self.assertEqual(STATUS_NAMES[entry[10]], game["status"])
+        index.close()
+        log.close()
+
+    def test_query(self):
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+
+        games = index.query(player = "abc", status = "lost")
+        self.assertEqual([game["code"] for game in games],
+                         [["green", "green", "green", "green"]])
+        self.assertEqual(len(index.query(player = "abc")), 3)
+        self.assertEqual(len(index.query(status = "win", score = 2)), 1)
+        self.assertEqual([game["session"] for game in index.query(
+            code = ["red", "red", "blue", "blue"])], [0, 2])
+        self.assertEqual(len(index.query()), 4)
+        self.assertEqual(index.query(player = "def", status = "win"), [])
+        self.assertEqual(index.query(player = "xyz"), [])
+        index.close()
+        log.close()
+
+    def test_build_session_index(self):
+        log = SessionLog("test_sessions2.bin")
+        build_session_index(log, "test_sessions3.bin" + INDEX_SUFFIX)
+        index = SessionIndex("test_sessions3.bin" + INDEX_SUFFIX)
+        self.assertEqual(len(index), 4)
+        index.close()
+
+        self.assertRaises(TypeError, build_session_index, "test_sessions2.bin")
+        log.close()
+
+    def test_load_session_index(self):
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+        self.assertEqual(len(index), 4)
+        modified = os.stat(index.filename).st_mtime_ns
+        index.close()
+        # a fresh index is not built again
+        index = load_session_index(log)
+        self.assertEqual(os.stat(index.filename).st_mtime_ns, modified)
+        index.close()
+        log.close()
+
+        # another log of the same size, started 1 ms later, is indexed again
+        with open("test_sessions2.bin", "r+b") as outfile:
+            outfile.seek(SESSION_HEADER.size + 1)
+            byte = outfile.read(1)[0]
+            outfile.seek(SESSION_HEADER.size + 1)
+            outfile.write(bytes([byte ^ 1]))
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+        self.assertNotEqual(os.stat(index.filename).st_mtime_ns, modified)
+        self.assertEqual(index.log_time, log.get_start_time())
+        index.close()
+        log.close()
+
+        # a longer log is indexed from the end of the index
+        recorder = SessionRecorder("test_sessions2.bin")
+        recorder.record_create("ghi", GameModel())
+        recorder.close()
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+        self.assertEqual(len(index), 5)
+        self.assertEqual(index.log_size, len(log))
+        index.close()
+        log.close()
+
+        self.assertRaises(TypeError, load_session_index, "test_sessions2.bin")
+
+    def test_index_appended_records(self):
+        log = SessionLog("test_sessions2.bin")
+        load_session_index(log).close()
+        log.close()
+
+        # a game goes on after the index, and another recorder opens the log
+        recorder = SessionRecorder("test_sessions2.bin")
+        model = GameModel(max_guess = 3, code_range = ["", "red", "green"])
+        model.code = ["green", "green", "green", "green"]
+        session = recorder.record_create("ghi", model)
+        recorder.record_round(session, ["red", "", "", ""], 0, 0, "running")
+        recorder.flush()
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+        self.assertEqual(index.get_game(4)["status"], "running")
+        index.close()
+        log.close()
+        recorder.record_round(session, ["green", "green", "green", "green"],
+                              4, 0, "win")
+        recorder.close()
+        recorder = SessionRecorder("test_sessions2.bin")
+        recorder.record_create("jkl", GameModel())
+        recorder.close()
+
+        # the index of the appended records is the index of the whole log
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+        build_session_index(log, "test_sessions3.bin" + INDEX_SUFFIX)
+        index2 = SessionIndex("test_sessions3.bin" + INDEX_SUFFIX)
+        self.assertEqual(index.get_entries(), index2.get_entries())
+        self.assertEqual(index.data[:], index2.data[:])
+        game = index.get_game(4)
+        self.assertEqual([game["player"], game["status"], game["score"]],
+                         ["ghi", "win", 2])
+        self.assertEqual([record[1] for record in log.game_records(game)],
+                         ["create", "round", "round"])
+        self.assertEqual(index.get_game(5)["session"], 4)
+        self.assertEqual(index.log_size, len(log))
+        index.close()
+        index2.close()
+        log.close()
+
+        # a shorter log is indexed again from its start
+        with open("test_sessions2.bin", "r+b") as outfile:
+            outfile.truncate(game["start"])
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.log_size, len(log))
+        index.close()
+        log.close()
+
+        self.assertRaises(TypeError, build_session_index, log, None, "a")
+
+    def test_str(self):
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+        self.assertEqual(index.__str__(), "Session Index\t" +
+                         "File: test_sessions2.bin.index\tGames: 4")
+        index.close()
+        log.close()
+
+    def test_eq(self):
+        log = SessionLog("test_sessions2.bin")
+        index = load_session_index(log)
+        index2 = SessionIndex("test_sessions2.bin" + INDEX_SUFFIX)
+
+        self.assertTrue(index.__eq__(index2))
+        self.assertFalse(index == "a")
+        index.close()
+        index2.close()
+        log.close()
+
+
+class GameStatsTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class GameStats,
+    and the functions iter_games, analyze_log, analyze_logs, main.
+    Methods: setUp, test_init, test_add, test_merge, test_player_average,
+             test_top_players, test_get_sketch, test_first_guess_table,
+             test_format_report, test_iter_games, test_analyze_log,
+             test_analyze_logs, test_main, test_str, test_eq
+    """
+
+    def setUp(self):
+        record_sessions("test_sessions4.bin")
+        self.games = [
+            {"player": "abc", "config": "7x4/10", "score": 3, "status": "win",
+             "first_guess": ["red", "red", "", ""], "first_bull_num": 1,
+             "first_cow_num": 1},
+            {"player": "abc", "config": "7x4/10", "score": 10, "status": "lost",
+             "first_guess": ["red", "red", "", ""], "first_bull_num": 0,
+             "first_cow_num": 0},
+            {"player": "def", "config": "7x4/10", "score": 5, "status": "win",
+             "first_guess": ["blue", "", "", ""], "first_bull_num": 0,
+             "first_cow_num": 2},
+            {"player": "ghi", "config": "7x5/8", "score": 3, "status": "win",
+             "first_guess": ["red", "red", "", "", ""], "first_bull_num": 2,
+             "first_cow_num": 0}]
+
+    def test_init(self):
+        stats = GameStats()
+
+        self.assertEqual(stats.name, "Game Stats")
+        self.assertEqual(stats.players, {})
+        self.assertEqual(stats.sketches, {})
+        self.assertEqual(stats.first_guesses, {})
+        self.assertEqual(stats.game_num(), 0)
+
+    def test_add(self):
+        stats = GameStats()
+        stats.add(self.games[0])
+        stats.add(self.games[1])
+
+        self.assertEqual(stats.players, {"abc": [2, 1, 3]})
+        self.assertEqual(stats.sketches["7x4/10"].to_text(), "1 0 0 1\n")
+        self.assertEqual(stats.first_guesses, {("7x4/10", "red,red,,"): [2, 1, 3, 2]})
+        self.assertTrue(stats.add_games(iter(self.games[2:])) is stats)
+        self.assertEqual(stats.game_num(), 4)
+
+    def test_merge(self):
+        stats = GameStats().add_games(self.games[:2])
+        stats2 = GameStats().add_games(self.games[1:])
+
+        self.assertTrue(stats.merge(stats2) is stats)
+        self.assertEqual(stats.players, {"abc": [3, 1, 3], "def": [1, 1, 5],
+                                         "ghi": [1, 1, 3]})
+        self.assertEqual(stats.get_sketch("7x4/10").game_num(), 4)
+        self.assertEqual(stats.first_guesses[("7x4/10", "red,red,,")], [3, 1, 3, 2])
+        self.assertEqual(stats2.game_num(), 3)
+
+        self.assertRaises(TypeError, stats.merge, "a")
+
+    def test_player_average(self):
+        stats = GameStats().add_games(self.games + self.games[:1])
+
+        self.assertEqual(stats.player_average("abc"), 3)
+        self.assertEqual(stats.player_average("def"), 5)
+        self.assertEqual(stats.player_average("xyz"), None)
+
+    def test_top_players(self):
+        stats = GameStats().add_games(self.games + self.games[:1])
+
+        # on a tie, the player with more wins goes first
+        self.assertEqual(stats.top_players(5), [["abc", 3], ["ghi", 3],
+                                                ["def", 5]])
+        self.assertEqual(stats.top_players(1), [["abc", 3]])
+        self.assertEqual(stats.top_players(5, 2), [["abc", 3]])
+
+        self.assertRaises(TypeError, stats.top_players, "5")
+
+    def test_get_sketch(self):
+        stats = GameStats().add_games(self.games)
+
+        self.assertEqual(stats.get_sketch("7x4/10").median(), 3)
+        self.assertEqual(stats.get_sketch("7x4/10").lost_num, 1)
+        self.assertEqual(stats.get_sketch("3x4/10"), ScoreSketch())
+
+    def test_first_guess_table(self):
+        stats = GameStats().add_games(self.games)
+
+        self.assertEqual(stats.first_guess_table("7x4/10"),
+                         [[["blue", "", "", ""], 1, 1.0, 5.0, 2.0],
+                          [["red", "red", "", ""], 2, 0.5, 3.0, 1.0]])
+        self.assertEqual(stats.first_guess_table("3x4/10"), [])
+
+    def test_format_report(self):
+        stats = GameStats().add_games(self.games)
+        lines = stats.format_report(1).splitlines()
+
+        self.assertEqual(lines, [
+            "Games: 4\tPlayers: 3", "abc: 3.00 guesses",
+            "7x4/10\tGames: 3\tWon: 2\tMedian: 3",
+            "blue,,,\tGames: 1\tWon: 100.00%\tGuesses: 5.00\tFirst feedback: 2.00",
+            "7x5/8\tGames: 1\tWon: 1\tMedian: 3",
+            "red,red,,,\tGames: 1\tWon: 100.00%\tGuesses: 3.00\t" +
+            "First feedback: 2.00"])
+
+    def test_iter_games(self):
+        log = SessionLog("test_sessions4.bin")
+        games = list(iter_games(log.records()))
+        log.close()
+
+        # the restarted game is a game of its own, with its first guess
+        config = format_game_config(GameModel().code_range, 4, 2)
+        config2 = format_game_config(["", "red", "blue"], 4, 2)
+        self.assertEqual([[game["player"], game["config"], game["score"],
+                           game["status"]] for game in games],
+                         [["abc", config, 2, "win"], ["def", config2, 2, "lost"],
+                          ["abc", config, 2, "lost"], ["abc", config, 1, "win"]])
+        self.assertEqual([games[0]["first_guess"], games[0]["first_bull_num"],
+                          games[0]["first_cow_num"]], [["red", "", "", ""], 1, 0])
+        self.assertEqual(games[3]["first_guess"], ["red", "red", "blue", "blue"])
+
+    def test_analyze_log(self):
+        stats = analyze_log("test_sessions4.bin")
+
+        self.assertEqual(stats.players, {"abc": [3, 2, 3], "def": [1, 0, 0]})
+        self.assertEqual(stats.get_sketch(
+            format_game_config(GameModel().code_range, 4, 2)).median(), 1)
+        if os.path.exists("test_sessions5.bin"):
+            os.remove("test_sessions5.bin")
+        self.assertRaises(FileNotFoundError, analyze_log, "test_sessions5.bin")
+
+    def test_analyze_logs(self):
+        stats = analyze_log("test_sessions4.bin")
+        shutil.copyfile("test_sessions4.bin", "test_sessions5.bin")
+
+        # the shards' results are merged
+        expected = GameStats().merge(stats).merge(stats)
+        self.assertEqual(analyze_logs(["test_sessions4.bin",
+                                       "test_sessions5.bin"]), expected)
+        self.assertEqual(analyze_logs(["test_sessions4.bin",
+                                       "test_sessions5.bin"], 2), expected)
+        self.assertEqual(analyze_logs([]), GameStats())
+
+        # test bad arguments
+        self.assertRaises(TypeError, analyze_logs, "test_sessions4.bin")
+        self.assertRaises(ValueError, analyze_logs, ["test_sessions4.bin"], 0)
+
+    def test_main(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            analytics_main(["test_sessions4.bin", "-n", "1"])
+
+        self.assertEqual(output.getvalue(),
+                         analyze_log("test_sessions4.bin").format_report(1))
+
+    def test_str(self):
+        stats = GameStats().add_games(self.games)
+        self.assertEqual(stats.__str__(), "Game Stats\tGames: 4\tPlayers: 3")
+
+    def test_eq(self):
+        stats = GameStats().add_games(self.games)
+
+        self.assertTrue(stats.__eq__(GameStats().add_games(self.games)))
+        self.assertFalse(stats == GameStats().add_games(self.games[1:]))
+        self.assertFalse(stats == "a")
+
+
+class GameSnapshotTest(unittest.TestCase):
+    """
+    A TestCase class that test the functions of the game snapshots.
+    Methods: setUp, test_encode_snapshot, test_decode_snapshot,
+             test_bad_snapshot, test_track_candidates, test_save_snapshot,
+             test_write_snapshot
+    """
+
+    def setUp(self):
+        self.model = GameModel(max_guess = 5)
+        self.model.code = ["black", "black", "green", "blue"]
+        self.controller = Controller(self.model, "abc")
+        self.controller.reset_guess()
+        for guess in [["red", "", "", ""], ["black", "blue", "", ""]]:
+            for i in range(len(guess)):
+                self.controller.add_guess(guess[i], i)
+            self.controller.update_game()
+        self.controller.add_guess("green", 2)
+
+    def test_encode_snapshot(self):
+        data = encode_snapshot(self.controller)
+        self.assertEqual(data[:4], b"MMSS")
+        # a byte a number or color, the colors' names once
+        self.assertTrue(len(data) < 80)
+
+        # test bad argument
+        self.assertRaises(ValueError, encode_snapshot, Controller())
+        self.controller.current_guess[0] = "white"
+        self.assertRaises(ValueError, encode_snapshot, self.controller)
+
+    def test_decode_snapshot(self):
+        snapshot = decode_snapshot(encode_snapshot(self.controller))
+        self.assertEqual(snapshot["player"], "abc")
+        self.assertEqual(snapshot["current_guess"], ["", "", "green", ""])
+        self.assertEqual(snapshot["current_round"], 3)
+        self.assertEqual(snapshot["game_status"], "running")
+
+        model = snapshot["model"]
+        self.assertEqual(model, self.model)
+        self.assertEqual(model.code_range, self.model.code_range)
+        self.assertEqual(model.max_guess, 5)
+        self.assertEqual(model.history, [(["red", "", "", ""], 0, 0),
+                                         (["black", "blue", "", ""], 1, 1)])
+        self.assertEqual((model.bull_num, model.cow_num), (1, 1))
+        self.assertEqual(model.candidates, None)
+
+        # the restored game plays on like the saved one
+        model.update(["black", "black", "green", "blue"])
+        self.assertEqual(model.check_status(), "win")
+
+    def test_bad_snapshot(self):
+        data = encode_snapshot(self.controller)
+        self.assertRaises(ValueError, decode_snapshot, b"")
+        self.assertRaises(ValueError, decode_snapshot, b"MMSR" + data[4:])
+        self.assertRaises(ValueError, decode_snapshot,
+                          SNAPSHOT_HEADER.pack(b"MMSS", 0) +
+                          data[SNAPSHOT_HEADER.size:])
+        self.assertRaises(ValueError, decode_snapshot, data + b"\x00")
+        for length in range(SNAPSHOT_HEADER.size, len(data)):
+            self.assertRaises(ValueError, decode_snapshot, data[:length])
+
+    def test_track_candidates(self):
+        model = GameModel(track_candidates=True)
+        random.seed(0)
+        model.create_code()
+        model.update(["red", "", "", ""])
+        controller = Controller(model, "abc")
+
+        restored = decode_snapshot(encode_snapshot(controller))["model"]
+        self.assertTrue(restored.track_candidates)
+        self.assertEqual(len(restored.candidates), len(model.candidates))
+        self.assertTrue(restored.code in restored.candidates)
+
+    def test_save_snapshot(self):
+        if os.path.exists("test_snapshot.bin"):
+            os.remove("test_snapshot.bin")
+        self.assertEqual(load_snapshot("test_snapshot.bin"), None)
+
+        save_snapshot(self.controller, "test_snapshot.bin")
+        snapshot = load_snapshot("test_snapshot.bin")
+        self.assertEqual(snapshot["model"], self.model)
+        self.assertEqual(snapshot["current_guess"], ["", "", "green", ""])
+
+    def test_write_snapshot(self):
+        data = encode_snapshot(self.controller)
+        write_snapshot(data, "test_snapshot.bin")
+        with open("test_snapshot.bin", "rb") as infile:
+            self.assertEqual(infile.read(), data)
+
+        # without a snapshot, the file is removed
+        write_snapshot(None, "test_snapshot.bin")
+        self.assertFalse(os.path.exists("test_snapshot.bin"))
+        write_snapshot(None, "test_snapshot.bin")
+
+
+class CodeArrayTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class CodeArray.
+    Methods: test_init, test_bad_init, test_score, test_score_each,
+             test_count, test_take, test_filter, test_str, test_eq
+    """
+
+    def test_init(self):
+        codes = CodeArray(["red", "blue", ""], 2, [0, 5, 8])
+
+        self.assertEqual(codes.code_range, ["red", "blue", ""])
+        self.assertEqual(codes.length, 2)
+        self.assertEqual(list(codes), [0, 5, 8])
+        self.assertEqual(len(codes), 3)
+        self.assertEqual(codes.digits, [b"\x00\x01\x02", b"\x00\x02\x02"])
+        self.assertEqual(codes.counts, [b"\x02\x00\x00", b"\x00\x01\x00",
+                                        b"\x00\x01\x02"])
+        self.assertEqual(codes.decode(5), ["blue", ""])
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, CodeArray, "a", 2, [])
+        self.assertRaises(ValueError, CodeArray, [], 2, [])
+        self.assertRaises(ValueError, CodeArray, ["red"], 0, [])
+        self.assertRaises(ValueError, CodeArray, list(range(256)), 2, [])
+
+    def test_score(self):
+        codes = full_code_array(model.code_range, 4)
+        guess = ["red", "black", "black", ""]
+        scores = codes.score(guess)
+
+        self.assertEqual(len(scores), 2401)
+        for index in range(0, 2401, 7):
+            bull_num, cow_num = count_bulls_and_cows(codes.decode(index), guess)
+            self.assertEqual(scores[index], pack_score(bull_num, cow_num, 4))
+
+        self.assertRaises(ValueError, codes.score, ["red"])
+        self.assertRaises(KeyError, codes.score, ["red", "red", "red", "white"])
+
+    def test_count(self):
+        # long codes whose packed scores overflow one byte
+        code_range = [str(i) for i in range(12)]
+        random.seed(3)
+        secret_codes = [random.choices(code_range, k=18) for i in range(50)]
+        guess = random.choices(code_range, k=18)
+        codes = CodeArray(code_range, 18, [])
+        codes = CodeArray(code_range, 18, map(codes.encode, secret_codes))
+
+        self.assertEqual(codes.count(guess),
+                         [count_bulls_and_cows(each, guess)
+                          for each in secret_codes])
+
+    def test_score_each(self):
+        codes = full_code_array(["red", "blue", "green", ""], 3)
+        guesses = CodeArray(codes.code_range, 3, reversed(range(64)))
+        scores = codes.score_each(guesses)
+
+        for index in range(64):
+            self.assertEqual(scores[index], pack_score(*count_bulls_and_cows(
+                codes.decode(index), codes.decode(63 - index)), 3))
+
+        self.assertRaises(TypeError, codes.score_each, [0])
+        self.assertRaises(ValueError, codes.score_each, guesses.take([0]))
+        self.assertRaises(ValueError, codes.score_each,
+                          full_code_array(["red", "blue", "green", ""], 2))
+
+    def test_take(self):
+        codes = full_code_array(["red", "blue", ""], 3)
+        some_codes = codes.take([26, 3, 0])
+
+        self.assertEqual(some_codes, CodeArray(["red", "blue", ""], 3, [26, 3, 0]))
+        self.assertEqual(some_codes.counts,
+                         CodeArray(["red", "blue", ""], 3, [26, 3, 0]).counts)
+
+    def test_filter(self):
+        codes = full_code_array(model.code_range, 4)
+        guess = ["red", "red", "blue", "blue"]
+        consistent = codes.filter(guess, 1, 1)
+
+        expected = [index for index in range(2401)
+                    if count_bulls_and_cows(codes.decode(index), guess) == (1, 1)]
+        self.assertEqual(list(consistent), expected)
+        self.assertEqual(len(codes.filter(guess, 4, 0)), 1)
+
+    def test_str(self):
+        codes = CodeArray(["red", "blue"], 2, [0, 3])
+        msg = "Code Array\tColors: 2\tLength: 2\tCodes: 2"
+
+        self.assertEqual(codes.__str__(), msg)
+
+    def test_eq(self):
+        self.assertTrue(CodeArray(["red", "blue"], 2, [0, 3]) ==
+                        full_code_array(["red", "blue"], 2).take([0, 3]))
+        self.assertFalse(CodeArray(["red", "blue"], 2, [0, 3]) ==
+                         CodeArray(["red", "blue"], 2, [0, 2]))
+        self.assertFalse(CodeArray(["red", "blue"], 2, [0]).__eq__("a"))
+
+
+class CandidateTrackerTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class CandidateTracker.
+    Methods: test_init, test_bad_init, test_update, test_reset, test_contains,
+             test_str, test_eq
+    """
+
+    def test_init(self):
+        tracker = CandidateTracker(["red", "blue", ""], 2)
+
+        self.assertEqual(tracker.length, 2)
+        self.assertEqual(len(tracker), 9)
+        self.assertEqual(list(tracker)[:2], [["red", "red"], ["red", "blue"]])
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, CandidateTracker, "a", 2)
+        self.assertRaises(ValueError, CandidateTracker, [], 2)
+        self.assertRaises(ValueError, CandidateTracker, ["red"], 0)
+        self.assertRaises(ValueError, CandidateTracker, list(range(30)), 20)
+
+    def test_update(self):
+        tracker = CandidateTracker(["red", "blue", ""], 2)
+        tracker.update(["red", "blue"], 1, 0)
+
+        self.assertEqual(list(tracker), [["red", "red"], ["red", ""],
+                                         ["blue", "blue"], ["", "blue"]])
+        tracker.update(["red", "red"], 1, 0)
+        self.assertEqual(list(tracker), [["red", ""]])
+
+    def test_reset(self):
+        tracker = CandidateTracker(["red", "blue", ""], 2)
+        tracker.update(["red", "blue"], 2, 0)
+        self.assertEqual(len(tracker), 1)
+
+        tracker.reset()
+        self.assertEqual(len(tracker), 9)
+
+    def test_contains(self):
+        tracker = CandidateTracker(["red", "blue", ""], 2)
+        tracker.update(["red", "blue"], 1, 0)
+
+        self.assertTrue(["red", ""] in tracker)
+        self.assertFalse(["red", "blue"] in tracker)
+        self.assertFalse(["red", "white"] in tracker)
+        self.assertFalse(["red"] in tracker)
+
+    def test_str(self):
+        tracker = CandidateTracker(["red", "blue", ""], 2)
+
+        self.assertEqual(tracker.__str__(), "Candidate Tracker\tCandidates: 9")
+
+    def test_eq(self):
+        tracker = CandidateTracker(["red", "blue", ""], 2)
+        tracker2 = CandidateTracker(["red", "blue", ""], 2)
+        self.assertTrue(tracker == tracker2)
+
+        tracker2.update(["red", "blue"], 1, 0)
+        self.assertFalse(tracker == tracker2)
+        self.assertFalse(tracker.__eq__("a"))
+
+
+class ScoreTableTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class ScoreTable.
+    Methods: test_init, test_bad_init, test_encode_and_decode, test_count,
+             test_row, test_str, test_eq
+    """
+
+    def test_init(self):
+        table = ScoreTable(["red", "blue", "red", ""], 3)
+
+        self.assertEqual(table.code_range, ["red", "blue", ""])
+        self.assertEqual(table.length, 3)
+        self.assertEqual(table.color_num, 3)
+        self.assertEqual(table.size, 27)
+        self.assertEqual(len(table.table), 27 * 27)
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, ScoreTable, "a", 4)
+        self.assertRaises(TypeError, ScoreTable, ["red"], "a")
+        self.assertRaises(ValueError, ScoreTable, [], 4)
+        self.assertRaises(ValueError, ScoreTable, ["red"], 0)
+        self.assertRaises(ValueError, ScoreTable, ["red"], 16)
+
+    def test_encode_and_decode(self):
+        table = get_score_table(model.code_range, 4)
+
+        self.assertEqual(table.encode(["red", "red", "red", "red"]), 0)
+        self.assertEqual(table.encode(["", "", "", ""]), 2400)
+        self.assertEqual(table.encode(["red", "red", "blue", "green"]), 9)
+        for index in range(0, 2401, 37):
+            self.assertEqual(table.encode(table.decode(index)), index)
+
+        self.assertRaises(ValueError, table.encode, ["red"])
+        self.assertRaises(KeyError, table.encode, ["red", "red", "red", "white"])
+        self.assertRaises(IndexError, table.decode, 2401)
+
+    def test_count(self):
+        table = ScoreTable(["red", "blue", ""], 3)
+        for secret_index in range(table.size):
+            for guess_index in range(table.size):
+                secret_code = table.decode(secret_index)
+                guess = table.decode(guess_index)
+                self.assertEqual(table.count(secret_code, guess),
+                                 count_bulls_and_cows(secret_code, guess))
+
+        table2 = get_score_table(model.code_range, 4)
+        self.assertEqual(table2.count(["black", "black", "", "blue"],
+                                      ["red", "black", "black", ""]), (1, 2))
+        self.assertEqual(table2.count(["black", "black", "", "blue"],
+                                      ["", "blue", "black", "black"]), (0, 4))
+
+    def test_row(self):
+        table = ScoreTable(["red", "blue"], 2)
+        guess_index = table.encode(["red", "blue"])
+        row = table.row(guess_index)
+
+        self.assertEqual(len(row), 4)
+        for secret_index in range(4):
+            self.assertEqual(row[secret_index],
+                             table.score(secret_index, guess_index))
+        self.assertEqual(row[guess_index], pack_score(2, 0, 2))
+
+    def test_str(self):
+        table = ScoreTable(["red", "blue"], 2)
+        msg = "Score Table\tColors: 2\tLength: 2\tSize: 4"
+
+        self.assertEqual(table.__str__(), msg)
+
+    def test_eq(self):
+        self.assertTrue(ScoreTable(["red", "blue"], 2) ==
+                        ScoreTable(["red", "blue"], 2))
+        self.assertFalse(ScoreTable(["red", "blue"], 2) ==
+                         ScoreTable(["red", "blue"], 3))
+        self.assertFalse(ScoreTable(["red", "blue"], 2).__eq__("a"))
+
+
+class CodeSymmetryTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class CodeSymmetry.
+    Methods: test_init, test_bad_init, test_stabilizer, test_image,
+             test_representatives, test_str, test_eq
+    """
+
+    def test_init(self):
+        codes = full_code_array(["red", "blue", "green"], 3)
+        symmetry = CodeSymmetry(codes)
+
+        self.assertEqual(symmetry.name, "Code Symmetry")
+        self.assertTrue(symmetry.codes is codes)
+        self.assertEqual(symmetry.free_tables, {})
+
+    def test_bad_init(self):
+        codes = full_code_array(["red", "blue", "green"], 3)
+
+        self.assertRaises(TypeError, CodeSymmetry, "a")
+        self.assertRaises(ValueError, CodeSymmetry, codes.take([0, 1]))
+
+    def test_stabilizer(self):
+        symmetry = CodeSymmetry(full_code_array(["red", "blue", "green"], 3))
+
+        self.assertEqual(len(symmetry.stabilizer([])), 6)
+        # swapping the two reds, or all three pegs with red and blue swapped
+        elements = symmetry.stabilizer([["red", "red", "blue"]])
+        self.assertEqual(sorted(perm for perm, bijection in elements),
+                         [(0, 1, 2), (1, 0, 2)])
+        for perm, bijection in elements:
+            self.assertEqual(bijection, {0: 0, 1: 1})
+        self.assertEqual(len(symmetry.stabilizer([["red", "blue", "green"]])), 6)
+        self.assertEqual(symmetry.stabilizer([["red", "blue", "green"],
+                                              ["red", "red", "blue"]]),
+                         [((0, 1, 2), {0: 0, 1: 1, 2: 2})])
+
+    def test_image(self):
+        codes = full_code_array(["red", "blue", "green"], 3)
+        symmetry = CodeSymmetry(codes)
+        image = symmetry.image(codes, (2, 0, 1), {0: 1, 1: 0})
+
+        for index in range(27):
+            code = codes.decode(index)
+            code = [{"red": "blue", "blue": "red"}.get(color, color)
+                    for color in code]
+            self.assertEqual(codes.decode(image[index]),
+                             [code[2], code[0], code[1]])
+
+    def test_representatives(self):
+        codes = full_code_array(GameModel().code_range, 4)
+        symmetry = CodeSymmetry(codes)
+
+        self.assertEqual([codes.decode(index)
+                          for index in symmetry.representatives([])],
+                         [["red", "red", "red", "red"],
+                          ["red", "red", "red", "blue"],
+                          ["red", "red", "blue", "blue"],
+                          ["red", "red", "blue", "green"],
+                          ["red", "blue", "green", "yellow"]])
+
+        # every code is equivalent to exactly one representative,
+        # which splits the candidates alike
+        model = GameModel()
+        model.code = ["red", "red", "red", "red"]
+        solver = Solver(model)
+        guess = ["red", "blue", "blue", "green"]
+        solver.add_feedback(guess, 0, 2)
+        representatives = symmetry.representatives([guess])
+        sizes = set(tuple(sorted(solver.partition_sizes(codes.decode(index))))
+                    for index in representatives)
+        all_sizes = set(tuple(sorted(solver.partition_sizes(codes.decode(index))))
+                        for index in range(0, 2401, 5))
+        self.assertTrue(all_sizes <= sizes)
+        self.assertTrue(len(representatives) < 2401 // 10)
+        self.assertEqual(len(symmetry.free_tables), 2)
+
+    def test_str(self):
+        symmetry = CodeSymmetry(full_code_array(["red", "blue", "green"], 3))
+        msg = "Code Symmetry\tColors: 3\tLength: 3"
+
+        self.assertEqual(symmetry.__str__(), msg)
+
+    def test_eq(self):
+        symmetry = CodeSymmetry(full_code_array(["red", "blue", "green"], 3))
+
+        self.assertTrue(symmetry ==
+                        CodeSymmetry(full_code_array(["red", "blue", "green"], 3)))
+        self.assertFalse(symmetry ==
+                         CodeSymmetry(full_code_array(["red", "blue", "green"], 2)))
+        self.assertFalse(symmetry.__eq__("a"))
+
+
+class SolverTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class Solver and its subclasses.
+    Methods: test_init, test_bad_init, test_partition_sizes,
+             test_partition_counts, test_add_feedback, test_new_game, test_play,
+             test_minimax_first_guess, test_minimax_play, test_rate_guesses,
+             test_entropy_first_guess, test_expected_size_first_guess,
+             test_symmetry, test_random_solver, test_scripted_solver,
+             test_evaluate_solver, test_compare_solvers, test_str, test_eq
+    """
+
+    def test_init(self):
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        solver = Solver(model)
+
+        self.assertEqual(solver.name, "Mastermind Solver")
+        self.assertEqual(solver.length, 4)
+        self.assertEqual(len(solver.codes), 2401)
+        self.assertEqual(len(solver.candidates), 2401)
+        self.assertEqual(len(solver.score_values), 14)
+        self.assertEqual(solver.history, [])
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, Solver, "a")
+        self.assertRaises(ValueError, Solver, GameModel())
+
+    def test_partition_sizes(self):
+        model = GameModel(code_range=["red", "blue", "green", ""])
+        model.code = ["red", "red", "red"]
+        solver = Solver(model)
+        guess = ["red", "blue", "blue"]
+
+        sizes = solver.partition_sizes(guess)
+        scores = [pack_score(*count_bulls_and_cows(solver.codes.decode(index),
+                                                   guess), 3)
+                  for index in range(64)]
+        self.assertEqual(sizes, [scores.count(value)
+                                 for value in solver.score_values])
+        self.assertEqual(sum(sizes), 64)
+
+    def test_partition_counts(self):
+        model = GameModel(code_range=["red", "blue", "green", ""])
+        model.code = ["red", "red", "red"]
+        solver = Solver(model)
+        solver.add_feedback(["red", "blue", "blue"], 1, 0)
+        counts = solver.partition_counts()
+
+        for guess_index in range(64):
+            self.assertEqual([each[guess_index] for each in counts],
+                             solver.partition_sizes(solver.codes.decode(guess_index)))
+
+    def test_add_feedback(self):
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        solver = Solver(model)
+        solver.add_feedback(["black", "", "", "blue"], 2, 0)
+
+        self.assertEqual(solver.history, [(["black", "", "", "blue"], 2, 0)])
+        for index in solver.candidates:
+            self.assertEqual(count_bulls_and_cows(solver.codes.decode(index),
+                                                  ["black", "", "", "blue"]), (2, 0))
+        self.assertTrue(solver.codes.encode(model.code) in solver.candidates.codes)
+
+        solver.reset()
+        self.assertEqual(len(solver.candidates), 2401)
+        self.assertEqual(solver.history, [])
+
+    def test_new_game(self):
+        model = GameModel(code_range=["red", "blue", "green"])
+        model.create_code(5)
+        solver = Solver(model)
+        solver.add_feedback(["red", "red", "red", "red", "red"], 0, 0)
+
+        solver.new_game()
+        self.assertEqual(len(model.code), 5)
+        self.assertEqual(len(solver.candidates), 243)
+        self.assertEqual(solver.history, [])
+
+        solver.new_game(["red", "blue", "green", "red", "blue"])
+        self.assertEqual(model.code, ["red", "blue", "green", "red", "blue"])
+        self.assertEqual(model.score, 0)
+
+        # the tracked candidates of the model start over in every game
+        model = GameModel(code_range=["red", "blue", "green"],
+                          track_candidates=True)
+        model.create_code(4)
+        solver = Solver(model)
+        for code in [["red", "red", "blue", "green"],
+                     ["green", "blue", "blue", "red"]]:
+            solver.new_game(code)
+            self.assertEqual(len(model.candidates), 81)
+            self.assertEqual(solver.play(), "win")
+            self.assertEqual(list(model.candidates), [code])
+
+    def test_play(self):
+        model = GameModel()
+        model.code = ["black", "black", "", "blue"]
+        solver = Solver(model)
+
+        self.assertEqual(solver.play(), "win")
+        self.assertEqual(model.guess, ["black", "black", "", "blue"])
+        self.assertEqual(len(solver.candidates), 1)
+
+        model.code = ["", "", "", ""]
+        model.guess, model.score = [], 0
+        model.bull_num, model.cow_num = 0, 0
+        solver.reset()
+        model.max_guess = 2
+        self.assertEqual(solver.play(), "lost")
+
+    def test_minimax_first_guess(self):
+        # Knuth's first guess for 6 colors and 4 pegs is 1122
+        model = GameModel(code_range=["red", "blue", "green", "yellow",
+                                      "purple", "black"])
+        model.code = ["red", "red", "red", "red"]
+        solver = MinimaxSolver(model)
+
+        self.assertEqual(solver.next_guess(), ["red", "red", "blue", "blue"])
+        self.assertEqual(max(solver.partition_sizes(solver.first_guess)), 256)
+
+    def test_minimax_play(self):
+        # Knuth's strategy never needs more than 5 guesses for 6 colors
+        model = GameModel(code_range=["red", "blue", "green", "yellow",
+                                      "purple", "black"])
+        model.create_code()
+        solver = MinimaxSolver(model)
+        for index in range(0, 1296, 97):
+            model.code = solver.codes.decode(index)
+            model.guess, model.score = [], 0
+            model.bull_num, model.cow_num = 0, 0
+            solver.reset()
+
+            self.assertEqual(solver.play(), "win")
+            self.assertTrue(model.score <= 5)
+
+        # blank and duplicate colors of the default range
+        model2 = GameModel()
+        model2.code = ["", "black", "", "black"]
+        self.assertEqual(MinimaxSolver(model2).play(), "win")
+        self.assertTrue(model2.score <= MAX_GUESS)
+
+    def test_rate_guesses(self):
+        model = GameModel(code_range=["red", "blue"])
+        model.code = ["red", "red"]
+        # counts of two feedback values for three guesses
+        counts = [[4, 2, 3], [0, 2, 1]]
+
+        self.assertEqual(MinimaxSolver(model).rate_guesses(counts), [4, 2, 3])
+        self.assertEqual(ExpectedSizeSolver(model).rate_guesses(counts), [16, 8, 10])
+        ratings = EntropySolver(model).rate_guesses(counts)
+        self.assertAlmostEqual(ratings[0], 8.0)
+        self.assertAlmostEqual(ratings[1], 4.0)
+        self.assertTrue(ratings[1] < ratings[2] < ratings[0])
+        # the default rating is the largest partition
+        self.assertEqual(PartitionSolver(model).rate_guesses(counts), [4, 2, 3])
+
+    def test_entropy_first_guess(self):
+        # the most informative first guess for 6 colors is 1234
+        model = GameModel(code_range=["red", "blue", "green", "yellow",
+                                      "purple", "black"])
+        model.code = ["red", "red", "red", "red"]
+
+        self.assertEqual(EntropySolver(model).next_guess(),
+                         ["red", "blue", "green", "yellow"])
+
+    def test_expected_size_first_guess(self):
+        # Irving's first guess for 6 colors is 1123
+        model = GameModel(code_range=["red", "blue", "green", "yellow",
+                                      "purple", "black"])
+        model.code = ["red", "red", "red", "red"]
+
+        self.assertEqual(ExpectedSizeSolver(model).next_guess(),
+                         ["red", "red", "blue", "green"])
+
+    def test_symmetry(self):
+        model = GameModel(code_range=["red", "blue", "green", "yellow",
+                                      "purple", "black"])
+        model.code = ["red", "red", "red", "red"]
+        codes = range(0, 1296, 131)
+        symmetry = CodeSymmetry(full_code_array(model.code_range, 4))
+
+        # rating one guess of each class chooses the same guesses
+        for solver_class in [MinimaxSolver, EntropySolver, ExpectedSizeSolver]:
+            solver = solver_class(model)
+            solver.add_symmetry(symmetry)
+            self.assertTrue(solver.symmetry is symmetry)
+            self.assertEqual(len(solver.guess_classes()), 5)
+            self.assertEqual(evaluate_solver(solver, codes),
+                             evaluate_solver(solver_class(model), codes))
+
+        solver = MinimaxSolver(model)
+        solver.add_symmetry(symmetry)
+        self.assertEqual(solver.next_guess(), ["red", "red", "blue", "blue"])
+        # too few candidates left for a symmetry pass
+        solver.add_feedback(["red", "red", "blue", "blue"], 2, 2)
+        self.assertEqual(solver.guess_classes(), None)
+
+        self.assertRaises(TypeError, solver.add_symmetry, "a")
+        self.assertRaises(ValueError, solver.add_symmetry,
+                          CodeSymmetry(full_code_array(model.code_range, 3)))
+
+    def test_random_solver(self):
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        solver = RandomSolver(model)
+
+        self.assertEqual(solver.name, "Random Solver")
+        random.seed(0)
+        guesses = [solver.next_guess() for i in range(5)]
+        self.assertTrue(len(set(map(tuple, guesses))) > 1)
+        self.assertEqual(solver.first_guess, None)
+        for i in range(5):
+            solver.new_game()
+            self.assertEqual(solver.play(), "win")
+        solver.add_feedback(solver.next_guess(), 4, 0)
+        self.assertEqual(solver.next_guess(), solver.codes.decode(
+            solver.candidates.codes[0]))
+
+    def test_scripted_solver(self):
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        script = [["red", "red", "blue", "blue"], ["green", "", "", "black"]]
+        solver = ScriptedSolver(model, script)
+
+        self.assertEqual(solver.name, "Scripted Solver")
+        self.assertEqual(solver.play(), "win")
+        self.assertEqual(solver.history[0][0], script[0])
+        self.assertEqual(solver.history[1][0], script[1])
+        # the script is not changed by the games
+        self.assertEqual(script[0], ["red", "red", "blue", "blue"])
+
+        self.assertRaises(TypeError, ScriptedSolver, model, "a")
+        self.assertRaises(ValueError, ScriptedSolver, model, [["red"]])
+        self.assertRaises(ValueError, ScriptedSolver, model,
+                          [["red", "red", "red", "white"]])
+
+    def test_evaluate_solver(self):
+        model = GameModel(code_range=["red", "blue", "green"])
+        model.code = ["red", "red"]
+        distribution, lost_num = evaluate_solver(MinimaxSolver(model))
+
+        self.assertEqual(distribution, {1: 1, 2: 2, 3: 5, 4: 1})
+        self.assertEqual(lost_num, 0)
+
+        distribution2, lost_num2 = evaluate_solver(Solver(model), [0, 8])
+        self.assertEqual(distribution2, {1: 1, 3: 1})
+        self.assertEqual(lost_num2, 0)
+
+        model.max_guess = 2
+        distribution3, lost_num3 = evaluate_solver(Solver(model), [0, 8])
+        self.assertEqual(distribution3, {1: 1})
+        self.assertEqual(lost_num3, 1)
+
+        self.assertRaises(TypeError, evaluate_solver, model)
+
+    def test_compare_solvers(self):
+        model = GameModel(max_guess = 4, code_range = ["red", "blue", "green"])
+        model.code = ["red", "red"]
+        results = compare_solvers(model, [MinimaxSolver, EntropySolver,
+                                          ExpectedSizeSolver])
+
+        self.assertEqual([each[0] for each in results],
+                         ["Minimax Solver", "Entropy Solver",
+                          "Expected Size Solver"])
+        for name, average, worst, lost_num, max_guess in results:
+            self.assertTrue(1 <= average <= worst <= max_guess)
+            self.assertEqual(lost_num, 0)
+            self.assertEqual(max_guess, 4)
+
+        self.assertRaises(TypeError, compare_solvers, model, MinimaxSolver)
+
+    def test_str(self):
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        solver = MinimaxSolver(model)
+        msg = "Minimax Solver\tCandidates: 2401\tGuesses: 0"
+
+        self.assertEqual(solver.__str__(), msg)
+
+    def test_eq(self):
+        model = GameModel()
+        model.code = ["black", "black", "green", "blue"]
+        model2 = GameModel()
+        model2.code = ["black", "black", "green", "blue"]
+
+        self.assertTrue(Solver(model) == Solver(model))
+        self.assertFalse(Solver(model) == MinimaxSolver(model))
+        self.assertFalse(Solver(model) == Solver(model2))
+        self.assertFalse(Solver(model).__eq__("a"))
+
+
+class ParallelEvaluatorTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class ParallelEvaluator and the
+    functions count_shard, measure_speedup.
+    Methods: test_init, test_bad_init, test_partition_counts,
+             test_count_shard, test_solver_evaluator, test_measure_speedup,
+             test_str, test_eq
+    """
+
+    def new_solver(self):
+        model = GameModel(code_range = ["red", "blue", "green", ""])
+        model.code = ["red", "red", "red"]
+        solver = MinimaxSolver(model)
+        solver.add_feedback(["red", "blue", "blue"], 1, 0)
+        return solver
+
+    def test_init(self):
+        evaluator = ParallelEvaluator(2)
+
+        self.assertEqual(evaluator.name, "Parallel Evaluator")
+        self.assertEqual(evaluator.worker_num, 2)
+        self.assertTrue(evaluator.executor is not None)
+        evaluator.close()
+        self.assertEqual(evaluator.executor, None)
+        evaluator2 = ParallelEvaluator()
+        self.assertEqual(evaluator2.worker_num, os.cpu_count())
+        evaluator2.close()
+
+    def test_bad_init(self):
+        self.assertRaises(TypeError, ParallelEvaluator, "a")
+        self.assertRaises(ValueError, ParallelEvaluator, 0)
+
+    def test_partition_counts(self):
+        solver = self.new_solver()
+        evaluator = ParallelEvaluator(3)
+
+        self.assertEqual(evaluator.partition_counts(solver),
+                         solver.partition_counts())
+        self.assertEqual(evaluator.partition_counts(solver, [1, 5, 9, 63]),
+                         solver.partition_counts([1, 5, 9, 63]))
+        self.assertEqual(evaluator.partition_counts(solver, [7]),
+                         solver.partition_counts([7]))
+        self.assertRaises(TypeError, evaluator.partition_counts, "a")
+
+        evaluator.close()
+        self.assertRaises(ValueError, evaluator.partition_counts, solver)
+
+    def test_count_shard(self):
+        solver = self.new_solver()
+        evaluator = ParallelEvaluator(1)
+        evaluator.close()
+
+        # counting a shard in this process reads the same shared memory
+        counts = solver.partition_counts(range(10, 20))
+        candidates = array("Q", solver.candidates.codes).tobytes()
+        memory = shared_memory.SharedMemory(create=True, size=len(candidates))
+        try:
+            memory.buf[:len(candidates)] = candidates
+            self.assertEqual(count_shard((solver.codes.code_range, 3),
+                                         memory.name, len(solver.candidates),
+                                         range(10, 20)), counts)
+        finally:
+            memory.close()
+            memory.unlink()
+
+    def test_solver_evaluator(self):
+        solver = self.new_solver()
+        evaluator = ParallelEvaluator(2)
+        solver.add_evaluator(evaluator)
+
+        self.assertTrue(solver.evaluator is evaluator)
+        # every count goes to the workers with no lower limit
+        limit = mastermind_game_solver.PARALLEL_LIMIT
+        mastermind_game_solver.PARALLEL_LIMIT = 0
+        try:
+            self.assertEqual(solver.next_guess(), self.new_solver().next_guess())
+        finally:
+            mastermind_game_solver.PARALLEL_LIMIT = limit
+        solver.add_evaluator(None)
+        self.assertEqual(solver.evaluator, None)
+
+        evaluator.close()
+        self.assertRaises(ValueError, solver.add_evaluator, evaluator)
+
+    def test_measure_speedup(self):
+        solver = self.new_solver()
+        results = measure_speedup(solver, [1, 2])
+
+        self.assertEqual([each[0] for each in results], [1, 2])
+        for worker_num, seconds, speedup in results:
+            self.assertTrue(seconds > 0 and speedup > 0)
+        self.assertEqual(solver.evaluator, None)
+        self.assertRaises(TypeError, measure_speedup, solver, 2)
+
+    def test_str(self):
+        evaluator = ParallelEvaluator(2)
+        msg = "Parallel Evaluator\tWorkers: 2"
+
+        self.assertEqual(evaluator.__str__(), msg)
+        evaluator.close()
+
+    def test_eq(self):
+        evaluator, evaluator2 = ParallelEvaluator(2), ParallelEvaluator(2)
+        evaluator3 = ParallelEvaluator(1)
+
+        self.assertTrue(evaluator == evaluator2)
+        self.assertFalse(evaluator == evaluator3)
+        self.assertFalse(evaluator.__eq__("a"))
+        for each in [evaluator, evaluator2, evaluator3]:
+            each.close()
+
+
+class SimulatorTest(unittest.TestCase):
+    """
+    A TestCase class that test the functions of the game simulator.
+    Methods: test_create_player, test_play_game, test_play_games,
+             test_format_game, test_run_simulation, test_format_summary,
+             test_parse_script, test_parse_arguments, test_main
+    """
+
+    def test_create_player(self):
+        controller, solver = create_player(("minimax", 3, 8, (), None))
+
+        self.assertEqual(len(controller.model.code), 3)
+        self.assertEqual(controller.model.max_guess, 8)
+        self.assertTrue(solver.model is controller.model)
+        self.assertEqual(solver.name, "Minimax Solver")
+        controller2, solver2 = create_player(("scripted", 2, 10,
+                                              (("red", "blue"),), None))
+        self.assertEqual(solver2.script, [["red", "blue"]])
+
+        self.assertRaises(ValueError, create_player,
+                          ("cheating", 4, 10, (), None))
+
+    def test_play_game(self):
+        controller, solver = create_player(("random-consistent", 4, 10, (), None))
+        code, guess_num, status = play_game(controller, solver)
+
+        self.assertEqual(code, controller.model.code)
+        self.assertEqual(status, "win")
+        self.assertEqual(guess_num, controller.model.score)
+        self.assertEqual(controller.current_round, guess_num + 1)
+
+        controller2, solver2 = create_player(
+            ("scripted", 4, 1, (("red", "red", "red", "red"),), None))
+        code2, guess_num2, status2 = play_game(controller2, solver2)
+        self.assertEqual(guess_num2, 1)
+        self.assertEqual(status2, "win" if code2 == ["red", "red", "red", "red"]
+                         else "lost")
+
+    def test_play_games(self):
+        config = ("random-consistent", 3, 10, (), None)
+        games = play_games(config, 11, 0, 5)
+
+        self.assertEqual(len(games), 5)
+        for code, guess_num, status in games:
+            self.assertEqual(len(code), 3)
+            self.assertEqual(status, "win")
+        # the same games, however the run is split into chunks
+        self.assertEqual(play_games(config, 11, 0, 2) +
+                         play_games(config, 11, 2, 3), games)
+        self.assertNotEqual(play_games(config, 12, 0, 5), games)
+
+    def test_format_game(self):
+        self.assertEqual(format_game(3, [["red", "", "blue", ""], 5, "win"]),
+                         "3\tred,,blue,\t5\twin\n")
+
+    def test_run_simulation(self):
+        config = ("random-consistent", 4, 10, (), None)
+        with open("test_simulation.txt", "w") as outfile:
+            distribution, lost_num, seconds = run_simulation(config, 25, 2, 10,
+                                                             outfile)
+
+        self.assertEqual(sum(distribution.values()) + lost_num, 25)
+        self.assertTrue(seconds > 0)
+        with open("test_simulation.txt", "r") as infile:
+            lines = infile.readlines()
+        self.assertEqual(len(lines), 25)
+        self.assertEqual([line.split("\t")[0] for line in lines],
+                         [str(i) for i in range(1, 26)])
+
+        # a seeded run is the same for any number of workers
+        for worker_num, filename in [(1, "test_simulation3.txt"),
+                                     (3, "test_simulation4.txt")]:
+            with open(filename, "w") as outfile:
+                run_simulation(config, 40, worker_num, 7, outfile, seed = 5)
+        with open("test_simulation3.txt", "r") as infile3, \
+                open("test_simulation4.txt", "r") as infile4:
+            self.assertEqual(infile3.read(), infile4.read())
+
+        self.assertEqual(run_simulation(config, 0, 1)[:2], ({}, 0))
+        self.assertRaises(TypeError, run_simulation, config, "a")
+        self.assertRaises(ValueError, run_simulation, config, 10, 1, 0)
+
+    def test_format_summary(self):
+        summary = format_summary({4: 3, 5: 1}, 1, 2.0)
+
+        self.assertEqual(summary,
+                         "Games: 5\tWon: 4\tLost: 1\n"
+                         "Average guesses: 4.2500\tMost guesses: 5\n"
+                         "4 guesses: 3\t60.00%\n"
+                         "5 guesses: 1\t20.00%\n"
+                         "Games/sec: 2.5\n")
+        self.assertEqual(format_summary({}, 2, 1.0),
+                         "Games: 2\tWon: 0\tLost: 2\nGames/sec: 2.0\n")
+
+    def test_parse_script(self):
+        self.assertEqual(parse_script("red,,blue,;black,black,red,red"),
+                         (("red", "", "blue", ""), ("black", "black", "red", "red")))
+        self.assertEqual(parse_script(""), ())
+
+    def test_parse_arguments(self):
+        arguments = parse_arguments(["-n", "50", "-s", "entropy", "-w", "3"])
+
+        self.assertEqual(arguments.games, 50)
+        self.assertEqual(arguments.strategy, "entropy")
+        self.assertEqual(arguments.workers, 3)
+        self.assertEqual(arguments.length, 4)
+        self.assertEqual(arguments.max_guess, MAX_GUESS)
+        self.assertEqual(arguments.output, "-")
+        self.assertEqual(arguments.book, None)
+        self.assertEqual(arguments.seed, None)
+        self.assertEqual(parse_arguments(["--seed", "9"]).seed, 9)
+        self.assertEqual(parse_arguments(["--script", "red,,blue,red"]).script,
+                         "red,,blue,red")
+
+        # a bad scripted guess is reported as a bad argument
+        for script, message in [("red,pink,blue,red", "invalid color: 'pink'"),
+                                ("red,blue", "each guess must have 4 colors")]:
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                self.assertRaises(SystemExit, parse_arguments,
+                                  ["--script", script])
+            self.assertIn("argument --script: " + message, stderr.getvalue())
+
+    def test_main(self):
+        simulator_main(["-n", "12", "-w", "2", "--length", "3",
+                        "-o", "test_simulation2.txt"])
+
+        with open("test_simulation2.txt", "r") as infile:
+            lines = infile.readlines()
+        self.assertEqual(len(lines), 12)
+        for line in lines:
+            game_id, code, guess_num, status = line.strip("\n").split("\t")
+            self.assertEqual(len(code.split(",")), 3)
+            self.assertEqual(status, "win")
+
+
+class OpeningBookTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class OpeningBook and the
+    functions build_opening_book, load_opening_book.
+    Methods: test_init, test_bad_init, test_find, test_build_opening_book,
+             test_load_opening_book, test_solver_book, test_str, test_eq
+    """
+
+    def new_solver(self, code_range = ["red", "blue", "green", ""]):
+        model = GameModel(code_range = code_range)
+        model.code = ["red", "red", "red"]
+        return MinimaxSolver(model)
+
+    def test_init(self):
+        solver = self.new_solver()
+        build_opening_book(solver, 2, "test_opening_book.bin")
+        book = OpeningBook("test_opening_book.bin")
+
+        self.assertEqual(book.name, "Opening Book")
+        self.assertEqual(book.length, 3)
+        self.assertEqual(book.depth, 2)
+        self.assertEqual(book.digest, solver.get_digest())
+        self.assertTrue(len(book) > 1)
+        book.close()
+
+    def test_bad_init(self):
+        with open("test_opening_book_bad.bin", "wb") as outfile:
+            outfile.write(b"MMBK")
+
+        self.assertRaises(TypeError, OpeningBook, 123)
+        self.assertRaises(FileNotFoundError, OpeningBook, "test_no_book.bin")
+        self.assertRaises(ValueError, OpeningBook, "test_opening_book_bad.bin")
+
+    def test_find(self):
+        solver = self.new_solver()
+        build_opening_book(solver, 2, "test_opening_book.bin")
+        book = OpeningBook("test_opening_book.bin")
+        first_guess = solver.choose_guess()
+
+        self.assertEqual(book.find([]), solver.codes.encode(first_guess))
+        for bull_num, cow_num in [(0, 0), (1, 1), (0, 2)]:
+            solver.reset()
+            solver.add_feedback(first_guess, bull_num, cow_num)
+            self.assertEqual(book.find([(bull_num, cow_num)]),
+                             solver.codes.encode(solver.next_guess()))
+        # a win or a path deeper than the book
+        self.assertEqual(book.find([(3, 0)]), None)
+        self.assertEqual(book.find([(0, 0), (0, 0)]), None)
+        book.close()
+
+    def test_build_opening_book(self):
+        solver = self.new_solver()
+        build_opening_book(solver, 1, "test_opening_book.bin")
+        book = OpeningBook("test_opening_book.bin")
+
+        self.assertEqual(len(book), 1)
+        self.assertEqual(len(solver.candidates), 64)
+        book.close()
+
+        self.assertRaises(TypeError, build_opening_book, "a")
+        self.assertRaises(ValueError, build_opening_book, solver, 0,
+                          "test_opening_book.bin")
+        self.assertRaises(ValueError, build_opening_book, solver, 4,
+                          "test_opening_book.bin")
+
+    def test_load_opening_book(self):
+        solver = self.new_solver()
+        book = load_opening_book(solver, 2, "test_opening_book2.bin")
+        self.assertEqual(book.digest, solver.get_digest())
+        book.close()
+
+        # the same configuration loads the saved book
+        modified_time = os.path.getmtime("test_opening_book2.bin")
+        book = load_opening_book(solver, 1, "test_opening_book2.bin")
+        self.assertEqual(book.depth, 2)
+        self.assertEqual(os.path.getmtime("test_opening_book2.bin"), modified_time)
+        book.close()
+
+        # a new configuration builds a new book
+        solver2 = self.new_solver(["red", "blue", "green"])
+        book2 = load_opening_book(solver2, 2, "test_opening_book2.bin")
+        self.assertEqual(book2.digest, solver2.get_digest())
+        self.assertFalse(book2.digest == solver.get_digest())
+        book2.close()
+
+    def test_solver_book(self):
+        solver = self.new_solver()
+        solver2 = self.new_solver()
+        book = load_opening_book(solver, 2, "test_opening_book3.bin")
+        solver.add_book(book)
+
+        for index in range(0, 64, 5):
+            solver.new_game(solver.codes.decode(index))
+            solver.play()
+            solver2.new_game(solver.codes.decode(index))
+            solver2.play()
+            self.assertEqual(solver.history, solver2.history)
+
+        self.assertRaises(ValueError, self.new_solver(["red", "blue"]).add_book,
+                          book)
+        book.close()
+
+    def test_str(self):
+        build_opening_book(self.new_solver(), 1, "test_opening_book.bin")
+        book = OpeningBook("test_opening_book.bin")
+
+        self.assertEqual(book.__str__(), "Opening Book\tDepth: 1\tEntries: 1")
+        book.close()
+
+    def test_eq(self):
+        build_opening_book(self.new_solver(), 1, "test_opening_book.bin")
+        build_opening_book(self.new_solver(), 1, "test_opening_book4.bin")
+        book = OpeningBook("test_opening_book.bin")
+        book2 = OpeningBook("test_opening_book4.bin")
+
+        self.assertTrue(book == book2)
+        self.assertFalse(book.__eq__("a"))
+        book.close()
+        book2.close()
+
+
+class PointTest(unittest.TestCase):
+    """
+    A TestCase class that test the methods in class Point.
+    Methods: test_init, test_get_distance, test_str, test_eq
+    """
+
+    def test_init(self):
+        point = Point()
+        point2 = Point(1, 2)
+        point3 = Point(0.5, 3.5)
+        point4 = Point(-10, 0.5)
+
+        self.assertEqual(point.x, 0)
+        self.assertEqual(point.y, 0)
+        self.assertEqual(point2.x, 1)
+        self.assertEqual(point2.y, 2)
+        self.assertEqual(point3.x, 0.5)
+        self.assertEqual(point3.y, 3.5)
+        self.assertEqual(point4.x, -10)
+        self.assertEqual(point4.y, 0.5)
+
+        self.assertRaises(TypeError, Point, "a", 1)
+        self.assertRaises(TypeError, Point, 1, [])
+
+    def test_get_distance(self):
+        point = Point()
+        point2 = Point(1, 2)
+        point3 = Point(0.5, 3.5)
+        point4 = Point(-10, 0.5)
+
+        self.assertAlmostEqual(point.get_distance(point2), 2.23606798)
+        self.assertAlmostEqual(point2.get_distance(point3), 1.58113883)
+        self.assertAlmostEqual(point.get_distance(point4), 10.01249220)
+
+    def test_str(self):
+        point = Point()
         point4 = Point(-10, 0.5)
 
         self.assertEqual(point.__str__(), "(0, 0)")
@@ -458,7 +4223,10 @@ class PointTest(unittest.TestCase):
 class FunctionTest(unittest.TestCase):
     """
     A TestCase class that test the function count_bulls_and_cows,
-    validate_position. 
+    validate_position, pack_score, unpack_score, count_bulls_and_cows_histogram,
+    count_bulls_and_cows_batch, get_score_table, score_guess, game_seed,
+    read_records, write_records, get_game_config, format_game_config,
+    get_file_fingerprint, save_records.
     """
 
     def test_count_bulls_and_cows(self):
@@ -486,6 +4254,149 @@ class FunctionTest(unittest.TestCase):
         self.assertRaises(TypeError, count_bulls_and_cows, 1, "a")
         self.assertRaises(ValueError, count_bulls_and_cows, [], ["red"])
 
+    def test_pack_and_unpack_score(self):
+        for bull_num in range(5):
+            for cow_num in range(5 - bull_num):
+                packed = pack_score(bull_num, cow_num, 4)
+                self.assertEqual(unpack_score(packed, 4), (bull_num, cow_num))
+        self.assertEqual(pack_score(4, 0, 4), 20)
+
+    def test_count_bulls_and_cows_histogram(self):
+        code4 = ["black", "black", "", "blue"]
+        guess3 = ["red", "black", "black", ""]
+        guess4 = ["", "blue", "black", "black"]
+
+        self.assertEqual(count_bulls_and_cows_histogram(code4, guess3), (1, 2))
+        self.assertEqual(count_bulls_and_cows_histogram(code4, guess4), (0, 4))
+        self.assertEqual(count_bulls_and_cows_histogram([], []), (0, 0))
+
+        # differential test against count_bulls_and_cows
+        # on long codes and large palettes, including few-color palettes
+        random.seed(4)
+        for length, color_num in [(4, 7), (8, 10), (12, 2), (20, 30), (20, 3)]:
+            code_range = [str(i) for i in range(color_num)]
+            for i in range(300):
+                secret_code = random.choices(code_range, k=length)
+                guess = random.choices(code_range, k=length)
+                self.assertEqual(count_bulls_and_cows_histogram(secret_code, guess),
+                                 count_bulls_and_cows(secret_code, guess))
+
+        self.assertRaises(TypeError, count_bulls_and_cows_histogram, 1, "a")
+        self.assertRaises(ValueError, count_bulls_and_cows_histogram, [], ["red"])
+
+    def test_count_bulls_and_cows_batch(self):
+        table = get_score_table(model.code_range, 4)
+        secret_codes = [["black", "black", "", "blue"], ["red", "red", "red", "red"],
+                        ["blue", "green", "yellow", "purple"]]
+        guess = ["red", "black", "black", ""]
+        expected = [(1, 2), (1, 0), (0, 0)]
+
+        encoded = [table.encode(each) for each in secret_codes]
+        self.assertEqual(count_bulls_and_cows_batch(encoded, guess), expected)
+        self.assertEqual(count_bulls_and_cows_batch(table.codes.take(encoded),
+                                                    guess), expected)
+        self.assertEqual(count_bulls_and_cows_batch([], guess), [])
+
+        self.assertRaises(TypeError, count_bulls_and_cows_batch, [0], "a")
+
+    def test_get_score_table(self):
+        table = get_score_table(model.code_range, 4)
+
+        self.assertTrue(table is get_score_table(list(model.code_range), 4))
+        self.assertEqual(table.size, 2401)
+        self.assertEqual(get_score_table(model.code_range, 5), None)
+        self.assertEqual(get_score_table([], 4), None)
+
+        # only the CACHE_SIZE most recently used configurations stay cached
+        for length in range(1, CACHE_SIZE + 1):
+            get_score_table(["a", "b"], length)
+        self.assertFalse(table is get_score_table(model.code_range, 4))
+        table = get_score_table(model.code_range, 4)
+        get_score_table(["a", "b", "c"], 1)
+        self.assertTrue(table is get_score_table(model.code_range, 4))
+
+    def test_score_guess(self):
+        code4 = ["black", "black", "", "blue"]
+        guess3 = ["red", "black", "black", ""]
+
+        self.assertEqual(score_guess(code4, guess3), (1, 2))
+        # colors out of the code range fall back to count_bulls_and_cows
+        self.assertEqual(score_guess(["a", "b"], ["b", "a"]), (0, 2))
+        self.assertEqual(score_guess(code4, guess3, ["red"]), (1, 2))
+        # long codes of a large palette are scored with histograms
+        code_range = [str(i) for i in range(30)]
+        self.assertEqual(score_guess(["1"] * 10 + ["2"] * 10,
+                                     ["2"] * 5 + ["1"] * 15, code_range), (5, 10))
+
+        self.assertRaises(TypeError, score_guess, 1, "a")
+        self.assertRaises(ValueError, score_guess, code4, ["red"])
+
+    def test_game_seed(self):
+        seeds = [game_seed(7, i) for i in range(100)]
+
+        self.assertEqual(seeds, [game_seed(7, i) for i in range(100)])
+        self.assertEqual(len(set(seeds)), 100)
+        self.assertNotEqual(game_seed(7, 0), game_seed(8, 0))
+        for seed in seeds:
+            self.assertTrue(0 <= seed < 2 ** 64)
+
+        self.assertRaises(TypeError, game_seed, "7", 0)
+
+    def test_read_records(self):
+        self.assertEqual(read_records(""), ([], True))
+        self.assertEqual(read_records("aaa\n3\nbbb\n1\n"),
+                         ([["aaa", "3"], ["bbb", "1"]], True))
+        # an incomplete last record is dropped
+        self.assertEqual(read_records("aaa\n3\nbbb\n1"), ([["aaa", "3"]], False))
+        self.assertEqual(read_records("aaa\n3\nbbb\n"), ([["aaa", "3"]], False))
+        self.assertEqual(read_records("aaa\nx\n"), ([], False))
+
+    def test_get_game_config(self):
+        model = GameModel(max_guess = 8)
+        model.create_code(5)
+        self.assertEqual(get_game_config(model),
+                         "[red,blue,green,yellow,purple,black,-]x5/8")
+        # palettes of the same size are other configurations
+        model2 = GameModel(max_guess = 8, code_range = ["white", "red", "blue",
+                                                        "green", "yellow",
+                                                        "purple", "black"])
+        model2.create_code(5)
+        self.assertNotEqual(get_game_config(model2), get_game_config(model))
+
+        self.assertRaises(TypeError, get_game_config, "a")
+
+    def test_format_game_config(self):
+        self.assertEqual(format_game_config(["", "red", "blue"], 4, 10),
+                         "[-,red,blue]x4/10")
+        model = GameModel(max_guess = 8, code_range = ["", "red", "blue"])
+        model.create_code(5)
+        self.assertEqual(format_game_config(["", "red", "blue"], 5, 8),
+                         get_game_config(model))
+
+    def test_get_file_fingerprint(self):
+        if os.path.exists("test_fingerprint.txt"):
+            os.remove("test_fingerprint.txt")
+        self.assertEqual(get_file_fingerprint(["test_fingerprint.txt"]), (None,))
+
+        write_atomic("test_fingerprint.txt", "aaa\n3\n")
+        fingerprint = get_file_fingerprint(["test_fingerprint.txt"])
+        status = os.stat("test_fingerprint.txt")
+        self.assertEqual(fingerprint, ((status.st_mtime_ns, 6),))
+        write_atomic("test_fingerprint.txt", "aaa\n3\nbbb\n5\n")
+        self.assertNotEqual(get_file_fingerprint(["test_fingerprint.txt"]),
+                            fingerprint)
+
+    def test_save_records(self):
+        fingerprint = save_records("test_fingerprint.txt", [["aaa", "3"]])
+        self.assertEqual(fingerprint, get_file_fingerprint(["test_fingerprint.txt"]))
+        with open("test_fingerprint.txt", "r") as infile:
+            self.assertEqual(infile.read(), "aaa\n3\n")
+
+    def test_write_records(self):
+        records = [["aaa", "3"], ["bbb", "1"]]
+        self.assertEqual(write_records(records), "aaa\n3\nbbb\n1\n")
+        self.assertEqual(read_records(write_records(records)), (records, True))
+
     def test_validate_position(self):
         position1 = (0, 0)
         position2 = (1.5, 2.5)